@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+"""
+AIPMスクリプトの共通パッケージ
+
+- aipm.paths: ルートディレクトリ（AIPM_ROOT）の解決
+- aipm.lazy: 重いモジュールを初回の属性アクセスまで読み込まない lazy_import
+- aipm.cli: 各スクリプトをサブコマンドとして同じプロセスで実行する aipm コマンド
+  （pip install . でインストール、または python -m aipm）
+
+エディタのフックなどから頻繁に起動されるため、このパッケージ自体は何も import しません。
+"""
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""
+python -m aipm（または python scripts/aipm）で aipm コマンドを実行
+"""
+
+import os
+import sys
+
+if not __package__:
+    # ディレクトリを直接実行した場合はパッケージの親（scripts）を検索パスに追加
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aipm.cli import main
+
+
+sys.exit(main())
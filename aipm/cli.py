@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+aipm コマンド
+
+各スクリプトを1つのコマンドのサブコマンドとして同じプロセスで実行します。
+
+    aipm extract          ストーリーとルーチンタスクを抽出（extract_tasks.py）
+    aipm daily            日次タスクを生成（generate_daily_tasks.py、抽出は同じプロセス内で実行）
+    aipm merge-calendar   カレンダー予定を日次タスクにマージ（merge_calendar_tasks.py）
+    aipm morning          daily → merge-calendar を続けて実行
+    aipm prefetch-calendar  N日分のカレンダー予定を先読み（calendar_prefetch.py）
+    aipm history          日次タスクの完了履歴を集計（task_history.py）
+    aipm validate         バックログ/ルーチンYAMLを検証（validate_yaml_batch.py）
+    aipm sync             Flow→Stock同期（flow_to_stock.py）
+
+引数は各スクリプトと同じです。daily / morning はサブプロセスと一時ファイルを使わずに
+抽出結果をそのまま受け渡します（--subprocess で従来どおり extract_tasks.py を別プロセスで実行）。
+"""
+
+import os
+import sys
+import argparse
+
+# インストールせずに python -m aipm / python scripts/aipm で実行した場合も各スクリプトを読み込めるようにする
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import phase_timer
+
+
+def run_extract(args):
+    import extract_tasks
+    return extract_tasks.extract(args)
+
+
+def run_daily(args):
+    import generate_daily_tasks
+    return generate_daily_tasks.generate(args)
+
+
+def run_merge_calendar(args):
+    import merge_calendar_tasks
+    return merge_calendar_tasks.merge(args)
+
+
+def run_morning(args):
+    """
+    日次タスクを生成し、成功した場合は同じ対象日・出力ファイルにカレンダー予定をマージする
+    """
+    import generate_daily_tasks
+    import merge_calendar_tasks
+    exit_code = generate_daily_tasks.generate(args)
+    if exit_code != 0:
+        return exit_code
+    return merge_calendar_tasks.merge(args)
+
+
+def run_prefetch_calendar(args):
+    import calendar_prefetch
+    return calendar_prefetch.prefetch(args)
+
+
+def run_history(args):
+    import task_history
+    return task_history.run(args)
+
+
+def run_validate(args):
+    import validate_yaml_batch
+    return validate_yaml_batch.run(args)
+
+
+def run_sync(args):
+    import flow_to_stock
+    flow_to_stock.check_arguments(args.parser, args)
+    # インストールした場合はスクリプトの親ディレクトリがルートにならないため、AIPM_ROOT を優先する
+    if not args.root and os.environ.get('AIPM_ROOT'):
+        args.root = os.environ['AIPM_ROOT']
+    return flow_to_stock.sync(args)
+
+
+def add_extract_arguments(parser):
+    import extract_tasks
+    extract_tasks.add_arguments(parser)
+
+
+def add_daily_arguments(parser):
+    import generate_daily_tasks
+    generate_daily_tasks.add_arguments(parser)
+    parser.set_defaults(in_process=True)
+    parser.add_argument('--subprocess', dest='in_process', action='store_false',
+                        help='extract_tasks.pyを別プロセスで実行する (スクリプト単体と同じ動作)')
+
+
+def add_morning_arguments(parser):
+    """
+    日次タスク生成の引数に、カレンダーの取得元の引数を加える（--date / --output / --root は共通）
+    """
+    import merge_calendar_tasks
+    add_daily_arguments(parser)
+    merge_calendar_tasks.add_source_arguments(parser)
+
+
+def add_merge_calendar_arguments(parser):
+    import merge_calendar_tasks
+    merge_calendar_tasks.add_arguments(parser)
+
+
+def add_prefetch_calendar_arguments(parser):
+    import calendar_prefetch
+    calendar_prefetch.add_arguments(parser)
+
+
+def add_history_arguments(parser):
+    import task_history
+    task_history.add_arguments(parser)
+
+
+def add_validate_arguments(parser):
+    import validate_yaml_batch
+    validate_yaml_batch.add_arguments(parser)
+
+
+def add_sync_arguments(parser):
+    import flow_to_stock
+    flow_to_stock.add_arguments(parser)
+
+
+# (サブコマンド名, ヘルプ, 引数の追加, 実行関数, メトリクスのジョブ名)
+COMMANDS = (
+    ('extract', 'バックログとルーチンからタスクを抽出', add_extract_arguments, run_extract, "extract_tasks"),
+    ('daily', '日次タスクを生成', add_daily_arguments, run_daily, "generate_daily_tasks"),
+    ('merge-calendar', 'カレンダー予定を日次タスクにマージ', add_merge_calendar_arguments,
+     run_merge_calendar, "merge_calendar_tasks"),
+    ('morning', '日次タスクの生成とカレンダー予定のマージを続けて実行', add_morning_arguments, run_morning, "morning"),
+    ('prefetch-calendar', 'N日分のカレンダー予定を先読みして日ごとに保存', add_prefetch_calendar_arguments,
+     run_prefetch_calendar, "calendar_prefetch"),
+    ('history', '日次タスクの完了日・連続実施・計画と実績を集計', add_history_arguments, run_history, "task_history"),
+    ('validate', 'バックログ/ルーチンYAMLをまとめて検証', add_validate_arguments, run_validate, "validate_yaml_batch"),
+    ('sync', 'Flowの最新文書をStockへ同期', add_sync_arguments, run_sync, "flow_to_stock"),
+)
+
+
+def build_parser(argv=None):
+    """
+    aipm の引数パーサーを作成
+
+    起動を速くするため、引数を追加する（＝スクリプトを読み込む）のは argv で指定された
+    サブコマンドだけにする
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    selected = next((arg for arg in argv if not arg.startswith('-')), None)
+
+    parser = argparse.ArgumentParser(prog='aipm', description='AIPMのタスク抽出・日次タスク生成・検証・同期を行うコマンド')
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    subparsers.required = True
+    for name, help_text, add_arguments, func, job in COMMANDS:
+        subparser = subparsers.add_parser(name, help=help_text, description=help_text)
+        if name == selected:
+            add_arguments(subparser)
+        subparser.set_defaults(func=func, job=job, parser=subparser)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser(argv)
+    args = parser.parse_args(argv)
+
+    with phase_timer.session(args, args.job):
+        return phase_timer.record_exit_code(args.func(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
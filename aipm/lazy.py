@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+モジュールの遅延読み込み
+
+    yaml = lazy_import("yaml")
+
+のように書くと、yaml.safe_load などの属性に最初にアクセスした時点で読み込まれます。
+--help や小さな処理では使われないモジュール（yaml, json, subprocess, sqlite3 など）の
+読み込み時間を起動時に払わずに済みます。
+
+Python 3.11以前の LazyLoader はスレッドセーフではないため、ワーカースレッドから
+初めて参照される可能性があるモジュール（flow_to_stock / sync_engine など）では
+関数内の import を使います。
+"""
+
+import sys
+import importlib.util
+
+
+def lazy_import(name):
+    """
+    nameのモジュールを遅延読み込みするモジュールオブジェクトを返す
+
+    既に読み込まれている場合はそのまま返し、見つからない場合は通常の import と同じく
+    ModuleNotFoundError を送出する
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
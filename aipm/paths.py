@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+ルートディレクトリの解決
+"""
+
+import os
+import sys
+
+
+DEFAULT_ROOT_DIR = "~/aipm_v3"
+
+
+def get_root_dir(stream=None):
+    """
+    環境変数またはデフォルト値からルートディレクトリを取得
+
+    AIPM_ROOT が設定されていない場合はデフォルトパスを使い、その旨を stream
+    （デフォルト: 標準出力）に出力する
+    """
+    # 環境変数 AIPM_ROOT が設定されていれば使用
+    root_dir = os.environ.get('AIPM_ROOT')
+
+    # 環境変数が設定されていない場合はデフォルトパスを使用
+    if not root_dir:
+        root_dir = os.path.expanduser(DEFAULT_ROOT_DIR)
+        print(f"環境変数 AIPM_ROOT が設定されていません。デフォルトパス {root_dir} を使用します。",
+              file=stream or sys.stdout)
+
+    return root_dir
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ベンチマーク用の合成 AIPM_ROOT ツリー生成スクリプト
+
+1. Stock/programs/<プログラム>/projects/<プロジェクト>/ に backlog.yaml と routines.yaml を作成
+   （エピック・ストーリー・スプリント数は指定可能、スプリントの1つは基準日を含む）
+   内容は validate_backlog_yaml.py / validate_routines_yaml.py の検証を通る形式で、
+   ID はツリー全体で一意（US-PPPNNNN など、PPP はプロジェクトの通し番号）
+2. Flow/YYYYMM/YYYY-MM-DD/ に calendar_events.json と daily_tasks.md を作成
+3. Flow/Private/YYYY-MM-DD/<プロジェクト>/ に flow_to_stock 用のプロジェクト文書とバックログを作成
+
+同じ引数とシードからは常に同じツリーが生成されます。
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+from datetime import date, datetime, timedelta
+
+import yaml
+
+
+SCALES = {
+    'small': {
+        'programs': 1, 'projects_per_program': 2, 'epics': 3, 'stories_per_epic': 5, 'sprints': 4,
+        'routines': 5, 'flow_days': 7, 'calendar_events': 5, 'flow_stories': 10
+    },
+    'medium': {
+        'programs': 3, 'projects_per_program': 5, 'epics': 8, 'stories_per_epic': 15, 'sprints': 8,
+        'routines': 15, 'flow_days': 30, 'calendar_events': 12, 'flow_stories': 50
+    },
+    'large': {
+        'programs': 8, 'projects_per_program': 10, 'epics': 15, 'stories_per_epic': 25, 'sprints': 12,
+        'routines': 30, 'flow_days': 90, 'calendar_events': 20, 'flow_stories': 200
+    }
+}
+
+PRIORITIES = ("high", "medium", "low")
+STORY_STATUSES = ("new", "planned", "in_progress", "blocked", "completed")
+FREQUENCIES = ("daily", "weekly", "monthly")
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+ASSIGNEES = ("宮田", "佐藤", "鈴木", "田中")
+# ルーチンタスクの estimate は分単位の正の整数（scheduler.py の routine_estimate_minutes: 1）
+ROUTINE_ESTIMATES = (5, 15, 30, 60)
+FLOW_DOCUMENTS = (
+    "project_charter.md", "stakeholder_register.md", "wbs.md", "risk_plan.md",
+    "lessons_learned.md", "product_backlog.md", "draft_release_roadmap.md"
+)
+
+
+def build_sprints(project_id, sprint_count, base_date):
+    """
+    基準日を含むスプリントが1つできるように、2週間ごとのスプリントを作成
+    """
+    first_start = base_date - timedelta(days=14 * (sprint_count // 2))
+    sprints = []
+    for n in range(sprint_count):
+        start = first_start + timedelta(days=14 * n)
+        end = start + timedelta(days=13)
+        if end < base_date:
+            status = "completed"
+        elif start <= base_date:
+            status = "in_progress"
+        else:
+            status = "planned"
+        sprints.append({
+            'sprint_id': f"S{n + 1}",
+            'name': f"Sprint {n + 1}",
+            'start_date': start.isoformat(),
+            'end_date': end.isoformat(),
+            'status': status,
+            'goal': f"{project_id} スプリント {n + 1} のゴール"
+        })
+    return sprints
+
+
+def build_backlog(rng, program_id, project_id, project_number, scale, base_date):
+    """
+    backlog.yaml の内容を作成
+    """
+    sprints = build_sprints(project_id, scale['sprints'], base_date)
+    epics = []
+    story_ids = []
+    for e in range(scale['epics']):
+        epic_id = f"EP-{project_number:03d}{e + 1:03d}"
+        stories = []
+        for s in range(scale['stories_per_epic']):
+            story_id = f"US-{project_number:03d}{e * scale['stories_per_epic'] + s + 1:04d}"
+            sprint_id = rng.choice(sprints)['sprint_id']
+            estimate = rng.choice((1, 2, 3, 5, 8))
+            story = {
+                'story_id': story_id,
+                'title': f"ストーリー {e + 1}-{s + 1}",
+                'description': f"{project_id} のエピック {e + 1} に属するストーリー {s + 1} の説明です。" * 2,
+                'acceptance_criteria': [f"受け入れ条件 {n + 1}" for n in range(rng.randint(1, 4))],
+                'priority': rng.choice(PRIORITIES),
+                'status': rng.choice(STORY_STATUSES),
+                'sprint_id': sprint_id,
+                'sprint': sprint_id,
+                'estimate': estimate,
+                'story_points': estimate,
+                'assignee': rng.choice(ASSIGNEES),
+                'labels': rng.sample(["frontend", "backend", "infra", "docs", "research"], rng.randint(0, 2))
+            }
+            if story_ids and rng.random() < 0.3:
+                story['dependencies'] = rng.sample(story_ids[-20:], min(len(story_ids[-20:]), rng.randint(1, 2)))
+            stories.append(story)
+            story_ids.append(story_id)
+        epics.append({
+            'epic_id': epic_id,
+            'title': f"エピック {e + 1}",
+            'description': f"{project_id} のエピック {e + 1}",
+            'priority': rng.choice(PRIORITIES),
+            'status': rng.choice(("new", "in_progress", "completed")),
+            'stories': stories
+        })
+
+    return {
+        'project': {'id': project_id, 'name': project_id, 'program': program_id,
+                    'description': f"{program_id} のプロジェクト {project_id}"},
+        'sprints': sprints,
+        'epics': epics
+    }
+
+
+def build_routines(rng, project_id, project_number, routine_count):
+    """
+    routines.yaml の内容を作成
+    """
+    routines = []
+    for n in range(routine_count):
+        frequency = rng.choice(FREQUENCIES)
+        routine_number = f"{project_number:03d}{n + 1:03d}"
+        routine = {
+            'routine_id': f"RT-{routine_number}",
+            'title': f"ルーチン {n + 1}",
+            'frequency': frequency,
+            'priority': rng.choice(PRIORITIES),
+            'tasks': [
+                {
+                    'task_id': f"T-{routine_number}{t + 1}",
+                    'title': f"ルーチン {n + 1} のタスク {t + 1}",
+                    'description': "定例作業",
+                    'priority': rng.choice(PRIORITIES),
+                    'estimate': rng.choice(ROUTINE_ESTIMATES),
+                    'assignee': rng.choice(ASSIGNEES)
+                }
+                for t in range(rng.randint(1, 3))
+            ]
+        }
+        if frequency == "weekly":
+            routine['day_of_week'] = rng.choice(WEEKDAYS)
+        elif frequency == "monthly":
+            routine['day_of_month'] = rng.randint(1, 28)
+        routines.append(routine)
+
+    return {'project': {'id': project_id, 'name': project_id}, 'routines': routines}
+
+
+def build_calendar_events(rng, day, event_count):
+    """
+    calendar_events.json の内容を作成（重なりや終日予定を含む）
+    """
+    events = []
+    for n in range(event_count):
+        if rng.random() < 0.1:
+            events.append({'title': f"終日予定 {n + 1}", 'startTime': "", 'endTime': ""})
+            continue
+        start = datetime.combine(day, datetime.min.time()) + timedelta(minutes=rng.randrange(8 * 60, 19 * 60, 15))
+        end = start + timedelta(minutes=rng.choice((15, 30, 60, 90)))
+        events.append({
+            'title': f"会議 {n + 1}",
+            'startTime': start.strftime("%Y-%m-%dT%H:%M:%S+09:00"),
+            'endTime': end.strftime("%Y-%m-%dT%H:%M:%S+09:00")
+        })
+    events.sort(key=lambda event: event['startTime'])
+    return events
+
+
+def build_daily_tasks(day):
+    """
+    マージ対象となる daily_tasks.md の内容を作成
+    """
+    return (
+        f"# 日次タスク: {day.isoformat()}\n\n"
+        "## 📋 今日の予定\n"
+        "- [ ] 09:00-09:30: 古い予定\n"
+        "- [ ] メールの確認\n\n"
+        "## 🎯 スプリントタスク\n\n"
+        "- [ ] ストーリー\n\n"
+        "## 📝 備考・メモ\n\n"
+    )
+
+
+def write_yaml(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+
+
+def write_text(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def generate_root(root_dir, scale, base_date=None, seed=0):
+    """
+    合成 AIPM_ROOT ツリーを作成し、作成した件数を返す
+    """
+    if base_date is None:
+        base_date = date.today()
+    rng = random.Random(seed)
+    counts = {'backlog_files': 0, 'routines_files': 0, 'stories': 0, 'routines': 0,
+              'flow_days': 0, 'calendar_events': 0, 'flow_files': 0}
+
+    projects = []
+    for p in range(scale['programs']):
+        program_id = f"P{p + 1:02d}"
+        for j in range(scale['projects_per_program']):
+            project_id = f"{program_id}-proj{j + 1:02d}"
+            project_dir = os.path.join(root_dir, "Stock", "programs", program_id, "projects", project_id)
+            project_number = len(projects) + 1
+            write_yaml(os.path.join(project_dir, "backlog.yaml"),
+                       build_backlog(rng, program_id, project_id, project_number, scale, base_date))
+            write_yaml(os.path.join(project_dir, "routines.yaml"),
+                       build_routines(rng, project_id, project_number, scale['routines']))
+            counts['backlog_files'] += 1
+            counts['routines_files'] += 1
+            counts['stories'] += scale['epics'] * scale['stories_per_epic']
+            counts['routines'] += scale['routines']
+            projects.append(project_id)
+
+    for d in range(scale['flow_days']):
+        day = base_date - timedelta(days=d)
+        day_dir = os.path.join(root_dir, "Flow", day.strftime("%Y%m"), day.isoformat())
+        events = build_calendar_events(rng, day, scale['calendar_events'])
+        write_text(os.path.join(day_dir, "calendar_events.json"), json.dumps(events, ensure_ascii=False, indent=2))
+        write_text(os.path.join(day_dir, "daily_tasks.md"), build_daily_tasks(day))
+        counts['flow_days'] += 1
+        counts['calendar_events'] += len(events)
+
+        # flow_to_stock 用: 1日あたり数プロジェクトの文書とバックログを更新
+        private_dir = os.path.join(root_dir, "Flow", "Private", day.isoformat())
+        for project_id in rng.sample(projects, min(len(projects), 3)):
+            project_flow_dir = os.path.join(private_dir, project_id)
+            for document in rng.sample(FLOW_DOCUMENTS, 2):
+                write_text(os.path.join(project_flow_dir, document), f"# {document}\n\n{day.isoformat()} 版\n" * 20)
+                counts['flow_files'] += 1
+            if rng.random() < 0.3:
+                backlog_dir = os.path.join(project_flow_dir, "backlog")
+                write_text(os.path.join(backlog_dir, "epics.yaml"), f"epics: []\n# {day.isoformat()}\n")
+                for s in range(scale['flow_stories']):
+                    write_text(os.path.join(backlog_dir, "stories", f"story_{s:04d}.md"),
+                               f"# Story {s}\n\n{'内容 ' * 50}\n")
+                counts['flow_files'] += 1 + scale['flow_stories']
+
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='ベンチマーク用の合成AIPM_ROOTツリーを生成するスクリプト')
+    parser.add_argument('root', help='生成先ディレクトリ')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small', help='規模のプリセット')
+    parser.add_argument('--date', help='基準日 (YYYY-MM-DD形式、デフォルト: 今日)')
+    parser.add_argument('--seed', type=int, default=0, help='乱数シード')
+    for key in SCALES['small']:
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, dest=key, help=f'{key} をプリセットから上書き')
+    args = parser.parse_args(argv)
+
+    scale = dict(SCALES[args.scale])
+    for key in scale:
+        if getattr(args, key) is not None:
+            scale[key] = getattr(args, key)
+    base_date = datetime.strptime(args.date, "%Y-%m-%d").date() if args.date else None
+
+    counts = generate_root(args.root, scale, base_date, args.seed)
+    print(json.dumps({'root': os.path.abspath(args.root), 'scale': scale, 'counts': counts},
+                     ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AIPMスクリプトのベンチマーク
+
+1. generate_synthetic_root.py で合成 AIPM_ROOT を作成（--root で既存ツリーも指定可能）
+2. 以下のフェーズを同一プロセス内で繰り返し計測
+   discovery / yaml_parse / extraction / sprint_resolution / filtering /
+   markdown_rendering / calendar_merge / flow_to_stock_cold / flow_to_stock_warm
+3. 結果をJSONで出力（バージョン間で比較できるようにコミットと実行環境も記録）
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+import contextlib
+from datetime import date, datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import extract_tasks
+import generate_daily_tasks
+import merge_calendar_tasks
+import flow_to_stock
+import generate_synthetic_root
+
+
+def get_git_revision():
+    """
+    ベンチマーク対象のコミットを取得（gitが無い場合はNone）
+    """
+    try:
+        result = subprocess.run(["git", "-C", REPO_DIR, "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True, check=False)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def measure(results, name, func, repeat, quiet=True):
+    """
+    funcをrepeat回実行して経過時間（秒）を記録し、最後の戻り値を返す
+    """
+    timings = []
+    value = None
+    for _ in range(repeat):
+        with open(os.devnull, 'w') as devnull:
+            redirect = contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()
+            with redirect:
+                start = time.perf_counter()
+                value = func()
+                timings.append(time.perf_counter() - start)
+
+    results[name] = {
+        'runs': [round(t, 6) for t in timings],
+        'min': round(min(timings), 6),
+        'median': round(statistics.median(timings), 6),
+        'mean': round(statistics.mean(timings), 6)
+    }
+    return value
+
+
+def list_flow_day_dirs(root_dir):
+    """
+    Flow/YYYYMM/YYYY-MM-DD 形式の日付フォルダを返す
+    """
+    day_dirs = []
+    flow_dir = os.path.join(root_dir, "Flow")
+    for yearmonth in sorted(os.listdir(flow_dir)) if os.path.isdir(flow_dir) else []:
+        if not (len(yearmonth) == 6 and yearmonth.isdigit()):
+            continue
+        month_dir = os.path.join(flow_dir, yearmonth)
+        for day in sorted(os.listdir(month_dir)):
+            day_dirs.append(os.path.join(month_dir, day))
+    return day_dirs
+
+
+def run_benchmarks(root_dir, base_date, repeat):
+    """
+    すべてのフェーズを計測して結果の辞書を返す
+    """
+    results = {}
+
+    backlog_files, routines_files = measure(results, 'discovery', lambda: (
+        extract_tasks.find_yaml_files(root_dir, "backlog.ya?ml"),
+        extract_tasks.find_yaml_files(root_dir, "routines.ya?ml")
+    ), repeat)
+
+    measure(results, 'yaml_parse', lambda: [
+        extract_tasks.load_yaml_file(file_path) for file_path in backlog_files + routines_files
+    ], repeat)
+
+    items = measure(results, 'extraction', lambda: (
+        extract_tasks.extract_stories_from_backlog(backlog_files)
+        + extract_tasks.extract_tasks_from_routines(routines_files)
+    ), repeat)
+
+    current_sprints = measure(results, 'sprint_resolution',
+                              lambda: generate_daily_tasks.get_current_sprint(items, base_date), repeat)
+
+    user_names = ["宮田"]
+
+    def filtering():
+        stories = generate_daily_tasks.filter_current_sprint_stories(items, current_sprints)
+        routines = generate_daily_tasks.filter_routine_tasks(items, base_date)
+        return (generate_daily_tasks.filter_stories_by_assignee(stories, user_names),
+                generate_daily_tasks.filter_by_assignee(routines, user_names))
+
+    sprint_stories, routine_tasks = measure(results, 'filtering', filtering, repeat)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_file = os.path.join(temp_dir, "daily_tasks.md")
+        measure(results, 'markdown_rendering', lambda: generate_daily_tasks.generate_daily_tasks_markdown(
+            sprint_stories, routine_tasks, output_file, base_date), repeat)
+
+    day_dirs = list_flow_day_dirs(root_dir)
+
+    def calendar_merge():
+        merged = 0
+        for day_dir in day_dirs:
+            events = merge_calendar_tasks.read_calendar_events(day_dir)
+            content = merge_calendar_tasks.read_daily_tasks(day_dir)
+            if content and merge_calendar_tasks.merge_calendar_to_tasks(
+                    content, merge_calendar_tasks.calendar_event_lines(events))[0]:
+                merged += 1
+        return merged
+
+    measure(results, 'calendar_merge', calendar_merge, repeat)
+
+    def flow_sync():
+        config = flow_to_stock.load_config(root_dir)
+        os.makedirs(config['log_dir'], exist_ok=True)
+        return flow_to_stock.run_all_projects(config)
+
+    # 1回目は全ファイルのコピー、2回目以降は変更なしの同期
+    measure(results, 'flow_to_stock_cold', flow_sync, 1)
+    measure(results, 'flow_to_stock_warm', flow_sync, repeat)
+
+    counts = {
+        'backlog_files': len(backlog_files),
+        'routines_files': len(routines_files),
+        'items': len(items),
+        'current_sprints': len(current_sprints),
+        'sprint_stories': len(sprint_stories),
+        'routine_tasks': len(routine_tasks),
+        'flow_days': len(day_dirs)
+    }
+    return results, counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='AIPMスクリプトのベンチマークを実行してJSONで出力')
+    parser.add_argument('--root', help='既存のAIPM_ROOTを使用する (デフォルト: 一時ディレクトリに合成ツリーを生成)')
+    parser.add_argument('--scale', choices=sorted(generate_synthetic_root.SCALES), default='small',
+                        help='合成ツリーの規模')
+    parser.add_argument('--date', help='基準日 (YYYY-MM-DD形式、デフォルト: 今日)')
+    parser.add_argument('--seed', type=int, default=0, help='合成ツリーの乱数シード')
+    parser.add_argument('--repeat', type=int, default=3, help='各フェーズの繰り返し回数')
+    parser.add_argument('--keep', action='store_true', help='生成した合成ツリーを削除しない')
+    parser.add_argument('-o', '--output', help='結果JSONの出力先 (デフォルト: 標準出力)')
+    args = parser.parse_args(argv)
+
+    base_date = datetime.strptime(args.date, "%Y-%m-%d").date() if args.date else date.today()
+
+    generated = None
+    scale = None
+    if args.root:
+        root_dir = args.root
+    else:
+        generated = tempfile.mkdtemp(prefix="aipm_bench_")
+        root_dir = generated
+        scale = generate_synthetic_root.SCALES[args.scale]
+        start = time.perf_counter()
+        generate_synthetic_root.generate_root(root_dir, scale, base_date, args.seed)
+        print(f"合成ツリーを生成しました: {root_dir} ({time.perf_counter() - start:.2f}秒)", file=sys.stderr)
+
+    try:
+        results, counts = run_benchmarks(root_dir, base_date, args.repeat)
+    finally:
+        if generated and not args.keep:
+            shutil.rmtree(generated, ignore_errors=True)
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'revision': get_git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'root': None if generated and not args.keep else os.path.abspath(root_dir),
+        'scale': args.scale if scale else None,
+        'scale_params': scale,
+        'seed': args.seed if scale else None,
+        'base_date': base_date.isoformat(),
+        'repeat': args.repeat,
+        'counts': counts,
+        'results': results
+    }
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+        print(f"ベンチマーク結果を保存しました: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CLIエントリポイントの起動時間チェック
+
+1. 各スクリプトを `python -X importtime <script> --help` で起動し、読み込まれたモジュールを取得
+2. --help の時点で読み込んではいけない重いモジュール（yaml, json, subprocess など）が
+   読み込まれていないことを確認
+3. 起動時間（複数回の最小値）が素のインタプリタ（python -c pass）との差で予算内かを確認
+
+予算（デフォルト +75 ms）の内訳の目安:
+- argparse で --help を表示するだけで +25 ms 前後（re, gettext, shutil などの読み込み）
+- 直接実行したスクリプト自身はバイトコードがキャッシュされないため、毎回のコンパイルに 5-12 ms
+- 残りがスクリプト固有の読み込み（phase_timer, datetime など）
+重いモジュールの読み込みは時間ではなく 2. のチェックで検出する。
+
+予算を超えた場合は終了コード1を返すので、CIやコミット前のフックで使えます。
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+ENTRY_POINTS = (
+    "extract_tasks.py",
+    "generate_daily_tasks.py",
+    "merge_calendar_tasks.py",
+    "calendar_prefetch.py",
+    "task_history.py",
+    "validate_yaml_batch.py",
+    "validate_portfolio.py",
+    "item_store.py",
+    "validate_backlog_yaml.py",
+    "validate_routines_yaml.py",
+    "flow_to_stock.py",
+    "flow_backup.py",
+    "run_metrics.py",
+    "aipm/__main__.py"
+)
+
+# --help だけでは使われないモジュール
+FORBIDDEN_MODULES = (
+    "yaml", "json", "subprocess", "tempfile", "sqlite3", "pathlib", "glob",
+    "concurrent.futures", "multiprocessing", "yaml_schema"
+)
+
+
+def run_timed(cmd, env=None):
+    start = time.perf_counter()
+    result = subprocess.run(cmd, capture_output=True, text=True, env=env, cwd=REPO_DIR, check=False)
+    return time.perf_counter() - start, result
+
+
+def imported_modules(script):
+    """
+    -X importtime の出力から --help 実行時に読み込まれたモジュールと累積時間（マイクロ秒）を返す
+    """
+    _, result = run_timed([sys.executable, "-X", "importtime", os.path.join(REPO_DIR, script), "--help"])
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        if cumulative.isdigit():
+            modules[name] = int(cumulative)
+    return result.returncode, modules
+
+
+def best_time(cmd, repeat):
+    return min(run_timed(cmd)[0] for _ in range(repeat))
+
+
+def check(scripts, budget_ms, repeat):
+    """
+    各スクリプトを計測して結果のリストを返す
+    """
+    baseline = best_time([sys.executable, "-c", "pass"], repeat)
+    results = []
+    for script in scripts:
+        returncode, modules = imported_modules(script)
+        forbidden = sorted(name for name in modules if name in FORBIDDEN_MODULES)
+        elapsed = best_time([sys.executable, os.path.join(REPO_DIR, script), "--help"], repeat)
+        overhead_ms = (elapsed - baseline) * 1000
+        slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:5]
+        results.append({
+            'script': script,
+            'returncode': returncode,
+            'seconds': round(elapsed, 4),
+            'overhead_ms': round(overhead_ms, 1),
+            'forbidden_modules': forbidden,
+            'slowest_imports': [{'module': name, 'ms': round(us / 1000, 1)} for name, us in slowest],
+            'ok': returncode == 0 and not forbidden and overhead_ms <= budget_ms
+        })
+    return baseline, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='CLIエントリポイントの --help 起動時間を予算と比較するスクリプト')
+    parser.add_argument('scripts', nargs='*', help=f'対象スクリプト (デフォルト: {", ".join(ENTRY_POINTS)})')
+    parser.add_argument('--budget-ms', type=float, default=75.0,
+                        help='素のインタプリタ起動からの許容オーバーヘッド（ミリ秒、デフォルト: 75）')
+    parser.add_argument('--repeat', type=int, default=5, help='計測回数（最小値を使用）')
+    parser.add_argument('--json', action='store_true', help='結果をJSONで出力')
+    args = parser.parse_args(argv)
+
+    baseline, results = check(args.scripts or ENTRY_POINTS, args.budget_ms, args.repeat)
+
+    if args.json:
+        print(json.dumps({'baseline_seconds': round(baseline, 4), 'budget_ms': args.budget_ms,
+                          'results': results}, ensure_ascii=False, indent=2))
+    else:
+        print(f"素のインタプリタ: {baseline * 1000:.1f} ms / 予算: +{args.budget_ms:.0f} ms")
+        for result in results:
+            mark = "OK  " if result['ok'] else "NG  "
+            print(f"{mark}{result['script']:<28}{result['seconds'] * 1000:>8.1f} ms (+{result['overhead_ms']:.1f} ms)")
+            if result['returncode'] != 0:
+                print(f"      --help が終了コード {result['returncode']} で失敗しました")
+            if result['forbidden_modules']:
+                print(f"      --help で読み込まれた重いモジュール: {', '.join(result['forbidden_modules'])}")
+            if not result['ok']:
+                slowest = ", ".join(f"{item['module']} {item['ms']}ms" for item in result['slowest_imports'])
+                print(f"      読み込みの遅いモジュール: {slowest}")
+
+    return 0 if all(result['ok'] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+カレンダー予定の先読みスクリプト
+
+1. カレンダーの取得元（calendar_sources.py、デフォルトは clasp run getCalendarEventsWithParams）から
+   N 日分の予定を1回で取得
+2. 予定を日ごとに分け、Flow/YYYYMM/YYYY-MM-DD/calendar_events.json に書き出す
+   （日をまたぐ予定・複数日の終日予定は該当する各日に入れ、予定の無い日は空のリスト）
+3. 取得日時を ROOT/.aipm/calendar_prefetch.json に記録する
+
+merge_calendar_tasks.py は、先読み済みの日（--prefetch-max-age 以内）はカレンダーに問い合わせず
+ローカルのファイルを使います。週の初めに1回実行すれば、1週間分の問い合わせが1回で済みます。
+
+    python3 calendar_prefetch.py --days 7
+"""
+
+import os
+import sys
+import argparse
+from datetime import datetime, timedelta
+
+import phase_timer
+from aipm import paths
+from aipm.lazy import lazy_import
+
+json = lazy_import("json")
+time_slots = lazy_import("time_slots")
+calendar_sources = lazy_import("calendar_sources")
+
+DEFAULT_DAYS = 7
+DEFAULT_MAX_AGE_HOURS = 7 * 24
+
+
+def get_root_dir():
+    """
+    環境変数またはデフォルト値からルートディレクトリを取得（aipm.paths と共通）
+    """
+    return paths.get_root_dir()
+
+
+def get_manifest_path(root_dir):
+    """
+    先読みの記録ファイルのパス
+    """
+    return os.path.join(root_dir, ".aipm", "calendar_prefetch.json")
+
+
+def get_calendar_file(root_dir, day):
+    return os.path.join(root_dir, "Flow", day.strftime("%Y%m"), day.strftime("%Y-%m-%d"), "calendar_events.json")
+
+
+def load_manifest(root_dir):
+    manifest_path = get_manifest_path(root_dir)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'days': {}}
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('days'), dict):
+        return {'days': {}}
+    return manifest
+
+
+def write_json_atomic(path, data):
+    """
+    一時ファイルに書いてから置き換える
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+def split_events_by_day(events, start_date, days):
+    """
+    予定を日ごとに分ける（期間内のすべての日をキーに持つ）
+
+    開始日から終了日まで（終日予定の終了日は含まない）の各日に入れる
+    日付は予定に書かれた時刻で決める（実行するマシンのタイムゾーンに変換すると、
+    UTC のマシンでは日本時間の早朝の予定が前日に入ってしまう）
+    """
+    by_day = {start_date + timedelta(days=offset): [] for offset in range(days)}
+    for event in events:
+        if not isinstance(event, dict):
+            continue
+        raw_start = event.get('startTime') or ''
+        raw_end = event.get('endTime') or ''
+        start, _, _ = time_slots.parse_time(raw_start)
+        end, _, _ = time_slots.parse_time(raw_end)
+        if start is None:
+            continue
+
+        first_day = start.date()
+        last_day = first_day
+        if end is not None and end > start:
+            # 終了時刻ちょうど（0:00）や終日予定の終了日はその日に含めない
+            last_day = (end - timedelta(microseconds=1)).date()
+
+        day = max(first_day, start_date)
+        while day <= last_day and day in by_day:
+            by_day[day].append(event)
+            day += timedelta(days=1)
+    return by_day
+
+
+def write_day_files(root_dir, by_day, source_name="clasp"):
+    """
+    日ごとの calendar_events.json を書き出して記録を更新し、書き出した日数を返す
+    """
+    manifest = load_manifest(root_dir)
+    fetched_at = datetime.now().isoformat(timespec='seconds')
+    for day, events in sorted(by_day.items()):
+        calendar_file = get_calendar_file(root_dir, day)
+        write_json_atomic(calendar_file, events)
+        phase_timer.count_file(calendar_file)
+        manifest['days'][day.strftime("%Y-%m-%d")] = {
+            'fetched_at': fetched_at,
+            'source': source_name,
+            'count': len(events)
+        }
+        print(f"  {day}: {len(events)} 件 → {calendar_file}")
+    write_json_atomic(get_manifest_path(root_dir), manifest)
+    return len(by_day)
+
+
+def load_prefetched_events(root_dir, day, max_age_hours=DEFAULT_MAX_AGE_HOURS):
+    """
+    先読み済みで max_age_hours 以内の予定があれば返す（無ければNone）
+    """
+    if not max_age_hours or max_age_hours <= 0:
+        return None
+    entry = load_manifest(root_dir)['days'].get(day.strftime("%Y-%m-%d"))
+    if not entry:
+        return None
+    try:
+        fetched_at = datetime.fromisoformat(entry['fetched_at'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if datetime.now() - fetched_at > timedelta(hours=max_age_hours):
+        return None
+
+    calendar_file = get_calendar_file(root_dir, day)
+    try:
+        with open(calendar_file, 'r', encoding='utf-8') as f:
+            events = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return events if isinstance(events, list) else None
+
+
+def add_arguments(parser):
+    """
+    先読みのコマンドライン引数を追加（aipm prefetch-calendar と共通）
+    """
+    parser.add_argument('--root', help='ルートディレクトリ (デフォルト: 環境変数 AIPM_ROOT または ~/aipm_v3)')
+    parser.add_argument('--start', help='開始日 (YYYY-MM-DD形式、デフォルト: 今日)')
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help=f'取得する日数 (デフォルト: {DEFAULT_DAYS})')
+    parser.add_argument('--source', choices=calendar_sources.SOURCE_TYPES,
+                        help='カレンダーの取得元 (デフォルト: user_config.yaml の calendar_source、無ければ clasp)')
+    parser.add_argument('--ics', metavar='PATH', help='ICSファイルから予定を読み込む (--source ics の path を指定)')
+    parser.add_argument('--calendar-id', help='カレンダーID (デフォルト: user_config.yaml の calendar_source、無ければ primary)')
+    phase_timer.add_arguments(parser)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='N日分のカレンダー予定を1回で取得し、日ごとのFlowディレクトリに書き出すスクリプト')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with phase_timer.session(args, "calendar_prefetch"):
+        return phase_timer.record_exit_code(prefetch(args))
+
+
+def prefetch(args):
+    """
+    期間の予定を取得して日ごとに書き出し、終了コードを返す
+    """
+    root_dir = args.root if getattr(args, 'root', None) else get_root_dir()
+    if args.start:
+        try:
+            start_date = datetime.strptime(args.start, "%Y-%m-%d").date()
+        except ValueError:
+            print(f"エラー: 無効な日付形式です。YYYY-MM-DD形式で指定してください: {args.start}")
+            return 1
+    else:
+        start_date = datetime.now().date()
+    if args.days < 1:
+        print(f"エラー: --days は1以上を指定してください: {args.days}")
+        return 1
+
+    source = calendar_sources.create_source_from_args(root_dir, args)
+    if source is None:
+        return 1
+    print(f"カレンダー予定を取得中: {start_date} から {args.days} 日間 ({source.describe()})")
+    with phase_timer.phase("calendar_fetch"):
+        try:
+            events = source.fetch(start_date, args.days)
+        finally:
+            source.close()
+    if events is None:
+        print("❌ カレンダー予定の取得に失敗しました。")
+        return 1
+    print(f"{len(events)} 件のカレンダー予定を取得しました。")
+    phase_timer.set_value('calendar_events', len(events))
+
+    with phase_timer.phase("split"):
+        by_day = split_events_by_day(events, start_date, args.days)
+        phase_timer.count(items=len(events))
+
+    with phase_timer.phase("write"):
+        written = write_day_files(root_dir, by_day, source.name)
+    print(f"✅ {written} 日分のカレンダー予定を書き出しました。")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
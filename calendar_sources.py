@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+カレンダー予定の取得元
+
+merge_calendar_tasks.py と calendar_prefetch.py は、ここで作った取得元の fetch(開始日, 日数) で
+予定のリスト（Code.js の getCalendarEvents と同じ形式）を受け取ります。失敗した場合はNoneです。
+
+- webapp: Apps Script の Webアプリ（Code.js の doGet）に HTTP で問い合わせる
+  （Node を起動しない。同じホストへの接続は使い回し、接続エラー・429・5xx は間隔を空けて再試行）
+- clasp: clasp run getCalendarEventsWithParams を calendar_app ディレクトリで実行する（設定が無い場合）
+- ics: ICS（iCalendar）ファイルから読み込む（ics_calendar.py、繰り返しの予定は期間内の回だけ展開）
+- fake: JSON ファイルまたは渡したリストの予定を返す（テスト用、呼び出しを calls に記録）
+
+user_config.yaml の例:
+    calendar_source:
+      type: webapp
+      url: https://script.google.com/macros/s/XXXX/exec
+      calendar_id: primary          # カンマ区切りまたはリストで複数指定
+      timeout: 30
+      retries: 3
+    # type: ics のときは path: ~/Downloads/calendar.ics
+    # type: fake のときは path: 予定のJSONファイル
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from aipm.lazy import lazy_import
+
+import phase_timer
+
+json = lazy_import("json")
+yaml = lazy_import("yaml")
+subprocess = lazy_import("subprocess")
+http_client = lazy_import("http.client")
+urllib_parse = lazy_import("urllib.parse")
+time_slots = lazy_import("time_slots")
+ics_calendar = lazy_import("ics_calendar")
+merge_calendar_tasks = lazy_import("merge_calendar_tasks")
+
+SOURCE_TYPES = ('clasp', 'webapp', 'ics', 'fake')
+DEFAULT_SOURCE_TYPE = 'clasp'
+DEFAULT_TIMEOUT = 30
+DEFAULT_RETRIES = 3
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+
+
+def load_source_config(root_dir):
+    """
+    user_config.yaml の calendar_source を読み込む（無い場合は空の辞書）
+    """
+    config_path = os.path.join(root_dir, "scripts", "config", "user_config.yaml")
+    if not os.path.exists(config_path):
+        return {}
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError) as e:
+        print(f"警告: ユーザー設定ファイルを読み込めません: {config_path}: {e}", file=sys.stderr)
+        return {}
+    source_config = config.get('calendar_source') if isinstance(config, dict) else None
+    if source_config is None:
+        return {}
+    if not isinstance(source_config, dict):
+        print("警告: calendar_source は辞書で指定してください。デフォルトの取得元を使用します。", file=sys.stderr)
+        return {}
+    return dict(source_config)
+
+
+def calendar_ids(value):
+    """
+    calendar_id（カンマ区切りの文字列またはリスト）をカンマ区切りの文字列にする
+    """
+    if isinstance(value, (list, tuple)):
+        value = ",".join(str(item).strip() for item in value if str(item).strip())
+    return str(value or 'primary')
+
+
+def local_midnight(day):
+    """
+    ローカルの0時をオフセット付きの ISO 形式にする
+    （日付だけを渡すと Apps Script 側でUTCの0時と解釈されるため）
+    """
+    return datetime.combine(day, datetime.min.time()).astimezone().isoformat()
+
+
+def events_in_range(events, start_date, days):
+    """
+    期間（start_date の0時から days 日）に重なる予定だけを返す
+    """
+    window_start = datetime.combine(start_date, datetime.min.time())
+    window_end = window_start + timedelta(days=days)
+    selected = []
+    for event in events:
+        if not isinstance(event, dict):
+            continue
+        start, _, _ = time_slots.parse_time(event.get('startTime') or '')
+        end, _, _ = time_slots.parse_time(event.get('endTime') or '')
+        if start is None:
+            continue
+        if end is None or end <= start:
+            end = start + timedelta(microseconds=1)
+        if start < window_end and end > window_start:
+            selected.append(event)
+    return selected
+
+
+class CalendarSource:
+    """
+    予定の取得元（fetch を実装する）
+    """
+
+    name = 'base'
+
+    def fetch(self, start_date, days=1):
+        """
+        start_date から days 日分の予定のリストを返す（失敗時はNone）
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def describe(self):
+        return self.name
+
+
+class ClaspSource(CalendarSource):
+    """
+    clasp run getCalendarEventsWithParams で取得する（Node のプロセスを起動する）
+    """
+
+    name = 'clasp'
+
+    def __init__(self, app_dir, calendar_id='primary', query=''):
+        self.app_dir = app_dir
+        self.calendar_id = calendar_ids(calendar_id)
+        self.query = query or ''
+
+    def describe(self):
+        return f"clasp (calendarId={self.calendar_id})"
+
+    def fetch(self, start_date, days=1):
+        if not os.path.isdir(self.app_dir):
+            print(f"calendar_app ディレクトリが見つかりません: {self.app_dir}", file=sys.stderr)
+            return None
+
+        params = json.dumps([self.calendar_id, days, local_midnight(start_date), self.query])
+        try:
+            # cwd を渡すので、呼び出し元のカレントディレクトリには依存しない
+            result = subprocess.run(["clasp", "run", "getCalendarEventsWithParams", "-p", params],
+                                    cwd=self.app_dir, capture_output=True, text=True, check=False)
+        except OSError as e:
+            print(f"clasp を実行できません: {e}", file=sys.stderr)
+            return None
+        if result.returncode != 0:
+            print(f"clasp run が失敗しました: {result.stderr}", file=sys.stderr)
+            return None
+
+        phase_timer.count(bytes=len(result.stdout.encode('utf-8')))
+        return merge_calendar_tasks.parse_calendar_output(result.stdout)
+
+
+class WebAppSource(CalendarSource):
+    """
+    Apps Script の Webアプリ（doGet）から HTTP で取得する
+
+    Webアプリは script.google.com から script.googleusercontent.com へリダイレクトするため、
+    ホストごとに接続を持ち、同じインスタンスで続けて取得するときは接続を使い回す
+    """
+
+    name = 'webapp'
+
+    def __init__(self, url, calendar_id='primary', query='', timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES, backoff=1.0):
+        self.url = url
+        self.calendar_id = calendar_ids(calendar_id)
+        self.query = query or ''
+        self.timeout = float(timeout)
+        self.retries = max(0, int(retries))
+        self.backoff = float(backoff)
+        self.connections = {}   # (scheme, netloc) → HTTPConnection
+
+    def describe(self):
+        return f"webapp (calendarId={self.calendar_id})"
+
+    def _connection(self, scheme, netloc):
+        key = (scheme, netloc)
+        connection = self.connections.get(key)
+        if connection is None:
+            if scheme == 'https':
+                connection = http_client.HTTPSConnection(netloc, timeout=self.timeout)
+            else:
+                connection = http_client.HTTPConnection(netloc, timeout=self.timeout)
+            self.connections[key] = connection
+        return key, connection
+
+    def _discard(self, key):
+        connection = self.connections.pop(key, None)
+        if connection is not None:
+            connection.close()
+
+    def _get(self, url):
+        """
+        リダイレクトをたどって GET し、(ステータス, 本文) を返す
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urllib_parse.urlsplit(url)
+            target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            key, connection = self._connection(parts.scheme, parts.netloc)
+            try:
+                connection.request("GET", target, headers={'Accept': 'application/json'})
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http_client.HTTPException):
+                self._discard(key)
+                raise
+            if response.will_close:
+                self._discard(key)
+
+            location = response.getheader('Location')
+            if response.status in REDIRECT_STATUSES and location:
+                url = urllib_parse.urljoin(url, location)
+                continue
+            return response.status, body
+        raise http_client.HTTPException(f"リダイレクトが多すぎます: {url}")
+
+    def request_url(self, start_date, days):
+        params = urllib_parse.urlencode({
+            'action': 'events',
+            'calendarId': self.calendar_id,
+            'days': days,
+            'startDate': local_midnight(start_date),
+            'q': self.query
+        })
+        separator = '&' if '?' in self.url else '?'
+        return f"{self.url}{separator}{params}"
+
+    def fetch(self, start_date, days=1):
+        url = self.request_url(start_date, days)
+        body = None
+        for attempt in range(self.retries + 1):
+            try:
+                status, body = self._get(url)
+            except (OSError, http_client.HTTPException) as e:
+                error = e
+            else:
+                if status == 200:
+                    break
+                if status not in RETRY_STATUSES:
+                    print(f"Webアプリからの取得に失敗しました: HTTP {status}", file=sys.stderr)
+                    return None
+                error = f"HTTP {status}"
+                body = None
+            if attempt < self.retries:
+                print(f"警告: Webアプリからの取得に失敗しました（{error}）。再試行します ({attempt + 1}/{self.retries})",
+                      file=sys.stderr)
+                time.sleep(self.backoff * (2 ** attempt))
+        if body is None:
+            print(f"Webアプリからの取得に失敗しました: {error}", file=sys.stderr)
+            return None
+
+        phase_timer.count(bytes=len(body))
+        try:
+            data = json.loads(body.decode('utf-8'))
+        except ValueError:
+            # 公開範囲が「全員」でない場合はログインページ（HTML）が返る
+            print("Webアプリの応答がJSONではありません。デプロイのアクセス権を確認してください。", file=sys.stderr)
+            return None
+        if isinstance(data, dict):
+            if data.get('error'):
+                print(f"Webアプリがエラーを返しました: {data['error']}", file=sys.stderr)
+                return None
+            data = data.get('events')
+        return data if isinstance(data, list) else None
+
+    def close(self):
+        for key in list(self.connections):
+            self._discard(key)
+
+
+class IcsSource(CalendarSource):
+    """
+    ICS ファイルから読み込む
+    """
+
+    name = 'ics'
+
+    def __init__(self, path, calendar_id='ics'):
+        self.path = os.path.expanduser(path)
+        self.calendar_id = calendar_id
+
+    def describe(self):
+        return f"ics ({self.path})"
+
+    def fetch(self, start_date, days=1):
+        try:
+            events = ics_calendar.read_events(self.path, self.calendar_id, start_date, days)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"ICSファイルを読み込めません: {self.path}: {e}", file=sys.stderr)
+            return None
+        phase_timer.count_file(self.path)
+        return events
+
+
+class FakeSource(CalendarSource):
+    """
+    渡した予定（または JSON ファイルの予定）を返す（テスト用）
+    """
+
+    name = 'fake'
+
+    def __init__(self, events=None, path=None, fail=False):
+        self.events = events
+        self.path = os.path.expanduser(path) if path else None
+        self.fail = fail
+        self.calls = []
+
+    def describe(self):
+        return f"fake ({self.path})" if self.path else "fake"
+
+    def fetch(self, start_date, days=1):
+        self.calls.append((start_date, days))
+        if self.fail:
+            return None
+        events = self.events
+        if self.path:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    events = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"予定のJSONファイルを読み込めません: {self.path}: {e}", file=sys.stderr)
+                return None
+            if isinstance(events, dict):
+                events = events.get('events')
+        return events_in_range(events or [], start_date, days)
+
+
+def create_source(root_dir, source_type=None, config=None, **overrides):
+    """
+    設定（user_config.yaml の calendar_source）から取得元を作る（設定が不正な場合はNone）
+
+    source_type と overrides（calendar_id など、Noneは無視）は設定より優先する
+    """
+    if config is None:
+        config = load_source_config(root_dir)
+    config = dict(config)
+    config.update({key: value for key, value in overrides.items() if value is not None})
+    source_type = source_type or config.get('type') or DEFAULT_SOURCE_TYPE
+
+    if source_type == 'clasp':
+        app_dir = config.get('app_dir') or os.path.join(root_dir, "scripts", "calendar_app")
+        return ClaspSource(os.path.expanduser(app_dir), config.get('calendar_id'), config.get('query'))
+    if source_type == 'webapp':
+        if not config.get('url'):
+            print("エラー: calendar_source の url（WebアプリのURL）が設定されていません。", file=sys.stderr)
+            return None
+        return WebAppSource(config['url'], config.get('calendar_id'), config.get('query'),
+                            config.get('timeout', DEFAULT_TIMEOUT), config.get('retries', DEFAULT_RETRIES))
+    if source_type == 'ics':
+        if not config.get('path'):
+            print("エラー: calendar_source の path（ICSファイル）が設定されていません。", file=sys.stderr)
+            return None
+        return IcsSource(config['path'], config.get('calendar_id') or 'ics')
+    if source_type == 'fake':
+        return FakeSource(config.get('events'), config.get('path'))
+
+    print(f"エラー: 不明なカレンダーの取得元です: {source_type}（{', '.join(SOURCE_TYPES)}）", file=sys.stderr)
+    return None
+
+
+def create_source_from_args(root_dir, args):
+    """
+    --source / --ics / --calendar-id の指定を設定に重ねて取得元を作る
+    """
+    ics_path = getattr(args, 'ics', None)
+    source_type = 'ics' if ics_path else getattr(args, 'source', None)
+    return create_source(root_dir, source_type, path=ics_path, calendar_id=getattr(args, 'calendar_id', None))
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+未完了タスクの持ち越し
+
+1. 対象日の前日から遡り、Flow/YYYYMM/YYYY-MM-DD/daily_tasks.md のパスを日付から直接組み立てて
+   存在するものを days 件まで探す（Flow 全体は走査せず、遡るのは max_lookback_days 日まで）
+2. 見つかった日次タスクのうち、今日の予定（カレンダー）とルーチンタスク以外の見出しだけを解析
+   （解析は task_history.py と共通）
+3. 新しい日から順に1回だけ見て、各タスクの最新の状態が未完了のものを持ち越す
+   - ストーリーはIDで、それ以外のタスクは文字列で同じタスクとみなす
+   - 今日のスプリントストーリーに含まれるもの、バックログで完了済みのストーリーは除外
+   - ルーチンタスクは頻度に従って毎日生成されるので持ち越さない
+
+user_config.yaml の例:
+    carry_over:
+      enabled: true
+      days: 1                  # 遡って読む日次タスクのファイル数
+      max_lookback_days: 14    # ファイルが無い日（休日など）を含めて遡る最大日数
+"""
+
+import os
+from datetime import timedelta
+
+import phase_timer
+from aipm.lazy import lazy_import
+
+task_history = lazy_import("task_history")
+
+
+DEFAULT_SETTINGS = {
+    'enabled': True,
+    'days': 1,
+    'max_lookback_days': 14
+}
+
+# 解析する見出しの種類（task_history.section_kind() の値）
+CARRY_OVER_SECTIONS = frozenset(('plan', 'sprint', 'carry_over', 'other'))
+
+# 持ち越すチェックボックスの種類（task_history.classify_checkbox() の値）
+CARRY_OVER_KINDS = frozenset(('story', 'task'))
+
+
+def load_settings(user_config):
+    """
+    user_config.yaml の carry_over をデフォルト値に重ねる
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    carry_over_config = user_config.get('carry_over') if user_config else None
+    if isinstance(carry_over_config, dict):
+        settings.update(carry_over_config)
+    elif carry_over_config is not None:
+        print("警告: carry_over は辞書で指定してください。デフォルト設定を使用します。")
+    return settings
+
+
+def get_daily_tasks_path(root_dir, day):
+    return os.path.join(root_dir, "Flow", day.strftime("%Y%m"), day.strftime("%Y-%m-%d"), "daily_tasks.md")
+
+
+def find_previous_day_files(root_dir, today_date, days=1, max_lookback_days=14):
+    """
+    対象日より前の日次タスクを新しい順に最大 days 件、[(日付, パス)] で返す
+    """
+    found = []
+    for offset in range(1, max_lookback_days + 1):
+        if len(found) >= days:
+            break
+        day = today_date - timedelta(days=offset)
+        file_path = get_daily_tasks_path(root_dir, day)
+        if os.path.isfile(file_path):
+            found.append((day, file_path))
+    return found
+
+
+def carry_over_key(entry):
+    """
+    同じタスクとみなすためのキー（ストーリーはID、それ以外は空白を詰めた文字列）
+    """
+    if entry['kind'] == 'story':
+        return ('story', entry['item_id'])
+    return ('task', " ".join(entry['title'].split()))
+
+
+def collect_carry_over(day_files, exclude_ids=(), completed_ids=()):
+    """
+    日次タスクのファイル（新しい順）から持ち越すタスクを集める
+
+    戻り値の各要素は {'kind', 'id', 'title', 'text', 'project', 'epic', 'since'}
+    （since は遡った範囲でそのタスクが最初に未完了で載っていた日）
+    """
+    exclude_ids = set(exclude_ids)
+    completed_ids = set(completed_ids)
+    decided = set()
+    items = {}
+
+    for day, file_path in day_files:
+        try:
+            phase_timer.count_file(file_path)
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except OSError as e:
+            print(f"警告: {file_path} を読み込めませんでした: {e}")
+            continue
+
+        for entry in task_history.parse_daily_tasks(content, CARRY_OVER_SECTIONS):
+            if entry['kind'] not in CARRY_OVER_KINDS:
+                continue
+            key = carry_over_key(entry)
+            if key in items:
+                if not entry['done']:
+                    items[key]['since'] = day.strftime("%Y-%m-%d")
+                continue
+            if key in decided:
+                continue
+            decided.add(key)
+            if entry['done'] or entry['item_id'] in exclude_ids or entry['item_id'] in completed_ids:
+                continue
+
+            if entry['kind'] == 'story':
+                text = f"{entry['item_id']}: {entry['title']}"
+            else:
+                text = entry['title']
+            items[key] = {
+                'kind': entry['kind'],
+                'id': entry['item_id'],
+                'title': entry['title'],
+                'text': text,
+                'project': entry['project'],
+                'epic': entry['epic'],
+                'since': day.strftime("%Y-%m-%d")
+            }
+        phase_timer.count(items=len(items))
+
+    return list(items.values())
+
+
+def carry_over_tasks(root_dir, today_date, settings, exclude_ids=(), completed_ids=()):
+    """
+    設定に従って前日以前の日次タスクから持ち越すタスクを返す
+    """
+    if not settings.get('enabled'):
+        return []
+    try:
+        days = int(settings.get('days', DEFAULT_SETTINGS['days']))
+        max_lookback_days = int(settings.get('max_lookback_days', DEFAULT_SETTINGS['max_lookback_days']))
+    except (TypeError, ValueError):
+        print("警告: carry_over の days / max_lookback_days は整数で指定してください。持ち越しを行いません。")
+        return []
+    if days <= 0:
+        return []
+
+    day_files = find_previous_day_files(root_dir, today_date, days, max(days, max_lookback_days))
+    return collect_carry_over(day_files, exclude_ids, completed_ids)
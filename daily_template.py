@@ -0,0 +1,642 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日次タスクのマークダウンテンプレート
+
+1. テンプレートを解析してPythonの関数にコンパイルし、ソースごとにキャッシュ
+2. セクション（header / schedule / special_day / plan / carry_over / sprint / routine / notes / review）を
+   指定された順に、出力先の write（list.append やファイルの write）へ書き出す
+3. ユーザー設定（user_config.yaml の daily_template）でセクションの順序・追加セクション・
+   プロジェクトごとのレイアウトを変更できる
+
+テンプレートの構文:
+    {{ story.title }}                      値の出力（キーが無い場合は空文字）
+    {{ story.id|default("Unknown") }}      キーが無い場合の値、capitalize / lower / upper も使用可
+    {% if is_monday %} ... {% elif is_friday %} ... {% else %} ... {% endif %}
+    {% if project.name == "dinner" %}      == / != と not が使用可
+    {% for story in epic.stories %} ... {% else %}（空の場合） ... {% endfor %}
+    {% include project.template %}         別のテンプレート（セクション）をその場で出力
+    {# コメント #}
+タグだけの行は、行ごと（改行を含めて）出力から除かれます。
+
+user_config.yaml の例:
+    daily_template:
+      sections: [header, schedule, focus, special_day, plan, carry_over, sprint, routine, notes, review]
+      templates:
+        focus: |
+          ## 🔥 今日のフォーカス
+          - [ ]
+
+      template_files:                 # scripts/config からの相対パス
+        compact_project: templates/compact_project.md
+      project_templates:              # プロジェクト名 → テンプレート名
+        dinner: compact_project
+
+merge_calendar_tasks.py は「## 📋 今日の予定」見出しの下に予定を差し込むため、
+schedule セクションを変更する場合も見出しは残してください。
+carry_over.py は見出しに「持ち越し」を含むセクションを持ち越し済みのタスクとして読むため、
+carry_over セクションを変更する場合も見出しの「持ち越し」は残してください。
+"""
+
+import os
+import re
+import ast
+
+
+class TemplateError(ValueError):
+    """
+    テンプレートの構文エラー（テンプレート名と行番号付き）
+    """
+
+    def __init__(self, message, name=None, line=None):
+        location = f"{name or '<template>'}"
+        if line is not None:
+            location += f":{line}"
+        super().__init__(f"{location}: {message}")
+        self.name = name
+        self.line = line
+
+
+HEADER_TEMPLATE = "# 日次タスク {{ date }}\n\n"
+
+SCHEDULE_TEMPLATE = "## 📋 今日の予定\n\n\n"
+
+SPECIAL_DAY_TEMPLATE = """\
+{% if is_monday %}
+## 🚀 週初めのタスク
+
+
+{% elif is_friday %}
+## 📊 週末のタスク
+
+
+{% endif %}
+"""
+
+PLAN_TEMPLATE = """\
+{% if plan %}
+## ⏱ 今日のキャパシティ
+- 稼働可能: {{ plan.capacity }}（カレンダーの予定: {{ plan.busy }}）
+- 計画: {{ plan.planned }}（{{ plan.scheduled_count }} 件）
+{% if plan.deferred_count %}
+- 持ち越し: {{ plan.deferred_count }} 件（{{ plan.deferred_time }}）
+{% endif %}
+{% if plan.blocks %}
+
+### 時間割
+{% for block in plan.blocks %}
+- {{ block.start }}-{{ block.end }} {{ block.title }}
+{% endfor %}
+{% endif %}
+{% if plan.deferred_items %}
+
+### 計画に入らなかったタスク（優先順）
+{% for item in plan.deferred_items %}
+- {% if item.kind == "carry_over" %}[ ] {% endif %}{{ item.rank }}. {{ item.title }}（{{ item.time }}、{{ item.reason }}）
+{% endfor %}
+{% endif %}
+
+{% endif %}
+"""
+
+CARRY_OVER_TEMPLATE = """\
+{% if carry_over %}
+## ⏩ 持ち越しタスク
+{% for item in carry_over %}
+- [ ] {{ item.text }}
+{% endfor %}
+
+{% endif %}
+"""
+
+SPRINT_TEMPLATE = """\
+{% if projects %}
+## 🎯 スプリントタスク
+
+{% for project in projects %}
+{% include project.template %}
+{% endfor %}
+{% endif %}
+"""
+
+PROJECT_TEMPLATE = """\
+### {{ project.name }}
+{% for epic in project.epics %}
+#### {{ epic.name }}
+{% for story in epic.stories %}
+- [ ] {{ story.id|default("Unknown") }}: {{ story.title|default("Untitled Story") }}
+{% endfor %}
+
+{% endfor %}
+
+"""
+
+ROUTINE_TEMPLATE = """\
+## 🔄 ルーチンタスク
+{% for task in routine_tasks %}
+- [ ] [{{ task.routine.frequency|default("")|capitalize }}] {{ task.title|default("Untitled Task") }}
+{% else %}
+- [ ] デイリータスクの確認
+{% endfor %}
+
+"""
+
+NOTES_TEMPLATE = "## 📝 備考・メモ\n- \n\n"
+
+REVIEW_TEMPLATE = "## 📈 今日の振り返り\n- 達成したこと: \n- 障害/課題: \n- 明日のアクション: \n"
+
+DEFAULT_TEMPLATES = {
+    'header': HEADER_TEMPLATE,
+    'schedule': SCHEDULE_TEMPLATE,
+    'special_day': SPECIAL_DAY_TEMPLATE,
+    'plan': PLAN_TEMPLATE,
+    'carry_over': CARRY_OVER_TEMPLATE,
+    'sprint': SPRINT_TEMPLATE,
+    'project': PROJECT_TEMPLATE,
+    'routine': ROUTINE_TEMPLATE,
+    'notes': NOTES_TEMPLATE,
+    'review': REVIEW_TEMPLATE
+}
+
+DEFAULT_SECTIONS = ['header', 'schedule', 'special_day', 'plan', 'carry_over', 'sprint', 'routine', 'notes', 'review']
+
+WEEKDAY_NAMES = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+MAX_INCLUDE_DEPTH = 20
+
+
+# --- 実行時ヘルパー（コンパイルしたテンプレートから呼ばれる） ---
+
+_MISSING = object()
+
+
+def _path(value, keys, default=""):
+    """
+    value から keys を順にたどる（辞書はキー、それ以外は属性）。見つからなければ default
+    """
+    for key in keys:
+        if isinstance(value, dict):
+            value = value.get(key, _MISSING)
+        else:
+            value = getattr(value, key, _MISSING)
+        if value is _MISSING:
+            return default
+    return value
+
+
+def _to_str(value):
+    return value if isinstance(value, str) else str(value)
+
+
+def _iterate(value):
+    return () if value is None else value
+
+
+def _default(value, default):
+    return default if value is None else value
+
+
+FILTERS = {
+    'capitalize': lambda value: _to_str(value).capitalize(),
+    'lower': lambda value: _to_str(value).lower(),
+    'upper': lambda value: _to_str(value).upper()
+}
+
+
+# --- 解析 ---
+
+TAG_RE = re.compile(r'\{\{(.*?)\}\}|\{%(.*?)%\}|\{#.*?#\}', re.S)
+EXPR_TOKEN_RE = re.compile(r'''\s*(?:
+    (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<number>-?\d+)
+  | (?P<op>==|!=|\||\(|\))
+  | (?P<name>[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*)
+)''', re.X)
+
+
+def _tokenize_expression(text, name, line):
+    tokens = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        match = EXPR_TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise TemplateError(f"式を解析できません: {text!r}", name, line)
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+    return tokens
+
+
+def _tokenize(source, name):
+    """
+    テキストとタグに分割する（タグだけの行は行ごと取り除く）
+
+    戻り値: [(種類, 内容, 行番号)] 種類は 'text' / 'var' / 'block'
+    """
+    tokens = []
+    pos = 0
+    for match in TAG_RE.finditer(source):
+        line = source.count("\n", 0, match.start()) + 1
+        text = source[pos:match.start()]
+        end = match.end()
+
+        if match.group(1) is None:
+            # ブロックタグとコメントは、行にそれだけしか無ければ行ごと除く
+            line_start = source.rfind("\n", 0, match.start()) + 1
+            line_end = source.find("\n", match.end())
+            if line_end == -1:
+                line_end = len(source)
+            prefix = source[line_start:match.start()]
+            suffix = source[match.end():line_end]
+            if line_start >= pos and not prefix.strip() and not suffix.strip():
+                text = text[:len(text) - len(prefix)]
+                end = min(line_end + 1, len(source))
+
+        if text:
+            tokens.append(('text', text, line))
+        if match.group(1) is not None:
+            tokens.append(('var', match.group(1), line))
+        elif match.group(2) is not None:
+            tokens.append(('block', match.group(2).strip(), line))
+        pos = end
+
+    if pos < len(source):
+        tokens.append(('text', source[pos:], source.count("\n", 0, pos) + 1))
+    return tokens
+
+
+def parse(source, name=None):
+    """
+    テンプレートを構文木（タプルのリスト）に変換
+    """
+    root = []
+    # スタックの要素: (タグ名, ノード, 現在の本文リスト, 行番号)
+    stack = [('root', None, root, 1)]
+
+    for kind, content, line in _tokenize(source, name):
+        body = stack[-1][2]
+        if kind == 'text':
+            body.append(('text', content))
+            continue
+        if kind == 'var':
+            body.append(('var', _parse_value(_tokenize_expression(content, name, line), name, line)))
+            continue
+
+        keyword, _, rest = content.partition(" ")
+        rest = rest.strip()
+        if keyword == 'if':
+            node = ['if', [(_parse_condition(rest, name, line), [])], None]
+            body.append(node)
+            stack.append(('if', node, node[1][0][1], line))
+        elif keyword == 'elif':
+            tag, node, _, _ = stack[-1]
+            if tag != 'if' or node[2] is not None:
+                raise TemplateError("対応する if がありません: elif", name, line)
+            branch = (_parse_condition(rest, name, line), [])
+            node[1].append(branch)
+            stack[-1] = ('if', node, branch[1], line)
+        elif keyword == 'else':
+            tag, node, _, _ = stack[-1]
+            if tag == 'if' and node[2] is None:
+                node[2] = []
+                stack[-1] = ('if', node, node[2], line)
+            elif tag == 'for' and node[4] is None:
+                node[4] = []
+                stack[-1] = ('for', node, node[4], line)
+            else:
+                raise TemplateError("対応する if / for がありません: else", name, line)
+        elif keyword == 'endif':
+            if stack[-1][0] != 'if':
+                raise TemplateError("対応する if がありません: endif", name, line)
+            stack.pop()
+        elif keyword == 'for':
+            match = re.match(r'([A-Za-z_]\w*)\s+in\s+(.+)$', rest)
+            if not match:
+                raise TemplateError(f"for の構文が正しくありません: {content!r}", name, line)
+            iterable = _parse_value(_tokenize_expression(match.group(2), name, line), name, line)
+            node = ['for', match.group(1), iterable, [], None]
+            body.append(node)
+            stack.append(('for', node, node[3], line))
+        elif keyword == 'endfor':
+            if stack[-1][0] != 'for':
+                raise TemplateError("対応する for がありません: endfor", name, line)
+            stack.pop()
+        elif keyword == 'include':
+            body.append(('include', _parse_value(_tokenize_expression(rest, name, line), name, line)))
+        else:
+            raise TemplateError(f"不明なタグです: {keyword}", name, line)
+
+    if len(stack) > 1:
+        tag, _, _, line = stack[-1]
+        raise TemplateError(f"{tag} が閉じられていません", name, line)
+    return root
+
+
+def _parse_value(tokens, name, line):
+    """
+    値（文字列・数値・名前）とフィルタを解析
+
+    戻り値: ('literal', 値, フィルタ) または ('path', [名前...], フィルタ)
+    フィルタは [(フィルタ名, 引数またはNone)]
+    """
+    if not tokens:
+        raise TemplateError("値がありません", name, line)
+    kind, text = tokens[0]
+    if kind == 'string' or kind == 'number':
+        value = ('literal', ast.literal_eval(text))
+    elif kind == 'name':
+        value = ('path', text.split("."))
+    else:
+        raise TemplateError(f"値を解析できません: {text!r}", name, line)
+
+    filters = []
+    pos = 1
+    while pos < len(tokens):
+        if tokens[pos] != ('op', '|') or pos + 1 >= len(tokens) or tokens[pos + 1][0] != 'name':
+            raise TemplateError(f"フィルタの構文が正しくありません: {tokens[pos][1]!r}", name, line)
+        filter_name = tokens[pos + 1][1]
+        pos += 2
+        argument = None
+        if pos < len(tokens) and tokens[pos] == ('op', '('):
+            if pos + 2 >= len(tokens) or tokens[pos + 1][0] not in ('string', 'number') \
+                    or tokens[pos + 2] != ('op', ')'):
+                raise TemplateError(f"フィルタの引数が正しくありません: {filter_name}", name, line)
+            argument = ast.literal_eval(tokens[pos + 1][1])
+            pos += 3
+        if filter_name != 'default' and filter_name not in FILTERS:
+            raise TemplateError(f"不明なフィルタです: {filter_name}", name, line)
+        filters.append((filter_name, argument))
+    return value + (filters,)
+
+
+def _parse_condition(text, name, line):
+    """
+    条件式（[not] 値 [== / != 値]）を解析
+    """
+    tokens = _tokenize_expression(text, name, line)
+    negate = False
+    if tokens and tokens[0] == ('name', 'not'):
+        negate = True
+        tokens = tokens[1:]
+    for index, token in enumerate(tokens):
+        if token in (('op', '=='), ('op', '!=')):
+            left = _parse_value(tokens[:index], name, line)
+            right = _parse_value(tokens[index + 1:], name, line)
+            return ('compare', negate, left, token[1], right)
+    return ('truthy', negate, _parse_value(tokens, name, line))
+
+
+# --- コード生成 ---
+
+class _CodeGenerator:
+    def __init__(self, name):
+        self.name = name
+        self.lines = []
+        self.counter = 0
+
+    def emit(self, depth, line):
+        self.lines.append("    " * depth + line)
+
+    def value(self, value, scope):
+        kind, target, filters = value
+        filters = list(filters)
+        if kind == 'literal':
+            code = repr(target)
+        else:
+            head, keys = target[0], tuple(target[1:])
+            base = f"l_{head}" if head in scope else None
+            if base is None:
+                keys = (head,) + keys
+                base = "ctx"
+            default = '""'
+            # パスの直後の default はキーが無い場合の値として使う（dict.get と同じ）
+            if filters and filters[0][0] == 'default':
+                default = repr(filters.pop(0)[1])
+            if len(keys) == 1:
+                # よく使う1段の辞書参照は関数呼び出しを避けてその場で展開する
+                code = f"({base}.get({keys[0]!r}, {default}) if {base}.__class__ is dict " \
+                       f"else _path({base}, {keys!r}, {default}))"
+            else:
+                code = f"_path({base}, {keys!r}, {default})" if keys else base
+        for filter_name, argument in filters:
+            if filter_name == 'default':
+                code = f"_default({code}, {argument!r})"
+            else:
+                code = f"_filters[{filter_name!r}]({code})"
+        return code
+
+    def condition(self, condition, scope):
+        if condition[0] == 'compare':
+            _, negate, left, operator, right = condition
+            code = f"({self.value(left, scope)} {operator} {self.value(right, scope)})"
+        else:
+            _, negate, value = condition
+            code = self.value(value, scope)
+        return f"not {code}" if negate else code
+
+    def scope_dict(self, scope):
+        if not scope:
+            return "ctx"
+        items = ", ".join(f"{name!r}: l_{name}" for name in scope)
+        return f"dict(ctx, **{{{items}}})"
+
+    def body(self, nodes, depth, scope):
+        if not nodes:
+            self.emit(depth, "pass")
+            return
+        # 連続するテキストと値は1回の w 呼び出しにまとめる
+        pieces = []
+        for node in nodes:
+            kind = node[0]
+            if kind == 'text':
+                pieces.append(repr(node[1]))
+                continue
+            if kind == 'var':
+                value = node[1]
+                if value[0] == 'literal' and not value[2]:
+                    pieces.append(repr(_to_str(value[1])))
+                else:
+                    pieces.append(f"str({self.value(value, scope)})")
+                continue
+            if pieces:
+                self.emit(depth, f"w({' + '.join(pieces)})")
+                pieces = []
+            if kind == 'if':
+                for index, (condition, branch) in enumerate(node[1]):
+                    keyword = "if" if index == 0 else "elif"
+                    self.emit(depth, f"{keyword} {self.condition(condition, scope)}:")
+                    self.body(branch, depth + 1, scope)
+                if node[2] is not None:
+                    self.emit(depth, "else:")
+                    self.body(node[2], depth + 1, scope)
+            elif kind == 'for':
+                _, var, iterable, loop_body, else_body = node
+                self.counter += 1
+                empty = f"_empty{self.counter}"
+                if else_body is not None:
+                    self.emit(depth, f"{empty} = True")
+                self.emit(depth, f"for l_{var} in _iterate({self.value(iterable, scope)}):")
+                if else_body is not None:
+                    self.emit(depth + 1, f"{empty} = False")
+                self.body(loop_body, depth + 1, scope + [var] if var not in scope else scope)
+                if else_body is not None:
+                    self.emit(depth, f"if {empty}:")
+                    self.body(else_body, depth + 1, scope)
+            elif kind == 'include':
+                self.emit(depth, f"include({self.value(node[1], scope)}, {self.scope_dict(scope)}, w)")
+        if pieces:
+            self.emit(depth, f"w({' + '.join(pieces)})")
+
+    def generate(self, nodes):
+        self.emit(0, "def render(ctx, w, include):")
+        self.body(nodes, 1, [])
+        return "\n".join(self.lines) + "\n"
+
+
+_RUNTIME = {
+    '_path': _path,
+    '_to_str': _to_str,
+    '_iterate': _iterate,
+    '_default': _default,
+    '_filters': FILTERS
+}
+
+# テンプレートのソース → コンパイル済みの render 関数
+_compiled_cache = {}
+
+
+def compile_template(source, name=None):
+    """
+    テンプレートをコンパイルして render(ctx, w, include) 関数を返す（同じソースはキャッシュを返す）
+    """
+    render = _compiled_cache.get(source)
+    if render is not None:
+        return render
+
+    code = _CodeGenerator(name).generate(parse(source, name))
+    namespace = dict(_RUNTIME)
+    exec(compile(code, f"<template {name or ''}>", "exec"), namespace)
+    render = namespace['render']
+    _compiled_cache[source] = render
+    return render
+
+
+class TemplateSet:
+    """
+    名前付きテンプレート（セクション）の集合と出力順
+    """
+
+    def __init__(self, templates=None, sections=None, project_templates=None):
+        self.templates = dict(DEFAULT_TEMPLATES)
+        self.templates.update(templates or {})
+        self.sections = list(sections or DEFAULT_SECTIONS)
+        self.project_templates = dict(project_templates or {})
+        self.depth = 0
+
+    def get(self, name):
+        source = self.templates.get(name)
+        if source is None:
+            raise TemplateError(f"テンプレートが見つかりません: {name}")
+        return compile_template(source, name)
+
+    def compile_all(self):
+        """
+        すべてのテンプレートをコンパイルして構文エラーを早めに検出する
+        """
+        for name in self.templates:
+            self.get(name)
+        for name in self.sections:
+            self.get(name)
+
+    def include(self, name, ctx, w):
+        if self.depth >= MAX_INCLUDE_DEPTH:
+            raise TemplateError(f"include の入れ子が深すぎます: {name}")
+        self.depth += 1
+        try:
+            self.get(name)(ctx, w, self.include)
+        finally:
+            self.depth -= 1
+
+    def render_to(self, w, ctx):
+        """
+        セクションを順に w（list.append やファイルの write）へ出力
+        """
+        for name in self.sections:
+            self.include(name, ctx, w)
+
+    def render(self, ctx):
+        parts = []
+        self.render_to(parts.append, ctx)
+        return "".join(parts)
+
+
+def load_template_set(template_config, config_dir=None):
+    """
+    user_config.yaml の daily_template からテンプレート集合を作成（未設定ならデフォルト）
+    """
+    if not template_config:
+        return TemplateSet()
+    if not isinstance(template_config, dict):
+        raise TemplateError("daily_template は辞書で指定してください")
+
+    templates = dict(template_config.get('templates') or {})
+    for name, relative_path in (template_config.get('template_files') or {}).items():
+        file_path = relative_path if os.path.isabs(relative_path) else os.path.join(config_dir or ".", relative_path)
+        with open(file_path, 'r', encoding='utf-8') as f:
+            templates[name] = f.read()
+
+    template_set = TemplateSet(templates, template_config.get('sections'), template_config.get('project_templates'))
+    template_set.compile_all()
+    return template_set
+
+
+def build_context(sprint_stories, routine_tasks, today_date, project_templates=None, plan=None, carry_over=None):
+    """
+    テンプレートに渡す値を作成（ストーリーはプロジェクト・エピック別にまとめる）
+
+    plan は scheduler.plan_summary() の戻り値（キャパシティ計画を使わない場合はNone）
+    carry_over は carry_over.collect_carry_over() の戻り値（前日以前から持ち越す未完了タスク）
+    """
+    project_templates = project_templates or {}
+
+    # プロジェクト別・エピック別にグループ化（出現順を保つ）
+    grouped = {}
+    for story in sprint_stories:
+        project_name = story.get('project', 'その他のプロジェクト')
+        epic_name = story.get('epic_name', 'その他のエピック')
+        grouped.setdefault(project_name, {}).setdefault(epic_name, []).append(story)
+
+    projects = [
+        {
+            'name': project_name,
+            'template': project_templates.get(project_name, 'project'),
+            'epics': [{'name': epic_name, 'stories': stories} for epic_name, stories in epics.items()]
+        }
+        for project_name, epics in grouped.items()
+    ]
+
+    weekday = today_date.weekday()
+    return {
+        'date': today_date.strftime("%Y-%m-%d"),
+        'weekday': WEEKDAY_NAMES[weekday],
+        'is_monday': weekday == 0,
+        'is_friday': weekday == 4,
+        'projects': projects,
+        'sprint_stories': sprint_stories,
+        'routine_tasks': routine_tasks,
+        'story_count': len(sprint_stories),
+        'routine_count': len(routine_tasks),
+        'plan': plan,
+        'carry_over': carry_over or []
+    }
+
+
+def render_daily_tasks(sprint_stories, routine_tasks, today_date, template_set=None, plan=None, carry_over=None):
+    """
+    日次タスクのマークダウンを文字列で返す
+    """
+    if template_set is None:
+        template_set = TemplateSet()
+    ctx = build_context(sprint_stories, routine_tasks, today_date, template_set.project_templates, plan, carry_over)
+    return template_set.render(ctx)
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ストーリーの依存関係グラフ
+
+1. ファイル単位で更新する（内容が変わったファイルのストーリーだけを差し替える）
+2. 変更があったときだけ、(ファイル, ストーリーID) のノードに番号を振って依存先を解決し
+   （同じファイル → 全バックログの順）、トポロジカル順・状態（completed / ready / blocked / cycle）・
+   クリティカルパスを計算し直す
+
+状態の判定:
+- completed: status が completed
+- ready: すべての依存先が completed（どのバックログにも無い依存先は判定に使わず missing として報告）
+- blocked: 未完了の依存先がある
+- cycle: 循環依存に含まれる（循環を解消するまで ready にならない）
+
+クリティカルパスは未完了のストーリーだけをたどり、estimate の合計が最大になる依存の連なりです。
+"""
+
+
+COMPLETED = "completed"
+READY = "ready"
+BLOCKED = "blocked"
+CYCLE = "cycle"
+
+
+def split_dependencies(value):
+    """
+    dependencies（カンマ区切りの文字列またはリスト）をIDのリストにする
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [str(dependency).strip() for dependency in value if str(dependency).strip()]
+
+
+def parse_estimate(value):
+    """
+    estimate を数値にする（空・不正な値は0）
+    """
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return number if number > 0 else 0.0
+
+
+def story_record(story):
+    """
+    グラフで使う項目だけを取り出す (ID, status, 依存先IDのタプル, estimate)
+    """
+    return (
+        str(story.get('id') or ''),
+        story.get('status') or '',
+        tuple(split_dependencies(story.get('dependencies'))),
+        parse_estimate(story.get('estimate'))
+    )
+
+
+class DependencyGraph:
+    """
+    バックログファイルごとのストーリーから作る依存関係グラフ（ファイル単位で差分更新）
+
+    ノードは (ファイル, ストーリーID) で、別のプロジェクトに同じIDがあっても別のストーリーとして扱う。
+    依存先のIDは同じファイル → 全バックログの順で解決する（validate_portfolio.py と同じ）。
+    全バックログで複数の定義がある場合は、そのすべてを依存先とする
+    """
+
+    def __init__(self):
+        self.files = {}        # ファイル → {ストーリーID: レコード}
+        self.analysis = None
+
+    def update_file(self, file_path, stories):
+        """
+        ファイルのストーリーを差し替える。内容が変わっていればTrue
+        """
+        records = {}
+        for story in stories:
+            record = story_record(story)
+            if record[0]:
+                records.setdefault(record[0], record)
+
+        if self.files.get(file_path) == records:
+            return False
+        self.files[file_path] = records
+        self.analysis = None
+        return True
+
+    def remove_file(self, file_path):
+        """
+        ファイルのストーリーをグラフから取り除く
+        """
+        if self.files.pop(file_path, None) is None:
+            return False
+        self.analysis = None
+        return True
+
+    def update_from_items(self, items):
+        """
+        extract_tasks.py の形式のアイテムからグラフを更新し、変更のあったファイル数を返す
+        （items に含まれないファイルは取り除く）
+        """
+        by_file = {}
+        for item in items:
+            if item.get('type') == 'story':
+                by_file.setdefault(item.get('file_path', ''), []).append(item)
+
+        changed = 0
+        for file_path in [path for path in self.files if path not in by_file]:
+            changed += self.remove_file(file_path)
+        for file_path, stories in by_file.items():
+            changed += self.update_file(file_path, stories)
+        return changed
+
+    def edge_count(self):
+        return sum(len(record[2]) for records in self.files.values() for record in records.values())
+
+    def _build(self):
+        """
+        ノードに番号を振り、依存先を番号のリストにする
+
+        番号はファイル・ストーリーの登録順で、どのバックログにも無い依存先は (None, ID) のノードとして最後に追加
+        """
+        keys = []          # 番号 → (ファイル, ストーリーID)
+        index = {}         # (ファイル, ストーリーID) → 番号
+        by_id = {}         # ストーリーID → 定義しているノードの番号のリスト
+        status = []
+        estimate = []
+        for file_path, records in self.files.items():
+            for story_id, record in records.items():
+                number = len(keys)
+                keys.append((file_path, story_id))
+                index[(file_path, story_id)] = number
+                by_id.setdefault(story_id, []).append(number)
+                status.append(record[1])
+                estimate.append(record[3])
+
+        defined_count = len(keys)
+        deps = []
+        for number in range(defined_count):
+            file_path, story_id = keys[number]
+            targets = []
+            for dependency in self.files[file_path][story_id][2]:
+                local = index.get((file_path, dependency))
+                if local is not None:
+                    targets.append(local)
+                    continue
+                definitions = by_id.get(dependency)
+                if definitions:
+                    targets.extend(definitions)
+                    continue
+                missing = index.get((None, dependency))
+                if missing is None:
+                    missing = len(keys)
+                    keys.append((None, dependency))
+                    index[(None, dependency)] = missing
+                    status.append('')
+                    estimate.append(0.0)
+                targets.append(missing)
+            deps.append(targets)
+        deps.extend([] for _ in range(len(keys) - defined_count))
+        defined = [number < defined_count for number in range(len(keys))]
+        return keys, index, by_id, status, estimate, deps, defined
+
+    def analyze(self):
+        """
+        トポロジカル順・状態・クリティカルパスを計算（変更が無ければ前回の結果を返す）
+        """
+        if self.analysis is not None:
+            return self.analysis
+
+        keys, index, by_id, status, estimate, deps, defined = self._build()
+        size = len(keys)
+        dependents = [[] for _ in range(size)]
+        waiting = [0] * size
+        for number in range(size):
+            for dependency in deps[number]:
+                dependents[dependency].append(number)
+                waiting[number] += 1
+
+        # Kahn法（order をそのままキューとして使う。同順位は登録した順）
+        order = [number for number in range(size) if not waiting[number]]
+        for number in order:
+            for dependent in dependents[number]:
+                waiting[dependent] -= 1
+                if not waiting[dependent]:
+                    order.append(dependent)
+
+        # pending: バックログにあり未完了（依存先として ready を妨げるもの）
+        completed = [defined[number] and status[number] == COMPLETED for number in range(size)]
+        pending = [defined[number] and not completed[number] for number in range(size)]
+
+        # 状態とクリティカルパス（未完了のストーリーのみ、estimate の合計が最大の連なり）を1回の走査で求める
+        state = [CYCLE] * size
+        length = [0.0] * size
+        previous = [-1] * size
+        for number in order:
+            if not pending[number]:
+                state[number] = COMPLETED if completed[number] else READY
+                continue
+            best = -1
+            best_length = 0.0
+            for dependency in deps[number]:
+                if pending[dependency] and length[dependency] >= best_length:
+                    best, best_length = dependency, length[dependency]
+            state[number] = BLOCKED if best != -1 else READY
+            length[number] = best_length + estimate[number]
+            previous[number] = best
+
+        # 順序に入らなかったもののうち、循環の後ろにあるだけのものは blocked にする
+        # （後続から順に取り除き、最後まで残ったものが循環に含まれる）
+        remaining_dependents = [0] * size
+        for number in range(size):
+            if waiting[number]:
+                for dependency in deps[number]:
+                    if waiting[dependency]:
+                        remaining_dependents[dependency] += 1
+        stack = [number for number in range(size) if waiting[number] and not remaining_dependents[number]]
+        while stack:
+            number = stack.pop()
+            state[number] = BLOCKED
+            for dependency in deps[number]:
+                if waiting[dependency]:
+                    remaining_dependents[dependency] -= 1
+                    if not remaining_dependents[dependency]:
+                        stack.append(dependency)
+        for number in range(size):
+            if waiting[number] and completed[number]:
+                state[number] = COMPLETED
+
+        end = max(order, key=lambda number: length[number], default=-1)
+        path = []
+        while end != -1 and length[end] > 0:
+            path.append(end)
+            end = previous[end]
+        path.reverse()
+
+        self.analysis = {
+            'keys': keys,
+            'index': index,
+            'by_id': by_id,
+            'status': status,
+            'deps': deps,
+            'defined': defined,
+            'order': order,
+            'state': state,
+            'length': length,
+            'critical_path': path
+        }
+        return self.analysis
+
+    def _lookup(self, story_id, file_path=None):
+        """
+        ストーリーのノード番号（file_path を省略した場合はそのIDの最初の定義、無ければNone）
+        """
+        analysis = self.analyze()
+        story_id = str(story_id)
+        if file_path is not None:
+            number = analysis['index'].get((file_path, story_id))
+            if number is not None:
+                return number
+        definitions = analysis['by_id'].get(story_id)
+        return definitions[0] if definitions else None
+
+    def topological_order(self):
+        """
+        依存先が先に来る順のストーリーID（循環に含まれるものとその後続は含まない）
+        """
+        analysis = self.analyze()
+        return [analysis['keys'][number][1] for number in analysis['order'] if analysis['defined'][number]]
+
+    def state(self, story_id, file_path=None):
+        """
+        ストーリーの状態（グラフに無いIDはNone）
+        """
+        number = self._lookup(story_id, file_path)
+        if number is None:
+            return None
+        return self.analysis['state'][number]
+
+    def is_ready(self, story_id, file_path=None):
+        return self.state(story_id, file_path) == READY
+
+    def classify(self):
+        """
+        {(ファイル, ストーリーID): 状態} を返す
+        """
+        analysis = self.analyze()
+        state = analysis['state']
+        return {key: state[number] for number, key in enumerate(analysis['keys']) if analysis['defined'][number]}
+
+    def completed_ids(self):
+        """
+        すべての定義が完了しているストーリーIDの集合（同じIDの未完了のストーリーが別のバックログにあれば含めない）
+        """
+        analysis = self.analyze()
+        state = analysis['state']
+        return {
+            story_id for story_id, definitions in analysis['by_id'].items()
+            if all(state[number] == COMPLETED for number in definitions)
+        }
+
+    def blockers(self, story_id, file_path=None):
+        """
+        ストーリーの未完了の依存先ID
+        """
+        number = self._lookup(story_id, file_path)
+        if number is None:
+            return []
+        analysis = self.analysis
+        return [analysis['keys'][dependency][1] for dependency in analysis['deps'][number]
+                if analysis['defined'][dependency] and analysis['status'][dependency] != COMPLETED]
+
+    def missing(self):
+        """
+        どのバックログにも無い依存先と、それを参照しているストーリー {依存先ID: [ストーリーID]}
+        """
+        analysis = self.analyze()
+        keys = analysis['keys']
+        defined = analysis['defined']
+        result = {}
+        for number, dependencies in enumerate(analysis['deps']):
+            if not defined[number]:
+                continue
+            for dependency in dependencies:
+                if not defined[dependency]:
+                    result.setdefault(keys[dependency][1], []).append(keys[number][1])
+        return result
+
+    def critical_path(self):
+        """
+        クリティカルパス (estimate の合計, [ストーリーID])
+        """
+        analysis = self.analyze()
+        path = analysis['critical_path']
+        total = analysis['length'][path[-1]] if path else 0.0
+        return total, [analysis['keys'][number][1] for number in path]
+
+
+def filter_ready_stories(stories, graph):
+    """
+    ready のストーリーだけを返す（グラフに無いストーリーはそのまま残す）
+    戻り値: (ready のストーリー, 除外したストーリー)
+    """
+    ready = []
+    excluded = []
+    for story in stories:
+        state = graph.state(story.get('id'), story.get('file_path'))
+        if state is None or state == READY:
+            ready.append(story)
+        else:
+            excluded.append(story)
+    return ready, excluded
@@ -8,28 +8,26 @@
 
 import os
 import sys
-import yaml
-import json
 import argparse
-import glob
 from datetime import datetime
-from pathlib import Path
+
+import phase_timer
+from aipm import paths
+from aipm.lazy import lazy_import
+
+# --help や小さな処理で読み込み時間を払わないよう、初回アクセスまで読み込まない
+yaml = lazy_import("yaml")
+json = lazy_import("json")
+glob = lazy_import("glob")
+pathlib = lazy_import("pathlib")
+yaml_schema = lazy_import("yaml_schema")
 
 
 def get_root_dir():
     """
-    環境変数またはデフォルト値からルートディレクトリを取得
+    環境変数またはデフォルト値からルートディレクトリを取得（aipm.paths と共通）
     """
-    # 環境変数 AIPM_ROOT が設定されていれば使用
-    root_dir = os.environ.get('AIPM_ROOT')
-    
-    # 環境変数が設定されていない場合は引数で渡されたパスを使用
-    if not root_dir:
-        # デフォルトパスを使用
-        root_dir = os.path.expanduser("~/aipm_v3")
-        print(f"環境変数 AIPM_ROOT が設定されていません。デフォルトパス {root_dir} を使用します。")
-    
-    return root_dir
+    return paths.get_root_dir()
 
 
 def find_yaml_files(root_dir, file_pattern):
@@ -77,6 +75,7 @@ def load_yaml_file(file_path):
     YAMLファイルを読み込む
     """
     try:
+        phase_timer.count_file(file_path)
         with open(file_path, 'r', encoding='utf-8') as f:
             return yaml.safe_load(f)
     except Exception as e:
@@ -89,7 +88,7 @@ def extract_project_info(file_path):
     ファイルパスからプログラム名とプロジェクト名を抽出
     想定パス構造: .../Stock/programs/[プログラム名]/projects/[プロジェクト名]/...
     """
-    path_parts = Path(file_path).parts
+    path_parts = pathlib.Path(file_path).parts
     
     program_name = "Unknown Program"
     project_name = "Unknown Project"
@@ -104,6 +103,66 @@ def extract_project_info(file_path):
     return program_name, project_name
 
 
+def extract_stories_from_backlog_data(data, file_path):
+    """
+    読み込み済みのbacklog.yamlデータからストーリーを抽出
+    """
+    stories_info = []
+    
+    # プログラム情報とプロジェクト情報を正しく取得
+    program_name, project_name = extract_project_info(file_path)
+    
+    # エピックとストーリーを抽出
+    epics = data.get('epics', [])
+    
+    for epic in epics:
+        epic_id = epic.get('epic_id', '')
+        epic_name = epic.get('title', 'Unknown Epic')  # 'name'ではなく'title'を使用
+        stories = epic.get('stories', [])
+        
+        for story in stories:
+            story_info = {
+                'type': 'story',
+                'file_path': file_path,
+                'program': program_name,
+                'project': project_name,
+                'epic_id': epic_id,
+                'epic_name': epic_name
+            }
+            # 出力項目はスキーマ定義（yaml_schema.py）と共有
+            for output_key, yaml_key, default in yaml_schema.STORY_FIELDS:
+                story_info[output_key] = story.get(yaml_key, default)
+            for list_key in yaml_schema.STORY_LIST_FIELDS:
+                story_info[list_key] = ','.join(story.get(list_key, []))
+            stories_info.append(story_info)
+    
+    return stories_info
+
+
+def extract_sprints_from_backlog_data(data, file_path):
+    """
+    読み込み済みのbacklog.yamlデータからスプリント定義を抽出
+    日付はYAMLの型に関わらず YYYY-MM-DD 形式の文字列に揃える
+    """
+    sprints_info = []
+    
+    for sprint in data.get('sprints', []) or []:
+        if not isinstance(sprint, dict):
+            continue
+        sprints_info.append({
+            'type': 'sprint',
+            'file_path': file_path,
+            'sprint_id': sprint.get('sprint_id', ''),
+            'name': sprint.get('name', ''),
+            'start_date': str(sprint.get('start_date', '') or ''),
+            'end_date': str(sprint.get('end_date', '') or ''),
+            'status': sprint.get('status', ''),
+            'goal': sprint.get('goal', '')
+        })
+    
+    return sprints_info
+
+
 def extract_stories_from_backlog(backlog_files):
     """
     backlog.yamlからストーリーを抽出
@@ -115,40 +174,8 @@ def extract_stories_from_backlog(backlog_files):
             data = load_yaml_file(file_path)
             if not data:
                 continue
-                
-            # プログラム情報とプロジェクト情報を正しく取得
-            program_name, project_name = extract_project_info(file_path)
-            
-            # エピックとストーリーを抽出
-            epics = data.get('epics', [])
             
-            for epic in epics:
-                epic_id = epic.get('epic_id', '')
-                epic_name = epic.get('title', 'Unknown Epic')  # 'name'ではなく'title'を使用
-                stories = epic.get('stories', [])
-                
-                for story in stories:
-                    story_info = {
-                        'type': 'story',
-                        'file_path': file_path,
-                        'program': program_name,
-                        'project': project_name,
-                        'epic_id': epic_id,
-                        'epic_name': epic_name,
-                        'id': story.get('story_id', ''),
-                        'title': story.get('title', 'Unknown Story'),
-                        'description': story.get('description', ''),
-                        'acceptance_criteria': story.get('acceptance_criteria', ''),
-                        'priority': story.get('priority', ''),
-                        'status': story.get('status', ''),
-                        'sprint_id': story.get('sprint_id', ''),
-                        'sprint': story.get('sprint', ''),
-                        'estimate': story.get('estimate', ''),
-                        'assignee': story.get('assignee', ''),
-                        'labels': ','.join(story.get('labels', [])),
-                        'dependencies': ','.join(story.get('dependencies', []))
-                    }
-                    all_stories.append(story_info)
+            all_stories.extend(extract_stories_from_backlog_data(data, file_path))
                     
         except Exception as e:
             print(f"エラー: {file_path} の処理中にエラーが発生しました: {e}")
@@ -168,6 +195,7 @@ def extract_routine_tasks(file_path):
         return []
     
     try:
+        phase_timer.count_file(file_path)
         with open(file_path, 'r', encoding='utf-8') as file:
             print(f"ファイル読み込み成功: {file_path}")
             file_content = file.read()
@@ -329,44 +357,78 @@ def save_to_csv(data, output_file):
         print(f"エラー: {output_file} への保存中にエラーが発生しました: {e}")
 
 
-def main():
-    parser = argparse.ArgumentParser(description='バックログとルーチンからタスクを抽出するスクリプト')
+def add_arguments(parser):
+    """
+    抽出のコマンドライン引数を追加（aipm extract と共通）
+    """
     parser.add_argument('--root', help='プロジェクトのルートディレクトリ')
     parser.add_argument('--format', choices=['json', 'csv'], default='json', help='出力形式 (json または csv)')
     parser.add_argument('--output', '-o', help='出力ファイルパス')
+    phase_timer.add_arguments(parser)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='バックログとルーチンからタスクを抽出するスクリプト')
+    add_arguments(parser)
     args = parser.parse_args()
     
-    # ルートディレクトリの取得
-    root_dir = args.root if args.root else get_root_dir()
-    print(f"ルートディレクトリ: {root_dir}")
-    
-    # 出力ファイルパスの決定
-    output_file = args.output if args.output else f"./extracted_tasks_{datetime.now().strftime('%Y%m%d')}.{args.format}"
-    print(f"出力ファイル: {output_file}")
-    print(f"出力形式: {args.format}")
+    with phase_timer.session(args, "extract_tasks"):
+        return phase_timer.record_exit_code(extract(args))
+
+
+def collect_items(root_dir):
+    """
+    ルートディレクトリ以下のバックログとルーチンからストーリーとタスクを抽出
     
+    戻り値: (ストーリーのリスト, ルーチンタスクのリスト)
+    """
     # バックログファイルを検索
-    backlog_files = find_yaml_files(root_dir, "backlog.ya?ml")
+    with phase_timer.phase("discover"):
+        backlog_files = find_yaml_files(root_dir, "backlog.ya?ml")
+        routines_files = find_yaml_files(root_dir, "routines.ya?ml")
     print(f"{len(backlog_files)} 件のバックログファイルが見つかりました。")
-    
-    # ルーチンファイルを検索
-    routines_files = find_yaml_files(root_dir, "routines.ya?ml")
     print(f"{len(routines_files)} 件のルーチンファイルが見つかりました。")
     
     # データを抽出
-    stories = extract_stories_from_backlog(backlog_files)
-    tasks = extract_tasks_from_routines(routines_files)
+    with phase_timer.phase("extract_backlog"):
+        stories = extract_stories_from_backlog(backlog_files)
+        phase_timer.count(items=len(stories))
+    with phase_timer.phase("extract_routines"):
+        tasks = extract_tasks_from_routines(routines_files)
+        phase_timer.count(items=len(tasks))
     
     print(f"{len(stories)} 件のストーリーが抽出されました。")
     print(f"{len(tasks)} 件のタスクが抽出されました。")
+    phase_timer.set_value('stories_extracted', len(stories))
+    phase_timer.set_value('tasks_extracted', len(tasks))
+    
+    return stories, tasks
+
+
+def extract(args):
+    """
+    コマンドライン引数に従ってストーリーとタスクを抽出・保存
+    """
+    # ルートディレクトリの取得
+    root_dir = args.root if args.root else get_root_dir()
+    print(f"ルートディレクトリ: {root_dir}")
+    
+    # 出力ファイルパスの決定
+    output_file = args.output if args.output else f"./extracted_tasks_{datetime.now().strftime('%Y%m%d')}.{args.format}"
+    print(f"出力ファイル: {output_file}")
+    print(f"出力形式: {args.format}")
+    
+    stories, tasks = collect_items(root_dir)
     
     # 結果を保存
     all_items = stories + tasks
     
-    if args.format == 'json':
-        save_to_json(all_items, output_file)
-    else:
-        save_to_csv(all_items, output_file)
+    with phase_timer.phase("save"):
+        if args.format == 'json':
+            save_to_json(all_items, output_file)
+        else:
+            save_to_csv(all_items, output_file)
+        phase_timer.count_file(output_file)
     
     print(f"データを {output_file} に保存しました。")
     
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Flow→Stock同期用のコンテンツアドレス型バックアップストア
+
+1. バックアップ対象ファイルのSHA-256を計算し、archive/objects/<先頭2文字>/<ハッシュ> に保存
+   （同じ内容のオブジェクトが既にあればコピーしない。可能ならreflinkで複製）
+2. 同期実行ごとに archive/manifests/<実行ID>.json を作成し、
+   どのファイルがどのオブジェクトに対応するかを記録
+3. 保持ポリシー（件数・日数）によるマニフェストの削除と、
+   どのマニフェストからも参照されないオブジェクトの削除
+4. マニフェストを指定してファイルを復元
+
+従来の archive/YYYYMMDD/ 形式のバックアップはそのまま残し、変更しません。
+"""
+
+import os
+import sys
+import argparse
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+FICLONE = 0x40049409
+RUN_ID_FORMAT = "%Y%m%d_%H%M%S"
+
+
+def get_store_paths(archive_root):
+    """
+    オブジェクトとマニフェストの保存先を返す
+    """
+    return os.path.join(archive_root, "objects"), os.path.join(archive_root, "manifests")
+
+
+def hash_file(file_path):
+    """
+    ファイル内容のSHA-256を計算
+    """
+    import hashlib
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_object_path(archive_root, sha256):
+    """
+    ハッシュに対応するオブジェクトのパスを返す
+    """
+    objects_dir, _ = get_store_paths(archive_root)
+    return os.path.join(objects_dir, sha256[:2], sha256)
+
+
+def _clone_or_copy(source, destination):
+    """
+    reflink（FICLONE）で複製し、使えないファイルシステムでは通常のコピーを行う
+    """
+    import shutil
+    if fcntl is not None:
+        try:
+            with open(source, 'rb') as src, open(destination, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return "reflink"
+        except OSError:
+            pass
+    shutil.copyfile(source, destination)
+    return "copy"
+
+
+def store_object(archive_root, file_path, sha256=None):
+    """
+    ファイルをオブジェクトとして保存（既に同じ内容があれば何もしない）
+
+    戻り値: (sha256, 保存方法) 保存方法は 'exists' / 'reflink' / 'copy'
+    """
+    import tempfile
+    if sha256 is None:
+        sha256 = hash_file(file_path)
+
+    object_path = get_object_path(archive_root, sha256)
+    if os.path.exists(object_path):
+        return sha256, "exists"
+
+    object_dir = os.path.dirname(object_path)
+    os.makedirs(object_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=object_dir, prefix=".tmp_")
+    os.close(fd)
+    try:
+        method = _clone_or_copy(file_path, temp_path)
+        os.chmod(temp_path, 0o444)
+        os.replace(temp_path, object_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return sha256, method
+
+
+def new_run_id(archive_root, now=None):
+    """
+    既存のマニフェストと重ならない実行IDを作成
+    """
+    if now is None:
+        now = datetime.now()
+    _, manifests_dir = get_store_paths(archive_root)
+    base_id = now.strftime(RUN_ID_FORMAT)
+    run_id = base_id
+    counter = 1
+    while os.path.exists(os.path.join(manifests_dir, f"{run_id}.json")):
+        run_id = f"{base_id}_{counter}"
+        counter += 1
+    return run_id
+
+
+def get_manifest_path(archive_root, run_id):
+    _, manifests_dir = get_store_paths(archive_root)
+    return os.path.join(manifests_dir, f"{run_id}.json")
+
+
+def load_manifest(archive_root, run_id):
+    """
+    マニフェストを読み込む（存在しなければNone）
+    """
+    import json
+    manifest_path = get_manifest_path(archive_root, run_id)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def start_run(root_dir, archive_root, run_id=None):
+    """
+    バックアップ実行を開始（run_idを指定した場合は既存のマニフェストに追記）
+    """
+    if run_id:
+        manifest = load_manifest(archive_root, run_id)
+        if manifest is not None:
+            manifest['archive_root'] = archive_root
+            return manifest
+    else:
+        run_id = new_run_id(archive_root)
+
+    return {
+        'run_id': run_id,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'root_dir': root_dir,
+        'archive_root': archive_root,
+        'entries': []
+    }
+
+
+def backup_file(run, file_path):
+    """
+    ファイルをバックアップし、実行のマニフェストに記録
+
+    戻り値: 記録したエントリ（ファイルが無い場合はNone）
+    """
+    if not os.path.isfile(file_path):
+        return None
+
+    stat_result = os.stat(file_path)
+    sha256, method = store_object(run['archive_root'], file_path)
+
+    abs_path = os.path.abspath(file_path)
+    root_dir = os.path.abspath(run['root_dir'])
+    if os.path.commonpath([abs_path, root_dir]) == root_dir:
+        rel_path = os.path.relpath(abs_path, root_dir)
+    else:
+        rel_path = abs_path
+
+    entry = {
+        'path': rel_path,
+        'sha256': sha256,
+        'size': stat_result.st_size,
+        'mtime': stat_result.st_mtime,
+        'stored': method
+    }
+    run['entries'] = [e for e in run['entries'] if e['path'] != rel_path]
+    run['entries'].append(entry)
+    return entry
+
+
+def finish_run(run):
+    """
+    マニフェストを書き込む（エントリが無ければ作成しない）
+    """
+    if not run['entries']:
+        return None
+
+    manifest_path = get_manifest_path(run['archive_root'], run['run_id'])
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    manifest = {key: value for key, value in run.items() if key != 'archive_root'}
+
+    import json
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, manifest_path)
+    return manifest_path
+
+
+def list_runs(archive_root):
+    """
+    マニフェストの実行IDを古い順に返す
+    """
+    _, manifests_dir = get_store_paths(archive_root)
+    try:
+        names = os.listdir(manifests_dir)
+    except FileNotFoundError:
+        return []
+    return sorted(name[:-5] for name in names if name.endswith(".json"))
+
+
+def _run_time(run_id):
+    try:
+        return datetime.strptime(run_id[:15], RUN_ID_FORMAT)
+    except ValueError:
+        return None
+
+
+def prune(archive_root, keep_last=None, keep_days=None, dry_run=False, now=None):
+    """
+    保持ポリシーに従ってマニフェストを削除し、参照されないオブジェクトを削除
+
+    keep_last: 新しい方から残す実行数
+    keep_days: この日数以内の実行は必ず残す
+    どちらかのポリシーで残る実行は削除しない（両方未指定なら孤立オブジェクトの削除のみ）
+    戻り値: {'removed_runs': [...], 'removed_objects': 件数, 'freed_bytes': バイト数}
+    """
+    if now is None:
+        now = datetime.now()
+
+    runs = list_runs(archive_root)
+    keep = set()
+    if keep_last is None and keep_days is None:
+        keep.update(runs)
+    if keep_last:
+        keep.update(runs[-keep_last:])
+    if keep_days is not None:
+        cutoff = now - timedelta(days=keep_days)
+        for run_id in runs:
+            run_time = _run_time(run_id)
+            if run_time is None or run_time >= cutoff:
+                keep.add(run_id)
+
+    removed_runs = [run_id for run_id in runs if run_id not in keep]
+
+    # 残る実行から参照されているオブジェクト
+    referenced = set()
+    for run_id in runs:
+        if run_id in keep:
+            manifest = load_manifest(archive_root, run_id) or {}
+            referenced.update(entry['sha256'] for entry in manifest.get('entries', []))
+
+    result = {'removed_runs': removed_runs, 'removed_objects': 0, 'freed_bytes': 0}
+
+    if not dry_run:
+        for run_id in removed_runs:
+            os.unlink(get_manifest_path(archive_root, run_id))
+
+    objects_dir, _ = get_store_paths(archive_root)
+    if os.path.isdir(objects_dir):
+        for prefix in sorted(os.listdir(objects_dir)):
+            prefix_dir = os.path.join(objects_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                if name in referenced:
+                    continue
+                object_path = os.path.join(prefix_dir, name)
+                result['removed_objects'] += 1
+                result['freed_bytes'] += os.path.getsize(object_path)
+                if not dry_run:
+                    os.unlink(object_path)
+            if not dry_run and not os.listdir(prefix_dir):
+                os.rmdir(prefix_dir)
+
+    return result
+
+
+def restore(archive_root, root_dir, run_id=None, paths=None, target_dir=None):
+    """
+    マニフェストに記録されたファイルを復元
+
+    run_id: 省略時は最新の実行
+    paths: 復元するパス（ルートからの相対パス、省略時はすべて）
+    target_dir: 復元先（省略時は元の場所へ上書き）
+    戻り値: 復元したファイルパスのリスト（マニフェストが無い場合はNone）
+    """
+    import shutil
+    if run_id is None:
+        runs = list_runs(archive_root)
+        if not runs:
+            return None
+        run_id = runs[-1]
+
+    manifest = load_manifest(archive_root, run_id)
+    if manifest is None:
+        return None
+
+    wanted = None
+    if paths:
+        wanted = set(os.path.normpath(p) for p in paths)
+
+    restored = []
+    for entry in manifest.get('entries', []):
+        if wanted is not None and os.path.normpath(entry['path']) not in wanted:
+            continue
+
+        object_path = get_object_path(archive_root, entry['sha256'])
+        if not os.path.isfile(object_path):
+            print(f"オブジェクトが見つかりません: {entry['path']} ({entry['sha256']})", file=sys.stderr)
+            continue
+
+        if target_dir:
+            destination = os.path.join(target_dir, entry['path'].lstrip(os.sep))
+        else:
+            destination = os.path.join(root_dir, entry['path'])
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        temp_path = destination + ".restore_tmp"
+        shutil.copyfile(object_path, temp_path)
+        os.replace(temp_path, destination)
+        os.utime(destination, (entry['mtime'], entry['mtime']))
+        restored.append(destination)
+
+    return restored
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Flow→Stock同期のバックアップストアを操作するスクリプト')
+    parser.add_argument('--root', help='ルートディレクトリ (デフォルト: このスクリプトの親ディレクトリ)')
+    parser.add_argument('--archive', help='アーカイブディレクトリ (デフォルト: ROOT/archive)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    backup_parser = subparsers.add_parser('backup', help='ファイルをバックアップ')
+    backup_parser.add_argument('files', nargs='+', help='バックアップするファイル')
+    backup_parser.add_argument('--run-id', help='追記する実行ID (省略時は新しい実行を作成)')
+
+    subparsers.add_parser('list', help='バックアップ実行の一覧を表示')
+
+    show_parser = subparsers.add_parser('show', help='バックアップ実行の内容を表示')
+    show_parser.add_argument('run_id', nargs='?', help='実行ID (デフォルト: 最新)')
+
+    restore_parser = subparsers.add_parser('restore', help='バックアップからファイルを復元')
+    restore_parser.add_argument('paths', nargs='*', help='復元するファイル (ルートからの相対パス、デフォルト: すべて)')
+    restore_parser.add_argument('--run', dest='run_id', help='実行ID (デフォルト: 最新)')
+    restore_parser.add_argument('--to', dest='target_dir', help='復元先ディレクトリ (デフォルト: 元の場所)')
+
+    prune_parser = subparsers.add_parser('prune', help='保持ポリシーに従って古いバックアップを削除')
+    prune_parser.add_argument('--keep-last', type=int, help='新しい方から残す実行数')
+    prune_parser.add_argument('--keep-days', type=int, help='この日数以内の実行を残す')
+    prune_parser.add_argument('--dry-run', action='store_true', help='削除対象を表示するだけで削除しない')
+
+    args = parser.parse_args(argv)
+
+    root_dir = args.root if args.root else os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    archive_root = args.archive if args.archive else os.path.join(root_dir, "archive")
+
+    if args.command == 'backup':
+        run = start_run(root_dir, archive_root, args.run_id)
+        missing = 0
+        for file_path in args.files:
+            entry = backup_file(run, file_path)
+            if entry is None:
+                print(f"バックアップ失敗: ファイル '{file_path}' が存在しません", file=sys.stderr)
+                missing += 1
+                continue
+            print(f"バックアップ作成: {entry['path']} ({entry['sha256'][:12]}, {entry['stored']})")
+        finish_run(run)
+        return 1 if missing else 0
+
+    if args.command == 'list':
+        for run_id in list_runs(archive_root):
+            manifest = load_manifest(archive_root, run_id) or {}
+            entries = manifest.get('entries', [])
+            new_count = sum(1 for e in entries if e.get('stored') != 'exists')
+            print(f"{run_id}  ファイル {len(entries)} 件 (新規オブジェクト {new_count} 件)")
+        return 0
+
+    if args.command == 'show':
+        run_id = args.run_id or (list_runs(archive_root) or [None])[-1]
+        manifest = load_manifest(archive_root, run_id) if run_id else None
+        if manifest is None:
+            print("バックアップが見つかりません", file=sys.stderr)
+            return 1
+        print(f"実行ID: {manifest['run_id']} ({manifest['created_at']})")
+        for entry in manifest['entries']:
+            print(f"  {entry['sha256'][:12]}  {format_size(entry['size']):>8}  {entry['path']}")
+        return 0
+
+    if args.command == 'restore':
+        restored = restore(archive_root, root_dir, args.run_id, args.paths, args.target_dir)
+        if restored is None:
+            print("バックアップが見つかりません", file=sys.stderr)
+            return 1
+        for destination in restored:
+            print(f"復元: {destination}")
+        if args.paths and len(restored) < len(args.paths):
+            print("一部のファイルはこの実行に含まれていません", file=sys.stderr)
+            return 1
+        return 0
+
+    if args.command == 'prune':
+        result = prune(archive_root, args.keep_last, args.keep_days, args.dry_run)
+        prefix = "[dry-run] " if args.dry_run else ""
+        for run_id in result['removed_runs']:
+            print(f"{prefix}削除: マニフェスト {run_id}")
+        print(f"{prefix}削除オブジェクト: {result['removed_objects']} 件 ({format_size(result['freed_bytes'])})")
+        return 0
+
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,892 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Flow→Stock同期スクリプト（flow_to_stock.sh のPython版）
+
+1. Flow/Public → Flow/Private の日付フォルダをそれぞれ新しい順に（シェル版の sort -r と同じ順で）1回だけ走査し、
+   同期パターンごとの最新ファイルとバックログディレクトリの索引を作成
+2. 索引からプロジェクト文書・バックログ・会議議事録のコピー／バックアップ／スキップを
+   すべて計算した同期計画（変更マニフェスト）を作成（--dry-run はここで終了）
+3. コピー対象をステージング領域（ROOT/.aipm/flow_to_stock）へ書き出してから
+   ジャーナルを記録し、os.replace でStockへ反映
+   途中で強制終了された場合、次回実行時にジャーナルからロールフォワードする
+
+--all-projects を指定すると Stock/projects/* と Stock/programs/*/projects/* の
+プロジェクトを検出し、Flow/<Private|Public>/<日付>/.../<プロジェクト名>/ 以下の文書を
+1回の走査でプロジェクトごとに振り分けて、プロジェクト単位で並列に同期します。
+
+ディレクトリ構成とファイル名は flow_to_stock_config.sh と同じです。
+シェル版はパターンごとにFlow全体を find し直すため、日付フォルダが増えると
+処理時間が大きく伸びますが、このスクリプトは走査を1回にまとめます。
+"""
+
+import os
+import sys
+import fnmatch
+import argparse
+import threading
+from datetime import datetime
+
+import flow_backup
+import phase_timer
+import sync_engine
+
+
+DEFAULT_PROJECT_ID = "dinner"
+MEETING_PATTERN = "meeting_*.md"
+
+
+def get_default_root_dir():
+    """
+    flow_to_stock_config.sh と同じく、スクリプトの親ディレクトリをルートとする
+    """
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_config(root_dir=None, project_id=None, now=None, jobs=None, delete_orphans=False,
+                dry_run=False, project=None):
+    """
+    flow_to_stock_config.sh と同じ設定値を辞書で返す
+
+    project（discover_projects の戻り値の要素）を渡した場合は、そのプロジェクトの
+    ディレクトリを使い、上書きされる product_backlog.md もプロジェクト内に置く
+    """
+    if root_dir is None:
+        root_dir = get_default_root_dir()
+    if project_id is None:
+        project_id = DEFAULT_PROJECT_ID
+    if now is None:
+        now = datetime.now()
+
+    flow_root = os.path.join(root_dir, "Flow")
+    stock_root = os.path.join(root_dir, "Stock")
+    state_dir = os.path.join(root_dir, ".aipm", "flow_to_stock")
+    if project is None:
+        project_docs_dir = os.path.join(stock_root, "projects", project_id, "documents")
+        agile_dir = os.path.join(stock_root, "Agile")
+        log_prefix = ""
+    else:
+        project_id = project['name']
+        project_docs_dir = os.path.join(project['project_dir'], "documents")
+        agile_dir = os.path.join(project_docs_dir, "Agile")
+        state_dir = os.path.join(state_dir, "projects", project['key'].replace("/", "__"))
+        log_prefix = f"[{project['key']}] "
+    pmbok_dir = os.path.join(project_docs_dir, "1_initiating")
+    planning_dir = os.path.join(project_docs_dir, "3_planning")
+    closing_dir = os.path.join(project_docs_dir, "6_closing")
+    backlog_stock_dir = os.path.join(planning_dir, "backlog")
+    log_dir = os.path.join(root_dir, "logs")
+
+    return {
+        'root_dir': root_dir,
+        'project_id': project_id,
+        'project_key': project['key'] if project else project_id,
+        'documents_dir': os.path.join(root_dir, "documents"),
+        'flow_root': flow_root,
+        'flow_private': os.path.join(flow_root, "Private"),
+        'flow_public': os.path.join(flow_root, "Public"),
+        'stock_root': stock_root,
+        'archive_root': os.path.join(root_dir, "archive"),
+        'project_docs_dir': project_docs_dir,
+        'pmbok_dir': pmbok_dir,
+        'planning_dir': planning_dir,
+        'executing_dir': os.path.join(project_docs_dir, "4_executing"),
+        'monitoring_dir': os.path.join(project_docs_dir, "5_monitoring"),
+        'closing_dir': closing_dir,
+        'agile_dir': agile_dir,
+        'meetings_dir': os.path.join(stock_root, "Meetings"),
+        'project_charter_stock': os.path.join(pmbok_dir, "project_charter.md"),
+        'stakeholder_register_stock': os.path.join(pmbok_dir, "stakeholder_register.md"),
+        'wbs_stock': os.path.join(planning_dir, "wbs.md"),
+        'risk_plan_stock': os.path.join(planning_dir, "risk_plan.md"),
+        'lessons_learned_stock': os.path.join(closing_dir, "lessons_learned.md"),
+        'product_backlog_stock': os.path.join(agile_dir, "product_backlog.md"),
+        'release_roadmap_stock': os.path.join(planning_dir, "release_roadmap.md"),
+        'backlog_stock_dir': backlog_stock_dir,
+        'backlog_epics_stock': os.path.join(backlog_stock_dir, "epics.yaml"),
+        'stories_stock_dir': os.path.join(backlog_stock_dir, "stories"),
+        'log_dir': log_dir,
+        'log_file': os.path.join(log_dir, f"flow_to_stock_{now.strftime('%Y%m%d')}.log"),
+        'log_prefix': log_prefix,
+        'missing_is_error': project is None,
+        'state_dir': state_dir,
+        'backup_run': None,
+        'lock': threading.Lock(),
+        'jobs': jobs,
+        'delete_orphans': delete_orphans,
+        'dry_run': dry_run
+    }
+
+
+def ensure_directories(config):
+    """
+    flow_to_stock_config.sh と同じサブディレクトリを作成
+    """
+    for key in ('pmbok_dir', 'planning_dir', 'executing_dir', 'monitoring_dir', 'closing_dir',
+                'agile_dir', 'meetings_dir', 'log_dir', 'backlog_stock_dir', 'stories_stock_dir'):
+        os.makedirs(config[key], exist_ok=True)
+
+
+def get_sync_list(config):
+    """
+    同期対象のリスト (Flowファイル名パターン, Stockの保存先)
+    """
+    return [
+        ("project_charter*.md", config['project_charter_stock']),
+        ("*stakeholder*register*.md", config['stakeholder_register_stock']),
+        ("*wbs*.md", config['wbs_stock']),
+        ("*risk_plan*.md", config['risk_plan_stock']),
+        ("lessons_learned*.md", config['lessons_learned_stock']),
+        ("*product_backlog*.md", config['product_backlog_stock']),
+        ("draft_release_roadmap*.md", config['release_roadmap_stock']),
+    ]
+
+
+def log(config, message):
+    """
+    ログを標準出力とログファイルに出力
+
+    --all-projects ではプロジェクトごとのスレッドから呼ばれるため、行が混ざらないよう
+    プロジェクト間で共有するロックの中で1行ずつ書き込む
+    """
+    line = f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {config['log_prefix']}{message}"
+    with config['lock']:
+        sys.stdout.write(line + "\n")
+        if not config['log_file']:
+            return
+        try:
+            with open(config['log_file'], 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+        except Exception as e:
+            print(f"ログファイル書き込みエラー: {e}", file=sys.stderr)
+
+
+def error_log(config, message):
+    """
+    エラーログを標準出力とログファイルに出力
+    """
+    log(config, f"[ERROR] {message}")
+
+
+def list_date_dirs(config):
+    """
+    Flow/Private と Flow/Public 直下の日付フォルダ（20*）を返す
+
+    flow_to_stock.sh の find ... | sort -r と同じく、フルパスの降順に並べる。
+    そのため Flow/Public の日付フォルダ（新しい順）がすべて先になり、次に Flow/Private の
+    日付フォルダ（新しい順）が続く。同じファイルがあれば先に見つかった Public 側を使う
+    """
+    date_dirs = []
+    for base_dir in (config['flow_private'], config['flow_public']):
+        try:
+            entries = os.scandir(base_dir)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith("20") and entry.is_dir():
+                    date_dirs.append(entry.path)
+
+    date_dirs.sort(reverse=True)
+    return date_dirs
+
+
+def build_flow_index(config, patterns):
+    """
+    日付フォルダを新しい順に1回だけ走査し、パターンごとの最新ファイルを索引化
+
+    すべてのパターンとバックログディレクトリが見つかった時点で走査を終了する
+    戻り値: {'files': {パターン: パス}, 'backlog_dir': パス, 'scanned_dirs': 件数, 'scanned_files': 件数}
+    """
+    remaining = list(dict.fromkeys(patterns))
+    index = {'files': {}, 'backlog_dir': None, 'scanned_dirs': 0, 'scanned_files': 0}
+
+    for date_dir in list_date_dirs(config):
+        if not remaining and index['backlog_dir']:
+            break
+        index['scanned_dirs'] += 1
+
+        if index['backlog_dir'] is None and os.path.isdir(os.path.join(date_dir, "backlog")):
+            index['backlog_dir'] = os.path.join(date_dir, "backlog")
+
+        if not remaining:
+            continue
+
+        found_here = {}
+        for dir_path, dir_names, file_names in os.walk(date_dir):
+            dir_names.sort()
+            for file_name in sorted(file_names):
+                index['scanned_files'] += 1
+                for pattern in remaining:
+                    if pattern not in found_here and fnmatch.fnmatchcase(file_name, pattern):
+                        found_here[pattern] = os.path.join(dir_path, file_name)
+
+        if found_here:
+            index['files'].update(found_here)
+            remaining = [pattern for pattern in remaining if pattern not in found_here]
+
+    return index
+
+
+def discover_projects(stock_root):
+    """
+    Stock/projects/* と Stock/programs/*/projects/* のプロジェクトを検出
+    （extract_tasks.extract_project_info と同じディレクトリ構成）
+
+    戻り値: {'key', 'name', 'program', 'project_dir'} の辞書のリスト
+    """
+    bases = [(os.path.join(stock_root, "projects"), None)]
+    programs_dir = os.path.join(stock_root, "programs")
+    if os.path.isdir(programs_dir):
+        for program in sorted(os.listdir(programs_dir)):
+            if not program.startswith("."):
+                bases.append((os.path.join(programs_dir, program, "projects"), program))
+
+    projects = []
+    for base_dir, program in bases:
+        try:
+            entries = sorted(os.scandir(base_dir), key=lambda e: e.name)
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            projects.append({
+                'key': f"{program}/{entry.name}" if program else entry.name,
+                'name': entry.name,
+                'program': program,
+                'project_dir': entry.path
+            })
+    return projects
+
+
+def route_flow_dir(rel_parts, projects_by_name):
+    """
+    日付フォルダからの相対パスに含まれるディレクトリ名でプロジェクトを決定
+
+    同名のプロジェクトが複数のプログラムにある場合は、パスにプログラム名も含まれるものを選ぶ
+    戻り値: プロジェクトのキー（決まらなければNone）
+    """
+    for part in rel_parts:
+        candidates = projects_by_name.get(part)
+        if not candidates:
+            continue
+        if len(candidates) == 1:
+            return candidates[0]['key']
+        for candidate in candidates:
+            if candidate['program'] in rel_parts:
+                return candidate['key']
+    return None
+
+
+def build_project_index(config, patterns, projects):
+    """
+    日付フォルダを新しい順に1回だけ走査し、プロジェクトごとにパターン別の最新ファイルと
+    バックログディレクトリを索引化する
+
+    Flow/<Private|Public>/<日付>/.../<プロジェクト名>/... にあるファイルをそのプロジェクトに振り分ける
+    戻り値: ({プロジェクトキー: build_flow_index と同じ形式の索引}, 走査件数の辞書)
+    """
+    projects_by_name = {}
+    for project in projects:
+        projects_by_name.setdefault(project['name'], []).append(project)
+
+    indexes = {project['key']: {'files': {}, 'backlog_dir': None} for project in projects}
+    stats = {'scanned_dirs': 0, 'scanned_files': 0, 'unrouted_files': 0}
+    patterns = list(dict.fromkeys(patterns))
+
+    for date_dir in list_date_dirs(config):
+        stats['scanned_dirs'] += 1
+        found_here = {}
+        for dir_path, dir_names, file_names in os.walk(date_dir):
+            dir_names.sort()
+            rel_dir = os.path.relpath(dir_path, date_dir)
+            rel_parts = [] if rel_dir == "." else rel_dir.split(os.sep)
+            key = route_flow_dir(rel_parts, projects_by_name)
+            if key is None:
+                stats['unrouted_files'] += len(file_names)
+                stats['scanned_files'] += len(file_names)
+                continue
+
+            index = indexes[key]
+            if index['backlog_dir'] is None and rel_parts and rel_parts[-1] == "backlog":
+                index['backlog_dir'] = dir_path
+
+            project_found = found_here.setdefault(key, {})
+            for file_name in sorted(file_names):
+                stats['scanned_files'] += 1
+                for pattern in patterns:
+                    if pattern in index['files'] or pattern in project_found:
+                        continue
+                    if fnmatch.fnmatchcase(file_name, pattern):
+                        project_found[pattern] = os.path.join(dir_path, file_name)
+
+        for key, project_found in found_here.items():
+            indexes[key]['files'].update(project_found)
+
+    return indexes, stats
+
+
+def backup_file(config, source_file):
+    """
+    ファイルをコンテンツアドレス型バックアップストア（archive/objects）へ保存
+    同じ内容のオブジェクトが既にあれば保存を省略し、マニフェストにだけ記録する
+    """
+    if not os.path.isfile(source_file):
+        error_log(config, f"バックアップ失敗: ファイル '{source_file}' が存在しません")
+        return False
+
+    # 複数プロジェクトを並列に同期する場合も1つのバックアップ実行にまとめる
+    with config['lock']:
+        if config.get('backup_run') is None:
+            config['backup_run'] = flow_backup.start_run(config['root_dir'], config['archive_root'])
+        entry = flow_backup.backup_file(config['backup_run'], source_file)
+    if entry['stored'] == "exists":
+        log(config, f"バックアップ済み（同一内容のため保存を省略）: {entry['path']} ({entry['sha256'][:12]})")
+    else:
+        log(config, f"バックアップ作成: {entry['path']} ({entry['sha256'][:12]})")
+    return True
+
+
+def _operation(action, kind, source, destination, reason, source_stat=None):
+    """
+    計画の操作を作成（JSONに保存できる値だけを持つ）
+    """
+    return {
+        'action': action,
+        'kind': kind,
+        'source': source,
+        'destination': destination,
+        'reason': reason,
+        'size': source_stat.st_size if source_stat else 0,
+        'source_mtime_ns': source_stat.st_mtime_ns if source_stat else None
+    }
+
+
+def plan_file(plan, kind, source, destination, backup=True):
+    """
+    単一ファイルの同期操作を計画に追加（内容が同じならスキップ）
+    """
+    source_stat = os.stat(source)
+    if os.path.isfile(destination):
+        if sync_engine.files_identical(source, destination, source_stat):
+            plan['operations'].append(_operation('skip', kind, source, destination, 'unchanged', source_stat))
+            return
+        if backup:
+            plan['operations'].append(_operation('backup', kind, None, destination, 'overwrite'))
+        reason = 'content'
+    else:
+        reason = 'new'
+    plan['operations'].append(_operation('copy', kind, source, destination, reason, source_stat))
+
+
+def plan_backlog(config, plan, index):
+    """
+    最新のバックログディレクトリ（epics.yaml と stories/*.md）の同期操作を計画
+    """
+    latest_backlog_dir = index['backlog_dir']
+    if not latest_backlog_dir:
+        if config['missing_is_error']:
+            plan['errors'].append("バックログディレクトリが見つかりません")
+        return
+
+    # エピックYAML（シェル版と同様にバックアップは作成しない）
+    epics_file = os.path.join(latest_backlog_dir, "epics.yaml")
+    if os.path.isfile(epics_file):
+        plan_file(plan, 'epics', epics_file, config['backlog_epics_stock'], backup=False)
+    else:
+        plan['warnings'].append(f"エピックファイルが見つかりません: {epics_file}")
+
+    # ストーリーファイル（変更のあったものだけをコピー）
+    stories_dir = os.path.join(latest_backlog_dir, "stories")
+    if not os.path.isdir(stories_dir):
+        plan['errors'].append(f"ストーリーディレクトリが見つかりません: {stories_dir}")
+        return
+
+    source_files = sync_engine.collect_files(stories_dir, "*.md")
+    operations = sync_engine.plan_directory_sync(source_files, config['stories_stock_dir'], "*.md")
+    sync_engine.resolve_operations(operations, config['jobs'], touch=not config['dry_run'])
+
+    for operation in operations:
+        if operation['action'] == 'orphan':
+            if config['delete_orphans']:
+                plan['operations'].append(_operation('backup', 'story', None, operation['destination'], 'orphan'))
+                plan['operations'].append(_operation('delete', 'story', None, operation['destination'], 'orphan'))
+            else:
+                plan['operations'].append(_operation('orphan', 'story', None, operation['destination'], 'orphan'))
+            continue
+        plan['operations'].append(_operation(operation['action'], 'story', operation['source'],
+                                             operation['destination'], operation['reason'],
+                                             operation['source_stat']))
+
+
+def build_plan(config, index):
+    """
+    Flowの索引からコピー・バックアップ・スキップの全操作を事前に計算する
+
+    Stockには一切書き込まない
+    """
+    plan = {
+        'version': 1,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'root_dir': config['root_dir'],
+        'project_id': config['project_id'],
+        'project_key': config['project_key'],
+        'backlog_dir': index['backlog_dir'],
+        'operations': [],
+        'errors': [],
+        'warnings': []
+    }
+
+    for pattern, destination in get_sync_list(config):
+        latest_flow_file = index['files'].get(pattern)
+        if not latest_flow_file or not os.path.isfile(latest_flow_file):
+            # 全プロジェクト同期では、Flowに無い文書は対象外として扱う
+            if config['missing_is_error']:
+                plan['errors'].append(f"同期失敗: パターン '{pattern}' の最新ファイルが見つかりません")
+            continue
+        plan_file(plan, 'document', latest_flow_file, destination)
+
+    plan_backlog(config, plan, index)
+
+    # 会議議事録（上書きではなく追加）
+    latest_meeting = index['files'].get(MEETING_PATTERN)
+    if latest_meeting and os.path.isfile(latest_meeting):
+        destination = os.path.join(config['meetings_dir'], os.path.basename(latest_meeting))
+        plan_file(plan, 'meeting', latest_meeting, destination, backup=False)
+
+    return plan
+
+
+def summarize_plan(plan):
+    """
+    計画の操作件数とコピー量を集計
+    """
+    summary = {'copy': 0, 'backup': 0, 'skip': 0, 'delete': 0, 'orphan': 0, 'copy_bytes': 0}
+    for operation in plan['operations']:
+        summary[operation['action']] += 1
+        if operation['action'] == 'copy':
+            summary['copy_bytes'] += operation['size']
+    summary['errors'] = len(plan['errors'])
+    return summary
+
+
+def format_plan(plan, verbose=False):
+    """
+    計画を読みやすいテキストで返す（verbose=Falseの場合スキップは件数のみ）
+    """
+    labels = {'copy': "コピー", 'backup': "バックアップ", 'skip': "変更なし", 'delete': "削除", 'orphan': "孤立"}
+    root_dir = plan['root_dir']
+    lines = [f"Flow→Stock同期計画 ({plan.get('project_key', plan['project_id'])}):"]
+    for operation in plan['operations']:
+        if operation['action'] == 'skip' and not verbose:
+            continue
+        destination = os.path.relpath(operation['destination'], root_dir)
+        if operation['source']:
+            source = os.path.relpath(operation['source'], root_dir)
+            lines.append(f"  [{labels[operation['action']]}] {source} → {destination} ({operation['reason']})")
+        else:
+            lines.append(f"  [{labels[operation['action']]}] {destination} ({operation['reason']})")
+    for message in plan['errors']:
+        lines.append(f"  [エラー] {message}")
+    for message in plan['warnings']:
+        lines.append(f"  [警告] {message}")
+
+    summary = summarize_plan(plan)
+    lines.append(f"合計: コピー {summary['copy']} 件 ({summary['copy_bytes']} バイト), "
+                 f"バックアップ {summary['backup']} 件, 削除 {summary['delete']} 件, "
+                 f"変更なし {summary['skip']} 件, 孤立 {summary['orphan']} 件, エラー {summary['errors']} 件")
+    return "\n".join(lines)
+
+
+def save_plan(plan, output_path):
+    """
+    計画（変更マニフェスト）をJSONで保存
+    """
+    import json
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+
+
+def load_plan(plan_path):
+    import json
+    with open(plan_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def get_state_dir(config):
+    """
+    ステージング領域とジャーナルの保存先（Stockと同じファイルシステム上のROOT/.aipm）
+    """
+    return config['state_dir']
+
+
+def _write_journal(journal_path, journal):
+    import json
+    temp_path = journal_path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(journal, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, journal_path)
+
+
+def _commit_journal(journal):
+    """
+    ジャーナルに記録されたリネームと削除を実行（途中まで実行済みでも再実行できる）
+    """
+    for staged_path, destination in journal['moves']:
+        if os.path.exists(staged_path):
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            os.replace(staged_path, destination)
+    for destination in journal['deletes']:
+        if os.path.exists(destination):
+            os.unlink(destination)
+
+
+def recover_interrupted_sync(config):
+    """
+    前回中断された同期を処理する
+
+    ジャーナルがあればリネームを最後まで実行（ロールフォワード）し、
+    ジャーナルの無いステージング領域（コピー途中で中断されたもの）は破棄する
+    """
+    import shutil
+    state_dir = get_state_dir(config)
+    if not os.path.isdir(state_dir):
+        return
+
+    journal_path = os.path.join(state_dir, "journal.json")
+    if os.path.isfile(journal_path):
+        try:
+            import json
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                journal = json.load(f)
+            _commit_journal(journal)
+            log(config, f"前回中断された同期を完了しました: {len(journal['moves'])} 件のファイル")
+        except Exception as e:
+            error_log(config, f"前回中断された同期の復旧に失敗しました: {e}")
+            return
+        os.unlink(journal_path)
+
+    for name in os.listdir(state_dir):
+        if name.startswith("staging_"):
+            shutil.rmtree(os.path.join(state_dir, name), ignore_errors=True)
+
+
+def _source_changed(operation):
+    try:
+        source_stat = os.stat(operation['source'])
+    except FileNotFoundError:
+        return True
+    return (source_stat.st_size != operation['size']
+            or source_stat.st_mtime_ns != operation['source_mtime_ns'])
+
+
+def apply_plan(config, plan):
+    """
+    計画を実行する
+
+    1. バックアップを作成（Stockは変更しない）
+    2. コピー対象をすべてステージング領域へ並列コピー
+    3. リネーム一覧をジャーナルに書き込み、os.replaceでStockへ反映
+    ステージング中に中断された場合Stockは変更されず、反映中に中断された場合は
+    次回実行時にジャーナルからロールフォワードされる
+    戻り値: エラー件数
+    """
+    import shutil
+    import tempfile
+    copies = [op for op in plan['operations'] if op['action'] == 'copy']
+    deletes = [op for op in plan['operations'] if op['action'] == 'delete']
+
+    with phase_timer.phase("verify_sources"):
+        changed = [op['source'] for op in copies if _source_changed(op)]
+    if changed:
+        for source in changed:
+            error_log(config, f"計画作成後にFlowのファイルが変更されました: {source}")
+        error_log(config, "計画を作り直してください。Stockは変更していません。")
+        return len(changed)
+
+    # 保存済みの計画を再実行した場合など、既に反映済みのコピーは除く
+    with phase_timer.phase("verify_sources"):
+        copies = [op for op in copies if not sync_engine.files_identical(op['source'], op['destination'])]
+    pending = set(op['destination'] for op in copies + deletes)
+
+    # バックアップ（上書き・削除されるStockファイル）
+    with phase_timer.phase("backup"):
+        for operation in plan['operations']:
+            if operation['action'] == 'backup' and operation['destination'] in pending \
+                    and os.path.isfile(operation['destination']):
+                backup_file(config, operation['destination'])
+                phase_timer.count_file(operation['destination'])
+
+    if not copies and not deletes:
+        return 0
+
+    # ステージング
+    state_dir = get_state_dir(config)
+    os.makedirs(state_dir, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix="staging_", dir=state_dir)
+    moves = [(os.path.join(staging_dir, str(n)), op['destination']) for n, op in enumerate(copies)]
+
+    def stage(item):
+        (staged_path, _), operation = item
+        try:
+            sync_engine.copy_file(operation['source'], staged_path)
+            return None
+        except Exception as e:
+            return f"{operation['source']}: {e}"
+
+    from concurrent.futures import ThreadPoolExecutor
+    jobs = config['jobs'] or sync_engine.default_jobs()
+    with phase_timer.phase("stage"):
+        with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(copies) or 1))) as executor:
+            failures = [message for message in executor.map(stage, zip(moves, copies)) if message]
+        phase_timer.count(files=len(copies), bytes=sum(op['size'] for op in copies))
+
+    if failures:
+        for message in failures:
+            error_log(config, f"ステージングに失敗しました: {message}")
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        error_log(config, "Stockは変更していません。")
+        return len(failures)
+
+    # ジャーナルを書いてから反映
+    journal_path = os.path.join(state_dir, "journal.json")
+    journal = {'staging_dir': staging_dir, 'moves': moves, 'deletes': [op['destination'] for op in deletes]}
+    with phase_timer.phase("commit"):
+        _write_journal(journal_path, journal)
+        _commit_journal(journal)
+        os.unlink(journal_path)
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        phase_timer.count(items=len(moves) + len(deletes))
+
+    for operation in copies:
+        log_applied(config, operation)
+    for operation in deletes:
+        log(config, f"孤立したストーリーファイルを削除しました: {os.path.basename(operation['destination'])}")
+    return 0
+
+
+def log_applied(config, operation):
+    """
+    反映したコピー操作をシェル版と同じ形式でログに出力
+    """
+    if operation['kind'] == 'story':
+        log(config, f"ストーリーファイルを同期しました: {os.path.basename(operation['destination'])}")
+    elif operation['kind'] == 'epics':
+        log(config, "エピックファイルを同期しました: epics.yaml")
+    elif operation['kind'] == 'meeting':
+        log(config, f"会議議事録を同期: {operation['source']} → {operation['destination']}")
+    else:
+        log(config, f"同期完了: {operation['source']} → {operation['destination']}")
+
+
+def sync_project(config, index, plan=None, plan_output=None):
+    """
+    1プロジェクト分の計画作成と反映を行い、エラー件数を返す
+
+    plan を渡した場合は保存済みの計画を実行し、dry_run の場合は計画の表示だけを行う
+    """
+    # 前回中断された同期があれば、計画を作る前に反映を完了させる
+    if not config['dry_run']:
+        with phase_timer.phase("recover"):
+            recover_interrupted_sync(config)
+
+    if plan is None:
+        with phase_timer.phase("plan"):
+            plan = build_plan(config, index)
+            phase_timer.count(items=len(plan['operations']))
+
+    if plan_output:
+        save_plan(plan, plan_output)
+        log(config, f"同期計画を保存しました: {plan_output}")
+
+    summary = summarize_plan(plan)
+    log(config, f"同期計画: コピー {summary['copy']} 件 ({summary['copy_bytes']} バイト), "
+                f"バックアップ {summary['backup']} 件, 削除 {summary['delete']} 件, 変更なし {summary['skip']} 件")
+
+    if config['dry_run']:
+        with config['lock']:
+            sys.stdout.write(format_plan(plan) + "\n")
+        return len(plan['errors'])
+
+    for message in plan['errors']:
+        error_log(config, message)
+    for message in plan['warnings']:
+        error_log(config, message)
+    for operation in plan['operations']:
+        if operation['action'] == 'orphan':
+            log(config, f"[WARN] Flowに存在しないストーリーファイルがあります: {os.path.basename(operation['destination'])}")
+
+    with phase_timer.phase("apply"):
+        return len(plan['errors']) + apply_plan(config, plan)
+
+
+def finish_sync(config, error_count):
+    """
+    バックアップのマニフェストを保存し、結果をログに出力
+    """
+    phase_timer.set_value('errors', error_count)
+    if config.get('backup_run') is not None:
+        manifest_path = flow_backup.finish_run(config['backup_run'])
+        if manifest_path:
+            log(config, f"バックアップマニフェストを保存しました: {manifest_path}")
+
+    if error_count == 0:
+        log(config, "Flow→Stock同期処理が正常に完了しました。")
+    else:
+        error_log(config, f"Flow→Stock同期処理が完了しましたが、{error_count}件のエラーがありました。")
+
+
+def run_sync(config, plan=None, plan_output=None):
+    """
+    単一プロジェクトのFlow→Stock同期処理を実行し、エラー件数を返す
+    """
+    log(config, "Flow→Stock同期処理を開始します...")
+
+    index = None
+    if plan is None:
+        sync_list = get_sync_list(config)
+        with phase_timer.phase("flow_scan"):
+            index = build_flow_index(config, [pattern for pattern, _ in sync_list] + [MEETING_PATTERN])
+            phase_timer.count(files=index['scanned_files'], items=index['scanned_dirs'])
+        log(config, f"Flowを走査しました: 日付フォルダ {index['scanned_dirs']} 件, ファイル {index['scanned_files']} 件")
+
+    error_count = sync_project(config, index, plan, plan_output)
+    finish_sync(config, error_count)
+    return error_count
+
+
+def run_all_projects(config, project_jobs=None):
+    """
+    Stock内の全プロジェクトを検出し、Flowを1回走査して各プロジェクトを並列に同期する
+    """
+    log(config, "Flow→Stock同期処理を開始します（全プロジェクト）...")
+
+    with phase_timer.phase("discover_projects"):
+        projects = discover_projects(config['stock_root'])
+    if not projects:
+        error_log(config, f"プロジェクトが見つかりません: {config['stock_root']}")
+        return 1
+    log(config, f"プロジェクトを検出しました: {len(projects)} 件")
+
+    patterns = [pattern for pattern, _ in get_sync_list(config)] + [MEETING_PATTERN]
+    with phase_timer.phase("flow_scan"):
+        indexes, stats = build_project_index(config, patterns, projects)
+        phase_timer.count(files=stats['scanned_files'], items=stats['scanned_dirs'])
+    log(config, f"Flowを走査しました: 日付フォルダ {stats['scanned_dirs']} 件, ファイル {stats['scanned_files']} 件 "
+                f"(プロジェクトに振り分けられなかったファイル {stats['unrouted_files']} 件)")
+
+    # バックアップ実行とロックは全プロジェクトで共有する
+    if not config['dry_run'] and config.get('backup_run') is None:
+        config['backup_run'] = flow_backup.start_run(config['root_dir'], config['archive_root'])
+    project_configs = []
+    for project in projects:
+        project_config = load_config(config['root_dir'], jobs=config['jobs'], delete_orphans=config['delete_orphans'],
+                                     dry_run=config['dry_run'], project=project)
+        project_config['log_file'] = config['log_file']
+        project_config['backup_run'] = config['backup_run']
+        project_config['lock'] = config['lock']
+        project_configs.append((project_config, indexes[project['key']]))
+
+    def run(item):
+        project_config, index = item
+        if not index['files'] and not index['backlog_dir']:
+            return 0
+        try:
+            return sync_project(project_config, index)
+        except Exception as e:
+            error_log(project_config, f"同期中にエラーが発生しました: {e}")
+            return 1
+
+    from concurrent.futures import ThreadPoolExecutor
+    if project_jobs is None:
+        project_jobs = min(8, len(project_configs))
+    with ThreadPoolExecutor(max_workers=max(1, project_jobs)) as executor:
+        error_count = sum(executor.map(run, project_configs))
+
+    finish_sync(config, error_count)
+    return error_count
+
+
+def add_arguments(parser):
+    """
+    同期のコマンドライン引数を追加（aipm sync と共通）
+    """
+    parser.add_argument('--root', help='ルートディレクトリ (デフォルト: このスクリプトの親ディレクトリ)')
+    parser.add_argument('--project', help=f'プロジェクトID (デフォルト: {DEFAULT_PROJECT_ID})')
+    parser.add_argument('-j', '--jobs', type=int, help='ストーリー同期の並列数 (デフォルト: CPU数+4、最大32)')
+    parser.add_argument('--delete-orphans', action='store_true',
+                        help='Flowに存在しないStockのストーリーをバックアップ後に削除 (デフォルト: 警告のみ)')
+    parser.add_argument('--dry-run', action='store_true', help='同期計画を表示するだけでStockを変更しない')
+    parser.add_argument('--plan-output', help='同期計画（変更マニフェスト）をJSONで保存するパス')
+    parser.add_argument('--apply-plan', help='保存済みの同期計画を実行')
+    parser.add_argument('--all-projects', action='store_true',
+                        help='Stock/projects/* と Stock/programs/*/projects/* の全プロジェクトを同期')
+    parser.add_argument('--project-jobs', type=int, help='--all-projects 時に並列で同期するプロジェクト数 (デフォルト: 8)')
+    phase_timer.add_arguments(parser)
+
+
+def check_arguments(parser, args):
+    """
+    同時に指定できない引数の組み合わせをエラーにする
+    """
+    if args.all_projects and (args.project or args.plan_output or args.apply_plan):
+        parser.error("--all-projects は --project / --plan-output / --apply-plan と同時に指定できません")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Flowフォルダの最新文書をStockフォルダへ同期するスクリプト')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    check_arguments(parser, args)
+
+    with phase_timer.session(args, "flow_to_stock"):
+        return phase_timer.record_exit_code(sync(args))
+
+
+def sync(args):
+    """
+    引数に従って同期を実行し、終了コードを返す
+    """
+    config = load_config(args.root, args.project, jobs=args.jobs, delete_orphans=args.delete_orphans,
+                         dry_run=args.dry_run)
+
+    plan = None
+    if args.apply_plan:
+        try:
+            plan = load_plan(args.apply_plan)
+        except Exception as e:
+            print(f"同期計画の読み込みエラー: {e}", file=sys.stderr)
+            return 1
+
+    if config['dry_run']:
+        config['log_file'] = None
+    elif args.all_projects:
+        os.makedirs(config['log_dir'], exist_ok=True)
+    else:
+        ensure_directories(config)
+
+    print("Flow→Stock同期設定を読み込みました。")
+    print(f"- ルートディレクトリ: {config['root_dir']}")
+    print(f"- Flowディレクトリ: {config['flow_root']}")
+    print(f"- Flow Private: {config['flow_private']}")
+    print(f"- Flow Public: {config['flow_public']}")
+    print(f"- Stockディレクトリ: {config['stock_root']}")
+    print(f"- アーカイブディレクトリ: {config['archive_root']}")
+    if args.all_projects:
+        print("- プロジェクト: Stock内の全プロジェクト")
+        error_count = run_all_projects(config, args.project_jobs)
+        return 0 if error_count == 0 else 1
+
+    print(f"- プロジェクトID: {config['project_id']}")
+    print(f"- バックログディレクトリ: {config['backlog_stock_dir']}")
+
+    error_count = run_sync(config, plan, args.plan_output)
+    return 0 if error_count == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -25,12 +25,56 @@ error_log() {
   echo "[$(date +"%Y-%m-%d %H:%M:%S")] [ERROR] $1" | tee -a "${LOG_FILE}"
 }
 
+# 実行メトリクス（AIPM_METRICS_DIR または METRICS_FILE が設定されている場合に run_metrics.py で出力）
+FILES_COPIED=0
+BYTES_COPIED=0
+BACKUPS_CREATED=0
+
+# コピーしたファイルをメトリクスに加算
+count_copied() {
+  FILES_COPIED=$((FILES_COPIED + 1))
+  BYTES_COPIED=$((BYTES_COPIED + $(wc -c < "$1")))
+}
+
+# メトリクスを書き出す（出力先が無い場合やpython3が無い場合は何もしない）
+write_metrics() {
+  local exit_code="$1"
+  local error_count="$2"
+  if [ -z "${AIPM_METRICS_DIR}" ] && [ -z "${METRICS_FILE}" ]; then
+    return 0
+  fi
+  if ! command -v python3 &> /dev/null || [ ! -f "${SCRIPT_DIR}/run_metrics.py" ]; then
+    return 0
+  fi
+  python3 "${SCRIPT_DIR}/run_metrics.py" --job flow_to_stock_sh ${METRICS_FILE:+--output "${METRICS_FILE}"} \
+    --duration "${SECONDS}" --exit-code "$exit_code" \
+    --value "errors=${error_count}" --value "files_copied=${FILES_COPIED}" \
+    --value "bytes_copied=${BYTES_COPIED}" --value "backups_created=${BACKUPS_CREATED}" \
+    || error_log "メトリクスの書き込みに失敗しました"
+}
+
+# バックアップの実行ID（1回の同期で1つのマニフェストにまとめる）
+BACKUP_RUN_ID=$(date +"%Y%m%d_%H%M%S")
+
 # ファイルのバックアップを作成
+# flow_backup.py が使える場合はコンテンツアドレス型ストア（archive/objects）へ保存し、
+# 同じ内容のファイルは重複して保存しない
 backup_file() {
   local source_file="$1"
   local backup_dir="${ARCHIVE_ROOT}/$(date +"%Y%m%d")"
   
   if [ -f "$source_file" ]; then
+    BACKUPS_CREATED=$((BACKUPS_CREATED + 1))
+    if command -v python3 &> /dev/null && [ -f "${SCRIPT_DIR}/flow_backup.py" ]; then
+      local result
+      if result=$(python3 "${SCRIPT_DIR}/flow_backup.py" --root "${ROOT_DIR}" --archive "${ARCHIVE_ROOT}" \
+          backup --run-id "${BACKUP_RUN_ID}" "$source_file" 2>&1); then
+        log "$result"
+        return 0
+      fi
+      error_log "バックアップストアへの保存に失敗しました: $result"
+    fi
+
     # バックアップディレクトリがなければ作成
     mkdir -p "$backup_dir"
     
@@ -97,13 +141,18 @@ sync_file() {
   local latest_flow_file=$(find_latest_flow_file "$file_pattern")
   
   if [ -n "$latest_flow_file" ] && [ -f "$latest_flow_file" ]; then
-    # 既存のファイルがあればバックアップ
+    # 既存のファイルがあればバックアップ（内容が同じならバックアップもコピーも不要）
     if [ -f "$stock_path" ]; then
+      if cmp -s "$latest_flow_file" "$stock_path"; then
+        log "変更なし: $latest_flow_file → $stock_path"
+        return 0
+      fi
       backup_file "$stock_path"
     fi
     
     # ファイルをコピー
     cp "$latest_flow_file" "$stock_path"
+    count_copied "$stock_path"
     log "同期完了: $latest_flow_file → $stock_path"
     return 0
   else
@@ -131,6 +180,7 @@ sync_backlog() {
   # エピックYAMLの同期
   if [ -f "${latest_backlog_dir}/epics.yaml" ]; then
     cp "${latest_backlog_dir}/epics.yaml" "${BACKLOG_STOCK_DIR}/epics.yaml"
+    count_copied "${BACKLOG_STOCK_DIR}/epics.yaml"
     log "エピックファイルを同期しました: epics.yaml"
   else
     error_log "エピックファイルが見つかりません: ${latest_backlog_dir}/epics.yaml"
@@ -144,6 +194,11 @@ sync_backlog() {
       cp "$story_file" "${STORIES_STOCK_DIR}/$story_filename"
       log "ストーリーファイルを同期しました: $story_filename"
     done
+    # パイプ内のループはサブシェルで動くため、件数はここでまとめて加算する
+    local story_file
+    while read story_file; do
+      count_copied "$story_file"
+    done < <(find "${latest_backlog_dir}/stories" -name "*.md" -type f)
     log "ストーリーファイルの同期が完了しました"
   else
     error_log "ストーリーディレクトリが見つかりません: ${latest_backlog_dir}/stories"
@@ -197,15 +252,18 @@ main() {
     
     # 会議議事録は日付付きでコピー（上書きではなく追加）
     cp "$latest_meeting" "${MEETINGS_DIR}/${meeting_filename}"
+    count_copied "${MEETINGS_DIR}/${meeting_filename}"
     log "会議議事録を同期: $latest_meeting → ${MEETINGS_DIR}/${meeting_filename}"
   fi
   
   # 結果出力
   if [ $error_count -eq 0 ]; then
     log "Flow→Stock同期処理が正常に完了しました。"
+    write_metrics 0 "$error_count"
     return 0
   else
     error_log "Flow→Stock同期処理が完了しましたが、${error_count}件のエラーがありました。"
+    write_metrics 1 "$error_count"
     return 1
   fi
 }
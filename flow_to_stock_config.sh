@@ -7,7 +7,7 @@
 ROOT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )/.." &> /dev/null && pwd )"
 
 # プロジェクトID（dinnerなど）
-PROJECT_ID="dinner"
+PROJECT_ID="${PROJECT_ID:-dinner}"
 
 # 各種ディレクトリの設定
 DOCUMENTS_DIR="${ROOT_DIR}/documents"
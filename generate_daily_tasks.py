@@ -5,35 +5,40 @@
 
 1. extract_tasks.pyを実行してストーリーとタスクを抽出
 2. 現在のスプリントに該当するストーリーをフィルタリング
-3. 該当する頻度（日次/週次）のルーチンタスクをフィルタリング
-4. 必要に応じてassigneeでフィルタリング
-5. 日次タスクのマークダウンを生成
+3. 依存先（dependencies）が未完了のストーリーを除外（dependency_graph.py）
+4. 該当する頻度（日次/週次）のルーチンタスクをフィルタリング
+5. 必要に応じてassigneeでフィルタリング
+6. 前日以前の日次タスクから未完了のタスクを持ち越す（carry_over.py）
+7. 必要に応じて稼働可能時間に収まるように優先度順で計画（scheduler.py）
+8. 日次タスクのマークダウンを生成
 """
 
 import os
 import sys
-import json
-import yaml
 import argparse
-import subprocess
-import tempfile
 from datetime import datetime, timedelta
-from pathlib import Path
+
+import phase_timer
+from aipm import paths
+from aipm.lazy import lazy_import
+
+# --help や小さな処理で読み込み時間を払わないよう、初回アクセスまで読み込まない
+yaml = lazy_import("yaml")
+json = lazy_import("json")
+subprocess = lazy_import("subprocess")
+tempfile = lazy_import("tempfile")
+yaml_schema = lazy_import("yaml_schema")
+daily_template = lazy_import("daily_template")
+scheduler = lazy_import("scheduler")
+dependency_graph = lazy_import("dependency_graph")
+carry_over = lazy_import("carry_over")
 
 
 def get_root_dir():
     """
-    環境変数またはデフォルト値からルートディレクトリを取得
+    環境変数またはデフォルト値からルートディレクトリを取得（aipm.paths と共通）
     """
-    # 環境変数 AIPM_ROOT が設定されていれば使用
-    root_dir = os.environ.get('AIPM_ROOT')
-    
-    # 環境変数が設定されていない場合はデフォルトパスを使用
-    if not root_dir:
-        root_dir = os.path.expanduser("~/aipm_v3")
-        print(f"環境変数 AIPM_ROOT が設定されていません。デフォルトパス {root_dir} を使用します。")
-    
-    return root_dir
+    return paths.get_root_dir()
 
 
 def load_user_config(root_dir):
@@ -86,12 +91,13 @@ def run_extract_tasks(root_dir, temp_output):
         cmd = [sys.executable, extract_script, "--format", "json", "--output", temp_output]
         print(f"Running command: {' '.join(cmd)}")
         
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=False  # エラーが発生しても例外をスローしない
-        )
+        with phase_timer.phase("extract_subprocess"):
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                check=False  # エラーが発生しても例外をスローしない
+            )
         
         print(result.stdout)
         
@@ -116,28 +122,44 @@ def run_extract_tasks(root_dir, temp_output):
         return False
 
 
+def extract_items_in_process(root_dir):
+    """
+    extract_tasks を同じプロセスで実行し、抽出結果（JSON出力と同じ形式のリスト）を返す
+    """
+    import extract_tasks
+    
+    try:
+        with phase_timer.phase("extract_in_process"):
+            stories, tasks = extract_tasks.collect_items(root_dir)
+        return stories + tasks
+    except Exception as e:
+        print(f"Error extracting tasks: {e}")
+        return []
+
+
 def load_extracted_data(file_path):
     """
     抽出されたJSONデータを読み込む
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with phase_timer.phase("load_extracted_json"):
+            phase_timer.count_file(file_path)
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            phase_timer.count(items=len(data))
+            return data
     except Exception as e:
         print(f"Error loading extracted data: {e}")
         return []
 
 
-def get_current_sprint(extracted_data):
+def get_current_sprint(extracted_data, today=None):
     """
     現在アクティブなスプリントを特定
     
     バックログから全スプリント情報を取得し、日付に基づいて現在のスプリントを判断
     複数のスプリントが現在日付に該当する場合は全て返す
     """
-    today = datetime.now().date()
-    active_sprints = []
-    
     # ストーリーからユニークなファイルパスを取得
     unique_files = set()
     for item in extracted_data:
@@ -148,6 +170,7 @@ def get_current_sprint(extracted_data):
     sprints = []
     for file_path in unique_files:
         try:
+            phase_timer.count_file(file_path)
             with open(file_path, 'r', encoding='utf-8') as f:
                 data = yaml.safe_load(f)
                 if data and 'sprints' in data:
@@ -157,6 +180,19 @@ def get_current_sprint(extracted_data):
         except Exception as e:
             print(f"Warning: Failed to read sprint data from {file_path}: {e}")
     
+    return select_active_sprints(sprints, today)
+
+
+def select_active_sprints(sprints, today=None):
+    """
+    スプリント定義のリストから現在アクティブなスプリントIDを選択
+    
+    現在日付がスプリント期間内のものを全て返し、該当がなければ一番近い将来のスプリントを返す
+    """
+    if today is None:
+        today = datetime.now().date()
+    active_sprints = []
+    
     # 現在日付がスプリント期間内のものを全て選択
     for sprint in sprints:
         try:
@@ -194,6 +230,42 @@ def get_current_sprint(extracted_data):
     return active_sprints
 
 
+def load_items_from_store(root_dir, db_path, today=None, graph=None):
+    """
+    アイテムストア（SQLite）を同期し、インデックスを使って
+    現在のスプリントのストーリーとルーチンタスクを取得
+    graph を渡すと全ストーリーの依存関係でグラフを更新する
+    
+    戻り値: (現在のスプリントIDリスト, 未完了のスプリントストーリー, ルーチンタスク)
+    """
+    import item_store
+    
+    if not db_path:
+        db_path = item_store.get_default_db_path(root_dir)
+    print(f"アイテムストア: {db_path}")
+    
+    conn = item_store.open_store(db_path)
+    try:
+        item_store.sync_store(conn, root_dir)
+        
+        sprints = [
+            sprint for sprint in item_store.load_sprints(conn)
+            if sprint['sprint_id'] and sprint['start_date'] and sprint['end_date']
+        ]
+        current_sprints = select_active_sprints(sprints, today)
+        
+        stories = []
+        if current_sprints:
+            stories = item_store.query_stories(conn, sprint_ids=current_sprints, exclude_statuses=["completed"])
+        routine_tasks = item_store.query_routine_tasks(conn)
+        if graph is not None:
+            graph.update_from_items(item_store.query_story_dependencies(conn))
+    finally:
+        conn.close()
+    
+    return current_sprints, stories, routine_tasks
+
+
 def filter_current_sprint_stories(extracted_data, current_sprints):
     """
     現在のスプリントに割り当てられたストーリーをフィルタリング
@@ -225,6 +297,37 @@ def filter_current_sprint_stories(extracted_data, current_sprints):
     return current_stories
 
 
+def filter_ready_stories(stories, graph):
+    """
+    依存関係グラフで ready（依存先がすべて完了）のストーリーだけを残す
+    """
+    with phase_timer.phase("dependency_filter"):
+        ready_stories, excluded_stories = dependency_graph.filter_ready_stories(stories, graph)
+    
+    if excluded_stories:
+        print(f"{len(excluded_stories)} 件のストーリーは依存先が未完了のため除外しました。")
+        for story in excluded_stories:
+            story_id = story.get('id')
+            file_path = story.get('file_path')
+            if graph.state(story_id, file_path) == dependency_graph.CYCLE:
+                print(f"  - {story_id}: 循環依存")
+            else:
+                print(f"  - {story_id}: 依存先 {', '.join(graph.blockers(story_id, file_path))}")
+    
+    story_ids = {story.get('id') for story in stories}
+    for dependency, referrers in graph.missing().items():
+        referrers = [story_id for story_id in referrers if story_id in story_ids]
+        if referrers:
+            print(f"警告: 依存先 {dependency} がどのバックログにもありません ({', '.join(referrers)})")
+    
+    length, path = graph.critical_path()
+    if path:
+        print(f"クリティカルパス（全バックログ）: {' → '.join(path)} (estimate 合計 {length:g})")
+    
+    phase_timer.set_value('blocked_stories', len(excluded_stories))
+    return ready_stories
+
+
 def filter_by_assignee(items, user_names):
     """
     ユーザー名に基づいてアイテム（ストーリーまたはルーチンタスク）をフィルタリング
@@ -278,8 +381,7 @@ def filter_routine_tasks(extracted_data, today_date=None):
         today_date = datetime.now().date()
     
     weekday = today_date.weekday()  # 0=月曜, 1=火曜, ..., 6=日曜
-    weekday_names = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-    today_weekday = weekday_names[weekday]
+    today_weekday = yaml_schema.WEEKDAYS[weekday]
     
     today_tasks = []
     
@@ -304,99 +406,37 @@ def filter_routine_tasks(extracted_data, today_date=None):
     return today_tasks
 
 
-def generate_daily_tasks_markdown(sprint_stories, routine_tasks, output_file, today_date=None):
+def load_daily_template(root_dir, user_config):
     """
-    日次タスクのマークダウンを生成
+    ユーザー設定の daily_template からテンプレートを読み込む（エラー時はデフォルトのテンプレート）
     """
-    if today_date is None:
-        today_date = datetime.now().date()
-    
-    date_str = today_date.strftime("%Y-%m-%d")
-    weekday = today_date.weekday()
-    is_monday = weekday == 0
-    is_friday = weekday == 4
-    
-    # スプリントタスクセクション（プロジェクト・エピック別に階層化）
-    sprint_section = ""
-    if sprint_stories:
-        sprint_section = "## 🎯 スプリントタスク\n\n"
-        
-        # プロジェクト別にストーリーをグループ化
-        projects = {}
-        for story in sprint_stories:
-            project_name = story.get('project', 'その他のプロジェクト')
-            epic_name = story.get('epic_name', 'その他のエピック')
-            
-            if project_name not in projects:
-                projects[project_name] = {}
-            
-            if epic_name not in projects[project_name]:
-                projects[project_name][epic_name] = []
-            
-            projects[project_name][epic_name].append(story)
-        
-        # プロジェクト・エピック別にマークダウンを生成
-        for project_name, epics in projects.items():
-            sprint_section += f"### {project_name}\n"
-            
-            for epic_name, stories in epics.items():
-                sprint_section += f"#### {epic_name}\n"
-                
-                for story in stories:
-                    story_id = story.get('id', 'Unknown')
-                    story_title = story.get('title', 'Untitled Story')
-                    sprint_section += f"- [ ] {story_id}: {story_title}\n"
-                
-                sprint_section += "\n"
-            
-            sprint_section += "\n"
-    
-    # ルーチンタスクセクション
-    routine_tasks_md = ""
-    if routine_tasks:
-        for task in routine_tasks:
-            task_title = task.get('title', 'Untitled Task')
-            routine_info = task.get('routine', {})
-            frequency = routine_info.get('frequency', '').capitalize()
-            routine_tasks_md += f"- [ ] [{frequency}] {task_title}\n"
-    else:
-        routine_tasks_md = "- [ ] デイリータスクの確認\n"
-    
-    # 曜日特有のタスクセクション
-    special_day_section = ""
-    if is_monday:
-        special_day_section = """## 🚀 週初めのタスク
-
-
-"""
-    elif is_friday:
-        special_day_section = """## 📊 週末のタスク
+    config_dir = os.path.join(root_dir, "scripts", "config")
+    try:
+        return daily_template.load_template_set(user_config.get("daily_template"), config_dir)
+    except (OSError, daily_template.TemplateError) as e:
+        print(f"警告: 日次タスクのテンプレートを読み込めません: {e}")
+        print("デフォルトのテンプレートを使用します。")
+        return daily_template.TemplateSet()
 
 
-"""
+def generate_daily_tasks_markdown(sprint_stories, routine_tasks, output_file, today_date=None, template_set=None,
+                                   plan=None, carried_tasks=None):
+    """
+    日次タスクのマークダウンを生成（コンパイル済みテンプレートで出力）
+    """
+    if today_date is None:
+        today_date = datetime.now().date()
     
-    # テンプレートの作成
-    template = f"""# 日次タスク {date_str}
-
-## 📋 今日の予定
-
-
-{special_day_section}{sprint_section}## 🔄 ルーチンタスク
-{routine_tasks_md}
-## 📝 備考・メモ
-- 
-
-## 📈 今日の振り返り
-- 達成したこと: 
-- 障害/課題: 
-- 明日のアクション: 
-"""
+    template = daily_template.render_daily_tasks(sprint_stories, routine_tasks, today_date, template_set, plan,
+                                                 carried_tasks)
     
     # ファイルに書き込み
     try:
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(template)
+        with phase_timer.phase("write_markdown"):
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(template)
+            phase_timer.count(files=1, bytes=len(template.encode('utf-8')))
         
         print(f"日次タスクを作成しました: {output_file}")
         return True
@@ -405,15 +445,43 @@ def generate_daily_tasks_markdown(sprint_stories, routine_tasks, output_file, to
         return False
 
 
-def main():
-    parser = argparse.ArgumentParser(description='現在のスプリントとルーチンタスクに基づいた日次タスクを生成')
+def add_arguments(parser):
+    """
+    日次タスク生成のコマンドライン引数を追加（aipm daily と共通）
+    """
     parser.add_argument('--date', help='対象日付 (YYYY-MM-DD形式、デフォルト: 今日)')
     parser.add_argument('--output', '-o', help='出力ファイルパス (デフォルト: Flow/YYYY-MM-DD/daily_tasks.md)')
     parser.add_argument('--root', help='ルートディレクトリ (デフォルト: 環境変数 AIPM_ROOT または ~/aipm_v3)')
     parser.add_argument('--filter-assignee', action='store_true', help='自分のassigneeでフィルタリングする')
     parser.add_argument('--all-assignees', action='store_true', help='全てのassigneeを表示する (--filter-assigneeより優先)')
+    parser.add_argument('--store', action='store_true', help='extract_tasks.pyの代わりにアイテムストア (SQLite) から読み込む')
+    parser.add_argument('--db', help='アイテムストアのデータベースパス (デフォルト: ROOT/.aipm/items.sqlite3)')
+    parser.add_argument('--in-process', action='store_true',
+                        help='extract_tasks.pyを別プロセスで実行せず、同じプロセス内で抽出する')
+    parser.add_argument('--include-blocked', action='store_true',
+                        help='依存先 (dependencies) が未完了のストーリーも表示する')
+    parser.add_argument('--schedule', action='store_true',
+                        help='優先度・見積もり・カレンダーの予定から、稼働可能時間に収まるタスクだけを計画する')
+    parser.add_argument('--capacity', type=float, metavar='HOURS',
+                        help='1日の稼働可能時間 (時間、指定すると --schedule も有効、デフォルト: user_config.yaml の schedule)')
+    parser.add_argument('--carry-over-days', type=int, metavar='N',
+                        help='前日以前のN件の日次タスクから未完了のタスクを持ち越す (0で無効、デフォルト: user_config.yaml の carry_over、未設定なら1)')
+    phase_timer.add_arguments(parser)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='現在のスプリントとルーチンタスクに基づいた日次タスクを生成')
+    add_arguments(parser)
     args = parser.parse_args()
     
+    with phase_timer.session(args, "generate_daily_tasks"):
+        return phase_timer.record_exit_code(generate(args))
+
+
+def generate(args):
+    """
+    コマンドライン引数に従って日次タスクを生成し、終了コードを返す
+    """
     # ルートディレクトリの取得
     root_dir = args.root if args.root else get_root_dir()
     
@@ -442,57 +510,131 @@ def main():
     print(f"出力ファイル: {output_file}")
     
     # ユーザー設定の読み込み
-    user_config = load_user_config(root_dir)
+    with phase_timer.phase("load_user_config"):
+        user_config = load_user_config(root_dir)
+        template_set = load_daily_template(root_dir, user_config)
     user_names = user_config.get("user_names", [])
     
-    # 一時ファイルを作成
-    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as temp:
-        temp_file = temp.name
+    temp_file = None
+    graph = dependency_graph.DependencyGraph()
     
     try:
-        # extract_tasks.pyを実行
-        print("ストーリーとタスクデータを抽出中...")
-        if not run_extract_tasks(root_dir, temp_file):
-            print("エラー: ストーリーとタスクの抽出に失敗しました。")
-            return 1
-        
-        # 抽出データを読み込み
-        extracted_data = load_extracted_data(temp_file)
-        if not extracted_data:
-            print("エラー: 抽出データが空か、読み込みに失敗しました。")
-            return 1
-        
-        # 現在のスプリントを特定
-        current_sprints = get_current_sprint(extracted_data)
-        if current_sprints:
-            print(f"現在のスプリント: {', '.join(current_sprints)}")
+        if args.store:
+            # アイテムストアからインデックス検索で読み込み
+            print("アイテムストアからストーリーとタスクデータを読み込み中...")
+            with phase_timer.phase("store_sync_and_query"):
+                current_sprints, store_stories, store_routine_tasks = load_items_from_store(
+                    root_dir, args.db, today_date, graph)
+            phase_timer.set_value('items_loaded', len(store_stories) + len(store_routine_tasks))
+            if current_sprints:
+                print(f"現在のスプリント: {', '.join(current_sprints)}")
+            
+            with phase_timer.phase("filter"):
+                sprint_stories = filter_current_sprint_stories(store_stories, current_sprints)
+                routine_tasks = filter_routine_tasks(store_routine_tasks, today_date)
+            print(f"{len(sprint_stories)} 件のスプリントストーリーが見つかりました。")
+            print(f"{len(routine_tasks)} 件のルーチンタスクが見つかりました。")
         else:
-            print("警告: 現在のスプリントが見つかりませんでした。")
+            if getattr(args, 'in_process', False):
+                # 同じプロセス内で抽出（サブプロセスと一時ファイルを使わない）
+                print("ストーリーとタスクデータを抽出中...")
+                extracted_data = extract_items_in_process(root_dir)
+            else:
+                # 一時ファイルを作成
+                with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as temp:
+                    temp_file = temp.name
+                
+                # extract_tasks.pyを実行
+                print("ストーリーとタスクデータを抽出中...")
+                if not run_extract_tasks(root_dir, temp_file):
+                    print("エラー: ストーリーとタスクの抽出に失敗しました。")
+                    return 1
+                
+                # 抽出データを読み込み
+                extracted_data = load_extracted_data(temp_file)
+            if not extracted_data:
+                print("エラー: 抽出データが空か、読み込みに失敗しました。")
+                return 1
+            phase_timer.set_value('items_loaded', len(extracted_data))
+            
+            # 全バックログのストーリーから依存関係グラフを作成
+            with phase_timer.phase("dependency_graph"):
+                graph.update_from_items(extracted_data)
+                phase_timer.count(items=graph.edge_count())
+            
+            # 現在のスプリントを特定
+            with phase_timer.phase("sprint_resolution"):
+                current_sprints = get_current_sprint(extracted_data, today_date)
+            if current_sprints:
+                print(f"現在のスプリント: {', '.join(current_sprints)}")
+            else:
+                print("警告: 現在のスプリントが見つかりませんでした。")
+            
+            # 現在のスプリントのストーリーとルーチンタスクをフィルタリング
+            with phase_timer.phase("filter"):
+                sprint_stories = filter_current_sprint_stories(extracted_data, current_sprints)
+                routine_tasks = filter_routine_tasks(extracted_data, today_date)
+            print(f"{len(sprint_stories)} 件のスプリントストーリーが見つかりました。")
+            print(f"{len(routine_tasks)} 件のルーチンタスクが見つかりました。")
         
-        # 現在のスプリントのストーリーをフィルタリング
-        sprint_stories = filter_current_sprint_stories(extracted_data, current_sprints)
-        print(f"{len(sprint_stories)} 件のスプリントストーリーが見つかりました。")
+        # 依存先・assignee・キャパシティで外すものも含めて、今日のスプリントストーリーは持ち越さない
+        today_story_ids = {story.get('id') for story in sprint_stories}
         
-        # ルーチンタスクをフィルタリング
-        routine_tasks = filter_routine_tasks(extracted_data, today_date)
-        print(f"{len(routine_tasks)} 件のルーチンタスクが見つかりました。")
+        # 依存先が未完了のストーリーを除外
+        if not getattr(args, 'include_blocked', False):
+            sprint_stories = filter_ready_stories(sprint_stories, graph)
         
         # assigneeでフィルタリング
         if args.filter_assignee and not args.all_assignees:
             if user_names:
                 print(f"assigneeフィルタを適用します: {', '.join(user_names)}")
                 # ストーリーをフィルタリング
-                filtered_stories = filter_stories_by_assignee(sprint_stories, user_names)
+                with phase_timer.phase("filter"):
+                    filtered_stories = filter_stories_by_assignee(sprint_stories, user_names)
+                    filtered_routine_tasks = filter_by_assignee(routine_tasks, user_names)
                 print(f"{len(filtered_stories)} 件のストーリーが自分のassigneeとして見つかりました。")
                 sprint_stories = filtered_stories
                 
                 # ルーチンタスクもフィルタリング
-                filtered_routine_tasks = filter_by_assignee(routine_tasks, user_names)
                 print(f"{len(filtered_routine_tasks)} 件のルーチンタスクが自分のassigneeとして見つかりました。")
                 routine_tasks = filtered_routine_tasks
         
+        # 前日以前の未完了タスクを持ち越し
+        carry_over_settings = carry_over.load_settings(user_config)
+        carry_over_days = getattr(args, 'carry_over_days', None)
+        if carry_over_days is not None:
+            carry_over_settings.update(enabled=carry_over_days > 0, days=carry_over_days)
+        with phase_timer.phase("carry_over"):
+            completed_ids = graph.completed_ids()
+            carried_tasks = carry_over.carry_over_tasks(root_dir, today_date, carry_over_settings,
+                                                        today_story_ids, completed_ids)
+        if carried_tasks:
+            print(f"{len(carried_tasks)} 件の未完了タスクを持ち越します。")
+        phase_timer.set_value('carried_tasks', len(carried_tasks))
+        
+        # 稼働可能時間に収まるように計画
+        plan = None
+        schedule_settings = scheduler.load_settings(user_config)
+        capacity = getattr(args, 'capacity', None)
+        if capacity is not None:
+            schedule_settings['capacity_hours'] = capacity
+        if getattr(args, 'schedule', False) or capacity is not None or schedule_settings.get('enabled'):
+            calendar_file = os.path.join(root_dir, "Flow", today_date.strftime("%Y%m"), date_str, "calendar_events.json")
+            with phase_timer.phase("schedule"):
+                phase_timer.count(items=len(sprint_stories) + len(routine_tasks) + len(carried_tasks))
+                sprint_stories, routine_tasks, carried_tasks, plan = scheduler.schedule_items(
+                    sprint_stories, routine_tasks, today_date, schedule_settings, calendar_file, carried_tasks)
+            print(f"キャパシティ計画: 稼働可能 {plan['capacity']}（予定 {plan['busy']}）、"
+                  f"計画 {plan['planned']}（{plan['scheduled_count']} 件）、持ち越し {plan['deferred_count']} 件")
+            phase_timer.set_value('deferred_items', plan['deferred_count'])
+        
+        phase_timer.set_value('sprint_stories', len(sprint_stories))
+        phase_timer.set_value('routine_tasks', len(routine_tasks))
+        
         # 日次タスクのマークダウンを生成
-        success = generate_daily_tasks_markdown(sprint_stories, routine_tasks, output_file, today_date)
+        with phase_timer.phase("render_markdown"):
+            success = generate_daily_tasks_markdown(sprint_stories, routine_tasks, output_file, today_date,
+                                                    template_set, plan, carried_tasks)
         
         if success:
             print(f"日次タスクを生成しました。カレンダー予定の統合を続行します...")
@@ -503,10 +645,11 @@ def main():
     
     finally:
         # 一時ファイルを削除
-        try:
-            os.unlink(temp_file)
-        except Exception:
-            pass
+        if temp_file:
+            try:
+                os.unlink(temp_file)
+            except Exception:
+                pass
 
 
 if __name__ == "__main__":
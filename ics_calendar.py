@@ -0,0 +1,647 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ICS（iCalendar）ファイルの読み込み
+
+1. ファイルを1行ずつ読み、折り返された行（先頭が空白・タブの行）を前の行につなげる
+2. BEGIN:VEVENT 〜 END:VEVENT のプロパティを読み取り、期間外の単発の予定はその場で捨てる
+3. 繰り返しの予定（RRULE）は、期間の直前の周期まで計算で飛ばしてから期間内の回だけを展開する
+   （COUNT がある場合のみ最初から数える。EXDATE / RDATE、RECURRENCE-ID による個別の変更・取消に対応）
+4. Code.js（getCalendarEvents）と同じ形式の予定にする
+   （id, title, description, location, startTime, endTime, allDay, status, calendarId, calendarName）
+
+時刻は TZID（zoneinfo で解決できるもの）と UTC（末尾 Z）をローカル時刻に変換し、
+オフセット付きの ISO 形式にします。TZID の無い時刻（floating）はそのままローカル時刻として扱います。
+繰り返しは予定のタイムゾーンの時刻で展開するので、夏時間の切り替えをまたいでも同じ時刻になります。
+繰り返しの各回の id は Google カレンダーと同じく「UID_開始日時」です。
+"""
+
+import re
+import calendar
+from datetime import date, datetime, time, timedelta, timezone
+
+
+_DURATION_RE = re.compile(r"^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+_BYDAY_RE = re.compile(r"^([+-]?\d+)?(MO|TU|WE|TH|FR|SA|SU)$")
+_TEXT_ESCAPE_RE = re.compile(r"\\(.)")
+_TEXT_ESCAPES = {'n': "\n", 'N': "\n"}
+
+WEEKDAYS = {'MO': 0, 'TU': 1, 'WE': 2, 'TH': 3, 'FR': 4, 'SA': 5, 'SU': 6}
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+
+# 条件に合う日が無い規則（BYMONTHDAY=30 と BYMONTH=2 など）で止まらないための周期数の上限
+MAX_PERIODS = 10000
+
+# 複数行を持てるプロパティ（それ以外は最初の1つだけを使う）
+_MULTI_VALUED = ('EXDATE', 'RDATE')
+
+# TZID → tzinfo（解決できないものは None）
+_zones = {}
+
+
+def unfold_lines(lines):
+    """
+    折り返された行をつなげた論理行を順に返す
+    """
+    current = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def parse_property(line):
+    """
+    "NAME;PARAM=VALUE:値" を (NAME, {PARAM: VALUE}, 値) にする
+    """
+    index = line.find(':')
+    if index < 0:
+        return None, {}, ''
+    head = line[:index]
+    if '"' in head:
+        # パラメータ値（"..."）の中のコロンは区切りにしない
+        in_quote = False
+        for index, char in enumerate(line):
+            if char == '"':
+                in_quote = not in_quote
+            elif char == ':' and not in_quote:
+                break
+        else:
+            return None, {}, ''
+        head = line[:index]
+    value = line[index + 1:]
+    if ';' not in head:
+        return head.upper(), {}, value
+
+    name, *raw_params = head.split(';')
+    params = {}
+    for raw in raw_params:
+        key, _, param_value = raw.partition('=')
+        params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+
+def unescape_text(value):
+    """
+    TEXT 型の値のエスケープ（\\n, \\, \\; \\\\）を戻す
+    """
+    return _TEXT_ESCAPE_RE.sub(lambda match: _TEXT_ESCAPES.get(match.group(1), match.group(1)), value)
+
+
+def _zone(tzid):
+    if tzid not in _zones:
+        try:
+            from zoneinfo import ZoneInfo
+            _zones[tzid] = ZoneInfo(tzid)
+        except (ImportError, ValueError, KeyError, OSError):
+            _zones[tzid] = None
+    return _zones[tzid]
+
+
+def parse_datetime(value, params=None):
+    """
+    DATE / DATE-TIME の値を解析する
+
+    戻り値: (date または予定のタイムゾーンでの naive な datetime, tzinfo, 日付のみか)
+    解析できない場合は (None, None, False)
+    """
+    value = value.strip()
+    params = params or {}
+    # strptime は遅いので固定位置の数字を切り出す（YYYYMMDD / YYYYMMDDTHHMMSS[Z]）
+    try:
+        if params.get('VALUE') == 'DATE' or len(value) == 8:
+            return date(int(value[0:4]), int(value[4:6]), int(value[6:8])), None, True
+        if len(value) < 15 or value[8] != 'T':
+            return None, None, False
+        moment = datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]),
+                          int(value[9:11]), int(value[11:13]), int(value[13:15]))
+    except ValueError:
+        return None, None, False
+    if value.endswith('Z'):
+        return moment, timezone.utc, False
+    return moment, (_zone(params['TZID']) if params.get('TZID') else None), False
+
+
+def localize(moment, zone):
+    """
+    予定のタイムゾーンの時刻をローカル時刻にする（date と floating はそのまま）
+    """
+    if zone is None or not isinstance(moment, datetime):
+        return moment
+    return moment.replace(tzinfo=zone).astimezone()
+
+
+def convert_zone(moment, from_zone, zone):
+    """
+    from_zone の時刻を zone の時刻にする（zone が None ならローカル時刻、どちらも naive のまま返す）
+    """
+    if from_zone is zone or not isinstance(moment, datetime):
+        return moment
+    moment = localize(moment, from_zone)
+    return moment.astimezone(zone).replace(tzinfo=None) if zone is not None else local_naive(moment)
+
+
+def local_naive(moment):
+    """
+    比較用にローカル時刻の naive な datetime にする（date はその日の0時）
+    """
+    if not isinstance(moment, datetime):
+        return datetime.combine(moment, time())
+    if moment.tzinfo is not None:
+        return moment.astimezone().replace(tzinfo=None)
+    return moment
+
+
+# 日付 → その日のローカルタイムゾーンのUTCオフセット（astimezone() を予定ごとに呼ばないためのキャッシュ）
+_local_offsets = {}
+
+
+def _local_offset(day):
+    offset = _local_offsets.get(day)
+    if offset is None:
+        offset = datetime.combine(day, time(12)).astimezone().utcoffset()
+        _local_offsets[day] = offset
+    return offset
+
+
+def wall_to_local(moment, zone):
+    """
+    予定のタイムゾーンの時刻を、比較用のローカル時刻の naive な datetime にする
+    （local_naive(localize(moment, zone)) と同じ結果を astimezone() を呼ばずに求める）
+    """
+    if not isinstance(moment, datetime):
+        return datetime.combine(moment, time())
+    if zone is None:
+        return moment
+    utc = moment - (moment.replace(tzinfo=zone).utcoffset() if zone is not timezone.utc else timedelta(0))
+    return utc + _local_offset(utc.date())
+
+
+def parse_duration(value):
+    """
+    DURATION（例: PT1H30M, P1D）を timedelta にする（解析できない場合はNone）
+    """
+    match = _DURATION_RE.match(value.strip())
+    if not match:
+        return None
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    delta = timedelta(weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+                      minutes=int(minutes or 0), seconds=int(seconds or 0))
+    return -delta if sign == '-' else delta
+
+
+def parse_rrule(value):
+    """
+    RRULE を辞書にする（FREQ が無い・不明な場合はNone）
+
+    キー: freq, interval, count, until（(値, tzinfo, 日付のみか)）, byday（[(序数またはNone, 曜日)]）,
+          bymonthday, bymonth, bysetpos, wkst
+    """
+    parts = {}
+    for item in value.split(';'):
+        key, _, part_value = item.partition('=')
+        parts[key.strip().upper()] = part_value.strip()
+    if parts.get('FREQ', '').upper() not in FREQUENCIES:
+        return None
+
+    def numbers(key):
+        result = []
+        for number in parts.get(key, '').split(','):
+            try:
+                result.append(int(number))
+            except ValueError:
+                pass
+        return result
+
+    byday = []
+    for item in parts.get('BYDAY', '').split(','):
+        match = _BYDAY_RE.match(item.strip().upper())
+        if match:
+            byday.append((int(match.group(1)) if match.group(1) else None, WEEKDAYS[match.group(2)]))
+
+    try:
+        interval = max(1, int(parts.get('INTERVAL') or 1))
+        count = int(parts['COUNT']) if parts.get('COUNT') else None
+    except ValueError:
+        return None
+
+    return {
+        'freq': parts['FREQ'].upper(),
+        'interval': interval,
+        'count': count,
+        'until': parse_datetime(parts['UNTIL']) if parts.get('UNTIL') else None,
+        'byday': byday,
+        'bymonthday': numbers('BYMONTHDAY'),
+        'bymonth': numbers('BYMONTH'),
+        'bysetpos': numbers('BYSETPOS'),
+        'wkst': WEEKDAYS.get(parts.get('WKST', 'MO').upper(), 0)
+    }
+
+
+def _add_months(year, month, months):
+    index = year * 12 + month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+def _month_days(year, month, rule, start_day):
+    """
+    規則に合うその月の日（1〜）のリスト
+    """
+    last = calendar.monthrange(year, month)[1]
+    if rule['bymonthday']:
+        days = sorted({day if day > 0 else last + day + 1 for day in rule['bymonthday']
+                       if 1 <= (day if day > 0 else last + day + 1) <= last})
+        if rule['byday']:
+            weekdays = {weekday for _, weekday in rule['byday']}
+            days = [day for day in days if calendar.weekday(year, month, day) in weekdays]
+        return days
+    if rule['byday']:
+        days = set()
+        for ordinal, weekday in rule['byday']:
+            first = (weekday - calendar.weekday(year, month, 1)) % 7 + 1
+            matches = list(range(first, last + 1, 7))
+            if ordinal is None:
+                days.update(matches)
+            elif -len(matches) <= ordinal <= len(matches) and ordinal != 0:
+                days.add(matches[ordinal - 1] if ordinal > 0 else matches[ordinal])
+        return sorted(days)
+    return [start_day] if start_day <= last else []
+
+
+def _year_days(year, rule):
+    """
+    YEARLY で BYMONTH が無く BYDAY がある場合（序数は年の中での何番目か）の日付のリスト
+    """
+    first_day = date(year, 1, 1)
+    days_in_year = 366 if calendar.isleap(year) else 365
+    result = set()
+    for ordinal, weekday in rule['byday']:
+        first = first_day + timedelta(days=(weekday - first_day.weekday()) % 7)
+        matches = [first + timedelta(weeks=week) for week in range((days_in_year - (first - first_day).days + 6) // 7)]
+        if ordinal is None:
+            result.update(matches)
+        elif -len(matches) <= ordinal <= len(matches) and ordinal != 0:
+            result.add(matches[ordinal - 1] if ordinal > 0 else matches[ordinal])
+    return sorted(result)
+
+
+def _period(rule, start, index):
+    """
+    index 番目の周期の (周期の最初の日, 規則に合う開始時刻のリスト)
+    """
+    freq = rule['freq']
+    step = index * rule['interval']
+    clock = start.time()
+
+    if freq == 'DAILY':
+        day = start.date() + timedelta(days=step)
+        days = [day]
+        period_start = day
+    elif freq == 'WEEKLY':
+        week_start = start.date() - timedelta(days=(start.weekday() - rule['wkst']) % 7) + timedelta(weeks=step)
+        weekdays = sorted({weekday for _, weekday in rule['byday']}) or [start.weekday()]
+        days = sorted(week_start + timedelta(days=(weekday - rule['wkst']) % 7) for weekday in weekdays)
+        period_start = week_start
+    elif freq == 'MONTHLY':
+        year, month = _add_months(start.year, start.month, step)
+        days = [date(year, month, day) for day in _month_days(year, month, rule, start.day)]
+        period_start = date(year, month, 1)
+    else:
+        year = start.year + step
+        period_start = date(year, 1, 1)
+        if rule['byday'] and not rule['bymonth'] and not rule['bymonthday']:
+            days = _year_days(year, rule)
+        else:
+            days = [date(year, month, day)
+                    for month in (sorted(rule['bymonth']) or [start.month])
+                    for day in _month_days(year, month, rule, start.day)]
+
+    # 周期より細かい BYxxx は絞り込みとして使う
+    if rule['bymonth'] and freq != 'YEARLY':
+        days = [day for day in days if day.month in rule['bymonth']]
+    if freq in ('DAILY', 'WEEKLY') and rule['bymonthday']:
+        days = [day for day in days if day.day in _month_days(day.year, day.month, rule, day.day)]
+    if freq == 'DAILY' and rule['byday']:
+        weekdays = {weekday for _, weekday in rule['byday']}
+        days = [day for day in days if day.weekday() in weekdays]
+
+    moments = [datetime.combine(day, clock) for day in days]
+    if rule['bysetpos'] and moments:
+        moments = sorted({moments[position - 1] if position > 0 else moments[position]
+                          for position in rule['bysetpos']
+                          if position and -len(moments) <= position <= len(moments)})
+    return period_start, moments
+
+
+def _first_period(rule, start, target):
+    """
+    target（日付）より前に終わる周期を飛ばした最初の周期の番号
+    """
+    freq = rule['freq']
+    if freq == 'DAILY':
+        elapsed = (target - start.date()).days
+    elif freq == 'WEEKLY':
+        week_start = start.date() - timedelta(days=(start.weekday() - rule['wkst']) % 7)
+        elapsed = (target - week_start).days // 7
+    elif freq == 'MONTHLY':
+        elapsed = (target.year - start.year) * 12 + target.month - start.month
+    else:
+        elapsed = target.year - start.year
+    return max(0, elapsed // rule['interval'])
+
+
+def expand_rrule(start, zone, rule, window_start, window_end, duration=timedelta(0)):
+    """
+    RRULE の開始時刻（start と同じ型、予定のタイムゾーンの時刻）のうち、
+    期間（ローカル時刻の naive な datetime）に重なりうるものを順に返す
+
+    COUNT が無ければ期間の直前の周期まで計算で飛ばすので、何年前から続く予定でも
+    展開するのは期間内の回だけ
+    """
+    all_day = not isinstance(start, datetime)
+    base = datetime.combine(start, time()) if all_day else start
+
+    until = None
+    if rule['until'] is not None:
+        until_value, until_zone, until_date_only = rule['until']
+        if until_date_only:
+            until = datetime.combine(until_value, time.max)
+        else:
+            until = convert_zone(until_value, until_zone, zone)
+
+    # 予定のタイムゾーンとローカルの時差の分、1日ずつ余裕を持たせて周期を絞る
+    margin = timedelta(days=1) + abs(duration)
+    first = 0
+    if rule['count'] is None:
+        first = _first_period(rule, base, (window_start - margin).date())
+    last_wall = window_end + timedelta(days=1)
+
+    emitted = 0
+    for index in range(first, first + MAX_PERIODS):
+        period_start, moments = _period(rule, base, index)
+        if datetime.combine(period_start, time()) > last_wall:
+            return
+        for moment in moments:
+            if moment < base:
+                continue
+            if until is not None and moment > until:
+                return
+            emitted += 1
+            if rule['count'] is not None and emitted > rule['count']:
+                return
+            yield moment.date() if all_day else moment
+
+
+def iter_vevents(lines):
+    """
+    VEVENT ごとに {プロパティ名: [(パラメータ, 値)]} を返す
+    カレンダー名（X-WR-CALNAME）は '_calendar_name' に入れる
+    """
+    calendar_name = ''
+    properties = None
+    depth = 0
+    for line in unfold_lines(lines):
+        marker = line[:6].upper()
+        if properties is None:
+            if marker == 'BEGIN:' and line[6:].strip().upper() == 'VEVENT':
+                properties = {}
+            elif marker == 'X-WR-C':
+                name, _, value = parse_property(line)
+                if name == 'X-WR-CALNAME':
+                    calendar_name = unescape_text(value)
+            continue
+
+        if marker == 'BEGIN:':
+            depth += 1   # VALARM などの入れ子は読み飛ばす
+        elif marker[:4] == 'END:':
+            if depth:
+                depth -= 1
+            elif line[4:].strip().upper() == 'VEVENT':
+                properties['_calendar_name'] = [({}, calendar_name)]
+                yield properties
+                properties = None
+        elif not depth:
+            name, params, value = parse_property(line)
+            if name:
+                values = properties.setdefault(name, [])
+                if not values or name in _MULTI_VALUED:
+                    values.append((params, value))
+
+
+def _first(properties, name, default=None):
+    values = properties.get(name)
+    return values[0] if values else default
+
+
+def _text(properties, name, default=''):
+    value = _first(properties, name)
+    return unescape_text(value[1]) if value else default
+
+
+def event_times(properties):
+    """
+    (開始, 終了, tzinfo, 日付のみか) を返す（開始時刻が無い・解析できない場合は開始がNone）
+    開始・終了は予定のタイムゾーンの時刻
+    """
+    start_params, start_value = _first(properties, 'DTSTART', ({}, ''))
+    start, zone, all_day = parse_datetime(start_value, start_params)
+    if start is None:
+        return None, None, None, False
+
+    end = None
+    if 'DTEND' in properties:
+        end_params, end_value = _first(properties, 'DTEND')
+        end, end_zone, _ = parse_datetime(end_value, end_params)
+        if end is not None:
+            # 終了だけ別のタイムゾーンの場合は開始のタイムゾーンにそろえる
+            end = convert_zone(end, end_zone, zone)
+    elif 'DURATION' in properties:
+        duration = parse_duration(_first(properties, 'DURATION')[1])
+        if duration is not None:
+            end = start + duration
+    if end is None or type(end) is not type(start):
+        end = start + timedelta(days=1) if all_day else start
+    return start, end, zone, all_day
+
+
+def occurrence_id(uid, start, zone):
+    """
+    繰り返しの各回の id（Google カレンダーの singleEvents と同じ「UID_開始日時」）
+    """
+    if not isinstance(start, datetime):
+        return f"{uid}_{start:%Y%m%d}"
+    if zone is not None:
+        return f"{uid}_{start.replace(tzinfo=zone).astimezone(timezone.utc):%Y%m%dT%H%M%SZ}"
+    return f"{uid}_{start:%Y%m%dT%H%M%S}"
+
+
+def to_event(properties, calendar_id='ics', start=None, end=None, zone=None, all_day=False, event_id=None):
+    """
+    VEVENT のプロパティを Code.js と同じ形式の予定にする（開始時刻が無いものはNone）
+    start を渡した場合はその回の予定にする（予定のタイムゾーンの時刻）
+    """
+    if start is None:
+        start, end, zone, all_day = event_times(properties)
+        if start is None:
+            return None
+
+    return {
+        'id': event_id or _text(properties, 'UID'),
+        'title': _text(properties, 'SUMMARY') or '(タイトルなし)',
+        'description': _text(properties, 'DESCRIPTION'),
+        'location': _text(properties, 'LOCATION'),
+        'startTime': localize(start, zone).isoformat(),
+        'endTime': localize(end, zone).isoformat(),
+        'allDay': all_day,
+        'status': _text(properties, 'STATUS', 'confirmed').lower(),
+        'calendarId': calendar_id,
+        'calendarName': _first(properties, '_calendar_name', ({}, ''))[1]
+    }
+
+
+def _overlaps(start, end, zone, window):
+    if window is None:
+        return True
+    window_start, window_end = window
+    start = wall_to_local(start, zone)
+    end = wall_to_local(end, zone)
+    if end <= start:
+        end = start + timedelta(microseconds=1)
+    return start < window_end and end > window_start
+
+
+def _date_values(properties, name):
+    """
+    EXDATE / RDATE の値（カンマ区切り、複数行）を (値, tzinfo, 日付のみか) のリストにする
+    """
+    result = []
+    for params, value in properties.get(name, []):
+        for item in value.split(','):
+            if item.strip():
+                parsed = parse_datetime(item, params)
+                if parsed[0] is not None:
+                    result.append(parsed)
+    return result
+
+
+def _instance_key(uid, value, zone):
+    """
+    繰り返しの回を照合するキー（UID とローカル時刻）
+    """
+    return uid, wall_to_local(value, zone)
+
+
+def _expand_event(properties, calendar_id, window, overridden):
+    """
+    繰り返しの予定の期間内の回を返す（EXDATE と RECURRENCE-ID で変更された回は除く）
+    """
+    start, end, zone, all_day = event_times(properties)
+    if start is None:
+        return
+    rule = parse_rrule(_first(properties, 'RRULE')[1])
+    uid = _text(properties, 'UID')
+    duration = end - start
+    excluded = {wall_to_local(value, value_zone) for value, value_zone, _ in _date_values(properties, 'EXDATE')}
+
+    if rule is None:
+        starts = [start]
+    else:
+        window_start, window_end = window
+        starts = expand_rrule(start, zone, rule, window_start, window_end, duration)
+    extra = [(value, value_zone) for value, value_zone, _ in _date_values(properties, 'RDATE')
+             if type(value) is type(start)]
+
+    seen = set()
+    for occurrence, occurrence_zone in [(moment, zone) for moment in starts] + extra:
+        key = _instance_key(uid, occurrence, occurrence_zone)
+        if key in seen or key[1] in excluded or key in overridden:
+            continue
+        seen.add(key)
+        occurrence = convert_zone(occurrence, occurrence_zone, zone)
+        if _overlaps(occurrence, occurrence + duration, zone, window):
+            yield to_event(properties, calendar_id, occurrence, occurrence + duration, zone, all_day,
+                           occurrence_id(uid, occurrence, zone))
+
+
+def iter_events(lines, calendar_id='ics', start_date=None, days=1):
+    """
+    行のイテラブルから予定を順に返す（start_date を渡すとその日から days 日の期間に重なるものだけ）
+
+    単発の予定は読んだ時点で期間外なら捨て、繰り返しの予定と RECURRENCE-ID の変更だけを
+    最後まで持っておく（件数は繰り返しの予定の数だけ）
+    """
+    window = None
+    if start_date is not None:
+        window_start = datetime.combine(start_date, time())
+        window = (window_start, window_start + timedelta(days=days))
+        # タイムゾーンの差（最大1日）を見込んだ日付の文字列で、明らかに期間外の予定は解析せずに捨てる
+        earliest = f"{start_date - timedelta(days=1):%Y%m%d}"
+        latest = f"{start_date + timedelta(days=days + 1):%Y%m%d}"
+
+    recurring = []
+    overrides = []
+    for properties in iter_vevents(lines):
+        if 'RECURRENCE-ID' in properties:
+            overrides.append(properties)
+            continue
+        if 'RRULE' in properties or 'RDATE' in properties:
+            if window is not None:
+                recurring.append(properties)
+                continue
+        if window is not None:
+            raw_start = _first(properties, 'DTSTART', ({}, ''))[1].strip()[:8]
+            raw_end = _first(properties, 'DTEND', ({}, raw_start))[1].strip()[:8]
+            if raw_start > latest or ('DURATION' not in properties and raw_end < earliest):
+                continue
+        if _text(properties, 'STATUS').lower() == 'cancelled':
+            continue
+        start, end, zone, all_day = event_times(properties)
+        if start is not None and _overlaps(start, end, zone, window):
+            yield to_event(properties, calendar_id, start, end, zone, all_day)
+
+    # RECURRENCE-ID で変更・取消された回は元の回の代わりに変更後の予定を使う
+    overridden = set()
+    for properties in overrides:
+        params, value = _first(properties, 'RECURRENCE-ID')
+        recurrence, recurrence_zone, _ = parse_datetime(value, params)
+        if recurrence is not None:
+            overridden.add(_instance_key(_text(properties, 'UID'), recurrence, recurrence_zone))
+
+    for properties in recurring:
+        if _text(properties, 'STATUS').lower() != 'cancelled':
+            yield from _expand_event(properties, calendar_id, window, overridden)
+
+    for properties in overrides:
+        if window is not None:
+            raw_start = _first(properties, 'DTSTART', ({}, ''))[1].strip()[:8]
+            raw_end = _first(properties, 'DTEND', ({}, raw_start))[1].strip()[:8]
+            if raw_start > latest or ('DURATION' not in properties and raw_end < earliest):
+                continue
+        if _text(properties, 'STATUS').lower() == 'cancelled':
+            continue
+        start, end, zone, all_day = event_times(properties)
+        if start is None or not _overlaps(start, end, zone, window):
+            continue
+        params, value = _first(properties, 'RECURRENCE-ID')
+        recurrence, recurrence_zone, _ = parse_datetime(value, params)
+        event_id = occurrence_id(_text(properties, 'UID'), recurrence, recurrence_zone) if recurrence else None
+        yield to_event(properties, calendar_id, start, end, zone, all_day, event_id)
+
+
+def read_events(path, calendar_id='ics', start_date=None, days=1):
+    """
+    ICS ファイルの予定を開始時刻順に読み込む（キャンセルされた予定は除く）
+
+    start_date を渡すとその日から days 日の期間に重なるものだけを返し、繰り返しの予定を展開する
+    （渡さない場合、繰り返しの予定は初回だけ）
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        events = list(iter_events(f, calendar_id, start_date, days))
+    events.sort(key=lambda event: local_naive(datetime.fromisoformat(event['startTime'])))
+    return events
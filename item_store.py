@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+アイテムストア（SQLite）
+
+1. backlog.yaml / routines.yaml から抽出したストーリー・ルーチンタスク・スプリントを
+   SQLiteデータベースに保存
+2. ファイル単位で一括upsertし、変更のあったファイルのみ再抽出
+3. sprint_id / status / assignee / project / epic_id のインデックスを使って検索
+   （担当者は名前ごとに正規化した行を story_assignees に持ち、完全一致で検索）
+
+使用例:
+  python item_store.py --sprint S1 --status in_progress --assignee 宮田
+"""
+
+import os
+import re
+import sys
+import argparse
+from datetime import datetime
+
+from aipm.lazy import lazy_import
+
+# --help で読み込み時間を払わないよう、初回アクセスまで読み込まない
+json = lazy_import("json")
+sqlite3 = lazy_import("sqlite3")
+extract_tasks = lazy_import("extract_tasks")
+
+
+# スキーマを変更したら上げる（古いデータベースは全ファイルを再抽出する）
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file_path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS stories (
+    file_path TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    program TEXT,
+    project TEXT,
+    epic_id TEXT,
+    epic_name TEXT,
+    id TEXT,
+    title TEXT,
+    description TEXT,
+    acceptance_criteria TEXT,
+    priority TEXT,
+    status TEXT,
+    sprint_id TEXT,
+    sprint TEXT,
+    effective_sprint TEXT,
+    estimate,
+    assignee TEXT,
+    labels TEXT,
+    dependencies TEXT
+);
+
+CREATE TABLE IF NOT EXISTS story_assignees (
+    file_path TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS routine_tasks (
+    file_path TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    id TEXT,
+    title TEXT,
+    description TEXT,
+    priority,
+    estimate,
+    assignee TEXT,
+    program_id TEXT,
+    project_name TEXT,
+    frequency TEXT,
+    day_of_week TEXT,
+    day_of_month TEXT,
+    routine_json TEXT
+);
+
+CREATE TABLE IF NOT EXISTS sprints (
+    file_path TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    sprint_id TEXT,
+    name TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    status TEXT,
+    goal TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_stories_file ON stories (file_path);
+CREATE INDEX IF NOT EXISTS idx_stories_sprint ON stories (effective_sprint);
+CREATE INDEX IF NOT EXISTS idx_stories_status ON stories (status);
+CREATE INDEX IF NOT EXISTS idx_stories_position ON stories (file_path, position);
+CREATE INDEX IF NOT EXISTS idx_stories_project ON stories (project);
+CREATE INDEX IF NOT EXISTS idx_stories_epic ON stories (epic_id);
+CREATE INDEX IF NOT EXISTS idx_routine_tasks_file ON routine_tasks (file_path);
+CREATE INDEX IF NOT EXISTS idx_routine_tasks_frequency ON routine_tasks (frequency);
+CREATE INDEX IF NOT EXISTS idx_story_assignees_name ON story_assignees (name);
+CREATE INDEX IF NOT EXISTS idx_story_assignees_file ON story_assignees (file_path);
+CREATE INDEX IF NOT EXISTS idx_sprints_file ON sprints (file_path);
+CREATE INDEX IF NOT EXISTS idx_sprints_id ON sprints (sprint_id);
+CREATE INDEX IF NOT EXISTS idx_sprints_dates ON sprints (start_date, end_date);
+
+DROP INDEX IF EXISTS idx_stories_assignee;
+DROP INDEX IF EXISTS idx_routine_tasks_assignee;
+"""
+
+STORY_COLUMNS = [
+    'program', 'project', 'epic_id', 'epic_name', 'id', 'title', 'description',
+    'acceptance_criteria', 'priority', 'status', 'sprint_id', 'sprint', 'estimate',
+    'assignee', 'labels', 'dependencies'
+]
+
+SPRINT_COLUMNS = ['sprint_id', 'name', 'start_date', 'end_date', 'status', 'goal']
+
+# 1つの assignee に複数の担当者を書く場合の区切り
+ASSIGNEE_SEPARATOR_RE = re.compile(r'[,、/]')
+
+
+def get_default_db_path(root_dir):
+    """
+    ルートディレクトリからデフォルトのデータベースパスを取得
+    """
+    return os.path.join(root_dir, ".aipm", "items.sqlite3")
+
+
+def open_store(db_path):
+    """
+    データベースを開き、スキーマとインデックスを作成
+    """
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        # 古いスキーマで保存した行は新しい表（story_assignees など）が埋まっていないので作り直す
+        with conn:
+            for table in ("stories", "story_assignees", "routine_tasks", "sprints", "files"):
+                conn.execute(f"DELETE FROM {table}")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+def _to_text(value):
+    """
+    YAML由来の値（日付型など）をSQLiteに保存できる形に変換
+    """
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return str(value)
+
+
+def assignee_names(value):
+    """
+    assignee（文字列またはリスト）を正規化した担当者名のリストにする（前後の空白を除き小文字化）
+    """
+    if isinstance(value, (list, tuple)):
+        names = [str(item) for item in value if item is not None]
+    elif value is None:
+        names = []
+    else:
+        names = ASSIGNEE_SEPARATOR_RE.split(str(value))
+    normalized = []
+    for name in names:
+        name = " ".join(name.split()).lower()
+        if name and name not in normalized:
+            normalized.append(name)
+    return normalized
+
+
+def _delete_file_rows(conn, file_path):
+    """
+    指定ファイルに属するすべての行を削除
+    """
+    for table in ("stories", "story_assignees", "routine_tasks", "sprints", "files"):
+        conn.execute(f"DELETE FROM {table} WHERE file_path = ?", (file_path,))
+
+
+def _insert_file_rows(conn, entry):
+    """
+    1ファイル分のストーリー・ルーチンタスク・スプリントを挿入
+    """
+    file_path = entry['file_path']
+
+    conn.executemany(
+        f"INSERT INTO stories (file_path, position, effective_sprint, {', '.join(STORY_COLUMNS)}) "
+        f"VALUES (?, ?, ?, {', '.join('?' for _ in STORY_COLUMNS)})",
+        [
+            (file_path, position, _to_text(story.get('sprint_id') or story.get('sprint') or ''))
+            + tuple(_to_text(story.get(column, '')) for column in STORY_COLUMNS)
+            for position, story in enumerate(entry.get('stories', []))
+        ]
+    )
+    conn.executemany(
+        "INSERT INTO story_assignees (file_path, position, name) VALUES (?, ?, ?)",
+        [
+            (file_path, position, name)
+            for position, story in enumerate(entry.get('stories', []))
+            for name in assignee_names(story.get('assignee'))
+        ]
+    )
+
+    routine_rows = []
+    for position, task in enumerate(entry.get('routine_tasks', [])):
+        routine = task.get('routine', {})
+        routine_rows.append((
+            file_path, position,
+            _to_text(task.get('id', '')),
+            _to_text(task.get('title', '')),
+            _to_text(task.get('description', '')),
+            _to_text(task.get('priority', '')),
+            _to_text(task.get('estimate', 0)),
+            _to_text(task.get('assignee', '')),
+            _to_text(task.get('program_id', '')),
+            _to_text(task.get('project_name', '')),
+            _to_text(str(routine.get('frequency', '')).lower()),
+            _to_text(routine.get('day_of_week', '')),
+            _to_text(routine.get('day_of_month', '')),
+            json.dumps(routine, ensure_ascii=False, default=str)
+        ))
+    conn.executemany(
+        "INSERT INTO routine_tasks (file_path, position, id, title, description, priority, estimate, "
+        "assignee, program_id, project_name, frequency, day_of_week, day_of_month, routine_json) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        routine_rows
+    )
+
+    conn.executemany(
+        f"INSERT INTO sprints (file_path, position, {', '.join(SPRINT_COLUMNS)}) "
+        f"VALUES (?, ?, {', '.join('?' for _ in SPRINT_COLUMNS)})",
+        [
+            (file_path, position) + tuple(_to_text(sprint.get(column, '')) for column in SPRINT_COLUMNS)
+            for position, sprint in enumerate(entry.get('sprints', []))
+        ]
+    )
+
+    conn.execute(
+        "INSERT INTO files (file_path, kind, mtime_ns, size, updated_at) VALUES (?, ?, ?, ?, ?)",
+        (file_path, entry['kind'], entry.get('mtime_ns', 0), entry.get('size', 0), datetime.now().isoformat())
+    )
+
+
+def bulk_upsert(conn, entries):
+    """
+    ファイル単位でアイテムを一括upsert（1トランザクション）
+
+    entriesは以下のキーを持つ辞書のリスト:
+      file_path, kind ('backlog' または 'routines'), mtime_ns, size,
+      stories, routine_tasks, sprints
+    同じファイルの既存行は削除してから挿入する
+    """
+    with conn:
+        for entry in entries:
+            _delete_file_rows(conn, entry['file_path'])
+            _insert_file_rows(conn, entry)
+    return len(entries)
+
+
+def remove_files(conn, file_paths):
+    """
+    指定ファイルの行をストアから削除
+    """
+    with conn:
+        for file_path in file_paths:
+            _delete_file_rows(conn, file_path)
+
+
+def extract_file_entry(file_path, kind, stat_result=None):
+    """
+    1ファイルを抽出してupsert用のエントリを作成
+    """
+    if stat_result is None:
+        stat_result = os.stat(file_path)
+
+    entry = {
+        'file_path': file_path,
+        'kind': kind,
+        'mtime_ns': stat_result.st_mtime_ns,
+        'size': stat_result.st_size,
+        'stories': [],
+        'routine_tasks': [],
+        'sprints': []
+    }
+
+    if kind == 'backlog':
+        # extract_tasks.extract_stories_from_backlog と同じく、壊れたファイルは警告して空として扱う
+        try:
+            data = extract_tasks.load_yaml_file(file_path)
+            if data and isinstance(data, dict):
+                entry['stories'] = extract_tasks.extract_stories_from_backlog_data(data, file_path)
+                entry['sprints'] = extract_tasks.extract_sprints_from_backlog_data(data, file_path)
+        except Exception as e:
+            print(f"エラー: {file_path} の処理中にエラーが発生しました: {e}")
+            entry['stories'] = []
+            entry['sprints'] = []
+    else:
+        entry['routine_tasks'] = extract_tasks.extract_routine_tasks(file_path)
+
+    return entry
+
+
+def sync_store(conn, root_dir, force=False):
+    """
+    Stockディレクトリのバックログ・ルーチンファイルとストアを同期
+
+    サイズと更新時刻が変わったファイルのみ再抽出し、削除されたファイルの行は除去する
+    """
+    discovered = {}
+    for file_path in extract_tasks.find_yaml_files(root_dir, "backlog.ya?ml"):
+        discovered[file_path] = 'backlog'
+    for file_path in extract_tasks.find_yaml_files(root_dir, "routines.ya?ml"):
+        discovered[file_path] = 'routines'
+
+    known = {
+        row['file_path']: (row['mtime_ns'], row['size'])
+        for row in conn.execute("SELECT file_path, mtime_ns, size FROM files")
+    }
+
+    entries = []
+    unchanged = 0
+    for file_path, kind in discovered.items():
+        try:
+            stat_result = os.stat(file_path)
+        except OSError as e:
+            print(f"警告: {file_path} の情報を取得できませんでした: {e}")
+            continue
+
+        if not force and known.get(file_path) == (stat_result.st_mtime_ns, stat_result.st_size):
+            unchanged += 1
+            continue
+
+        entries.append(extract_file_entry(file_path, kind, stat_result))
+
+    removed = [file_path for file_path in known if file_path not in discovered]
+
+    bulk_upsert(conn, entries)
+    if removed:
+        remove_files(conn, removed)
+
+    stats = {
+        'scanned': len(discovered),
+        'updated': len(entries),
+        'unchanged': unchanged,
+        'removed': len(removed)
+    }
+    print(f"アイテムストアを同期しました: {stats}")
+    return stats
+
+
+def _story_from_row(row):
+    """
+    storiesテーブルの行をextract_tasks.pyと同じ形式の辞書に変換
+    """
+    story = {'type': 'story', 'file_path': row['file_path']}
+    for column in STORY_COLUMNS:
+        story[column] = row[column]
+    return story
+
+
+def _routine_task_from_row(row):
+    """
+    routine_tasksテーブルの行をextract_tasks.pyと同じ形式の辞書に変換
+    """
+    return {
+        'type': 'routine_task',
+        'id': row['id'],
+        'title': row['title'],
+        'description': row['description'],
+        'priority': row['priority'],
+        'estimate': row['estimate'],
+        'assignee': row['assignee'],
+        'program_id': row['program_id'],
+        'project_name': row['project_name'],
+        'file_path': row['file_path'],
+        'routine': json.loads(row['routine_json'] or '{}')
+    }
+
+
+def _in_clause(column, values):
+    """
+    IN句とパラメータを生成
+    """
+    values = list(values)
+    return f"{column} IN ({', '.join('?' for _ in values)})", values
+
+
+def query_stories(conn, sprint_ids=None, statuses=None, exclude_statuses=None,
+                  assignee=None, project=None, epic_id=None, priority=None):
+    """
+    インデックスを使ってストーリーを検索
+
+    sprint_idsはsprint_id（未設定の場合はsprint）で照合する
+    assigneeは担当者名の完全一致（大文字小文字・前後の空白は区別しない）で照合する
+    """
+    conditions = []
+    params = []
+    sql = "SELECT stories.* FROM stories"
+
+    if sprint_ids:
+        clause, values = _in_clause("effective_sprint", sprint_ids)
+        conditions.append(clause)
+        params.extend(values)
+    if statuses:
+        clause, values = _in_clause("status", statuses)
+        conditions.append(clause)
+        params.extend(values)
+    if exclude_statuses:
+        clause, values = _in_clause("status", exclude_statuses)
+        # status が無い行は NOT IN が NULL になり除外されてしまうため、明示的に残す
+        conditions.append(f"(status IS NULL OR NOT {clause})")
+        params.extend(values)
+    if assignee:
+        names = assignee_names(assignee)
+        sql += (" JOIN story_assignees ON story_assignees.file_path = stories.file_path"
+                " AND story_assignees.position = stories.position")
+        conditions.append("story_assignees.name = ?")
+        params.append(names[0] if names else "")
+    if project:
+        conditions.append("project = ?")
+        params.append(project)
+    if epic_id:
+        conditions.append("epic_id = ?")
+        params.append(epic_id)
+    if priority:
+        conditions.append("priority = ?")
+        params.append(priority)
+
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY stories.file_path, stories.position"
+
+    return [_story_from_row(row) for row in conn.execute(sql, params)]
+
+
+def query_story_dependencies(conn):
+    """
+    依存関係グラフ用に全ストーリーの file_path / id / status / estimate / dependencies を取得
+    """
+    sql = "SELECT file_path, id, status, estimate, dependencies FROM stories ORDER BY file_path, position"
+    return [dict(row, type='story') for row in conn.execute(sql)]
+
+
+def query_routine_tasks(conn, frequencies=None):
+    """
+    ルーチンタスクを検索
+    """
+    sql = "SELECT * FROM routine_tasks"
+    params = []
+    if frequencies:
+        clause, params = _in_clause("frequency", [f.lower() for f in frequencies])
+        sql += " WHERE " + clause
+    sql += " ORDER BY file_path, position"
+
+    return [_routine_task_from_row(row) for row in conn.execute(sql, params)]
+
+
+def load_sprints(conn):
+    """
+    すべてのスプリント定義を取得
+    """
+    sprints = []
+    for row in conn.execute("SELECT * FROM sprints ORDER BY file_path, position"):
+        sprint = {'file_path': row['file_path']}
+        for column in SPRINT_COLUMNS:
+            sprint[column] = row[column]
+        sprints.append(sprint)
+    return sprints
+
+
+def main():
+    parser = argparse.ArgumentParser(description='抽出済みのストーリーとタスクをSQLiteストアで検索するスクリプト')
+    parser.add_argument('--root', help='ルートディレクトリ (デフォルト: 環境変数 AIPM_ROOT または ~/aipm_v3)')
+    parser.add_argument('--db', help='データベースファイルパス (デフォルト: ROOT/.aipm/items.sqlite3)')
+    parser.add_argument('--no-sync', action='store_true', help='検索前にStockとの同期を行わない')
+    parser.add_argument('--force', action='store_true', help='変更の有無に関わらず全ファイルを再抽出する')
+    parser.add_argument('--sprint', action='append', help='スプリントIDで絞り込む (複数指定可)')
+    parser.add_argument('--status', action='append', help='ステータスで絞り込む (複数指定可)')
+    parser.add_argument('--exclude-status', action='append', help='除外するステータス (複数指定可)')
+    parser.add_argument('--assignee', help='担当者で絞り込む (完全一致、大文字小文字は区別しない)')
+    parser.add_argument('--project', help='プロジェクト名で絞り込む')
+    parser.add_argument('--epic', help='エピックIDで絞り込む')
+    parser.add_argument('--priority', help='優先度で絞り込む')
+    parser.add_argument('--output', '-o', help='出力ファイルパス (デフォルト: 標準出力)')
+    args = parser.parse_args()
+
+    root_dir = args.root if args.root else extract_tasks.get_root_dir()
+    db_path = args.db if args.db else get_default_db_path(root_dir)
+
+    conn = open_store(db_path)
+    try:
+        if not args.no_sync:
+            sync_store(conn, root_dir, force=args.force)
+
+        stories = query_stories(
+            conn,
+            sprint_ids=args.sprint,
+            statuses=args.status,
+            exclude_statuses=args.exclude_status,
+            assignee=args.assignee,
+            project=args.project,
+            epic_id=args.epic,
+            priority=args.priority
+        )
+    finally:
+        conn.close()
+
+    if args.output:
+        extract_tasks.save_to_json(stories, args.output)
+    else:
+        json.dump(stories, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
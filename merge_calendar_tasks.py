@@ -3,34 +3,38 @@
 """
 カレンダー予定と日次タスクのマージスクリプト
 
-1. get_calendar_events.shを直接実行してカレンダー予定を取得
+1. calendar_prefetch.py で先読み済みの予定があればそれを使い、無ければ
+   カレンダーの取得元（calendar_sources.py の webapp / clasp / ics / fake）から取得
 2. 日次タスクマークダウンファイルを読み込む
-3. カレンダー予定を「今日の予定」セクションに挿入
-4. マージした結果を日次タスクファイルに書き戻す
+3. 前回マージした予定（ROOT/.aipm/calendar_merge/YYYY-MM-DD.json）と予定の id で比べ、
+   追加・変更・削除のあった予定の行だけを「今日の予定」セクションで更新
+   （各行の末尾の <!-- cal:ID --> で予定を識別するので、チェックを付けた状態は残る）
+4. マージした結果を日次タスクファイルに書き戻す（差分が無ければ読み書きしない）
 """
 
 import os
-import json
 import re
 import sys
-import subprocess
+import argparse
 from datetime import datetime
-from pathlib import Path
+
+import phase_timer
+from aipm import paths
+from aipm.lazy import lazy_import
+
+# --help や小さな処理で読み込み時間を払わないよう、初回アクセスまで読み込まない
+json = lazy_import("json")
+hashlib = lazy_import("hashlib")
+time_slots = lazy_import("time_slots")
+calendar_prefetch = lazy_import("calendar_prefetch")
+calendar_sources = lazy_import("calendar_sources")
 
 
 def get_root_dir():
     """
-    環境変数またはデフォルト値からルートディレクトリを取得
+    環境変数またはデフォルト値からルートディレクトリを取得（aipm.paths と共通）
     """
-    # 環境変数 AIPM_ROOT が設定されていれば使用
-    root_dir = os.environ.get('AIPM_ROOT')
-    
-    # 環境変数が設定されていない場合はデフォルトパスを使用
-    if not root_dir:
-        root_dir = os.path.expanduser("~/aipm_v3")
-        print(f"環境変数 AIPM_ROOT が設定されていません。デフォルトパス {root_dir} を使用します。", file=sys.stderr)
-    
-    return root_dir
+    return paths.get_root_dir(sys.stderr)
 
 
 def get_todays_flow_dir(root_dir, date=None):
@@ -50,100 +54,80 @@ def get_todays_flow_dir(root_dir, date=None):
     return flow_dir, date_str
 
 
-def execute_calendar_events_script(root_dir, flow_dir):
+def get_calendar_events_direct(root_dir, flow_dir, source=None, day=None):
     """
-    get_calendar_events.shスクリプトを実行してカレンダー予定を取得
+    カレンダーの取得元（calendar_sources.py）から今日の予定を取得し、calendar_events.json に保存
     """
-    script_path = os.path.join(root_dir, "scripts", "calendar_app", "get_calendar_events.sh")
-    json_output_path = os.path.join(flow_dir, "calendar_events.json")
-    
-    # スクリプトの存在確認
-    if not os.path.exists(script_path):
-        print(f"カレンダー予定取得スクリプトが見つかりません: {script_path}", file=sys.stderr)
-        return False
-    
+    if source is None:
+        source = calendar_sources.create_source(root_dir)
+        if source is None:
+            return None
+    if day is None:
+        day = datetime.now().date()
+
+    print(f"カレンダー予定を取得中: {source.describe()}")
+    try:
+        events = source.fetch(day, 1)
+    finally:
+        source.close()
+    if events is None:
+        return None
+
     try:
-        # スクリプト実行前にFlowディレクトリが存在することを確認
         os.makedirs(flow_dir, exist_ok=True)
-        
-        # スクリプトを実行
-        print(f"カレンダー予定取得スクリプトを実行中: {script_path}")
-        result = subprocess.run(
-            [script_path],
-            capture_output=True,
-            text=True,
-            check=False
-        )
-        
-        # 実行結果を確認
-        if result.returncode != 0:
-            print(f"カレンダー予定取得スクリプトの実行に失敗しました: {result.stderr}", file=sys.stderr)
-            return False
-        
-        # JSONファイルが生成されたか確認
-        if not os.path.exists(json_output_path):
-            print(f"カレンダー予定JSONファイルが生成されませんでした: {json_output_path}", file=sys.stderr)
-            return False
-        
-        return True
-    except Exception as e:
-        print(f"カレンダー予定取得スクリプト実行エラー: {e}", file=sys.stderr)
-        return False
+        events_json_path = os.path.join(flow_dir, "calendar_events.json")
+        with open(events_json_path, 'w', encoding='utf-8') as f:
+            json.dump(events, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        print(f"カレンダー予定の保存に失敗しました: {e}", file=sys.stderr)
+    return events
+
+
+# JavaScript のオブジェクト表記（clasp run の出力）の文字列・キー・末尾カンマ
+_JS_TOKEN_RE = re.compile(r"""'((?:[^'\\]|\\.)*)'|("(?:[^"\\]|\\.)*")|([A-Za-z_$][\w$]*)(\s*:)|,(\s*[\]}])|\bundefined\b""")
+
+
+def _js_token_to_json(match):
+    single, double, key, colon, closing = match.groups()
+    if single is not None:
+        return json.dumps(re.sub(r"\\(.)", r"\1", single), ensure_ascii=False)
+    if double is not None:
+        return double
+    if key is not None:
+        return f'"{key}"{colon}'
+    if closing is not None:
+        return closing
+    return "null"
 
 
-def get_calendar_events_direct(root_dir, flow_dir):
+def js_literal_to_json(text):
     """
-    get_calendar_events.shを実行して直接カレンダーイベントを取得
+    JavaScript のオブジェクト表記（シングルクォート、クォートの無いキー、末尾カンマ）をJSONにする
+    （文字列の中身は変更しない）
     """
-    script_path = os.path.join(root_dir, "scripts", "calendar_app", "get_calendar_events.sh")
-    
-    # スクリプトの存在確認
-    if not os.path.exists(script_path):
-        print(f"カレンダー予定取得スクリプトが見つかりません: {script_path}", file=sys.stderr)
-        return None
-    
-    try:
-        # スクリプト実行前にFlowディレクトリが存在することを確認
-        os.makedirs(flow_dir, exist_ok=True)
-        
-        # スクリプトを実行
-        print(f"カレンダー予定取得スクリプトを実行中: {script_path}")
-        result = subprocess.run(
-            [script_path],
-            capture_output=True,
-            text=True,
-            check=False
-        )
-        
-        # 実行結果を確認
-        if result.returncode != 0:
-            print(f"カレンダー予定取得スクリプトの実行に失敗しました: {result.stderr}", file=sys.stderr)
-            return None
-        
-        output = result.stdout
-        
-        # スクリプトからの出力をパースしてカレンダーイベントを取得
+    return _JS_TOKEN_RE.sub(_js_token_to_json, text)
+
+
+def parse_calendar_output(output):
+    """
+    clasp run などの出力から予定のリストを取り出す
+
+    JSON、JavaScript のオブジェクト表記、{events: [...]} の形式に対応し、
+    どれでも解析できない場合は正規表現での抽出（extract_calendar_events_from_output）を使い、
+    それでも予定が見つからなければNone
+    """
+    lines = [line for line in output.split("\n") if not line.strip().startswith("Running")]
+    content = "\n".join(lines).strip()
+    for candidate in (content, js_literal_to_json(content)):
         try:
-            # 手動でカレンダーイベントを抽出
-            events = extract_calendar_events_from_output(output)
-            
-            if events:
-                # 取得したカレンダーデータを保存
-                events_json_path = os.path.join(flow_dir, "calendar_events.json")
-                with open(events_json_path, 'w', encoding='utf-8') as f:
-                    json.dump(events, f, ensure_ascii=False, indent=2)
-                
-                return events
-            else:
-                print("カレンダーデータの抽出に失敗しました。")
-                return None
-        except Exception as e:
-            print(f"カレンダーデータのパースに失敗しました: {e}", file=sys.stderr)
-            print("カレンダー出力内容:", output)
-            return None
-    except Exception as e:
-        print(f"カレンダー予定取得スクリプト実行エラー: {e}", file=sys.stderr)
-        return None
+            data = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            data = data.get('events', [])
+        if isinstance(data, list):
+            return data
+    return extract_calendar_events_from_output(content) or None
 
 
 def extract_calendar_events_from_output(output):
@@ -295,11 +279,12 @@ def read_calendar_events(flow_dir):
         return []
 
 
-def read_daily_tasks(flow_dir):
+def read_daily_tasks(flow_dir, daily_tasks_file=None):
     """
-    日次タスクマークダウンファイルを読み込む
+    日次タスクマークダウンファイルを読み込む（daily_tasks_file を省略した場合は flow_dir の daily_tasks.md）
     """
-    daily_tasks_file = os.path.join(flow_dir, "daily_tasks.md")
+    if daily_tasks_file is None:
+        daily_tasks_file = os.path.join(flow_dir, "daily_tasks.md")
     
     if not os.path.exists(daily_tasks_file):
         print(f"日次タスクファイルが見つかりません: {daily_tasks_file}", file=sys.stderr)
@@ -313,131 +298,211 @@ def read_daily_tasks(flow_dir):
         return None
 
 
-def format_calendar_events(events):
+# カレンダー予定の行（末尾の <!-- cal:ID --> で予定を識別し、チェック状態は残す）
+CALENDAR_LINE_RE = re.compile(r'^(\s*- \[)([ xX])(\] )(.*?)\s*<!-- cal:(\S+) -->\s*$')
+# ID を持たない以前の形式のカレンダー予定の行
+LEGACY_CALENDAR_LINE_RE = re.compile(r'- \[ \] (\d{2}:\d{2}(-\d{2}:\d{2})?|終日):')
+SCHEDULE_SECTION_RE = re.compile(r'(## 📋 今日の予定\n)([^\n]*\n)*?(?=\n##|\Z)')
+SCHEDULE_HEADER = "## 📋 今日の予定"
+
+
+def event_key(event, seen=None):
     """
-    カレンダー予定を日次タスクのマークダウン形式にフォーマット
+    予定を識別するキー（Code.js の id、無い場合や行に書けない場合はタイトルと時刻のハッシュ）
+
+    seen を渡すと、同じ id の予定（複数のカレンダーにある予定など）にカレンダーIDを付けて区別する
     """
-    if not events:
-        return "カレンダー予定はありません\n"
-    
-    formatted_events = []
-    
-    for event in events:
-        # イベントから時間とタイトルを取得
-        start_time = None
-        end_time = None
-        title = event.get('title', 'タイトルなし')
-        
-        # 時間情報の取得 (異なる形式に対応)
-        if 'start' in event:
-            if isinstance(event['start'], dict):
-                start_time = event['start'].get('time', '')
-            else:
-                start_time = event.get('startTime', '')
-        else:
-            start_time = event.get('startTime', '')
-        
-        if 'end' in event:
-            if isinstance(event['end'], dict):
-                end_time = event['end'].get('time', '')
-            else:
-                end_time = event.get('endTime', '')
-        else:
-            end_time = event.get('endTime', '')
-        
+    key = str(event.get('id') or '')
+    if not key or re.search(r'\s|-->', key):
+        digest = hashlib.sha1("\x1f".join(str(event.get(name) or '') for name in ('title', 'startTime', 'endTime'))
+                              .encode('utf-8')).hexdigest()[:12]
+        key = f"h{digest}"
+    if seen is not None:
+        if key in seen:
+            key = f"{key}@{time_slots.event_calendar(event) or len(seen)}"
+            key = re.sub(r'\s', '_', key)
+        seen.add(key)
+    return key
+
+
+def calendar_event_lines(events, day=None):
+    """
+    予定ごとの (キー, 表示する文字列) のリスト（時刻は time_slots.py で1回だけ解析し、終日予定は「終日」と表示）
+    """
+    if day is None:
+        day = datetime.now().date()
+
+    lines = []
+    seen = set()
+    for event in events or []:
+        if not isinstance(event, dict):
+            continue
+        parsed = time_slots.parse_event(event, day)
+
         # 時間の表示形式を調整（HH:MMまたは終日予定）
-        time_str = ""
-        if start_time:
-            # 時間部分のみを抽出 (ISO 8601形式をHH:MM形式に)
-            start_match = re.search(r'T(\d{2}:\d{2})', start_time)
-            if start_match:
-                time_str = start_match.group(1)
-            else:
-                time_str = start_time  # 元の形式をそのまま使用
-            
-            # 終了時間も同様に処理
-            if end_time:
-                end_match = re.search(r'T(\d{2}:\d{2})', end_time)
-                if end_match:
-                    time_str += f"-{end_match.group(1)}"
-                else:
-                    time_str += f"-{end_time}"
-        else:
+        if parsed['all_day'] or not parsed['start_label']:
             time_str = "終日"
-        
-        formatted_events.append(f"- [ ] {time_str}: {title}")
-    
-    return "\n".join(formatted_events) + "\n"
+        elif parsed['end_label']:
+            time_str = f"{parsed['start_label']}-{parsed['end_label']}"
+        else:
+            time_str = parsed['start_label']
+
+        title = " ".join(str(parsed['title']).split())
+        lines.append((event_key(event, seen), f"{time_str}: {title}"))
+    return lines
 
 
-def extract_existing_schedule_items(section_content):
+def format_calendar_line(key, text, checked=' '):
+    return f"- [{checked}] {text} <!-- cal:{key} -->"
+
+
+def format_calendar_events(events, day=None):
     """
-    既存の今日の予定セクションからタスク項目を抽出
+    カレンダー予定を日次タスクのマークダウン形式にフォーマット
     """
-    if not section_content:
-        return []
-    
-    # ヘッダー行を除外
-    lines = section_content.strip().split('\n')[1:]
-    
-    # カレンダー予定の行を除外（タイムスタンプがHH:MM-HH:MM形式のものは通常カレンダー予定）
-    task_lines = []
-    for line in lines:
-        # カレンダー予定パターンにマッチするか
-        if re.search(r'- \[ \] \d{2}:\d{2}(-\d{2}:\d{2})?:', line):
-            continue
-        # 空行や「カレンダー予定はありません」のような行を除外
-        if line.strip() and not "カレンダー予定はありません" in line:
-            task_lines.append(line)
-    
-    return task_lines
+    lines = calendar_event_lines(events, day)
+    if not lines:
+        return "カレンダー予定はありません\n"
+    return "\n".join(format_calendar_line(key, text) for key, text in lines) + "\n"
 
 
-def merge_calendar_to_tasks(daily_tasks_content, calendar_events_md):
+def diff_calendar_events(previous, current):
     """
-    日次タスク内の今日の予定セクションにカレンダー予定を挿入
-    既存の日常タスクは保持し、カレンダー予定のみを更新
+    前回マージした予定と今回の予定の差分 {'added', 'changed', 'removed'}（キーのリスト）
+    previous が None（前回の記録が無い）の場合はすべて追加
+    """
+    previous = dict(previous or [])
+    current_map = dict(current)
+    return {
+        'added': [key for key, _ in current if key not in previous],
+        'changed': [key for key, text in current if key in previous and previous[key] != text],
+        'removed': [key for key in previous if key not in current_map]
+    }
+
+
+def merge_calendar_to_tasks(daily_tasks_content, event_lines, previous=None):
+    """
+    日次タスク内の今日の予定セクションのカレンダー予定の行を差分で更新
+
+    - 変更された予定の行は文字列だけを置き換え、チェック状態と位置は残す
+    - 削除された予定の行は取り除く
+    - 追加された予定は、今回の並びで直前にある予定の行の後ろ（無ければセクションの先頭）に挿入する
+    - 前回マージした予定（previous）のうち行が無いものは、ユーザーが消したものとして追加し直さない
+    - previous が None（差分マージ前の日次タスク）の場合は、ID の無い以前の形式の予定の行を置き換える
+      （前回の予定があっても、予定の行が1つも無い場合は作り直された日次タスクとして同じように扱う）
+
+    戻り値: (更新後の内容, 差分)、セクションが無い場合は内容をそのまま返す
     """
     if not daily_tasks_content:
         print("日次タスクの内容が空です。マージを中止します。", file=sys.stderr)
-        return None
-    
-    # 今日の予定セクションを見つける
-    schedule_section_pattern = r'(## 📋 今日の予定\n)([^\n]*\n)*?(?=\n##|\Z)'
-    schedule_section_match = re.search(schedule_section_pattern, daily_tasks_content)
-    
-    if not schedule_section_match:
+        return None, None
+
+    diff = diff_calendar_events(previous, event_lines)
+    match = SCHEDULE_SECTION_RE.search(daily_tasks_content)
+    if not match:
         print("日次タスク内に「今日の予定」セクションが見つかりません。", file=sys.stderr)
-        return daily_tasks_content
-    
-    # 既存のセクション内容
-    existing_section = daily_tasks_content[schedule_section_match.start():schedule_section_match.end()]
-    
-    # 既存のスプリントタスクやルーチンタスクを抽出（カレンダー予定以外の項目）
-    existing_tasks = extract_existing_schedule_items(existing_section)
-    
-    # 新しい予定セクションを作成
-    new_schedule_section = "## 📋 今日の予定\n"
-    
-    # カレンダー予定が「カレンダー予定はありません」でない場合のみ追加
-    if not "カレンダー予定はありません" in calendar_events_md:
-        new_schedule_section += calendar_events_md
-    
-    # 既存のタスクも追加（空でない場合）
-    if existing_tasks:
-        new_schedule_section += "\n".join(existing_tasks) + "\n"
-    
-    # 旧セクションを新セクションに置き換え
-    new_content = daily_tasks_content[:schedule_section_match.start()] + new_schedule_section + daily_tasks_content[schedule_section_match.end():]
-    
-    return new_content
+        return daily_tasks_content, diff
+
+    body = daily_tasks_content[match.start():match.end()].split("\n")[1:-1]
+    if previous and not any(CALENDAR_LINE_RE.match(line) for line in body):
+        # 前回マージした予定の行が1つも無いのは日次タスクが作り直された場合なので、すべて追加する
+        previous = None
+        diff = diff_calendar_events(previous, event_lines)
+
+    current = dict(event_lines)
+    previous_keys = {key for key, _ in previous or []}
+
+    lines = []
+    present = {}   # キー → lines の位置
+    for line in body:
+        calendar_line = CALENDAR_LINE_RE.match(line)
+        if calendar_line:
+            key = calendar_line.group(5)
+            if key not in current or key in present:
+                continue
+            if calendar_line.group(4) != current[key]:
+                line = (f"{calendar_line.group(1)}{calendar_line.group(2)}{calendar_line.group(3)}"
+                        f"{current[key]} <!-- cal:{key} -->")
+            present[key] = len(lines)
+        elif previous is None and (LEGACY_CALENDAR_LINE_RE.search(line) or "カレンダー予定はありません" in line):
+            continue
+        lines.append(line)
+
+    # 追加する予定を、直前の予定の行の位置ごとにまとめる（-1 はセクションの先頭）
+    inserts = {}
+    anchor = -1
+    for key, text in event_lines:
+        if key in present:
+            anchor = present[key]
+        elif key not in previous_keys:
+            inserts.setdefault(anchor, []).append(format_calendar_line(key, text))
+
+    patched = list(inserts.get(-1, []))
+    for index, line in enumerate(lines):
+        patched.append(line)
+        patched.extend(inserts.get(index, []))
+    while patched and not patched[-1].strip():
+        patched.pop()
+
+    section = "\n".join([SCHEDULE_HEADER] + patched) + "\n"
+    return daily_tasks_content[:match.start()] + section + daily_tasks_content[match.end():], diff
+
+
+def get_merge_snapshot_path(root_dir, date_str):
+    """
+    前回マージした予定の記録ファイルのパス
+    """
+    return os.path.join(root_dir, ".aipm", "calendar_merge", f"{date_str}.json")
 
 
-def write_merged_tasks(flow_dir, content):
+def file_stamp(file_path):
     """
-    マージした日次タスクファイルを書き戻す
+    ファイルの (更新時刻, サイズ)（無い場合はNone）
     """
-    daily_tasks_file = os.path.join(flow_dir, "daily_tasks.md")
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def load_merge_snapshot(snapshot_path):
+    """
+    前回マージした予定の記録を読み込む（無い場合はNone）
+
+    戻り値: {'events': [(キー, 表示する文字列)], 'daily_tasks': 書き込んだ日次タスクの file_stamp}
+    """
+    try:
+        with open(snapshot_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get('events'), list):
+        return None
+    return {
+        'events': [tuple(item) for item in data['events'] if isinstance(item, list) and len(item) == 2],
+        'daily_tasks': data.get('daily_tasks')
+    }
+
+
+def save_merge_snapshot(snapshot_path, event_lines, daily_tasks_file):
+    try:
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        temp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'events': [list(item) for item in event_lines], 'daily_tasks': file_stamp(daily_tasks_file)},
+                      f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, snapshot_path)
+    except OSError as e:
+        print(f"警告: マージした予定の記録に失敗しました: {e}", file=sys.stderr)
+
+
+def write_merged_tasks(flow_dir, content, daily_tasks_file=None):
+    """
+    マージした日次タスクファイルを書き戻す（daily_tasks_file を省略した場合は flow_dir の daily_tasks.md）
+    """
+    if daily_tasks_file is None:
+        daily_tasks_file = os.path.join(flow_dir, "daily_tasks.md")
     
     try:
         with open(daily_tasks_file, 'w', encoding='utf-8') as f:
@@ -448,50 +513,143 @@ def write_merged_tasks(flow_dir, content):
         return False
 
 
+def add_arguments(parser):
+    """
+    カレンダー統合のコマンドライン引数を追加（aipm merge-calendar と共通）
+    """
+    parser.add_argument('--date', help='対象日付 (YYYY-MM-DD形式、デフォルト: 今日)')
+    parser.add_argument('--output', '-o', help='マージ先の日次タスクファイル (デフォルト: Flow/YYYYMM/YYYY-MM-DD/daily_tasks.md)')
+    parser.add_argument('--root', help='ルートディレクトリ (デフォルト: 環境変数 AIPM_ROOT または ~/aipm_v3)')
+    add_source_arguments(parser)
+    phase_timer.add_arguments(parser)
+
+
+def add_source_arguments(parser):
+    """
+    カレンダーの取得元の引数を追加（aipm morning では日次タスク生成の引数と組み合わせる）
+    """
+    parser.add_argument('--source', choices=calendar_sources.SOURCE_TYPES,
+                        help='カレンダーの取得元 (デフォルト: user_config.yaml の calendar_source、無ければ clasp)')
+    parser.add_argument('--ics', metavar='PATH', help='ICSファイルから予定を読み込む (--source ics の path を指定)')
+    parser.add_argument('--refresh', action='store_true', help='先読み済みの予定を使わず、カレンダーから取得し直す')
+    parser.add_argument('--prefetch-max-age', type=float, metavar='HOURS', default=None,
+                        help='先読み済みの予定を使う期限 (時間、0で無効、デフォルト: 168)')
+
+
 def main():
+    parser = argparse.ArgumentParser(description='カレンダー予定を日次タスクの「今日の予定」にマージするスクリプト')
+    add_arguments(parser)
+    args = parser.parse_args()
+    
+    with phase_timer.session(args, "merge_calendar_tasks"):
+        return phase_timer.record_exit_code(merge(args))
+
+
+def merge(args):
+    """
+    対象日（デフォルト: 今日）のカレンダー予定を取得して日次タスクにマージし、終了コードを返す
+    """
     # ルートディレクトリを取得
-    root_dir = get_root_dir()
+    root_dir = args.root if getattr(args, 'root', None) else get_root_dir()
     
-    # 今日の日付のFlowディレクトリを取得
-    flow_dir, date_str = get_todays_flow_dir(root_dir)
+    # 対象日の取得（aipm morning では日次タスク生成と同じ --date / --output を使う）
+    if getattr(args, 'date', None):
+        try:
+            target_date = datetime.strptime(args.date, "%Y-%m-%d").date()
+        except ValueError:
+            print(f"エラー: 無効な日付形式です。YYYY-MM-DD形式で指定してください: {args.date}")
+            return 1
+    else:
+        target_date = datetime.now().date()
+    
+    # 対象日のFlowディレクトリを取得
+    flow_dir, date_str = get_todays_flow_dir(root_dir, target_date)
+    daily_tasks_file = getattr(args, 'output', None) or os.path.join(flow_dir, "daily_tasks.md")
     
     print(f"処理対象日: {date_str}")
     print(f"Flowディレクトリ: {flow_dir}")
     
-    # 直接カレンダーイベントを取得
-    events = get_calendar_events_direct(root_dir, flow_dir)
+    # 先読み済みの予定があればそれを使う（calendar_prefetch.py）
+    events = None
+    prefetched = False
+    if not getattr(args, 'refresh', False):
+        max_age = getattr(args, 'prefetch_max_age', None)
+        if max_age is None:
+            max_age = calendar_prefetch.DEFAULT_MAX_AGE_HOURS
+        with phase_timer.phase("calendar_prefetched"):
+            events = calendar_prefetch.load_prefetched_events(root_dir, target_date, max_age)
+        prefetched = events is not None
+        if prefetched:
+            print("先読み済みのカレンダー予定を使用します。")
+    
+    # カレンダーの取得元から取得
+    fetched = False
+    if not prefetched:
+        source = calendar_sources.create_source_from_args(root_dir, args)
+        with phase_timer.phase("calendar_fetch"):
+            events = get_calendar_events_direct(root_dir, flow_dir, source, target_date) if source is not None else None
+        fetched = events is not None
+        phase_timer.set_value('calendar_fetch_failed', 0 if fetched else 1)
     
     # 直接取得に失敗した場合は既存のJSONファイルから読み込み
     if events is None:
         print("カレンダー予定の直接取得に失敗しました。既存のJSONファイルから読み込みます。")
-        events = read_calendar_events(flow_dir)
+        with phase_timer.phase("calendar_read_json"):
+            events = read_calendar_events(flow_dir)
+            phase_timer.count_file(os.path.join(flow_dir, "calendar_events.json"))
     
-    if events is None or len(events) == 0:
+    if events is None or (len(events) == 0 and not (prefetched or fetched)):
         print("エラー: カレンダー予定が取得できませんでした。")
         print("calendar_appがインストールされているか確認してください。")
         print("インストール方法: npm install -g gcalcli")
         return 1
     
     print(f"{len(events)}件のカレンダー予定を読み込みました。")
-    
-    # カレンダー予定をマークダウン形式に整形
-    calendar_events_md = format_calendar_events(events)
+    phase_timer.set_value('calendar_events', len(events))
+    
+    # カレンダー予定を行の文字列にして、前回マージした予定と比べる
+    with phase_timer.phase("format_events"):
+        event_lines = calendar_event_lines(events, target_date)
+        phase_timer.count(items=len(events))
+    snapshot_path = get_merge_snapshot_path(root_dir, date_str)
+    with phase_timer.phase("calendar_diff"):
+        snapshot = load_merge_snapshot(snapshot_path)
+        previous = snapshot['events'] if snapshot else None
+        diff = diff_calendar_events(previous, event_lines)
+    # 予定に差分が無く、日次タスクも前回書き込んだときのままなら何もしない
+    if (previous is not None and not any(diff.values())
+            and snapshot['daily_tasks'] == file_stamp(daily_tasks_file)):
+        print("カレンダー予定に変更はありません。")
+        phase_timer.set_value('calendar_changes', 0)
+        return 0
     
     # 日次タスクを読み込み
-    daily_tasks_content = read_daily_tasks(flow_dir)
+    with phase_timer.phase("read_daily_tasks"):
+        daily_tasks_content = read_daily_tasks(flow_dir, daily_tasks_file)
+        phase_timer.count_file(daily_tasks_file)
     if not daily_tasks_content:
         print("日次タスクファイルが読み込めないため、マージをスキップします。")
         return 0  # 失敗をエラーとして扱わない
     
-    # カレンダー予定と日次タスクをマージ
-    merged_content = merge_calendar_to_tasks(daily_tasks_content, calendar_events_md)
+    # 差分のあるカレンダー予定の行だけを更新
+    with phase_timer.phase("merge"):
+        merged_content, diff = merge_calendar_to_tasks(daily_tasks_content, event_lines, previous)
     if not merged_content:
         print("マージに失敗しました。")
         return 0  # 失敗をエラーとして扱わない
-    
-    # マージした結果を書き戻し
-    if write_merged_tasks(flow_dir, merged_content):
-        print(f"✅ カレンダー予定を日次タスクにマージしました: {os.path.join(flow_dir, 'daily_tasks.md')}")
+    print(f"カレンダー予定の差分: 追加 {len(diff['added'])} 件 / 変更 {len(diff['changed'])} 件 / "
+          f"削除 {len(diff['removed'])} 件")
+    phase_timer.set_value('calendar_changes', sum(len(keys) for keys in diff.values()))
+    
+    # マージした結果を書き戻し（内容が変わらない場合は書き込まない）
+    written = True
+    if merged_content != daily_tasks_content:
+        with phase_timer.phase("write"):
+            written = write_merged_tasks(flow_dir, merged_content, daily_tasks_file)
+            phase_timer.count(files=1, bytes=len(merged_content.encode('utf-8')))
+    if written:
+        save_merge_snapshot(snapshot_path, event_lines, daily_tasks_file)
+        print(f"✅ カレンダー予定を日次タスクにマージしました: {daily_tasks_file}")
         return 0
     else:
         print("❌ マージした日次タスクの書き込みに失敗しました。")
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+フェーズ別の処理時間計測とプロファイリング
+
+各スクリプトは処理の区切りを phase() で囲み、読み込んだファイル数やバイト数を
+count() / count_file() で記録します。
+
+- --timings: フェーズごとの処理時間・呼び出し回数・ファイル数・バイト数を標準エラーに出力
+- --profile PATH: cProfile（--profile-mode cpu）または tracemalloc（--profile-mode memory）の結果を保存
+- --metrics PATH / 環境変数 AIPM_METRICS_DIR: フェーズ別の集計と set_value() で記録した値を
+  Prometheus textfile または JSON で保存（run_metrics.py）
+
+計測が無効な場合、phase() は共有の何もしないコンテキストマネージャを返し、
+count() は条件分岐1つで戻るだけなので、計測用のコードを残したままでも処理時間は変わりません。
+"""
+
+import os
+import sys
+import time
+import threading
+import contextlib
+
+
+_NULL_PHASE = contextlib.nullcontext()
+_active = None
+
+
+class PhaseTimer:
+    """
+    フェーズごとの経過時間と件数を集計する
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.order = []
+        self.values = {}
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+
+    @property
+    def stack(self):
+        """
+        スレッドごとのフェーズのスタック（ワーカースレッドの時間はフェーズごとに合算される）
+        """
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def _entry(self, name):
+        entry = self.phases.get(name)
+        if entry is None:
+            entry = {'seconds': 0.0, 'calls': 0, 'files': 0, 'bytes': 0, 'items': 0, 'depth': len(self.stack)}
+            self.phases[name] = entry
+            self.order.append(name)
+        return entry
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        フェーズの経過時間を計測（入れ子のフェーズは親の時間にも含まれる）
+        """
+        stack = self.stack
+        with self.lock:
+            entry = self._entry(name)
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self.lock:
+                entry['seconds'] += elapsed
+                entry['calls'] += 1
+
+    def count(self, name=None, **counters):
+        """
+        現在のフェーズ（name指定時はそのフェーズ）に件数を加算
+        """
+        if name is None:
+            stack = self.stack
+            name = stack[-1] if stack else "(other)"
+        with self.lock:
+            entry = self._entry(name)
+            for key, value in counters.items():
+                entry[key] = entry.get(key, 0) + value
+
+    def set_value(self, name, value):
+        """
+        フェーズに属さない値（エラー件数、キャッシュヒット率など）を記録
+        """
+        with self.lock:
+            self.values[name] = value
+
+    def total_seconds(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        """
+        集計結果を {'total_seconds', 'phases': [{'name', 'seconds', ...}]} で返す
+        """
+        return {
+            'total_seconds': self.total_seconds(),
+            'phases': [dict(name=name, **self.phases[name]) for name in self.order],
+            'values': dict(self.values)
+        }
+
+    def format_report(self):
+        """
+        集計結果を表形式のテキストで返す
+        """
+        total = self.total_seconds()
+        lines = ["⏱ フェーズ別の処理時間:",
+                 f"  {'phase':<30}{'ms':>10}{'%':>7}{'calls':>6}{'files':>10}{'bytes':>13}{'items':>9}"]
+        for name in self.order:
+            entry = self.phases[name]
+            ratio = entry['seconds'] / total * 100 if total else 0
+            label = "  " * entry['depth'] + name
+            lines.append(f"  {label:<30}{entry['seconds'] * 1000:>10.1f}{ratio:>6.1f}%{entry['calls']:>6}"
+                         f"{entry['files']:>10}{entry['bytes']:>13}{entry['items']:>9}")
+        lines.append(f"  {'total':<30}{total * 1000:>10.1f}")
+        return "\n".join(lines)
+
+
+def enable():
+    """
+    計測を有効にしてタイマーを返す
+    """
+    global _active
+    _active = PhaseTimer()
+    return _active
+
+
+def disable():
+    global _active
+    _active = None
+
+
+def enabled():
+    return _active is not None
+
+
+def get_timer():
+    return _active
+
+
+def phase(name):
+    """
+    フェーズを計測するコンテキストマネージャ（無効時は共有の空コンテキスト）
+    """
+    if _active is None:
+        return _NULL_PHASE
+    return _active.phase(name)
+
+
+def count(name=None, **counters):
+    """
+    現在のフェーズに files / bytes / items などの件数を加算（無効時は何もしない）
+    """
+    if _active is None:
+        return
+    _active.count(name, **counters)
+
+
+def count_file(file_path, name=None):
+    """
+    読み込んだファイル1件とそのサイズを加算（無効時はstatも行わない）
+    """
+    if _active is None:
+        return
+    try:
+        size = os.path.getsize(file_path)
+    except OSError:
+        return
+    _active.count(name, files=1, bytes=size)
+
+
+def set_value(name, value):
+    """
+    エラー件数などの値を記録（無効時は何もしない）
+    """
+    if _active is None:
+        return
+    _active.set_value(name, value)
+
+
+def record_exit_code(exit_code):
+    """
+    終了コードを記録してそのまま返す（return phase_timer.record_exit_code(run(args)) のように使う）
+    """
+    set_value('exit_code', exit_code)
+    return exit_code
+
+
+def add_arguments(parser):
+    """
+    --timings / --profile / --profile-mode / --metrics をargparseに追加
+    """
+    parser.add_argument('--timings', action='store_true', help='フェーズ別の処理時間を標準エラーに出力')
+    parser.add_argument('--profile', metavar='PATH', help='プロファイル結果の保存先 (cProfileの.prof または tracemallocのテキスト)')
+    parser.add_argument('--profile-mode', choices=['cpu', 'memory'], default='cpu',
+                        help='--profile の種類 (cpu: cProfile, memory: tracemalloc)')
+    parser.add_argument('--metrics', metavar='PATH',
+                        help='実行メトリクスの保存先 (.prom: Prometheus textfile, .json: JSON、'
+                             'デフォルト: 環境変数 AIPM_METRICS_DIR があれば <DIR>/aipm_<ジョブ名>_<ユーザー>.prom)')
+
+
+@contextlib.contextmanager
+def profile(path, mode='cpu', top=30):
+    """
+    コンテキスト内の処理をプロファイルしてpathに保存
+
+    cpu: cProfileの統計（pstats / snakeviz で読み込める形式）
+    memory: tracemallocのピーク使用量と割り当て上位の行
+    """
+    if mode == 'memory':
+        import tracemalloc
+        tracemalloc.start(25)
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            stats = snapshot.statistics('lineno')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f"current: {current} bytes\npeak: {peak} bytes\n\n")
+                for stat in stats[:top]:
+                    f.write(f"{stat}\n")
+            print(f"メモリプロファイルを保存しました: {path}", file=sys.stderr)
+    else:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+            print(f"プロファイルを保存しました: {path} (python -m pstats {path} で確認できます)", file=sys.stderr)
+
+
+@contextlib.contextmanager
+def session(args, job=None):
+    """
+    argparseの引数に従って計測・プロファイルを行うコンテキスト
+
+    --timings 指定時は終了時に集計結果を標準エラーに出力し、
+    メトリクスの出力先がある場合は job の名前でメトリクスを保存する
+    """
+    timings = getattr(args, 'timings', False)
+    profile_path = getattr(args, 'profile', None)
+    metrics_path = None
+    if job:
+        import run_metrics
+        metrics_path = run_metrics.get_metrics_path(job, getattr(args, 'metrics', None))
+    timer = enable() if timings or metrics_path else None
+
+    with contextlib.ExitStack() as stack:
+        if profile_path:
+            stack.enter_context(profile(profile_path, getattr(args, 'profile_mode', 'cpu')))
+        failed = True
+        try:
+            yield timer
+            failed = False
+        finally:
+            if timer is not None:
+                if timings:
+                    print(timer.format_report(), file=sys.stderr)
+                if metrics_path:
+                    data = timer.as_dict()
+                    exit_code = data['values'].pop('exit_code', None)
+                    run_metrics.export(job, metrics_path, timings=data, values=data['values'],
+                                       exit_code=exit_code, success=False if failed else None)
+                disable()
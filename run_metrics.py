@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+定期実行のメトリクス出力
+
+cronで実行する generate_daily_tasks / merge_calendar_tasks / flow_to_stock などの
+実行結果を、Prometheus の textfile collector 形式（.prom）またはJSONで書き出します。
+
+1. 出力先は --metrics PATH、または環境変数 AIPM_METRICS_DIR（<DIR>/aipm_<ジョブ名>_<ユーザー>.prom）
+   同じディレクトリを複数のユーザーのcronが使っても互いのファイルを上書きしない
+2. 拡張子が .json ならJSON、それ以外はPrometheusのテキスト形式
+3. 書き込みは一時ファイル + os.replace で行い、収集中に途中のファイルが読まれないようにする
+
+出力するメトリクス（ラベル job / user、フェーズ別は phase も付く）:
+- aipm_run_duration_seconds / aipm_run_last_timestamp_seconds / aipm_run_success / aipm_run_exit_code
+- aipm_phase_duration_seconds / aipm_phase_calls / aipm_phase_files / aipm_phase_bytes / aipm_phase_items
+  （cache_hits などスクリプト固有の件数も aipm_phase_<名前> で出力）
+- aipm_<名前>: スクリプトが記録した値（errors, warnings, cache_hit_ratio など）
+
+シェルスクリプトからは次のように呼び出します:
+    python3 run_metrics.py --job flow_to_stock --duration 1.23 --value errors=0 --value files_copied=3
+"""
+
+import os
+import re
+import sys
+import time
+import getpass
+import argparse
+
+
+METRICS_DIR_ENV = "AIPM_METRICS_DIR"
+
+HELP = {
+    'aipm_run_duration_seconds': "Wall clock duration of the run.",
+    'aipm_run_last_timestamp_seconds': "Unix time the run finished.",
+    'aipm_run_success': "1 if the run finished without errors, 0 otherwise.",
+    'aipm_run_exit_code': "Exit code of the run.",
+    'aipm_phase_duration_seconds': "Time spent in each phase of the run.",
+    'aipm_phase_calls': "Number of times each phase was entered.",
+    'aipm_phase_files': "Files read or written in each phase.",
+    'aipm_phase_bytes': "Bytes read or written in each phase.",
+    'aipm_phase_items': "Items (stories, tasks, events, operations) processed in each phase."
+}
+
+
+def get_user():
+    """
+    メトリクスのuserラベル（環境変数 AIPM_METRICS_USER があれば優先）
+    """
+    user = os.environ.get("AIPM_METRICS_USER")
+    if user:
+        return user
+    try:
+        return getpass.getuser()
+    except Exception:
+        return "unknown"
+
+
+def get_metrics_path(job, path=None, user=None):
+    """
+    出力先を決める（--metrics の指定、なければ AIPM_METRICS_DIR、どちらもなければNone）
+
+    AIPM_METRICS_DIR の場合のファイル名は aipm_<ジョブ名>_<ユーザー>.prom
+    """
+    if path:
+        return path
+    metrics_dir = os.environ.get(METRICS_DIR_ENV)
+    if metrics_dir:
+        user = re.sub(r'[^a-zA-Z0-9_.-]', '_', user or get_user())
+        return os.path.join(metrics_dir, f"aipm_{job}_{user}.prom")
+    return None
+
+
+def metric_name(name):
+    """
+    Prometheusのメトリクス名として使える文字だけにする
+    """
+    name = re.sub(r'[^a-zA-Z0-9_]', '_', name)
+    return name if not name[:1].isdigit() else f"_{name}"
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def build_samples(job, timings=None, values=None, duration=None, exit_code=None, success=None,
+                  user=None, finished_at=None):
+    """
+    メトリクスを [(名前, ラベル辞書, 値)] のリストにする
+
+    timings は PhaseTimer.as_dict() の戻り値
+    """
+    labels = {'job': job, 'user': user or get_user()}
+    samples = []
+
+    if duration is None and timings is not None:
+        duration = timings['total_seconds']
+    if duration is not None:
+        samples.append(('aipm_run_duration_seconds', labels, duration))
+    samples.append(('aipm_run_last_timestamp_seconds', labels, finished_at if finished_at is not None else time.time()))
+    if exit_code is not None:
+        samples.append(('aipm_run_exit_code', labels, exit_code))
+    if success is None:
+        success = exit_code in (None, 0) and not (values or {}).get('errors')
+    samples.append(('aipm_run_success', labels, 1 if success else 0))
+
+    for phase in (timings or {}).get('phases', []):
+        phase_labels = dict(labels, phase=phase['name'])
+        samples.append(('aipm_phase_duration_seconds', phase_labels, phase['seconds']))
+        for key, value in phase.items():
+            if key in ('name', 'seconds', 'depth'):
+                continue
+            samples.append((metric_name(f"aipm_phase_{key}"), phase_labels, value))
+
+    for key, value in sorted((values or {}).items()):
+        samples.append((metric_name(f"aipm_{key}"), labels, value))
+
+    return samples
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(int(value))
+
+
+def format_prometheus(samples):
+    """
+    textfile collector 形式のテキストにする（同じ名前のメトリクスはまとめて出力）
+    """
+    grouped = {}
+    for name, labels, value in samples:
+        grouped.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name, entries in grouped.items():
+        lines.append(f"# HELP {name} {HELP.get(name, name.replace('_', ' ') + '.')}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in entries:
+            label_text = ",".join(f'{key}="{escape_label(val)}"' for key, val in labels.items())
+            lines.append(f"{name}{{{label_text}}} {format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def format_json(samples):
+    import json
+    return json.dumps({
+        'metrics': [{'name': name, 'labels': labels, 'value': value} for name, labels, value in samples]
+    }, ensure_ascii=False, indent=2) + "\n"
+
+
+def write_metrics(path, samples):
+    """
+    メトリクスを一時ファイルに書いてから置き換える
+    """
+    content = format_json(samples) if path.endswith(".json") else format_prometheus(samples)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(temp_path, path)
+    return path
+
+
+def export(job, path=None, **kwargs):
+    """
+    出力先が指定されていればメトリクスを書き出してパスを返す（書き込み失敗は警告のみ）
+    """
+    path = get_metrics_path(job, path, kwargs.get('user'))
+    if not path:
+        return None
+    try:
+        return write_metrics(path, build_samples(job, **kwargs))
+    except OSError as e:
+        print(f"メトリクスの書き込みに失敗しました: {path}: {e}", file=sys.stderr)
+        return None
+
+
+def parse_value(text):
+    """
+    NAME=VALUE 形式の引数を解析
+    """
+    name, sep, value = text.partition("=")
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"NAME=VALUE 形式で指定してください: {text}")
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"数値を指定してください: {text}")
+    return name, int(number) if number.is_integer() else number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='シェルスクリプトの実行結果をメトリクスとして書き出すスクリプト')
+    parser.add_argument('--job', required=True, help='ジョブ名 (例: flow_to_stock)')
+    parser.add_argument('--output', '-o', help=f'出力先 (デフォルト: ${METRICS_DIR_ENV}/aipm_<ジョブ名>_<ユーザー>.prom)')
+    parser.add_argument('--duration', type=float, help='実行時間（秒）')
+    parser.add_argument('--exit-code', type=int, help='終了コード')
+    parser.add_argument('--value', action='append', type=parse_value, default=[], metavar='NAME=VALUE',
+                        help='追加の値 (複数指定可、例: errors=0)')
+    args = parser.parse_args(argv)
+
+    if not get_metrics_path(args.job, args.output):
+        print(f"出力先が指定されていません (--output または {METRICS_DIR_ENV})", file=sys.stderr)
+        return 1
+
+    path = export(args.job, args.output, values=dict(args.value), duration=args.duration,
+                  exit_code=args.exit_code)
+    return 0 if path else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日次タスクのキャパシティ計画
+
+1. その日の稼働可能時間を求める（capacity_hours と、就業時間内の空き時間の合計の小さい方、
+   空き時間は time_slots.py で計算）
+2. ルーチンタスク・前日以前からの持ち越しタスク（carry_over.py）・スプリントストーリーを優先度順に並べる
+   （priority → ルーチン/それ以外 → 持ち越しタスクと進行中のストーリー → 元の順序）
+3. dependencies で指定された先行ストーリーが先に来るように、優先度付きのトポロジカル順にする
+4. 見積もり（estimate）が残り時間に収まるものから順に計画に入れる（収まらないものは持ち越し、
+   それに依存するストーリーも持ち越し）。1日の稼働可能時間より大きいストーリーは、
+   残り時間の分だけ計画に入れる（一部）。持ち越したものは順位順に一覧にする
+5. 計画に入れたものを順位順に空き時間へ割り当てて時間割にする
+
+見積もりの単位は user_config.yaml の schedule で指定します（デフォルトはストーリーが時間、
+ルーチンタスクが分）。見積もりが無いものは default_estimate_minutes として扱います。
+
+user_config.yaml の例:
+    schedule:
+      enabled: true
+      capacity_hours: 6
+      workday_start: "09:00"
+      workday_end: "18:00"
+      story_estimate_minutes: 60
+      routine_estimate_minutes: 1
+      default_estimate_minutes: 30
+      min_block_minutes: 15           # これより短い空き時間には割り当てない
+      calendars: []                   # busy とするカレンダー（空なら全て）
+      all_day_busy: false             # 終日予定を busy とするか
+"""
+
+import os
+import json
+import heapq
+import yaml_schema
+import time_slots
+import dependency_graph
+
+
+DEFAULT_SETTINGS = {
+    'enabled': False,
+    'capacity_hours': 6,
+    'workday_start': "09:00",
+    'workday_end': "18:00",
+    'story_estimate_minutes': 60,
+    'routine_estimate_minutes': 1,
+    'default_estimate_minutes': 30,
+    'min_block_minutes': time_slots.DEFAULT_MIN_BLOCK_MINUTES,
+    'calendars': [],
+    'all_day_busy': False
+}
+
+PRIORITY_RANK = {priority: rank for rank, priority in enumerate(yaml_schema.PRIORITIES)}
+UNKNOWN_PRIORITY_RANK = len(yaml_schema.PRIORITIES)
+
+
+def load_settings(user_config):
+    """
+    user_config.yaml の schedule をデフォルト値に重ねる
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    schedule_config = user_config.get('schedule') if user_config else None
+    if isinstance(schedule_config, dict):
+        settings.update(schedule_config)
+    elif schedule_config is not None:
+        print("警告: schedule は辞書で指定してください。デフォルト設定を使用します。")
+    return settings
+
+
+def parse_estimate(value):
+    """
+    見積もりを数値にする（空・不正な値・0以下はNone）
+    """
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+
+def priority_rank(value):
+    """
+    priority を順位にする（high/medium/low、数値の場合はその値、不明なものは最後）
+    """
+    if isinstance(value, str):
+        return PRIORITY_RANK.get(value.strip().lower(), UNKNOWN_PRIORITY_RANK)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return UNKNOWN_PRIORITY_RANK
+
+
+def load_calendar_events(calendar_file):
+    """
+    calendar_events.json を読み込む（無い場合や読めない場合は空のリスト）
+    """
+    if not calendar_file or not os.path.exists(calendar_file):
+        return []
+    try:
+        with open(calendar_file, 'r', encoding='utf-8') as f:
+            events = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"警告: カレンダー予定を読み込めません: {calendar_file}: {e}")
+        return []
+    return events if isinstance(events, list) else []
+
+
+def compute_capacity(settings, day, events=None):
+    """
+    その日の稼働可能時間（分）、予定の時間（分）、就業時間内の空き時間のリストを返す
+    """
+    workday_start = time_slots.clock_minutes(settings['workday_start'])
+    workday_end = time_slots.clock_minutes(settings['workday_end'])
+    parsed_events = time_slots.parse_events(events or [], day)
+    busy = time_slots.busy_intervals(parsed_events, workday_start, workday_end,
+                                     settings.get('calendars'), settings.get('all_day_busy'))
+    slots = time_slots.free_slots(busy, workday_start, workday_end)
+    capacity = min(float(settings['capacity_hours']) * 60, time_slots.total_minutes(slots))
+    return max(0.0, capacity), time_slots.total_minutes(busy), slots
+
+
+def estimate_minutes(item, settings):
+    """
+    アイテムの見積もりを分にする
+    """
+    estimate = parse_estimate(item.get('estimate'))
+    if estimate is None:
+        return float(settings['default_estimate_minutes'])
+    if item.get('type') == 'routine_task':
+        return estimate * float(settings['routine_estimate_minutes'])
+    return estimate * float(settings['story_estimate_minutes'])
+
+
+def build_plan(sprint_stories, routine_tasks, capacity, settings, carried_tasks=None):
+    """
+    ルーチンタスク・持ち越しタスク・ストーリーを稼働可能時間に収まるように順位付けする
+
+    1日の稼働可能時間より大きいストーリーは、残り時間があればその分だけ計画に入れる（partial）。
+    持ち越しタスク（carry_over.py）は前日以前に計画済みのため進行中のストーリーと同じ扱いにし、
+    見積もりが無ければ default_estimate_minutes とする
+
+    戻り値: {'scheduled': [...], 'deferred': [...], 'capacity_minutes', 'planned_minutes'}
+    各要素は {'rank', 'kind', 'item', 'minutes', 'reason'}（reason は持ち越しの理由）、
+    partial の要素は 'total_minutes'（見積もり全体）も持つ
+    """
+    candidates = []
+    for item in routine_tasks:
+        candidates.append(('routine', item))
+    for item in carried_tasks or []:
+        candidates.append(('carry_over', item))
+    for item in sprint_stories:
+        candidates.append(('story', item))
+
+    keys = []
+    story_index = {}
+    for position, (kind, item) in enumerate(candidates):
+        keys.append((
+            priority_rank(item.get('priority')),
+            0 if kind == 'routine' else 1,
+            0 if kind == 'carry_over' or item.get('status') == 'in_progress' else 1,
+            position
+        ))
+        if kind == 'story' and item.get('id'):
+            story_index.setdefault((item.get('file_path'), str(item['id'])), position)
+            story_index.setdefault(str(item['id']), position)
+
+    # 候補内の依存関係だけを辺にする（同じバックログのIDを優先、候補外の先行ストーリーはここでは考慮しない）
+    dependents = [[] for _ in candidates]
+    waiting = [0] * len(candidates)
+    for position, (kind, item) in enumerate(candidates):
+        if kind != 'story':
+            continue
+        for dependency in dependency_graph.split_dependencies(item.get('dependencies')):
+            source = story_index.get((item.get('file_path'), dependency), story_index.get(dependency))
+            if source is not None and source != position:
+                dependents[source].append(position)
+                waiting[position] += 1
+
+    heap = [keys[position] for position in range(len(candidates)) if waiting[position] == 0]
+    heapq.heapify(heap)
+
+    remaining = capacity
+    min_block = float(settings.get('min_block_minutes') or 0)
+    blocked = [False] * len(candidates)
+    unfinished = [False] * len(candidates)
+    visited = [False] * len(candidates)
+    scheduled = []
+    deferred = []
+    while heap:
+        position = heapq.heappop(heap)[3]
+        visited[position] = True
+        kind, item = candidates[position]
+        minutes = estimate_minutes(item, settings)
+
+        if blocked[position]:
+            unfinished[position] = True
+            deferred.append({'kind': kind, 'item': item, 'minutes': minutes, 'reason': 'dependency'})
+        elif minutes <= remaining:
+            remaining -= minutes
+            scheduled.append({'rank': len(scheduled) + 1, 'kind': kind, 'item': item, 'minutes': minutes,
+                              'reason': None})
+        elif kind == 'story' and minutes > capacity and remaining > 0 and remaining >= min_block:
+            # 1日では終わらないストーリーは、残り時間を使って進める（後続のストーリーは今日は始められない）
+            unfinished[position] = True
+            scheduled.append({'rank': len(scheduled) + 1, 'kind': kind, 'item': item, 'minutes': remaining,
+                              'total_minutes': minutes, 'reason': 'partial'})
+            remaining = 0.0
+        else:
+            unfinished[position] = True
+            deferred.append({'kind': kind, 'item': item, 'minutes': minutes, 'reason': 'capacity'})
+
+        for dependent in dependents[position]:
+            if unfinished[position]:
+                blocked[dependent] = True
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                heapq.heappush(heap, keys[dependent])
+
+    # 循環依存で順序を決められないものは持ち越し
+    for position, (kind, item) in enumerate(candidates):
+        if not visited[position]:
+            deferred.append({'kind': kind, 'item': item, 'minutes': estimate_minutes(item, settings),
+                             'reason': 'cycle'})
+
+    for rank, entry in enumerate(deferred, len(scheduled) + 1):
+        entry['rank'] = rank
+
+    return {
+        'scheduled': scheduled,
+        'deferred': deferred,
+        'capacity_minutes': capacity,
+        'planned_minutes': capacity - remaining
+    }
+
+
+def format_minutes(minutes):
+    """
+    分を「3時間30分」の形式にする
+    """
+    minutes = int(round(minutes))
+    hours, rest = divmod(minutes, 60)
+    if hours and rest:
+        return f"{hours}時間{rest}分"
+    if hours:
+        return f"{hours}時間"
+    return f"{rest}分"
+
+
+DEFERRED_REASONS = {
+    'capacity': "時間不足",
+    'dependency': "先行タスクが未完了",
+    'cycle': "循環依存"
+}
+
+
+def block_title(entry):
+    item = entry['item']
+    if entry['kind'] == 'story':
+        return f"{item.get('id', 'Unknown')}: {item.get('title', 'Untitled Story')}"
+    if entry['kind'] == 'carry_over':
+        return item.get('text') or item.get('title', 'Untitled Task')
+    return item.get('title', 'Untitled Task')
+
+
+def plan_summary(plan, busy, blocks=None):
+    """
+    テンプレートに渡す計画の要約
+    """
+    deferred_minutes = sum(entry['minutes'] for entry in plan['deferred'])
+    return {
+        'blocks': [
+            {
+                'start': time_slots.format_clock(block['start']),
+                'end': time_slots.format_clock(block['end']),
+                'title': block_title(block['entry']) + ("（続き）" if block['part'] > 1 else "")
+                + ("（一部）" if block['entry']['reason'] == 'partial' else ""),
+                'kind': block['entry']['kind'],
+                'part': block['part']
+            }
+            for block in blocks or []
+        ],
+        'capacity': format_minutes(plan['capacity_minutes']),
+        'busy': format_minutes(busy),
+        'planned': format_minutes(plan['planned_minutes']),
+        'scheduled_count': len(plan['scheduled']),
+        'deferred_count': len(plan['deferred']),
+        'deferred_time': format_minutes(deferred_minutes),
+        'deferred_items': [
+            {
+                'rank': entry['rank'],
+                'title': block_title(entry),
+                'kind': entry['kind'],
+                'time': format_minutes(entry['minutes']),
+                'reason': DEFERRED_REASONS.get(entry['reason'], entry['reason'])
+            }
+            for entry in plan['deferred']
+        ],
+        'partial_count': sum(1 for entry in plan['scheduled'] if entry['reason'] == 'partial'),
+        'scheduled': plan['scheduled'],
+        'deferred': plan['deferred']
+    }
+
+
+def schedule_items(sprint_stories, routine_tasks, day, settings, calendar_file=None, carried_tasks=None):
+    """
+    カレンダーの予定を考慮して計画を作成し、
+    (計画に入ったストーリー, ルーチンタスク, 持ち越しタスク, 要約) を返す
+
+    計画に入らなかった持ち越しタスクは、ストーリーと同じく要約の「計画に入らなかったタスク」にだけ載せる
+    （そこではチェックボックス付きで出力するので、翌日の持ち越しの対象からは消えない）
+    """
+    capacity, busy, slots = compute_capacity(settings, day, load_calendar_events(calendar_file))
+    plan = build_plan(sprint_stories, routine_tasks, capacity, settings, carried_tasks)
+    blocks, _ = time_slots.assign_blocks(slots, plan['scheduled'], int(settings['min_block_minutes']))
+
+    stories = [entry['item'] for entry in plan['scheduled'] if entry['kind'] == 'story']
+    routines = [entry['item'] for entry in plan['scheduled'] if entry['kind'] == 'routine']
+    carried = [entry['item'] for entry in plan['scheduled'] if entry['kind'] == 'carry_over']
+    return stories, routines, carried, plan_summary(plan, busy, blocks)
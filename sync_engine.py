@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Flow→Stock同期用のファイル同期エンジン
+
+1. コピー元とコピー先をscandirで列挙し、サイズ → 更新時刻 → SHA-256 の順に比較
+   （サイズと更新時刻が一致すれば内容は読まない）
+2. サイズが同じで更新時刻だけ違うファイルは、スレッドプールで並列に内容を比較して操作を確定
+3. コピー元に存在しないコピー先ファイル（孤立ファイル）を報告
+4. copy_file は copy_file_range / sendfile によるカーネル内コピー（使えなければ通常のコピー）で書き込む
+   （コピーの実行とステージングは flow_to_stock.py が行う）
+
+コピー時は更新時刻もコピー元に合わせるため、次回以降はstatだけで未変更と判定できます。
+"""
+
+import os
+import sys
+import fnmatch
+
+
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def default_jobs():
+    """
+    コピー用スレッド数のデフォルト値
+    """
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def hash_file(file_path):
+    """
+    ファイル内容のSHA-256を計算
+    """
+    import hashlib
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def files_identical(source, destination, source_stat=None, destination_stat=None):
+    """
+    2つのファイルが同じ内容かを判定
+
+    サイズが違えば異なる、サイズと更新時刻が一致すれば同じとみなし、
+    それ以外の場合だけ内容のハッシュを比較する
+    """
+    try:
+        if source_stat is None:
+            source_stat = os.stat(source)
+        if destination_stat is None:
+            destination_stat = os.stat(destination)
+    except FileNotFoundError:
+        return False
+
+    if source_stat.st_size != destination_stat.st_size:
+        return False
+    if source_stat.st_mtime_ns == destination_stat.st_mtime_ns:
+        return True
+    return hash_file(source) == hash_file(destination)
+
+
+def _copy_fd(source_fd, destination_fd, size):
+    """
+    ファイルディスクリプタ間でカーネル内コピーを行う
+
+    copy_file_range → sendfile → read/write の順に試す
+    """
+    copied = 0
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while copied < size:
+                sent = os.copy_file_range(source_fd, destination_fd, min(COPY_CHUNK_SIZE, size - copied))
+                if sent == 0:
+                    break
+                copied += sent
+            if copied >= size:
+                return
+        except OSError:
+            pass
+
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        try:
+            while copied < size:
+                sent = os.sendfile(destination_fd, source_fd, copied, min(COPY_CHUNK_SIZE, size - copied))
+                if sent == 0:
+                    break
+                copied += sent
+            if copied >= size:
+                return
+        except OSError:
+            pass
+
+    os.lseek(source_fd, copied, os.SEEK_SET)
+    os.lseek(destination_fd, copied, os.SEEK_SET)
+    while True:
+        chunk = os.read(source_fd, COPY_CHUNK_SIZE)
+        if not chunk:
+            break
+        os.write(destination_fd, chunk)
+
+
+def copy_file(source, destination, source_stat=None):
+    """
+    ファイルをコピー先と同じディレクトリの一時ファイルへ書き込み、os.replaceで置き換える
+    更新時刻とパーミッションはコピー元に合わせる
+    """
+    import shutil
+    import tempfile
+    if source_stat is None:
+        source_stat = os.stat(source)
+
+    destination_dir = os.path.dirname(destination) or "."
+    os.makedirs(destination_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=destination_dir, prefix=".sync_")
+    try:
+        with open(source, 'rb') as src:
+            _copy_fd(src.fileno(), fd, source_stat.st_size)
+        os.close(fd)
+        fd = None
+        shutil.copymode(source, temp_path)
+        os.utime(temp_path, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+        os.replace(temp_path, destination)
+    except Exception:
+        if fd is not None:
+            os.close(fd)
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def collect_files(source_dir, pattern="*.md", recursive=True):
+    """
+    コピー元ディレクトリからパターンに合うファイルを {ファイル名: (パス, stat)} で返す
+
+    サブディレクトリのファイルも同じ階層に平坦化する（同名の場合は後から見つかった方を優先）
+    """
+    files = {}
+    pending = [source_dir]
+    while pending:
+        current = pending.pop()
+        try:
+            entries = sorted(os.scandir(current), key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if recursive:
+                    subdirs.append(entry.path)
+            elif entry.is_file() and fnmatch.fnmatchcase(entry.name, pattern):
+                files[entry.name] = (entry.path, entry.stat())
+        pending.extend(reversed(subdirs))
+    return files
+
+
+def plan_directory_sync(source_files, destination_dir, pattern="*.md"):
+    """
+    コピー元ファイルとコピー先ディレクトリを比較して同期操作の一覧を作成
+
+    戻り値: 操作の辞書のリスト
+      {'action': 'copy' / 'skip' / 'orphan', 'source', 'destination', 'reason'}
+    """
+    destination_files = {}
+    try:
+        with os.scandir(destination_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and fnmatch.fnmatchcase(entry.name, pattern):
+                    destination_files[entry.name] = (entry.path, entry.stat())
+    except FileNotFoundError:
+        pass
+
+    operations = []
+    for name in sorted(source_files):
+        source, source_stat = source_files[name]
+        destination = os.path.join(destination_dir, name)
+        existing = destination_files.get(name)
+        if existing is None:
+            operations.append({'action': 'copy', 'source': source, 'destination': destination, 'reason': 'new',
+                               'source_stat': source_stat, 'destination_stat': None})
+            continue
+
+        destination_stat = existing[1]
+        if source_stat.st_size != destination_stat.st_size:
+            reason = 'size'
+        elif source_stat.st_mtime_ns == destination_stat.st_mtime_ns:
+            reason = None
+        else:
+            reason = 'hash?'
+        operations.append({'action': 'copy' if reason else 'skip', 'source': source, 'destination': destination,
+                           'reason': reason or 'unchanged', 'source_stat': source_stat,
+                           'destination_stat': destination_stat})
+
+    for name in sorted(set(destination_files) - set(source_files)):
+        operations.append({'action': 'orphan', 'source': None, 'destination': destination_files[name][0],
+                           'reason': 'orphan', 'source_stat': None, 'destination_stat': destination_files[name][1]})
+
+    return operations
+
+
+def resolve_operation(operation, touch=True):
+    """
+    サイズが同じで更新時刻だけ違うファイルを内容で比較し、操作を確定する
+    同じ内容で touch=True なら更新時刻だけを合わせ、次回以降の比較をstatだけで済ませる
+    """
+    if operation['reason'] != 'hash?':
+        return operation
+    if hash_file(operation['source']) == hash_file(operation['destination']):
+        if touch:
+            source_stat = operation['source_stat']
+            os.utime(operation['destination'], ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+        operation['action'] = 'skip'
+        operation['reason'] = 'unchanged'
+    else:
+        operation['reason'] = 'content'
+    return operation
+
+
+def resolve_operations(operations, jobs=None, touch=True):
+    """
+    内容比較が必要な操作をスレッドプールで並列に確定する
+    """
+    pending = [operation for operation in operations if operation['reason'] == 'hash?']
+    if not pending:
+        return operations
+
+    if jobs is None:
+        jobs = default_jobs()
+    if jobs <= 1 or len(pending) == 1:
+        for operation in pending:
+            resolve_operation(operation, touch)
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(jobs, len(pending))) as executor:
+            list(executor.map(lambda operation: resolve_operation(operation, touch), pending))
+    return operations
+
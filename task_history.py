@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日次タスクの履歴インデックス（SQLite）
+
+1. Flow/YYYYMM/YYYY-MM-DD/daily_tasks.md を探し、チェックボックスの状態を ROOT/.aipm/history.sqlite3 に保存
+2. サイズと更新時刻が変わったファイルだけ内容のハッシュを比べ、変わっていれば解析し直す
+3. 集計はインデックスを使ったSQLで行い、Markdownは読み直さない
+   - stories: ストーリーごとの初めて計画された日・完了した日・計画された日数
+   - routines: ルーチンタスクごとの実施率・現在の連続実施回数・最長の連続実施回数
+   - sprints: スプリントの期間ごとの計画したストーリー数と完了したストーリー数（スプリントはアイテムストアから取得）
+
+チェックボックスの行は見出しから次のように分類します:
+- calendar: 末尾に <!-- cal:ID --> がある行、または「今日の予定」の HH:MM の行
+- story: 「US-001: タイトル」の形式の行
+- routine: 「ルーチンタスク」の「[Daily] タイトル」の形式の行
+- task: それ以外
+
+使用例:
+  python task_history.py stories --since 2026-04-01
+  python task_history.py routines
+"""
+
+import os
+import re
+import sys
+import argparse
+import contextlib
+from datetime import datetime
+
+import phase_timer
+from aipm import paths
+from aipm.lazy import lazy_import
+
+json = lazy_import("json")
+sqlite3 = lazy_import("sqlite3")
+hashlib = lazy_import("hashlib")
+item_store = lazy_import("item_store")
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    file_path TEXT PRIMARY KEY,
+    day TEXT NOT NULL,
+    sha1 TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS entries (
+    file_path TEXT NOT NULL,
+    day TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    section TEXT,
+    project TEXT,
+    epic TEXT,
+    kind TEXT NOT NULL,
+    item_id TEXT,
+    title TEXT,
+    frequency TEXT,
+    done INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_days_day ON days (day);
+CREATE INDEX IF NOT EXISTS idx_entries_file ON entries (file_path);
+CREATE INDEX IF NOT EXISTS idx_entries_kind_item ON entries (kind, item_id, day);
+CREATE INDEX IF NOT EXISTS idx_entries_day ON entries (day);
+"""
+
+MONTH_DIR_RE = re.compile(r'^\d{6}$')
+DAY_DIR_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+CHECKBOX_RE = re.compile(r'^\s*[-*] \[([ xX])\]\s*(.*?)\s*$')
+CALENDAR_MARKER_RE = re.compile(r'\s*<!-- cal:(\S+) -->$')
+CALENDAR_TIME_RE = re.compile(r'^(\d{2}:\d{2}(-\d{2}:\d{2})?|終日):\s*(.*)$')
+STORY_RE = re.compile(r'^([A-Za-z][A-Za-z0-9_]*-\d+)\s*:\s*(.*)$')
+ROUTINE_RE = re.compile(r'^\[([^\]]*)\]\s*(.*)$')
+DEFERRED_ITEM_RE = re.compile(r'^\d+\.\s*(.*?)\s*（[^（）]*）$')
+
+DAILY_TASKS_FILE = "daily_tasks.md"
+
+
+def get_root_dir():
+    """
+    環境変数またはデフォルト値からルートディレクトリを取得（aipm.paths と共通）
+    """
+    return paths.get_root_dir()
+
+
+def get_default_db_path(root_dir):
+    """
+    ルートディレクトリからデフォルトのデータベースパスを取得
+    """
+    return os.path.join(root_dir, ".aipm", "history.sqlite3")
+
+
+def open_history(db_path):
+    """
+    データベースを開き、スキーマとインデックスを作成
+    """
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def find_daily_task_files(root_dir, since=None, until=None):
+    """
+    Flow/YYYYMM/YYYY-MM-DD/daily_tasks.md を {ファイルパス: 日付文字列} で返す
+
+    月・日のディレクトリ名で期間外を読み飛ばすので、Flow 全体を再帰的にはたどらない
+    """
+    flow_dir = os.path.join(root_dir, "Flow")
+    since_month = since.replace("-", "")[:6] if since else None
+    until_month = until.replace("-", "")[:6] if until else None
+
+    found = {}
+    try:
+        months = [entry for entry in os.scandir(flow_dir) if entry.is_dir() and MONTH_DIR_RE.match(entry.name)]
+    except OSError:
+        return found
+    for month in months:
+        if (since_month and month.name < since_month) or (until_month and month.name > until_month):
+            continue
+        try:
+            days = list(os.scandir(month.path))
+        except OSError:
+            continue
+        for day in days:
+            if not DAY_DIR_RE.match(day.name) or not day.is_dir():
+                continue
+            if (since and day.name < since) or (until and day.name > until):
+                continue
+            file_path = os.path.join(day.path, DAILY_TASKS_FILE)
+            if os.path.isfile(file_path):
+                found[file_path] = day.name
+    return found
+
+
+def section_kind(heading):
+    """
+    「##」見出しの種類（schedule / plan / sprint / carry_over / routine / other）
+    """
+    if "今日の予定" in heading:
+        return 'schedule'
+    if "キャパシティ" in heading:
+        return 'plan'
+    if "スプリント" in heading:
+        return 'sprint'
+    if "持ち越し" in heading:
+        return 'carry_over'
+    if "ルーチン" in heading:
+        return 'routine'
+    return 'other'
+
+
+def classify_checkbox(text, section):
+    """
+    チェックボックスの文字列を (kind, item_id, title, frequency) に分類
+    """
+    marker = CALENDAR_MARKER_RE.search(text)
+    if marker:
+        title = text[:marker.start()]
+        time_match = CALENDAR_TIME_RE.match(title)
+        return 'calendar', marker.group(1), time_match.group(3) if time_match else title, None
+    if section == 'schedule':
+        time_match = CALENDAR_TIME_RE.match(text)
+        if time_match:
+            return 'calendar', None, time_match.group(3), None
+    if section == 'plan':
+        # 計画に入らなかった持ち越しタスク（「3. タイトル（30分、時間不足）」）は順位と注記を除く
+        deferred = DEFERRED_ITEM_RE.match(text)
+        if deferred:
+            text = deferred.group(1)
+
+    story = STORY_RE.match(text)
+    if story:
+        return 'story', story.group(1), story.group(2), None
+    if section == 'routine':
+        routine = ROUTINE_RE.match(text)
+        if routine:
+            return 'routine', routine.group(2), routine.group(2), routine.group(1).strip().lower() or None
+        return 'routine', text, text, None
+    return 'task', None, text, None
+
+
+def parse_daily_tasks(content, sections=None):
+    """
+    日次タスクのチェックボックスを解析してエントリのリストを返す
+
+    各エントリは {'position', 'section', 'project', 'epic', 'kind', 'item_id', 'title', 'frequency', 'done'}
+    sections（section_kind() の値の集合）を渡すと、それ以外の見出しの行は解析しない
+    """
+    entries = []
+    section = ''
+    kind_of_section = 'other'
+    project = None
+    epic = None
+    for line in content.splitlines():
+        if line.startswith('#'):
+            level = len(line) - len(line.lstrip('#'))
+            heading = line[level:].strip()
+            if level <= 2:
+                section, kind_of_section = heading, section_kind(heading)
+                project = epic = None
+            elif level == 3:
+                project, epic = heading, None
+            else:
+                epic = heading
+            continue
+
+        if sections is not None and kind_of_section not in sections:
+            continue
+        match = CHECKBOX_RE.match(line)
+        if not match or not match.group(2):
+            continue
+        kind, item_id, title, frequency = classify_checkbox(match.group(2), kind_of_section)
+        entries.append({
+            'position': len(entries),
+            'section': section,
+            'project': project,
+            'epic': epic,
+            'kind': kind,
+            'item_id': item_id,
+            'title': title,
+            'frequency': frequency,
+            'done': match.group(1) != ' '
+        })
+    return entries
+
+
+def _replace_day(conn, file_path, day, sha1, stat_result, entries):
+    conn.execute("DELETE FROM entries WHERE file_path = ?", (file_path,))
+    conn.execute("DELETE FROM days WHERE file_path = ?", (file_path,))
+    conn.executemany(
+        "INSERT INTO entries (file_path, day, position, section, project, epic, kind, item_id, title, frequency, done) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (file_path, day, entry['position'], entry['section'], entry['project'], entry['epic'], entry['kind'],
+             entry['item_id'], entry['title'], entry['frequency'], int(entry['done']))
+            for entry in entries
+        ]
+    )
+    conn.execute(
+        "INSERT INTO days (file_path, day, sha1, mtime_ns, size, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+        (file_path, day, sha1, stat_result.st_mtime_ns, stat_result.st_size, datetime.now().isoformat())
+    )
+
+
+def sync_history(conn, root_dir, force=False):
+    """
+    Flow の日次タスクとインデックスを同期
+
+    サイズと更新時刻が変わったファイルだけ読み、内容のハッシュも変わっていれば解析し直す。
+    削除されたファイルの行は除去する
+    """
+    with phase_timer.phase("history_scan"):
+        discovered = find_daily_task_files(root_dir)
+        known = {
+            row['file_path']: (row['mtime_ns'], row['size'], row['sha1'])
+            for row in conn.execute("SELECT file_path, mtime_ns, size, sha1 FROM days")
+        }
+
+    stats = {'scanned': len(discovered), 'updated': 0, 'touched': 0, 'unchanged': 0, 'removed': 0}
+    with phase_timer.phase("history_parse"), conn:
+        for file_path, day in sorted(discovered.items(), key=lambda item: item[1]):
+            try:
+                stat_result = os.stat(file_path)
+            except OSError as e:
+                print(f"警告: {file_path} の情報を取得できませんでした: {e}")
+                continue
+            previous = known.get(file_path)
+            if not force and previous and previous[:2] == (stat_result.st_mtime_ns, stat_result.st_size):
+                stats['unchanged'] += 1
+                continue
+
+            try:
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+            except OSError as e:
+                print(f"警告: {file_path} を読み込めませんでした: {e}")
+                continue
+            phase_timer.count(files=1, bytes=len(data))
+            sha1 = hashlib.sha1(data).hexdigest()
+            if not force and previous and previous[2] == sha1:
+                # 内容が同じ（保存し直しただけ）なら更新時刻だけを記録する
+                conn.execute("UPDATE days SET mtime_ns = ?, size = ? WHERE file_path = ?",
+                             (stat_result.st_mtime_ns, stat_result.st_size, file_path))
+                stats['touched'] += 1
+                continue
+
+            entries = parse_daily_tasks(data.decode('utf-8', errors='replace'))
+            _replace_day(conn, file_path, day, sha1, stat_result, entries)
+            phase_timer.count(items=len(entries))
+            stats['updated'] += 1
+
+        removed = [file_path for file_path in known if file_path not in discovered]
+        for file_path in removed:
+            conn.execute("DELETE FROM entries WHERE file_path = ?", (file_path,))
+            conn.execute("DELETE FROM days WHERE file_path = ?", (file_path,))
+        stats['removed'] = len(removed)
+
+    print(f"履歴インデックスを同期しました: {stats}", file=sys.stderr)
+    return stats
+
+
+def _period_clause(since=None, until=None):
+    conditions = []
+    params = []
+    if since:
+        conditions.append("day >= ?")
+        params.append(since)
+    if until:
+        conditions.append("day <= ?")
+        params.append(until)
+    return conditions, params
+
+
+def story_completion_dates(conn, since=None, until=None):
+    """
+    ストーリーごとの初めて計画された日・完了した日（初めてチェックされた日）・計画された日数
+    """
+    conditions, params = _period_clause(since, until)
+    sql = (
+        "SELECT item_id, MIN(day) AS first_planned, MIN(CASE WHEN done THEN day END) AS completed, "
+        "COUNT(DISTINCT day) AS days_planned, MAX(title) AS title "
+        "FROM entries WHERE " + " AND ".join(["kind = 'story'"] + conditions) +
+        " GROUP BY item_id ORDER BY completed IS NULL, completed, item_id"
+    )
+    return [dict(row) for row in conn.execute(sql, params)]
+
+
+def routine_streaks(conn, since=None, until=None):
+    """
+    ルーチンタスクごとの実施率と連続実施回数
+
+    連続実施回数は、そのルーチンタスクが日次タスクに載った日を続けてチェックした回数
+    （週次のタスクなら週ごとの回数）。current は最後に載った日までの連続回数
+    """
+    conditions, params = _period_clause(since, until)
+    sql = (
+        "SELECT item_id, MAX(frequency) AS frequency, day, MAX(done) AS done "
+        "FROM entries WHERE " + " AND ".join(["kind = 'routine'"] + conditions) +
+        " GROUP BY item_id, day ORDER BY item_id, day"
+    )
+
+    results = []
+    current = None
+    for row in conn.execute(sql, params):
+        if current is None or current['title'] != row['item_id']:
+            current = {'title': row['item_id'], 'frequency': row['frequency'], 'planned': 0, 'done': 0,
+                       'current_streak': 0, 'longest_streak': 0, 'last_done': None}
+            results.append(current)
+        current['planned'] += 1
+        if row['done']:
+            current['done'] += 1
+            current['current_streak'] += 1
+            current['longest_streak'] = max(current['longest_streak'], current['current_streak'])
+            current['last_done'] = row['day']
+        else:
+            current['current_streak'] = 0
+
+    for result in results:
+        result['adherence'] = round(result['done'] / result['planned'], 3) if result['planned'] else 0.0
+    return results
+
+
+def planned_vs_done(conn, sprints):
+    """
+    スプリントの期間ごとの計画と完了
+
+    planned / done は日次タスクに載った・チェックされたストーリーの数（重複は数えない）、
+    checkboxes / checked はカレンダー予定を除くチェックボックスの延べ数
+    """
+    results = []
+    for sprint in sprints:
+        start_date = str(sprint.get('start_date') or '')
+        end_date = str(sprint.get('end_date') or '')
+        if not start_date or not end_date:
+            continue
+        row = conn.execute(
+            "SELECT COUNT(DISTINCT CASE WHEN kind = 'story' THEN item_id END) AS planned, "
+            "COUNT(DISTINCT CASE WHEN kind = 'story' AND done THEN item_id END) AS done, "
+            "SUM(kind != 'calendar') AS checkboxes, SUM(kind != 'calendar' AND done) AS checked, "
+            "COUNT(DISTINCT day) AS days "
+            "FROM entries WHERE day BETWEEN ? AND ?",
+            (start_date, end_date)
+        ).fetchone()
+        results.append({
+            'sprint_id': sprint.get('sprint_id'),
+            'name': sprint.get('name'),
+            'start_date': start_date,
+            'end_date': end_date,
+            'days': row['days'],
+            'planned': row['planned'],
+            'done': row['done'],
+            'checkboxes': row['checkboxes'] or 0,
+            'checked': row['checked'] or 0
+        })
+    return results
+
+
+def load_sprints(root_dir, sync=True):
+    """
+    アイテムストアからスプリント定義を取得
+
+    同期時の探索ログは集計結果（JSON）に混ざらないよう標準エラー出力に回す
+    """
+    conn = item_store.open_store(item_store.get_default_db_path(root_dir))
+    try:
+        if sync:
+            with contextlib.redirect_stdout(sys.stderr):
+                item_store.sync_store(conn, root_dir)
+        return item_store.load_sprints(conn)
+    finally:
+        conn.close()
+
+
+def add_arguments(parser):
+    """
+    履歴インデックスのコマンドライン引数を追加（aipm history と共通）
+    """
+    parser.add_argument('report', nargs='?', choices=('sync', 'stories', 'routines', 'sprints'), default='sync',
+                        help='集計の種類 (デフォルト: sync、インデックスの同期のみ)')
+    parser.add_argument('--root', help='ルートディレクトリ (デフォルト: 環境変数 AIPM_ROOT または ~/aipm_v3)')
+    parser.add_argument('--db', help='データベースファイルパス (デフォルト: ROOT/.aipm/history.sqlite3)')
+    parser.add_argument('--no-sync', action='store_true', help='集計前にFlowとの同期を行わない')
+    parser.add_argument('--force', action='store_true', help='変更の有無に関わらず全ファイルを解析し直す')
+    parser.add_argument('--since', help='集計の開始日 (YYYY-MM-DD形式)')
+    parser.add_argument('--until', help='集計の終了日 (YYYY-MM-DD形式)')
+    parser.add_argument('--output', '-o', help='出力ファイルパス (デフォルト: 標準出力)')
+    phase_timer.add_arguments(parser)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='日次タスクのチェック状態をインデックスし、完了日・連続実施・計画と実績を集計するスクリプト')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with phase_timer.session(args, "task_history"):
+        return phase_timer.record_exit_code(run(args))
+
+
+def run(args):
+    """
+    インデックスを同期して集計を出力し、終了コードを返す
+    """
+    root_dir = args.root if getattr(args, 'root', None) else get_root_dir()
+    db_path = args.db if args.db else get_default_db_path(root_dir)
+    for value in (args.since, args.until):
+        if value:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                print(f"エラー: 無効な日付形式です。YYYY-MM-DD形式で指定してください: {value}")
+                return 1
+
+    conn = open_history(db_path)
+    try:
+        if not args.no_sync:
+            sync_history(conn, root_dir, force=args.force)
+
+        with phase_timer.phase("history_query"):
+            if args.report == 'stories':
+                result = story_completion_dates(conn, args.since, args.until)
+            elif args.report == 'routines':
+                result = routine_streaks(conn, args.since, args.until)
+            elif args.report == 'sprints':
+                result = planned_vs_done(conn, load_sprints(root_dir, sync=not args.no_sync))
+            else:
+                return 0
+    finally:
+        conn.close()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+テスト共通の設定
+
+カレンダー予定はローカル時刻に変換して比較するため、テストは Asia/Tokyo で実行する
+（ics_calendar は時差をキャッシュするので、モジュールを読み込む前に設定する）
+
+Stock のバックログは write_backlog で作る（ストーリーの既定値は validate_backlog_yaml の検証を通る）
+"""
+
+import os
+import time
+
+import pytest
+import yaml
+
+os.environ['TZ'] = 'Asia/Tokyo'
+time.tzset()
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+@pytest.fixture
+def utc_machine():
+    """
+    予定とは違うタイムゾーン（UTC）のマシンで実行する場合
+    """
+    os.environ['TZ'] = 'UTC'
+    time.tzset()
+    yield
+    os.environ['TZ'] = 'Asia/Tokyo'
+    time.tzset()
+
+
+@pytest.fixture
+def recurring_ics():
+    return os.path.join(FIXTURES_DIR, "recurring.ics")
+
+
+def story_defaults(story_id):
+    """
+    検証を通るストーリーの既定値
+    """
+    return {
+        'story_id': story_id,
+        'title': f"{story_id} のタイトル",
+        'description': f"{story_id} の説明",
+        'acceptance_criteria': ["完了条件"],
+        'priority': 'medium',
+        'status': 'new',
+        'sprint_id': 'S1',
+        'sprint': 'S1',
+        'story_points': 1,
+        'estimate': 1,
+        'assignee': '宮田'
+    }
+
+
+@pytest.fixture
+def write_backlog(tmp_path):
+    """
+    ROOT/Stock/programs/<program>/projects/<project>/documents/backlog.yaml を書く関数
+
+    stories の各要素は story_id と上書きする項目だけの辞書（None の項目は書かない）
+    """
+    def write(project, stories, sprints=('S1',), program='P01', epic_id='EP-001'):
+        data = {
+            'project': {'id': project, 'name': project, 'description': f"{project} の説明"},
+            'sprints': [
+                {'sprint_id': sprint_id, 'name': sprint_id, 'start_date': '2026-10-12', 'end_date': '2026-10-25',
+                 'status': 'in_progress', 'goal': 'ゴール'}
+                for sprint_id in sprints
+            ],
+            'epics': [{'epic_id': epic_id, 'title': 'エピック', 'description': 'エピックの説明', 'priority': 'high',
+                       'status': 'in_progress', 'stories': [
+                           {key: value for key, value in dict(story_defaults(item['story_id']), **item).items()
+                            if value is not None}
+                           for item in stories
+                       ]}]
+        }
+        path = tmp_path / "Stock" / "programs" / program / "projects" / project / "documents" / "backlog.yaml"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(yaml.safe_dump(data, allow_unicode=True, sort_keys=False), encoding='utf-8')
+        return str(path)
+    return write
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+カレンダー予定の先読み（日ごとの振り分けと、先読み済みファイルの利用）
+"""
+
+import argparse
+import json
+from datetime import date, datetime, timedelta
+
+import calendar_prefetch
+
+START = date(2026, 10, 19)
+
+
+def event(title, start, end, **fields):
+    return dict({'title': title, 'startTime': start, 'endTime': end}, **fields)
+
+
+def titles(by_day):
+    return {day.isoformat(): [item['title'] for item in events] for day, events in sorted(by_day.items())}
+
+
+def test_events_are_split_by_their_own_date(utc_machine):
+    events = [
+        # UTC のマシンでも、日本時間の早朝の予定は前日ではなくその日に入れる
+        event("早朝の打ち合わせ", "2026-10-20T07:00:00+09:00", "2026-10-20T08:00:00+09:00"),
+        event("夜間作業", "2026-10-19T23:00:00+09:00", "2026-10-20T01:00:00+09:00"),
+        event("0時まで", "2026-10-19T22:00:00+09:00", "2026-10-20T00:00:00+09:00"),
+        event("合宿", "2026-10-20", "2026-10-22", allDay=True),
+        event("期間前から", "2026-10-17T09:00:00+09:00", "2026-10-19T10:00:00+09:00"),
+        event("期間外", "2026-10-25T09:00:00+09:00", "2026-10-25T10:00:00+09:00"),
+        event("時刻なし", "", ""),
+    ]
+    assert titles(calendar_prefetch.split_events_by_day(events, START, 3)) == {
+        "2026-10-19": ["夜間作業", "0時まで", "期間前から"],
+        "2026-10-20": ["早朝の打ち合わせ", "夜間作業", "合宿"],
+        "2026-10-21": ["合宿"],
+    }
+
+
+def test_prefetched_days_are_used_until_they_are_stale(tmp_path, capsys):
+    by_day = calendar_prefetch.split_events_by_day(
+        [event("定例", "2026-10-20T10:00:00+09:00", "2026-10-20T11:00:00+09:00")], START, 2)
+    assert calendar_prefetch.write_day_files(str(tmp_path), by_day, "ics") == 2
+
+    assert calendar_prefetch.load_prefetched_events(str(tmp_path), date(2026, 10, 19)) == []
+    assert [item['title'] for item in calendar_prefetch.load_prefetched_events(str(tmp_path), date(2026, 10, 20))] \
+        == ["定例"]
+    assert calendar_prefetch.load_prefetched_events(str(tmp_path), date(2026, 10, 21)) is None
+    assert calendar_prefetch.load_prefetched_events(str(tmp_path), date(2026, 10, 20), max_age_hours=0) is None
+
+    manifest_path = calendar_prefetch.get_manifest_path(str(tmp_path))
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    assert manifest['days']["2026-10-20"]['source'] == "ics"
+    manifest['days']["2026-10-20"]['fetched_at'] = (datetime.now() - timedelta(hours=25)).isoformat()
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    assert calendar_prefetch.load_prefetched_events(str(tmp_path), date(2026, 10, 20), max_age_hours=24) is None
+    assert calendar_prefetch.load_prefetched_events(str(tmp_path), date(2026, 10, 20), max_age_hours=48) is not None
+
+
+def test_prefetch_from_ics_writes_every_day(tmp_path, recurring_ics):
+    args = argparse.Namespace(root=str(tmp_path), start="2026-10-19", days=3, source=None, ics=recurring_ics,
+                              calendar_id=None)
+    assert calendar_prefetch.prefetch(args) == 0
+    titles = {}
+    for day in (date(2026, 10, 19), date(2026, 10, 20), date(2026, 10, 21)):
+        with open(calendar_prefetch.get_calendar_file(str(tmp_path), day), 'r', encoding='utf-8') as f:
+            events = json.load(f)
+        assert all(item['startTime'].startswith(day.isoformat()) for item in events)
+        titles[day.day] = sorted(item['title'] for item in events)
+    # 10/20 の朝会は EXDATE で除外、10/21 は時間変更
+    assert titles == {19: ["6回だけ", "単発", "朝会"], 20: ["6回だけ"], 21: ["朝会（時間変更）"]}
+
+    args.days = 0
+    assert calendar_prefetch.prefetch(args) == 1
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+カレンダーの取得元（FakeSource と設定からの作成）と、取得した予定の保存
+"""
+
+import json
+import os
+from argparse import Namespace
+from datetime import date
+
+import calendar_sources
+import merge_calendar_tasks
+
+DAY = date(2026, 10, 19)
+
+EVENTS = [
+    {'id': 'standup', 'title': '朝会', 'startTime': '2026-10-19T09:00:00+09:00', 'endTime': '2026-10-19T09:15:00+09:00'},
+    {'id': 'review', 'title': 'レビュー', 'startTime': '2026-10-19T14:00:00+09:00', 'endTime': '2026-10-19T15:00:00+09:00'},
+    {'id': 'tomorrow', 'title': '明日の予定', 'startTime': '2026-10-20T10:00:00+09:00', 'endTime': '2026-10-20T11:00:00+09:00'},
+]
+
+
+def test_fake_source_filters_to_range_and_records_calls():
+    source = calendar_sources.FakeSource(EVENTS)
+    assert [event['id'] for event in source.fetch(DAY, 1)] == ['standup', 'review']
+    assert [event['id'] for event in source.fetch(DAY, 2)] == ['standup', 'review', 'tomorrow']
+    assert source.calls == [(DAY, 1), (DAY, 2)]
+
+
+def test_fake_source_reads_json_file(tmp_path):
+    path = tmp_path / "events.json"
+    path.write_text(json.dumps({'events': EVENTS}, ensure_ascii=False), encoding='utf-8')
+    assert len(calendar_sources.FakeSource(path=str(path)).fetch(DAY, 1)) == 2
+    assert calendar_sources.FakeSource(path=str(tmp_path / "missing.json")).fetch(DAY, 1) is None
+    assert calendar_sources.FakeSource(EVENTS, fail=True).fetch(DAY, 1) is None
+
+
+def test_create_source_from_config_and_args(tmp_path):
+    root = str(tmp_path)
+    config_dir = tmp_path / "scripts" / "config"
+    config_dir.mkdir(parents=True)
+    (config_dir / "user_config.yaml").write_text(
+        "calendar_source:\n  type: webapp\n  url: https://example.com/exec\n  calendar_id: [primary, team]\n",
+        encoding='utf-8')
+
+    source = calendar_sources.create_source(root)
+    assert isinstance(source, calendar_sources.WebAppSource)
+    # --ics は設定の取得元より優先する
+    source = calendar_sources.create_source_from_args(root, Namespace(source=None, ics='/tmp/x.ics'))
+    assert isinstance(source, calendar_sources.IcsSource) and source.path == '/tmp/x.ics'
+    assert isinstance(calendar_sources.create_source(root, 'fake'), calendar_sources.FakeSource)
+    assert calendar_sources.create_source(root, 'webapp', config={}) is None
+    assert calendar_sources.create_source(root, 'unknown') is None
+    assert calendar_sources.calendar_ids(['primary', ' team ', '']) == 'primary,team'
+
+
+def test_get_calendar_events_direct_saves_events(tmp_path):
+    flow_dir = str(tmp_path / "Flow" / "202610" / "2026-10-19")
+    events = merge_calendar_tasks.get_calendar_events_direct(str(tmp_path), flow_dir, calendar_sources.FakeSource(EVENTS), DAY)
+    assert [event['id'] for event in events] == ['standup', 'review']
+    with open(os.path.join(flow_dir, "calendar_events.json"), 'r', encoding='utf-8') as f:
+        assert json.load(f) == events
+    assert merge_calendar_tasks.get_calendar_events_direct(
+        str(tmp_path), flow_dir, calendar_sources.FakeSource(fail=True), DAY) is None
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+未完了タスクの持ち越し（遡る範囲・同じタスクの重複排除・除外するストーリー・設定）
+"""
+
+import os
+from datetime import date
+
+import carry_over
+
+TODAY = date(2026, 10, 20)
+
+DAYS = {
+    # 月曜日
+    date(2026, 10, 19): """\
+## 🎯 スプリントタスク
+### web
+#### EP-001: 認証
+- [ ] US-001: ログイン
+- [x] US-002: ログアウト
+- [ ] US-005: 完了済み
+- [ ] US-006: 今日のスプリント
+
+## ⏩ 持ち越しタスク
+- [ ] 請求書を  送る
+
+## 📋 今日の予定
+- [ ] 09:00-09:15: 朝会
+
+## 🔄 ルーチンタスク
+- [ ] [Daily] 日報
+
+## メモ
+- [x] 資料を読む
+""",
+    # 金曜日（土日はファイルが無い）
+    date(2026, 10, 16): """\
+## 🎯 スプリントタスク
+- [ ] US-001: ログイン（旧タイトル）
+- [ ] US-002: ログアウト
+
+## ⏩ 持ち越しタスク
+- [x] 請求書を送る
+- [ ] 資料を読む
+- [ ] 経費精算
+""",
+    date(2026, 10, 2): """\
+- [ ] 古いタスク
+""",
+}
+
+
+def write_days(root):
+    for day, content in DAYS.items():
+        path = carry_over.get_daily_tasks_path(str(root), day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+
+def outline(items):
+    return [(item['kind'], item['id'], item['text'], item['since']) for item in items]
+
+
+def test_find_previous_day_files_skips_missing_days(tmp_path):
+    write_days(tmp_path)
+    found = carry_over.find_previous_day_files(str(tmp_path), TODAY, days=3)
+    assert [day for day, _ in found] == [date(2026, 10, 19), date(2026, 10, 16)]
+    assert found[0][1] == str(tmp_path / "Flow" / "202610" / "2026-10-19" / "daily_tasks.md")
+
+    assert [day for day, _ in carry_over.find_previous_day_files(str(tmp_path), TODAY, days=3,
+                                                                 max_lookback_days=30)][-1] == date(2026, 10, 2)
+    assert carry_over.find_previous_day_files(str(tmp_path), TODAY, days=3, max_lookback_days=2) == [
+        (date(2026, 10, 19), found[0][1])]
+    assert carry_over.find_previous_day_files(str(tmp_path), date(2026, 10, 17), days=1) == [
+        (date(2026, 10, 16), found[1][1])]
+
+
+def test_newest_state_wins_across_days(tmp_path):
+    write_days(tmp_path)
+    day_files = carry_over.find_previous_day_files(str(tmp_path), TODAY, days=2)
+    items = carry_over.collect_carry_over(day_files, exclude_ids=['US-006'], completed_ids={'US-005'})
+    # 予定とルーチンタスクは持ち越さず、同じタスクは1件にまとめる
+    assert outline(items) == [
+        ('story', 'US-001', 'US-001: ログイン', "2026-10-16"),
+        ('task', None, '請求書を  送る', "2026-10-19"),
+        ('task', None, '経費精算', "2026-10-16"),
+    ]
+    assert (items[0]['project'], items[0]['epic']) == ('web', 'EP-001: 認証')
+
+    items = carry_over.collect_carry_over(day_files[:1])
+    assert [item['id'] or item['text'] for item in items] == ['US-001', 'US-005', 'US-006', '請求書を  送る']
+    assert carry_over.collect_carry_over([(TODAY, str(tmp_path / "missing.md"))]) == []
+
+
+def test_carry_over_tasks_follows_settings(tmp_path):
+    write_days(tmp_path)
+    settings = carry_over.load_settings({'carry_over': {'days': 2}})
+    assert settings == {'enabled': True, 'days': 2, 'max_lookback_days': 14}
+    items = carry_over.carry_over_tasks(str(tmp_path), TODAY, settings, exclude_ids=['US-006'],
+                                        completed_ids=['US-005'])
+    assert [item['id'] or item['text'] for item in items] == ['US-001', '請求書を  送る', '経費精算']
+
+    assert [item['id'] or item['text'] for item in carry_over.carry_over_tasks(
+        str(tmp_path), TODAY, carry_over.DEFAULT_SETTINGS, exclude_ids=['US-006'], completed_ids=['US-005'])] == [
+        'US-001', '請求書を  送る']
+    assert carry_over.carry_over_tasks(str(tmp_path), TODAY, dict(settings, enabled=False)) == []
+    assert carry_over.carry_over_tasks(str(tmp_path), TODAY, dict(settings, days=0)) == []
+    assert carry_over.carry_over_tasks(str(tmp_path), TODAY, dict(settings, days='二日')) == []
+    assert carry_over.load_settings({'carry_over': 'yes'}) == carry_over.DEFAULT_SETTINGS
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+日次タスクのテンプレートのコンパイルとデフォルトのセクション
+"""
+
+from datetime import date
+
+import pytest
+
+import daily_template
+import merge_calendar_tasks
+
+
+def render(source, **ctx):
+    return daily_template.TemplateSet({'main': source}, ['main']).render(ctx)
+
+
+def test_values_and_filters():
+    source = '{{ story.id|default("Unknown") }}: {{ story.title }} {{ freq|capitalize }} {{ name|upper }}{{ missing.key }}'
+    assert render(source, story={'title': 'ログイン'}, freq='daily', name='ab') == 'Unknown: ログイン Daily AB'
+
+
+def test_if_elif_else_and_comparison():
+    source = '{% if kind == "a" %}A{% elif not kind %}none{% elif kind != "b" %}other{% else %}B{% endif %}'
+    assert [render(source, kind=kind) for kind in ('a', '', 'c', 'b')] == ['A', 'none', 'other', 'B']
+
+
+def test_for_else_and_tag_only_lines_removed():
+    source = """\
+{# 一覧 #}
+{% for item in items %}
+- {{ item }}
+{% else %}
+- なし
+{% endfor %}
+"""
+    assert render(source, items=['a', 'b']) == "- a\n- b\n"
+    assert render(source, items=[]) == "- なし\n"
+    assert render(source) == "- なし\n"
+
+
+def test_include_uses_context_value():
+    template_set = daily_template.TemplateSet(
+        {'main': '{% for p in projects %}{% include p.template %}{% endfor %}', 'short': '[{{ p.name }}]'},
+        ['main'])
+    ctx = {'projects': [{'name': 'a', 'template': 'short'}, {'name': 'b', 'template': 'short'}]}
+    assert template_set.render(ctx) == '[a][b]'
+
+
+def test_compiled_templates_are_cached():
+    source = '{{ value }}!'
+    assert daily_template.compile_template(source, 'x') is daily_template.compile_template(source, 'y')
+
+
+@pytest.mark.parametrize('source, line', [
+    ('ok\n{% if a %}\nnever closed\n', 2),
+    ('{% for x %}{% endfor %}', 1),
+    ('line\nline\n{{ a|unknown }}', 3),
+    ('{% endif %}', 1),
+])
+def test_syntax_errors_report_name_and_line(source, line):
+    with pytest.raises(daily_template.TemplateError) as excinfo:
+        daily_template.compile_template(source, 'broken')
+    assert excinfo.value.name == 'broken'
+    assert excinfo.value.line == line
+    assert str(excinfo.value).startswith(f"broken:{line}: ")
+
+
+def test_unknown_and_recursive_templates():
+    with pytest.raises(daily_template.TemplateError):
+        daily_template.TemplateSet(sections=['nothing']).render({})
+    with pytest.raises(daily_template.TemplateError):
+        daily_template.TemplateSet({'loop': '{% include "loop" %}'}, ['loop']).render({})
+
+
+def test_load_template_set_validates_templates(tmp_path):
+    (tmp_path / "compact.md").write_text("- {{ project.name }}\n", encoding='utf-8')
+    template_set = daily_template.load_template_set(
+        {'template_files': {'compact': 'compact.md'}, 'project_templates': {'dinner': 'compact'}}, str(tmp_path))
+    assert template_set.project_templates == {'dinner': 'compact'}
+    with pytest.raises(daily_template.TemplateError):
+        daily_template.load_template_set({'templates': {'focus': '{% if %}'}})
+
+
+STORIES = [
+    {'id': 'US-001', 'title': 'ログイン', 'project': 'web', 'epic_name': '認証'},
+    {'id': 'US-002', 'title': 'ログアウト', 'project': 'web', 'epic_name': '認証'},
+    {'id': 'US-010', 'title': '献立', 'project': 'dinner', 'epic_name': '計画'},
+]
+ROUTINES = [{'title': '日報', 'routine': {'frequency': 'daily'}}]
+
+
+def test_default_sections():
+    content = daily_template.render_daily_tasks(STORIES, ROUTINES, date(2026, 10, 19))
+    assert content.startswith("# 日次タスク 2026-10-19\n\n## 📋 今日の予定\n")
+    assert "## 🚀 週初めのタスク" in content  # 2026-10-19 は月曜日
+    assert "### web\n#### 認証\n- [ ] US-001: ログイン\n- [ ] US-002: ログアウト\n" in content
+    assert "- [ ] [Daily] 日報\n" in content
+    assert "持ち越し" not in content and "キャパシティ" not in content
+    # merge_calendar_tasks が予定を差し込む見出しが残っていること
+    assert merge_calendar_tasks.SCHEDULE_SECTION_RE.search(content)
+
+
+def test_project_templates_and_empty_routines():
+    compact = '{% for epic in project.epics %}{% for story in epic.stories %}* {{ story.id }}\n{% endfor %}{% endfor %}'
+    template_set = daily_template.TemplateSet({'compact': compact}, project_templates={'dinner': 'compact'})
+    content = daily_template.render_daily_tasks(STORIES, [], date(2026, 10, 20), template_set)
+    assert "* US-010\n" in content and "### dinner" not in content
+    assert "- [ ] デイリータスクの確認\n" in content
+    assert "週初め" not in content
+
+
+def test_carry_over_section():
+    carry_over = [{'text': 'US-003: 前日の続き'}, {'text': '請求書を送る'}]
+    plan = {'capacity': '6h', 'busy': '1h', 'planned': '5h', 'scheduled_count': 2, 'deferred_count': 0,
+            'deferred_time': '0m', 'blocks': [], 'deferred_items': []}
+    content = daily_template.render_daily_tasks(STORIES, ROUTINES, date(2026, 10, 20), plan=plan, carry_over=carry_over)
+    assert "## ⏩ 持ち越しタスク\n- [ ] US-003: 前日の続き\n- [ ] 請求書を送る\n" in content
+    assert content.index("⏱ 今日のキャパシティ") < content.index("⏩ 持ち越しタスク") < content.index("🎯 スプリントタスク")
+    assert "⏩ 持ち越しタスク" not in daily_template.render_daily_tasks(STORIES, ROUTINES, date(2026, 10, 20),
+                                                                 carry_over=[])
+
+
+def test_plan_section():
+    plan = {
+        'capacity': '6h', 'busy': '1h', 'planned': '5h30m', 'scheduled_count': 2,
+        'deferred_count': 2, 'deferred_time': '3h30m',
+        'blocks': [{'start': '09:00', 'end': '12:00', 'title': 'US-001: ログイン（一部）'}],
+        'deferred_items': [{'rank': 3, 'title': 'US-002: ログアウト', 'kind': 'story', 'time': '3h', 'reason': '時間不足'},
+                           {'rank': 4, 'title': '請求書を送る', 'kind': 'carry_over', 'time': '30m', 'reason': '時間不足'}]
+    }
+    content = daily_template.render_daily_tasks(STORIES, ROUTINES, date(2026, 10, 20), plan=plan)
+    assert "- 持ち越し: 2 件（3h30m）\n" in content
+    assert "### 時間割\n- 09:00-12:00 US-001: ログイン（一部）\n" in content
+    # 持ち越しタスクは翌日も持ち越せるようにチェックボックスで出力する
+    assert "### 計画に入らなかったタスク（優先順）\n- 3. US-002: ログアウト（3h、時間不足）\n" \
+           "- [ ] 4. 請求書を送る（30m、時間不足）\n" in content
+    assert "⏩ 持ち越しタスク" not in content
+    assert content.index("⏱ 今日のキャパシティ") < content.index("🎯 スプリントタスク")
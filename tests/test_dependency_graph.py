@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+ストーリーの依存関係グラフ（状態・ファイル単位のキー・差分更新・クリティカルパス）
+"""
+
+import dependency_graph
+from dependency_graph import BLOCKED, COMPLETED, CYCLE, READY
+
+
+def story(story_id, file_path='web/backlog.yaml', status='new', dependencies=None, estimate=1):
+    return {'type': 'story', 'id': story_id, 'file_path': file_path, 'status': status,
+            'dependencies': dependencies, 'estimate': estimate}
+
+
+def build(*stories):
+    graph = dependency_graph.DependencyGraph()
+    graph.update_from_items(list(stories))
+    return graph
+
+
+def states(graph):
+    return {story_id: state for (_, story_id), state in graph.classify().items()}
+
+
+def test_states():
+    graph = build(
+        story('US-001', status='completed'),
+        story('US-002', dependencies='US-001'),
+        story('US-003', dependencies='US-001, US-002'),
+        story('US-004', dependencies=['US-404']),
+        story('US-010', dependencies='US-011'),
+        story('US-011', dependencies='US-010'),
+        story('US-012', dependencies='US-011'),
+    )
+    assert states(graph) == {
+        'US-001': COMPLETED, 'US-002': READY, 'US-003': BLOCKED, 'US-004': READY,
+        'US-010': CYCLE, 'US-011': CYCLE, 'US-012': BLOCKED,
+    }
+    assert graph.blockers('US-003') == ['US-002']
+    assert graph.missing() == {'US-404': ['US-004']}
+    assert graph.topological_order()[:4] == ['US-001', 'US-002', 'US-004', 'US-003']
+    assert graph.state('US-999') is None
+
+
+def test_nodes_are_keyed_by_file():
+    # app の US-001 は未完了でも、web の US-002 は同じファイルの完了済み US-001 に依存する
+    graph = build(
+        story('US-001', 'web/backlog.yaml', status='completed'),
+        story('US-002', 'web/backlog.yaml', dependencies='US-001'),
+        story('US-001', 'app/backlog.yaml'),
+        story('US-003', 'misc/backlog.yaml', dependencies='US-001'),
+    )
+    assert graph.state('US-002', 'web/backlog.yaml') == READY
+    assert graph.state('US-001', 'app/backlog.yaml') == READY
+    # 他のファイルから参照された場合はすべての定義を依存先にする
+    assert graph.state('US-003', 'misc/backlog.yaml') == BLOCKED
+    assert graph.completed_ids() == set()
+
+    stories = [story('US-002', 'web/backlog.yaml'), story('US-003', 'misc/backlog.yaml'), {'id': 'US-900'}]
+    ready, excluded = dependency_graph.filter_ready_stories(stories, graph)
+    assert [item['id'] for item in ready] == ['US-002', 'US-900']
+    assert [item['id'] for item in excluded] == ['US-003']
+
+
+def test_incremental_updates():
+    web = [story('US-001', status='completed'), story('US-002', dependencies='US-001')]
+    app = [story('US-101', 'app/backlog.yaml', status='completed')]
+    graph = build(*web, *app)
+    assert graph.completed_ids() == {'US-001', 'US-101'}
+    analysis = graph.analyze()
+
+    assert graph.update_from_items(web + app) == 0
+    assert graph.analyze() is analysis
+
+    assert graph.update_from_items(web[:1] + [story('US-002', status='completed', dependencies='US-001')]) == 2
+    assert graph.completed_ids() == {'US-001', 'US-002'}
+    assert graph.edge_count() == 1
+
+
+def test_critical_path_follows_unfinished_estimates():
+    graph = build(
+        story('US-001', status='completed', estimate=10),
+        story('US-002', dependencies='US-001', estimate=3),
+        story('US-003', dependencies='US-002', estimate=2),
+        story('US-004', dependencies='US-001', estimate=4),
+        story('US-005', estimate='不明'),
+    )
+    assert graph.critical_path() == (5.0, ['US-002', 'US-003'])
+    assert build().critical_path() == (0.0, [])
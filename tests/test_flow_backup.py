@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Flow→Stock同期のコンテンツアドレス型バックアップストア（重複排除・保持ポリシー・復元）
+"""
+
+import os
+from datetime import datetime
+
+import flow_backup
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return str(path)
+
+
+def read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def backup_run(root, run_id, files):
+    """
+    files（ルートからの相対パス → 内容）を書き込み、1回分のバックアップを作成
+    """
+    archive_root = str(root / "archive")
+    run = flow_backup.start_run(str(root), archive_root, run_id)
+    for rel_path, content in files.items():
+        flow_backup.backup_file(run, write(root / rel_path, content))
+    return flow_backup.finish_run(run)
+
+
+def object_count(archive_root):
+    objects_dir, _ = flow_backup.get_store_paths(archive_root)
+    return sum(len(files) for _, _, files in os.walk(objects_dir))
+
+
+def test_same_content_is_stored_once(tmp_path):
+    archive_root = str(tmp_path / "archive")
+    first = write(tmp_path / "a.md", "# 同じ内容\n")
+    second = write(tmp_path / "b.md", "# 同じ内容\n")
+    sha256, method = flow_backup.store_object(archive_root, first)
+    assert method in ("reflink", "copy")
+    assert flow_backup.store_object(archive_root, second) == (sha256, "exists")
+    assert read(flow_backup.get_object_path(archive_root, sha256)) == "# 同じ内容\n"
+    assert object_count(archive_root) == 1
+
+
+def test_manifest_records_relative_paths(tmp_path):
+    archive_root = str(tmp_path / "archive")
+    run = flow_backup.start_run(str(tmp_path), archive_root, "20261019_090000")
+    assert flow_backup.finish_run(run) is None
+
+    path = write(tmp_path / "Stock" / "wbs.md", "# v1\n")
+    flow_backup.backup_file(run, path)
+    write(path, "# v2\n")
+    entry = flow_backup.backup_file(run, path)
+    assert flow_backup.backup_file(run, str(tmp_path / "missing.md")) is None
+
+    manifest_path = flow_backup.finish_run(run)
+    assert manifest_path == flow_backup.get_manifest_path(archive_root, "20261019_090000")
+    manifest = flow_backup.load_manifest(archive_root, "20261019_090000")
+    # 同じ実行で同じファイルを2回バックアップした場合は後のものだけを記録する
+    assert manifest['entries'] == [entry]
+    assert entry['path'] == os.path.join("Stock", "wbs.md")
+    assert flow_backup.new_run_id(archive_root, datetime(2026, 10, 19, 9, 0, 0)) == "20261019_090000_1"
+
+
+def test_prune_keeps_runs_by_count_or_age_and_removes_orphan_objects(tmp_path):
+    archive_root = str(tmp_path / "archive")
+    backup_run(tmp_path, "20261001_090000", {"wbs.md": "# 10/01\n", "charter.md": "# charter\n"})
+    backup_run(tmp_path, "20261010_090000", {"wbs.md": "# 10/10\n", "charter.md": "# charter\n"})
+    backup_run(tmp_path, "20261018_090000", {"wbs.md": "# 10/18\n"})
+    assert object_count(archive_root) == 4
+    now = datetime(2026, 10, 19, 12, 0, 0)
+
+    result = flow_backup.prune(archive_root, keep_last=1, keep_days=10, dry_run=True, now=now)
+    assert result['removed_runs'] == ["20261001_090000"]
+    assert result['removed_objects'] == 1
+    assert len(flow_backup.list_runs(archive_root)) == 3 and object_count(archive_root) == 4
+
+    result = flow_backup.prune(archive_root, keep_last=1, keep_days=10, now=now)
+    assert result == {'removed_runs': ["20261001_090000"], 'removed_objects': 1, 'freed_bytes': len("# 10/01\n")}
+    assert flow_backup.list_runs(archive_root) == ["20261010_090000", "20261018_090000"]
+
+    # 10/10 の実行だけが参照していた charter と wbs のオブジェクトも消える
+    assert flow_backup.prune(archive_root, keep_last=1, now=now)['removed_objects'] == 2
+    assert object_count(archive_root) == 1
+
+
+def test_restore_selected_paths_to_a_target_dir(tmp_path):
+    backup_run(tmp_path, "20261018_090000", {"Stock/wbs.md": "# 10/18\n"})
+    backup_run(tmp_path, "20261019_090000", {"Stock/wbs.md": "# 10/19\n", "Stock/charter.md": "# charter\n"})
+    archive_root = str(tmp_path / "archive")
+    write(tmp_path / "Stock" / "wbs.md", "# 壊れた内容\n")
+
+    restored = flow_backup.restore(archive_root, str(tmp_path), "20261018_090000")
+    assert restored == [str(tmp_path / "Stock" / "wbs.md")]
+    assert read(tmp_path / "Stock" / "wbs.md") == "# 10/18\n"
+
+    target_dir = str(tmp_path / "restored")
+    restored = flow_backup.restore(archive_root, str(tmp_path), paths=["Stock/charter.md"], target_dir=target_dir)
+    assert restored == [os.path.join(target_dir, "Stock", "charter.md")]
+    assert read(restored[0]) == "# charter\n"
+    assert flow_backup.restore(archive_root, str(tmp_path), "20200101_000000") is None
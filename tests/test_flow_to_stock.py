@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Flow→Stock同期（Flowの走査順と索引、同期計画と反映、全プロジェクトの並列同期）
+"""
+
+import os
+import threading
+
+import flow_backup
+import flow_to_stock
+
+DOCUMENTS = (
+    "project_charter.md", "stakeholder_register.md", "wbs.md", "risk_plan.md",
+    "lessons_learned.md", "product_backlog.md", "draft_release_roadmap.md"
+)
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return path
+
+
+def make_flow_day(root, base, day, project_dir="", label=None, stories=("US-001",)):
+    """
+    Flow/<base>/<day>/<project_dir>/ に同期対象の文書一式とバックログを作る
+    """
+    label = label or f"{base} {day}"
+    day_dir = os.path.join(str(root), "Flow", base, day, project_dir)
+    for name in DOCUMENTS:
+        write(os.path.join(day_dir, name), f"# {name} ({label})\n")
+    write(os.path.join(day_dir, "backlog", "epics.yaml"), f"# epics ({label})\n")
+    for story_id in stories:
+        write(os.path.join(day_dir, "backlog", "stories", f"{story_id}.md"), f"# {story_id} ({label})\n")
+    return day_dir
+
+
+def read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_date_dirs_follow_the_shell_sort_order(tmp_path):
+    for base, day in (("Private", "2026-10-19"), ("Private", "2026-10-18"), ("Public", "2026-10-17")):
+        os.makedirs(tmp_path / "Flow" / base / day)
+    os.makedirs(tmp_path / "Flow" / "Private" / "templates")
+    config = flow_to_stock.load_config(str(tmp_path))
+    # find ... | sort -r はフルパスの降順なので、Public の日付フォルダが先になる
+    assert [os.path.relpath(path, tmp_path / "Flow") for path in flow_to_stock.list_date_dirs(config)] == [
+        "Public/2026-10-17", "Private/2026-10-19", "Private/2026-10-18"
+    ]
+
+
+def test_flow_index_takes_the_newest_file_per_pattern(tmp_path):
+    make_flow_day(tmp_path, "Private", "2026-10-18")
+    newest = os.path.join(str(tmp_path), "Flow", "Private", "2026-10-19")
+    write(os.path.join(newest, "notes", "wbs_v2.md"), "# wbs\n")
+    write(os.path.join(newest, "meeting_20261019.md"), "# meeting\n")
+    config = flow_to_stock.load_config(str(tmp_path))
+
+    patterns = [pattern for pattern, _ in flow_to_stock.get_sync_list(config)] + [flow_to_stock.MEETING_PATTERN]
+    index = flow_to_stock.build_flow_index(config, patterns)
+    assert index['files']['*wbs*.md'] == os.path.join(newest, "notes", "wbs_v2.md")
+    assert index['files']['project_charter*.md'].endswith(os.path.join("2026-10-18", "project_charter.md"))
+    assert index['files'][flow_to_stock.MEETING_PATTERN] == os.path.join(newest, "meeting_20261019.md")
+    assert index['backlog_dir'].endswith(os.path.join("2026-10-18", "backlog"))
+
+
+def test_flow_index_stops_once_everything_is_found(tmp_path):
+    for day in ("2026-10-17", "2026-10-18", "2026-10-19"):
+        make_flow_day(tmp_path, "Private", day)
+    config = flow_to_stock.load_config(str(tmp_path))
+    patterns = [pattern for pattern, _ in flow_to_stock.get_sync_list(config)]
+    assert flow_to_stock.build_flow_index(config, patterns)['scanned_dirs'] == 1
+
+
+def test_sync_copies_latest_documents_and_backlog(tmp_path):
+    make_flow_day(tmp_path, "Private", "2026-10-18", stories=("US-001", "US-002"))
+    make_flow_day(tmp_path, "Private", "2026-10-19", stories=("US-001",))
+
+    assert flow_to_stock.main(['--root', str(tmp_path)]) == 0
+    docs = tmp_path / "Stock" / "projects" / "dinner" / "documents"
+    assert read(docs / "1_initiating" / "project_charter.md") == "# project_charter.md (Private 2026-10-19)\n"
+    assert read(docs / "3_planning" / "release_roadmap.md") == "# draft_release_roadmap.md (Private 2026-10-19)\n"
+    assert read(tmp_path / "Stock" / "Agile" / "product_backlog.md") == "# product_backlog.md (Private 2026-10-19)\n"
+    assert sorted(os.listdir(docs / "3_planning" / "backlog" / "stories")) == ["US-001.md"]
+
+    # 2回目は変更が無いのでバックアップも作らない
+    assert flow_to_stock.main(['--root', str(tmp_path)]) == 0
+    assert not os.path.isdir(tmp_path / "archive" / "manifests")
+
+
+def test_missing_documents_are_errors_for_a_single_project(tmp_path):
+    write(os.path.join(str(tmp_path), "Flow", "Private", "2026-10-19", "project_charter.md"), "# charter\n")
+    assert flow_to_stock.main(['--root', str(tmp_path)]) == 1
+    assert read(tmp_path / "Stock/projects/dinner/documents/1_initiating/project_charter.md") == "# charter\n"
+
+
+def stock_docs(root):
+    return root / "Stock" / "projects" / "dinner" / "documents"
+
+
+def test_dry_run_prints_the_plan_without_touching_stock(tmp_path, capsys):
+    make_flow_day(tmp_path, "Private", "2026-10-19")
+    assert flow_to_stock.main(['--root', str(tmp_path), '--dry-run']) == 0
+    assert not os.path.exists(tmp_path / "Stock")
+    assert not os.path.exists(tmp_path / ".aipm" / "flow_to_stock")
+    assert "[コピー]" in capsys.readouterr().out
+
+
+def test_saved_plan_is_applied_and_refused_after_flow_changes(tmp_path):
+    day_dir = make_flow_day(tmp_path, "Private", "2026-10-19")
+    plan_path = str(tmp_path / "plan.json")
+    assert flow_to_stock.main(['--root', str(tmp_path), '--dry-run', '--plan-output', plan_path]) == 0
+    plan = flow_to_stock.load_plan(plan_path)
+    assert {operation['action'] for operation in plan['operations']} == {'copy'}
+
+    # 計画作成後にFlowが変わった場合は、Stockを変更せずに失敗する
+    write(os.path.join(day_dir, "wbs.md"), "# wbs（計画後に編集）\n")
+    assert flow_to_stock.main(['--root', str(tmp_path), '--apply-plan', plan_path]) == 1
+    assert not os.path.exists(stock_docs(tmp_path) / "1_initiating" / "project_charter.md")
+
+    assert flow_to_stock.main(['--root', str(tmp_path), '--dry-run', '--plan-output', plan_path]) == 0
+    assert flow_to_stock.main(['--root', str(tmp_path), '--apply-plan', plan_path]) == 0
+    assert read(stock_docs(tmp_path) / "3_planning" / "wbs.md") == "# wbs（計画後に編集）\n"
+    # 反映済みの計画をもう一度実行しても何も変わらない
+    assert flow_to_stock.main(['--root', str(tmp_path), '--apply-plan', plan_path]) == 0
+
+
+def test_overwrite_is_backed_up_and_orphans_are_deleted_on_request(tmp_path):
+    make_flow_day(tmp_path, "Private", "2026-10-18", stories=("US-001", "US-002"))
+    assert flow_to_stock.main(['--root', str(tmp_path)]) == 0
+    make_flow_day(tmp_path, "Private", "2026-10-19", stories=("US-001",))
+
+    assert flow_to_stock.main(['--root', str(tmp_path), '--delete-orphans']) == 0
+    stories_dir = stock_docs(tmp_path) / "3_planning" / "backlog" / "stories"
+    assert sorted(os.listdir(stories_dir)) == ["US-001.md"]
+    (run_id,) = flow_backup.list_runs(str(tmp_path / "archive"))
+    manifest = flow_backup.load_manifest(str(tmp_path / "archive"), run_id)
+    backed_up = {os.path.basename(entry['path']) for entry in manifest['entries']}
+    # 上書きした文書と削除したストーリーはバックアップし、epics.yaml と更新したストーリーはしない
+    assert {"project_charter.md", "US-002.md"} <= backed_up
+    assert not {"epics.yaml", "US-001.md"} & backed_up
+
+
+def test_interrupted_commit_is_rolled_forward(tmp_path):
+    make_flow_day(tmp_path, "Private", "2026-10-19")
+    config = flow_to_stock.load_config(str(tmp_path))
+    state_dir = flow_to_stock.get_state_dir(config)
+    staging_dir = os.path.join(state_dir, "staging_interrupted")
+    destination = str(stock_docs(tmp_path) / "1_initiating" / "project_charter.md")
+    moved = str(stock_docs(tmp_path) / "1_initiating" / "already_moved.md")
+    write(os.path.join(staging_dir, "0"), "# staged\n")
+    write(moved, "# moved before the crash\n")
+    write(os.path.join(state_dir, "staging_abandoned", "0"), "# copy interrupted\n")
+    flow_to_stock._write_journal(os.path.join(state_dir, "journal.json"), {
+        'staging_dir': staging_dir,
+        'moves': [[os.path.join(staging_dir, "0"), destination], [os.path.join(staging_dir, "1"), moved]],
+        'deletes': []
+    })
+
+    flow_to_stock.recover_interrupted_sync(config)
+    assert read(destination) == "# staged\n"
+    assert read(moved) == "# moved before the crash\n"
+    assert os.listdir(state_dir) == []
+
+
+def test_all_projects_routes_flow_files_by_project_directory(tmp_path):
+    for project_dir in ("projects/web", "programs/P01/projects/app", "programs/P02/projects/app"):
+        os.makedirs(tmp_path / "Stock" / project_dir / "documents")
+    make_flow_day(tmp_path, "Private", "2026-10-19", "web", label="web")
+    make_flow_day(tmp_path, "Private", "2026-10-19", os.path.join("P02", "app"), label="P02 app")
+    write(os.path.join(str(tmp_path), "Flow", "Private", "2026-10-19", "misc", "wbs.md"), "# 振り分けられない\n")
+
+    config = flow_to_stock.load_config(str(tmp_path))
+    projects = flow_to_stock.discover_projects(config['stock_root'])
+    assert [project['key'] for project in projects] == ["web", "P01/app", "P02/app"]
+    patterns = [pattern for pattern, _ in flow_to_stock.get_sync_list(config)]
+    indexes, stats = flow_to_stock.build_project_index(config, patterns, projects)
+    assert indexes["P01/app"] == {'files': {}, 'backlog_dir': None}
+    assert stats['unrouted_files'] == 1
+
+    assert flow_to_stock.main(['--root', str(tmp_path), '--all-projects', '--project-jobs', '3']) == 0
+    app_docs = tmp_path / "Stock" / "programs" / "P02" / "projects" / "app" / "documents"
+    assert read(app_docs / "3_planning" / "wbs.md") == "# wbs.md (P02 app)\n"
+    assert read(app_docs / "Agile" / "product_backlog.md") == "# product_backlog.md (P02 app)\n"
+    assert read(tmp_path / "Stock/projects/web/documents/1_initiating/project_charter.md") \
+        == "# project_charter.md (web)\n"
+    assert not os.path.exists(tmp_path / "Stock" / "programs" / "P01" / "projects" / "app" / "documents" / "3_planning")
+
+
+def test_log_lines_from_threads_do_not_interleave(tmp_path, capsys):
+    config = flow_to_stock.load_config(str(tmp_path))
+    config['log_file'] = str(tmp_path / "sync.log")
+    lines_per_thread = 200
+
+    def worker(n):
+        for i in range(lines_per_thread):
+            flow_to_stock.log(dict(config, log_prefix=f"[project{n}] "), f"line {i} " + "x" * 200)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stdout_lines = capsys.readouterr().out.splitlines()
+    with open(config['log_file'], 'r', encoding='utf-8') as f:
+        file_lines = f.read().splitlines()
+    for lines in (stdout_lines, file_lines):
+        assert len(lines) == 8 * lines_per_thread
+        assert all(line.count("[project") == 1 and line.endswith("x" * 200) for line in lines)
+    # ロックの中で両方に書くので、標準出力とログファイルの行の順序も一致する
+    assert stdout_lines == file_lines
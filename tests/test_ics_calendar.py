@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+ics_calendar の RRULE 展開と ICS ファイルの読み込み（IcsSource を含む）
+"""
+
+from datetime import date, datetime
+
+import calendar_sources
+import ics_calendar
+
+
+def expand(rule, start, window_start, window_end, zone=None):
+    """
+    期間内に始まる回だけを返す（expand_rrule は期間の前後に余裕を持たせて返すため）
+    """
+    moments = ics_calendar.expand_rrule(start, zone, ics_calendar.parse_rrule(rule), window_start, window_end)
+    return [moment for moment in moments
+            if window_start <= (moment if isinstance(moment, datetime) else datetime.combine(moment, datetime.min.time()))
+            < window_end]
+
+
+def test_monthly_nth_weekday():
+    assert expand('FREQ=MONTHLY;BYDAY=3WE', datetime(2026, 1, 13, 15), datetime(2026, 1, 1), datetime(2026, 5, 1)) == [
+        datetime(2026, 1, 21, 15), datetime(2026, 2, 18, 15), datetime(2026, 3, 18, 15), datetime(2026, 4, 15, 15)
+    ]
+
+
+def test_monthly_last_weekday_with_bysetpos():
+    rule = 'FREQ=MONTHLY;BYDAY=MO,TU,WE,TH,FR;BYSETPOS=-1'
+    assert expand(rule, date(2025, 1, 31), datetime(2026, 5, 1), datetime(2026, 7, 1)) == [
+        date(2026, 5, 29), date(2026, 6, 30)
+    ]
+
+
+def test_monthly_skips_months_without_the_day():
+    assert expand('FREQ=MONTHLY', datetime(2026, 1, 31, 9), datetime(2026, 1, 1), datetime(2026, 6, 1)) == [
+        datetime(2026, 1, 31, 9), datetime(2026, 3, 31, 9), datetime(2026, 5, 31, 9)
+    ]
+
+
+def test_count_limits_occurrences():
+    assert expand('FREQ=DAILY;COUNT=3', datetime(2026, 10, 15, 13), datetime(2026, 1, 1), datetime(2027, 1, 1)) == [
+        datetime(2026, 10, 15, 13), datetime(2026, 10, 16, 13), datetime(2026, 10, 17, 13)
+    ]
+
+
+def test_until_in_utc_with_event_zone():
+    zone = ics_calendar._zone('America/New_York')
+    rule = 'FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH;UNTIL=20260125T000000Z'
+    assert expand(rule, datetime(2026, 1, 5, 10), datetime(2026, 1, 1), datetime(2026, 3, 1), zone) == [
+        datetime(2026, 1, 5, 10), datetime(2026, 1, 8, 10), datetime(2026, 1, 19, 10), datetime(2026, 1, 22, 10)
+    ]
+
+
+def test_long_running_rule_jumps_to_window():
+    assert expand('FREQ=YEARLY', date(1990, 3, 21), datetime(2026, 1, 1), datetime(2027, 1, 1)) == [date(2026, 3, 21)]
+
+
+def test_read_events_applies_exdate_and_overrides(recurring_ics):
+    events = ics_calendar.read_events(recurring_ics, start_date=date(2026, 10, 19), days=5)
+    morning = [(event['id'], event['title'], event['startTime']) for event in events if event['id'].startswith('daily_')]
+    # 10/20 は EXDATE、10/21 は時間変更、10/22 はキャンセル
+    assert morning == [
+        ('daily_20261019T000000Z', '朝会', '2026-10-19T09:00:00+09:00'),
+        ('daily_20261021T000000Z', '朝会（時間変更）', '2026-10-21T09:30:00+09:00'),
+        ('daily_20261023T000000Z', '朝会', '2026-10-23T09:00:00+09:00'),
+    ]
+
+
+def test_read_events_count_and_single_events(recurring_ics):
+    events = ics_calendar.read_events(recurring_ics, start_date=date(2026, 10, 19), days=7)
+    titles = [event['title'] for event in events]
+    assert titles.count('6回だけ') == 2  # 10/15 から6回なので 10/19, 10/20 まで
+    assert [event['startTime'] for event in events if event['id'] == 'single'] == ['2026-10-19T11:00:00+09:00']
+    assert [event['startTime'] for event in events] == sorted(event['startTime'] for event in events)
+
+
+def test_read_events_follows_event_zone_across_dst(recurring_ics):
+    events = ics_calendar.read_events(recurring_ics, start_date=date(2026, 10, 26), days=16)
+    # ニューヨークの10時は夏時間の終了（11/1）後に日本時間で1時間遅くなる
+    assert [event['startTime'] for event in events if event['title'] == 'NY定例'] == [
+        '2026-10-26T23:00:00+09:00', '2026-10-29T23:00:00+09:00', '2026-11-10T00:00:00+09:00'
+    ]
+
+
+def test_ics_source_reads_fixture(recurring_ics):
+    events = calendar_sources.IcsSource(recurring_ics).fetch(date(2026, 10, 19), 1)
+    assert [event['title'] for event in events] == ['朝会', '単発', '6回だけ']
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite アイテムストアの同期と検索
+"""
+
+import os
+
+import item_store
+
+BACKLOG = """\
+sprints:
+  - sprint_id: S1
+    name: スプリント1
+    start_date: 2026-10-12
+    end_date: 2026-10-25
+epics:
+  - epic_id: EP-001
+    title: 認証
+    stories:
+      - story_id: US-001
+        title: ログイン
+        status: in_progress
+        sprint_id: S1
+        assignee: 宮田
+      - story_id: US-002
+        title: ログアウト
+        sprint: S1
+        assignee: "Miyata, 山田"
+      - story_id: US-003
+        title: パスワード再設定
+        status: completed
+        sprint_id: S2
+        assignee: 宮田太郎
+"""
+
+
+def write_backlog(root, project, content=BACKLOG):
+    project_dir = root / "Stock" / "programs" / "P01" / "projects" / project / "documents"
+    project_dir.mkdir(parents=True, exist_ok=True)
+    path = project_dir / "backlog.yaml"
+    path.write_text(content, encoding='utf-8')
+    return path
+
+
+def open_synced(root):
+    conn = item_store.open_store(str(root / ".aipm" / "items.sqlite3"))
+    item_store.sync_store(conn, str(root))
+    return conn
+
+
+def ids(stories):
+    return [story['id'] for story in stories]
+
+
+def test_query_by_sprint_and_status(tmp_path):
+    write_backlog(tmp_path, "web")
+    conn = open_synced(tmp_path)
+    # sprint_id が無いストーリーは sprint で照合する
+    assert ids(item_store.query_stories(conn, sprint_ids=['S1'])) == ['US-001', 'US-002']
+    assert ids(item_store.query_stories(conn, statuses=['in_progress'])) == ['US-001']
+    # status が無いストーリーは除外するステータスの指定で落ちない
+    assert ids(item_store.query_stories(conn, exclude_statuses=['completed'])) == ['US-001', 'US-002']
+    assert item_store.load_sprints(conn)[0]['start_date'] == '2026-10-12'
+
+
+def test_assignee_is_matched_by_normalized_name(tmp_path):
+    write_backlog(tmp_path, "web")
+    conn = open_synced(tmp_path)
+    assert ids(item_store.query_stories(conn, assignee='宮田')) == ['US-001']
+    assert ids(item_store.query_stories(conn, assignee=' miyata ')) == ['US-002']
+    assert ids(item_store.query_stories(conn, assignee='山田', sprint_ids=['S1'])) == ['US-002']
+    assert item_store.query_stories(conn, assignee='田') == []
+    assert item_store.assignee_names(['A', ' a ', None, 'B 太郎']) == ['a', 'b 太郎']
+
+    plan = " ".join(str(row[-1]) for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT stories.* FROM stories JOIN story_assignees"
+        " ON story_assignees.file_path = stories.file_path AND story_assignees.position = stories.position"
+        " WHERE story_assignees.name = ?", ('宮田',)))
+    assert 'idx_story_assignees_name' in plan
+
+
+def test_sync_reextracts_only_changed_files(tmp_path):
+    web = write_backlog(tmp_path, "web")
+    write_backlog(tmp_path, "app")
+    conn = open_synced(tmp_path)
+    assert len(item_store.query_stories(conn)) == 6
+
+    stats = item_store.sync_store(conn, str(tmp_path))
+    assert (stats['updated'], stats['unchanged']) == (0, 2)
+
+    web.write_text(BACKLOG.replace("宮田太郎", "佐藤"), encoding='utf-8')
+    os.utime(web, ns=(1, 1))
+    stats = item_store.sync_store(conn, str(tmp_path))
+    assert (stats['updated'], stats['unchanged']) == (1, 1)
+    assert len(item_store.query_stories(conn, assignee='佐藤')) == 1
+
+    web.unlink()
+    assert item_store.sync_store(conn, str(tmp_path))['removed'] == 1
+    assert item_store.query_stories(conn, assignee='佐藤') == []
+    assert conn.execute("SELECT COUNT(*) FROM story_assignees").fetchone()[0] == 4
+
+
+def test_broken_backlog_is_skipped(tmp_path):
+    write_backlog(tmp_path, "web")
+    write_backlog(tmp_path, "broken", "epics: [\n")
+    conn = open_synced(tmp_path)
+    assert len(item_store.query_stories(conn)) == 3
+
+
+def test_old_schema_is_rebuilt(tmp_path):
+    write_backlog(tmp_path, "web")
+    conn = open_synced(tmp_path)
+    conn.execute("DELETE FROM story_assignees")
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+
+    conn = open_synced(tmp_path)
+    assert ids(item_store.query_stories(conn, assignee='宮田')) == ['US-001']
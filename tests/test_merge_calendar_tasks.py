@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+日次タスクの「今日の予定」への差分マージ（予定は FakeSource から取得）
+"""
+
+import os
+from argparse import Namespace
+from datetime import date
+
+import pytest
+
+import calendar_sources
+import merge_calendar_tasks
+
+DAY = date(2026, 10, 19)
+
+EVENTS = [
+    {'id': 'standup', 'title': '朝会', 'startTime': '2026-10-19T09:00:00+09:00', 'endTime': '2026-10-19T09:15:00+09:00'},
+    {'id': 'review', 'title': 'レビュー', 'startTime': '2026-10-19T14:00:00+09:00', 'endTime': '2026-10-19T15:00:00+09:00'},
+    {'id': 'tomorrow', 'title': '明日の予定', 'startTime': '2026-10-20T10:00:00+09:00', 'endTime': '2026-10-20T11:00:00+09:00'},
+]
+
+DAILY_TASKS = """# 2026-10-19 のタスク
+
+## 📋 今日の予定
+- [ ] カレンダー予定はありません
+
+## 🎯 スプリントストーリー
+- [ ] US-001: ログイン画面
+"""
+
+
+def schedule_lines(content):
+    section = merge_calendar_tasks.SCHEDULE_SECTION_RE.search(content).group(0)
+    return [line for line in section.split("\n")[1:] if line.strip()]
+
+
+def test_calendar_event_lines_and_diff():
+    lines = merge_calendar_tasks.calendar_event_lines(EVENTS[:2], DAY)
+    assert lines == [('standup', '09:00-09:15: 朝会'), ('review', '14:00-15:00: レビュー')]
+    current = [('standup', '09:00-09:30: 朝会'), ('lunch', '12:00-13:00: ランチ')]
+    assert merge_calendar_tasks.diff_calendar_events(lines, current) == {
+        'added': ['lunch'], 'changed': ['standup'], 'removed': ['review']
+    }
+    assert merge_calendar_tasks.diff_calendar_events(None, current)['added'] == ['standup', 'lunch']
+
+
+def test_event_keys_distinguish_duplicates_and_unsafe_ids():
+    shared = {'id': 'same', 'title': '定例', 'startTime': '2026-10-19T10:00:00+09:00', 'calendarId': 'team'}
+    seen = set()
+    assert merge_calendar_tasks.event_key(shared, seen) == 'same'
+    assert merge_calendar_tasks.event_key(dict(shared, calendarId='team b'), seen) == 'same@team_b'
+    # 行に書けない id はタイトルと時刻のハッシュにする
+    event = {'title': '定例', 'startTime': '2026-10-19T10:00:00+09:00'}
+    unsafe = merge_calendar_tasks.event_key(dict(event, id='a b'))
+    assert unsafe.startswith('h') and unsafe == merge_calendar_tasks.event_key(event)
+
+
+def test_first_merge_replaces_placeholder():
+    lines = merge_calendar_tasks.calendar_event_lines(EVENTS[:2], DAY)
+    content, diff = merge_calendar_tasks.merge_calendar_to_tasks(DAILY_TASKS, lines)
+    assert schedule_lines(content) == [
+        '- [ ] 09:00-09:15: 朝会 <!-- cal:standup -->',
+        '- [ ] 14:00-15:00: レビュー <!-- cal:review -->',
+    ]
+    assert diff['added'] == ['standup', 'review']
+    assert "- [ ] US-001: ログイン画面" in content
+
+
+def test_merge_keeps_checks_and_user_edits():
+    previous = [('standup', '09:00-09:15: 朝会'), ('review', '14:00-15:00: レビュー'), ('deleted', '16:00-17:00: 消した予定')]
+    content = DAILY_TASKS.replace("- [ ] カレンダー予定はありません", "\n".join([
+        '- [x] 09:00-09:15: 朝会 <!-- cal:standup -->',
+        '- [ ] 14:00-15:00: レビュー <!-- cal:review -->',
+        '- [ ] 手で追加したメモ',
+    ]))
+    current = [('standup', '09:30-09:45: 朝会'), ('lunch', '12:00-13:00: ランチ'), ('deleted', '16:00-17:00: 消した予定')]
+
+    merged, diff = merge_calendar_tasks.merge_calendar_to_tasks(content, current, previous)
+    # 変更はチェック状態を残して置き換え、削除された予定は取り除き、ユーザーが消した予定は追加し直さない
+    assert schedule_lines(merged) == [
+        '- [x] 09:30-09:45: 朝会 <!-- cal:standup -->',
+        '- [ ] 12:00-13:00: ランチ <!-- cal:lunch -->',
+        '- [ ] 手で追加したメモ',
+    ]
+    assert diff == {'added': ['lunch'], 'changed': ['standup'], 'removed': ['review']}
+
+
+def test_merge_without_schedule_section_returns_content():
+    content = "# 2026-10-19 のタスク\n"
+    assert merge_calendar_tasks.merge_calendar_to_tasks(content, [('a', '終日: 休暇')])[0] == content
+
+
+@pytest.fixture
+def aipm_root(tmp_path, monkeypatch):
+    flow_dir = tmp_path / "Flow" / "202610" / "2026-10-19"
+    flow_dir.mkdir(parents=True)
+    (flow_dir / "daily_tasks.md").write_text(DAILY_TASKS, encoding='utf-8')
+    source = calendar_sources.FakeSource(list(EVENTS))
+    monkeypatch.setattr(calendar_sources, 'create_source_from_args', lambda root_dir, args: source)
+    return tmp_path, source
+
+
+def merge_args(root, **overrides):
+    values = {'root': str(root), 'date': '2026-10-19', 'output': None, 'refresh': True,
+              'prefetch_max_age': None, 'source': 'fake', 'ics': None}
+    values.update(overrides)
+    return Namespace(**values)
+
+
+def test_merge_command_updates_only_changed_lines(aipm_root):
+    root, source = aipm_root
+    daily_tasks_file = root / "Flow" / "202610" / "2026-10-19" / "daily_tasks.md"
+
+    assert merge_calendar_tasks.merge(merge_args(root)) == 0
+    assert source.calls == [(DAY, 1)]
+    assert (root / ".aipm" / "calendar_merge" / "2026-10-19.json").exists()
+
+    # チェックを付けた後に予定が変わっても、チェック状態は残る
+    daily_tasks_file.write_text(daily_tasks_file.read_text(encoding='utf-8').replace(
+        '- [ ] 09:00-09:15: 朝会', '- [x] 09:00-09:15: 朝会'), encoding='utf-8')
+    source.events[1] = dict(source.events[1], endTime='2026-10-19T15:30:00+09:00')
+    assert merge_calendar_tasks.merge(merge_args(root)) == 0
+    assert schedule_lines(daily_tasks_file.read_text(encoding='utf-8')) == [
+        '- [x] 09:00-09:15: 朝会 <!-- cal:standup -->',
+        '- [ ] 14:00-15:30: レビュー <!-- cal:review -->',
+    ]
+
+    # 予定も日次タスクも変わっていなければ書き込まない
+    stat = os.stat(daily_tasks_file)
+    assert merge_calendar_tasks.merge(merge_args(root)) == 0
+    assert os.stat(daily_tasks_file).st_mtime_ns == stat.st_mtime_ns
+
+
+def test_merge_command_uses_date_and_output(aipm_root, tmp_path):
+    root, source = aipm_root
+    output = tmp_path / "other.md"
+    output.write_text(DAILY_TASKS, encoding='utf-8')
+
+    assert merge_calendar_tasks.merge(merge_args(root, date='2026-10-20', output=str(output))) == 0
+    assert source.calls == [(date(2026, 10, 20), 1)]
+    assert schedule_lines(output.read_text(encoding='utf-8')) == ['- [ ] 10:00-11:00: 明日の予定 <!-- cal:tomorrow -->']
+    assert (root / "Flow" / "202610" / "2026-10-19" / "daily_tasks.md").read_text(encoding='utf-8') == DAILY_TASKS
+
+
+def test_merge_command_fails_without_events(aipm_root):
+    root, source = aipm_root
+    source.fail = True
+    assert merge_calendar_tasks.merge(merge_args(root)) == 1
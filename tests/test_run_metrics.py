@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+定期実行のメトリクス出力（出力先とPrometheus/JSON形式）
+"""
+
+import json
+import os
+
+import run_metrics
+
+
+def test_default_path_is_per_job_and_user(tmp_path, monkeypatch):
+    monkeypatch.delenv(run_metrics.METRICS_DIR_ENV, raising=False)
+    monkeypatch.setenv("AIPM_METRICS_USER", "miyata")
+    assert run_metrics.get_metrics_path("flow_to_stock") is None
+    assert run_metrics.get_metrics_path("flow_to_stock", "custom.json") == "custom.json"
+
+    monkeypatch.setenv(run_metrics.METRICS_DIR_ENV, str(tmp_path))
+    assert run_metrics.get_metrics_path("flow_to_stock") == str(tmp_path / "aipm_flow_to_stock_miyata.prom")
+    assert run_metrics.get_metrics_path("flow_to_stock", user="DOMAIN\\y tanaka") \
+        == str(tmp_path / "aipm_flow_to_stock_DOMAIN_y_tanaka.prom")
+
+
+def test_users_sharing_a_directory_do_not_overwrite_each_other(tmp_path, monkeypatch):
+    monkeypatch.setenv(run_metrics.METRICS_DIR_ENV, str(tmp_path))
+    for user in ("miyata", "tanaka"):
+        monkeypatch.setenv("AIPM_METRICS_USER", user)
+        assert run_metrics.main(['--job', 'flow_to_stock_sh', '--duration', '1.5', '--exit-code', '0',
+                                 '--value', 'errors=0']) == 0
+
+    assert sorted(os.listdir(tmp_path)) == ["aipm_flow_to_stock_sh_miyata.prom", "aipm_flow_to_stock_sh_tanaka.prom"]
+    text = (tmp_path / "aipm_flow_to_stock_sh_tanaka.prom").read_text(encoding='utf-8')
+    assert 'aipm_run_duration_seconds{job="flow_to_stock_sh",user="tanaka"} 1.5' in text
+    assert 'aipm_run_success{job="flow_to_stock_sh",user="tanaka"} 1' in text
+    assert 'aipm_errors{job="flow_to_stock_sh",user="tanaka"} 0' in text
+
+
+def test_phases_and_json_output(tmp_path):
+    timings = {'total_seconds': 2.0, 'phases': [{'name': 'plan', 'seconds': 0.5, 'depth': 0, 'calls': 1,
+                                                 'cache-hits': 3}]}
+    path = run_metrics.export("daily", str(tmp_path / "daily.json"), timings=timings, values={'errors': 2},
+                              user="miyata", finished_at=100)
+    metrics = {(metric['name'], metric['labels'].get('phase')): metric for metric in
+               json.loads((tmp_path / "daily.json").read_text(encoding='utf-8'))['metrics']}
+    assert path == str(tmp_path / "daily.json")
+    assert metrics[('aipm_run_duration_seconds', None)]['value'] == 2.0
+    assert metrics[('aipm_run_success', None)]['value'] == 0
+    assert metrics[('aipm_phase_cache_hits', 'plan')]['labels'] == {'job': 'daily', 'user': 'miyata', 'phase': 'plan'}
+    assert ('aipm_phase_depth', 'plan') not in metrics
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+日次タスクのキャパシティ計画（優先順位・依存関係・持ち越しの扱い）
+"""
+
+from datetime import date
+
+import carry_over
+import daily_template
+import scheduler
+
+
+def settings(**overrides):
+    return dict(scheduler.DEFAULT_SETTINGS, enabled=True, **overrides)
+
+
+def story(story_id, estimate, priority='medium', **fields):
+    return dict({'type': 'story', 'id': story_id, 'title': f"{story_id} のタイトル", 'priority': priority,
+                 'estimate': estimate, 'file_path': 'web/backlog.yaml'}, **fields)
+
+
+def routine(title, estimate, priority='medium'):
+    return {'type': 'routine_task', 'title': title, 'priority': priority, 'estimate': estimate,
+            'routine': {'frequency': 'daily'}}
+
+
+def outline(entries):
+    return [(entry['rank'], entry['kind'], entry['item'].get('id') or entry['item'].get('title')
+             or entry['item'].get('text'), entry['minutes'], entry['reason']) for entry in entries]
+
+
+def test_priority_order_and_capacity():
+    plan = scheduler.build_plan(
+        [story('US-001', 2, 'low'), story('US-002', 3, 'high'), story('US-003', 1, 'medium', status='in_progress'),
+         story('US-004', 1, 'medium')],
+        [routine('日報', 15, 'medium')],
+        capacity=300, settings=settings(), carried_tasks=[{'text': '請求書を送る', 'priority': 'medium'}])
+    # priority → ルーチン → 持ち越し・進行中 → 元の順序
+    assert outline(plan['scheduled']) == [
+        (1, 'story', 'US-002', 180.0, None),
+        (2, 'routine', '日報', 15.0, None),
+        (3, 'carry_over', '請求書を送る', 30.0, None),
+        (4, 'story', 'US-003', 60.0, None),
+    ]
+    assert outline(plan['deferred']) == [
+        (5, 'story', 'US-004', 60.0, 'capacity'),
+        (6, 'story', 'US-001', 120.0, 'capacity'),
+    ]
+    assert plan['planned_minutes'] == 285.0
+
+
+def test_large_story_is_partially_planned_and_blocks_dependents():
+    plan = scheduler.build_plan(
+        [story('US-001', 8, 'high'), story('US-002', 1, 'high', dependencies='US-001'), story('US-003', 1, 'low')],
+        [], capacity=360, settings=settings())
+    assert outline(plan['scheduled']) == [(1, 'story', 'US-001', 360.0, 'partial')]
+    assert plan['scheduled'][0]['total_minutes'] == 480.0
+    assert outline(plan['deferred']) == [
+        (2, 'story', 'US-002', 60.0, 'dependency'),
+        (3, 'story', 'US-003', 60.0, 'capacity'),
+    ]
+
+
+def test_dependencies_reorder_and_cycles_are_deferred():
+    plan = scheduler.build_plan(
+        [story('US-001', 1, 'high', dependencies=['US-002']), story('US-002', 1, 'low'),
+         story('US-010', 1, 'high', dependencies='US-011'), story('US-011', 1, 'high', dependencies='US-010')],
+        [], capacity=600, settings=settings())
+    assert [entry['item']['id'] for entry in plan['scheduled']] == ['US-002', 'US-001']
+    assert [(entry['item']['id'], entry['reason']) for entry in plan['deferred']] == [
+        ('US-010', 'cycle'), ('US-011', 'cycle')]
+
+
+def test_capacity_is_limited_by_calendar_events():
+    events = [{'title': '定例', 'startTime': '2026-10-20T10:00:00+09:00', 'endTime': '2026-10-20T12:00:00+09:00'}]
+    capacity, busy, slots = scheduler.compute_capacity(settings(capacity_hours=8), date(2026, 10, 20), events)
+    assert (capacity, busy) == (420.0, 120.0)
+    assert len(slots) == 2
+
+
+def test_deferred_carried_tasks_leave_the_carry_over_section(tmp_path):
+    # 持ち越しタスクは見積もりが無ければ30分、priority が無ければ最後になる
+    carried = [{'kind': 'task', 'id': None, 'text': '請求書を送る'},
+               {'kind': 'story', 'id': 'US-009', 'text': 'US-009: 前日の続き（第2版）', 'priority': 'low', 'estimate': 1}]
+    stories, routines, kept, plan = scheduler.schedule_items(
+        [story('US-001', 5, 'high')], [], date(2026, 10, 20), settings(capacity_hours=5.5), None, carried)
+    assert [item['id'] for item in stories] == ['US-001']
+    assert kept == [carried[0]]
+    assert [(item['title'], item['reason']) for item in plan['deferred_items']] == [
+        ('US-009: 前日の続き（第2版）', '時間不足')]
+
+    content = daily_template.render_daily_tasks(stories, routines, date(2026, 10, 20), plan=plan, carry_over=kept)
+    assert "## ⏩ 持ち越しタスク\n- [ ] 請求書を送る\n\n" in content
+    assert "### 計画に入らなかったタスク（優先順）\n- [ ] 3. US-009: 前日の続き（第2版）（1時間、時間不足）\n" in content
+
+    # 計画にだけ載った持ち越しタスクも、翌日の持ち越しの対象に残る
+    day_file = tmp_path / "daily_tasks.md"
+    day_file.write_text(content, encoding='utf-8')
+    items = carry_over.collect_carry_over([(date(2026, 10, 20), str(day_file))], exclude_ids=['US-001'])
+    assert [(item['kind'], item['id'], item['text']) for item in items] == [
+        ('story', 'US-009', 'US-009: 前日の続き（第2版）'),
+        ('task', None, '請求書を送る'),
+    ]
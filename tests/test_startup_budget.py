@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+CLIエントリポイントの --help で重いモジュールを読み込んでいないこと
+（時間の予算は環境に左右されるので benchmarks/startup_budget.py で確認する）
+"""
+
+import os
+import re
+
+import pytest
+
+from benchmarks import startup_budget
+
+
+def test_every_cli_script_is_checked():
+    scripts = set()
+    for name in os.listdir(startup_budget.REPO_DIR):
+        if not name.endswith(".py"):
+            continue
+        with open(os.path.join(startup_budget.REPO_DIR, name), 'r', encoding='utf-8') as f:
+            source = f.read()
+        if "argparse" in source and re.search(r'^if __name__ == "__main__":', source, re.MULTILINE):
+            scripts.add(name)
+    assert sorted(scripts - set(startup_budget.ENTRY_POINTS)) == []
+
+
+@pytest.mark.parametrize("script", startup_budget.ENTRY_POINTS)
+def test_help_does_not_import_forbidden_modules(script):
+    returncode, modules = startup_budget.imported_modules(script)
+    assert returncode == 0
+    assert sorted(name for name in modules if name in startup_budget.FORBIDDEN_MODULES) == []
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+ファイル同期エンジン（stat による比較、差分の計画、アトミックなコピー）
+"""
+
+import os
+
+import sync_engine
+
+
+def write(path, content, mtime_ns=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+def read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_files_identical(tmp_path):
+    source = write(tmp_path / "a.md", "abc", 1_000_000_000)
+    assert sync_engine.files_identical(source, write(tmp_path / "same.md", "abc", 2_000_000_000))
+    assert not sync_engine.files_identical(source, write(tmp_path / "size.md", "abcd", 1_000_000_000))
+    assert not sync_engine.files_identical(source, write(tmp_path / "content.md", "xyz", 2_000_000_000))
+    assert not sync_engine.files_identical(source, str(tmp_path / "missing.md"))
+    # サイズと更新時刻が一致すれば内容は読まない
+    assert sync_engine.files_identical(source, write(tmp_path / "stat.md", "xyz", 1_000_000_000))
+
+
+def test_copy_file_replaces_atomically_and_keeps_mtime(tmp_path):
+    source = write(tmp_path / "src" / "a.md", "# 新しい内容\n" * 1000, 1_500_000_000_000_000_000)
+    destination = write(tmp_path / "dest" / "a.md", "# 古い内容\n")
+    sync_engine.copy_file(source, destination)
+    assert read(destination) == "# 新しい内容\n" * 1000
+    assert os.stat(destination).st_mtime_ns == 1_500_000_000_000_000_000
+    assert os.listdir(tmp_path / "dest") == ["a.md"]
+
+    sync_engine.copy_file(source, str(tmp_path / "new" / "nested" / "a.md"))
+    assert read(tmp_path / "new" / "nested" / "a.md") == read(source)
+
+
+def test_collect_files_flattens_subdirectories(tmp_path):
+    write(tmp_path / "stories" / "US-001.md", "1")
+    write(tmp_path / "stories" / "done" / "US-002.md", "2")
+    write(tmp_path / "stories" / "notes.txt", "x")
+    assert sorted(sync_engine.collect_files(str(tmp_path / "stories"))) == ["US-001.md", "US-002.md"]
+    assert sorted(sync_engine.collect_files(str(tmp_path / "stories"), recursive=False)) == ["US-001.md"]
+    assert sync_engine.collect_files(str(tmp_path / "missing")) == {}
+
+
+def test_plan_and_resolve_directory_sync(tmp_path):
+    source_dir, destination_dir = tmp_path / "flow", tmp_path / "stock"
+    write(source_dir / "new.md", "new")
+    write(source_dir / "same.md", "same", 1_000_000_000)
+    write(destination_dir / "same.md", "same", 1_000_000_000)
+    write(source_dir / "size.md", "longer")
+    write(destination_dir / "size.md", "short")
+    write(source_dir / "touched.md", "abc", 2_000_000_000)
+    write(destination_dir / "touched.md", "abc", 1_000_000_000)
+    write(source_dir / "edited.md", "abc", 2_000_000_000)
+    write(destination_dir / "edited.md", "xyz", 1_000_000_000)
+    write(destination_dir / "orphan.md", "old")
+    write(destination_dir / "readme.txt", "not a story")
+
+    operations = sync_engine.plan_directory_sync(sync_engine.collect_files(str(source_dir)), str(destination_dir))
+    assert [(os.path.basename(op['destination']), op['action'], op['reason']) for op in operations] == [
+        ("edited.md", 'copy', 'hash?'),
+        ("new.md", 'copy', 'new'),
+        ("same.md", 'skip', 'unchanged'),
+        ("size.md", 'copy', 'size'),
+        ("touched.md", 'copy', 'hash?'),
+        ("orphan.md", 'orphan', 'orphan'),
+    ]
+
+    sync_engine.resolve_operations(operations, jobs=4)
+    resolved = {os.path.basename(op['destination']): (op['action'], op['reason']) for op in operations}
+    assert resolved['edited.md'] == ('copy', 'content')
+    assert resolved['touched.md'] == ('skip', 'unchanged')
+    # 内容が同じなら更新時刻を合わせ、次回は stat だけで判定できる
+    assert os.stat(destination_dir / "touched.md").st_mtime_ns == 2_000_000_000
+
+
+def test_resolve_without_touch_leaves_stock_untouched(tmp_path):
+    write(tmp_path / "flow" / "a.md", "abc", 2_000_000_000)
+    write(tmp_path / "stock" / "a.md", "abc", 1_000_000_000)
+    operations = sync_engine.plan_directory_sync(sync_engine.collect_files(str(tmp_path / "flow")),
+                                                 str(tmp_path / "stock"))
+    sync_engine.resolve_operations(operations, jobs=1, touch=False)
+    assert operations[0]['action'] == 'skip'
+    assert os.stat(tmp_path / "stock" / "a.md").st_mtime_ns == 1_000_000_000
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+日次タスクの履歴インデックス（チェックボックスの分類・差分同期・完了日/連続実施/計画と実績の集計）
+"""
+
+import argparse
+import json
+
+import task_history
+
+DAYS = {
+    "2026-10-05": {'stories': [('US-009', True)], 'routine': True},
+    "2026-10-19": {'stories': [('US-001', False), ('US-002', True)], 'routine': True},
+    "2026-10-20": {'stories': [('US-001', True)], 'routine': False},
+    "2026-10-21": {'stories': [('US-001', True), ('US-003', False)], 'routine': True},
+}
+
+
+def checkbox(done, text):
+    return f"- [{'x' if done else ' '}] {text}\n"
+
+
+def daily_tasks(stories, routine):
+    return (
+        "# 2026-10-19 のタスク\n\n"
+        "## 📅 今日の予定\n" + checkbox(True, "09:00-09:15: 朝会 <!-- cal:abc -->") + "\n"
+        "## ⏩ 持ち越しタスク\n" + checkbox(False, "請求書を送る") + "\n"
+        "## 🏃 スプリントのストーリー\n### web\n#### EP-001: エピック\n"
+        + "".join(checkbox(done, f"{story_id}: {story_id} のタイトル") for story_id, done in stories) + "\n"
+        "## 🔄 ルーチンタスク\n" + checkbox(routine, "[Daily] 日報")
+    )
+
+
+def write_days(root, days=DAYS):
+    paths = {}
+    for day, content in days.items():
+        path = root / "Flow" / day.replace("-", "")[:6] / day / "daily_tasks.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(daily_tasks(**content), encoding='utf-8')
+        paths[day] = path
+    return paths
+
+
+def test_parse_daily_tasks():
+    entries = task_history.parse_daily_tasks(daily_tasks([('US-001', True)], False))
+    assert [(entry['kind'], entry['item_id'], entry['title'], entry['frequency'], entry['done'])
+            for entry in entries] == [
+        ('calendar', 'abc', '朝会', None, True),
+        ('task', None, '請求書を送る', None, False),
+        ('story', 'US-001', 'US-001 のタイトル', None, True),
+        ('routine', '日報', '日報', 'daily', False),
+    ]
+    assert (entries[2]['project'], entries[2]['epic']) == ('web', 'EP-001: エピック')
+
+    entries = task_history.parse_daily_tasks(daily_tasks([('US-001', True)], False), sections={'carry_over'})
+    assert [entry['title'] for entry in entries] == ['請求書を送る']
+
+    # 計画に入らなかったタスクは順位と注記を除いて記録する
+    entries = task_history.parse_daily_tasks(
+        "## 📊 キャパシティ計画\n- [ ] 3. US-009: 前日の続き（1時間、時間不足）\n")
+    assert [(entry['kind'], entry['item_id'], entry['title']) for entry in entries] == [
+        ('story', 'US-009', '前日の続き')]
+
+
+def test_sync_only_reparses_changed_files(tmp_path):
+    paths = write_days(tmp_path)
+    conn = task_history.open_history(task_history.get_default_db_path(str(tmp_path)))
+    try:
+        assert task_history.sync_history(conn, str(tmp_path))['updated'] == 4
+        assert task_history.sync_history(conn, str(tmp_path))['unchanged'] == 4
+
+        paths["2026-10-20"].write_text(daily_tasks([('US-001', False)], True), encoding='utf-8')
+        paths["2026-10-05"].unlink()
+        stats = task_history.sync_history(conn, str(tmp_path))
+        assert (stats['updated'], stats['removed']) == (1, 1)
+        assert [row['day'] for row in conn.execute("SELECT day FROM days ORDER BY day")] == [
+            "2026-10-19", "2026-10-20", "2026-10-21"]
+    finally:
+        conn.close()
+
+
+def test_history_aggregates(tmp_path):
+    write_days(tmp_path)
+    conn = task_history.open_history(task_history.get_default_db_path(str(tmp_path)))
+    try:
+        task_history.sync_history(conn, str(tmp_path))
+
+        # 完了日は初めてチェックされた日、未完了のストーリーは最後
+        assert [(row['item_id'], row['first_planned'], row['completed'], row['days_planned'])
+                for row in task_history.story_completion_dates(conn)] == [
+            ('US-009', "2026-10-05", "2026-10-05", 1),
+            ('US-002', "2026-10-19", "2026-10-19", 1),
+            ('US-001', "2026-10-19", "2026-10-20", 3),
+            ('US-003', "2026-10-21", None, 1),
+        ]
+        assert [row['item_id'] for row in task_history.story_completion_dates(conn, since="2026-10-19",
+                                                                             until="2026-10-20")] == [
+            'US-002', 'US-001']
+
+        assert task_history.routine_streaks(conn) == [{
+            'title': '日報', 'frequency': 'daily', 'planned': 4, 'done': 3, 'current_streak': 1,
+            'longest_streak': 2, 'last_done': "2026-10-21", 'adherence': 0.75}]
+        assert task_history.routine_streaks(conn, since="2026-10-21")[0]['longest_streak'] == 1
+
+        sprints = [{'sprint_id': 'S1', 'name': 'S1', 'start_date': '2026-10-12', 'end_date': '2026-10-25'},
+                   {'sprint_id': 'S0', 'name': '日付なし'}]
+        assert task_history.planned_vs_done(conn, sprints) == [{
+            'sprint_id': 'S1', 'name': 'S1', 'start_date': '2026-10-12', 'end_date': '2026-10-25',
+            'days': 3, 'planned': 3, 'done': 2, 'checkboxes': 11, 'checked': 5}]
+    finally:
+        conn.close()
+
+
+def test_sprints_report_writes_only_json_to_stdout(tmp_path, write_backlog, capsys):
+    write_backlog('web', [{'story_id': 'US-001'}])
+    write_days(tmp_path)
+    args = argparse.Namespace(report='sprints', root=str(tmp_path), db=None, no_sync=False, force=False,
+                              since=None, until=None, output=None)
+    assert task_history.run(args) == 0
+
+    captured = capsys.readouterr()
+    assert [(row['sprint_id'], row['planned'], row['done']) for row in json.loads(captured.out)] == [('S1', 3, 2)]
+    assert "見つかったファイル数" in captured.err
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+カレンダー予定からの空き時間の計算と、時間割への割り当て
+"""
+
+from datetime import date, datetime
+
+import time_slots
+
+DAY = date(2026, 10, 20)
+
+
+def event(title, start, end, **fields):
+    return dict({'title': title, 'startTime': start, 'endTime': end}, **fields)
+
+
+def test_labels_and_minutes_use_the_event_clock(utc_machine):
+    # UTC のマシンでも、+09:00 の予定は書かれた時刻のまま扱う（表示と busy の時間がずれない）
+    parsed = time_slots.parse_event(event("朝会", "2026-10-20T08:30:00+09:00", "2026-10-20T09:15:00+09:00"), DAY)
+    assert (parsed['start_label'], parsed['end_label']) == ("08:30", "09:15")
+    assert (parsed['start'], parsed['end']) == (8 * 60 + 30, 9 * 60 + 15)
+    assert time_slots.format_clock(parsed['start']) == parsed['start_label']
+
+    assert time_slots.parse_time("2026-10-20T23:30:00Z") == (datetime(2026, 10, 20, 23, 30), "23:30", False)
+    assert time_slots.parse_time("2026-10-20") == (datetime(2026, 10, 20), "00:00", True)
+    assert time_slots.parse_time("明日") == (None, "明日", False)
+
+
+def test_event_shapes():
+    api = time_slots.parse_event({'summary': 'x', 'start': {'dateTime': '2026-10-20T13:00:00+09:00'},
+                                  'end': {'dateTime': '2026-10-20T14:00:00+09:00'}}, DAY)
+    assert (api['start'], api['end'], api['all_day']) == (780, 840, False)
+    all_day = time_slots.parse_event({'title': '休暇', 'start': {'date': '2026-10-20'},
+                                      'end': {'date': '2026-10-21'}}, DAY)
+    assert (all_day['start'], all_day['end'], all_day['all_day']) == (0, 1440, True)
+    # 日をまたぐ予定は前日からの分（負）と翌日の分（1440以上）になる
+    overnight = time_slots.parse_event(event("夜間作業", "2026-10-19T22:00:00+09:00", "2026-10-20T02:00:00+09:00"), DAY)
+    assert (overnight['start'], overnight['end']) == (-120, 120)
+
+
+def test_busy_and_free_slots():
+    events = [
+        event("定例", "2026-10-20T10:00:00+09:00", "2026-10-20T11:00:00+09:00", calendar='work'),
+        event("1on1", "2026-10-20T10:30:00+09:00", "2026-10-20T11:30:00+09:00", calendar='work'),
+        event("歯医者", "2026-10-20T17:30:00+09:00", "2026-10-20T19:00:00+09:00", calendar='private'),
+        event("休暇", "2026-10-20", "2026-10-21", calendar='private'),
+    ]
+    parsed = time_slots.parse_events(events, DAY)
+    workday = time_slots.clock_minutes("09:00"), time_slots.clock_minutes("18:00")
+    busy = time_slots.busy_intervals(parsed, *workday)
+    assert busy == [(600, 690), (1050, 1080)]
+    assert time_slots.busy_intervals(parsed, *workday, calendars=['work']) == [(600, 690)]
+    assert time_slots.busy_intervals(parsed, *workday, include_all_day=True) == [(540, 1080)]
+    assert time_slots.free_slots(busy, *workday) == [(540, 600), (690, 1050)]
+    assert time_slots.free_slots([(540, 590), (600, 1080)], *workday, min_minutes=15) == []
+
+
+def test_assign_blocks_splits_across_slots():
+    entries = [{'minutes': 45}, {'minutes': 90}, {'minutes': 600}]
+    blocks, unplaced = time_slots.assign_blocks([(540, 600), (690, 780)], entries, min_block=20)
+    assert [(block['start'], block['end'], block['part']) for block in blocks] == [
+        (540, 585, 1), (690, 780, 1)]
+    # 2つ目は1つ目の空き時間の残り（15分）が min_block 未満なので次の空き時間から
+    assert blocks[1]['entry'] is entries[1]
+    assert unplaced == [entries[2]]
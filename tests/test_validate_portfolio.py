@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+ポートフォリオ横断の参照整合性検証（重複ID・参照の解決・循環依存）
+"""
+
+import validate_portfolio
+
+
+def validate(*paths):
+    return validate_portfolio.validate_portfolio({path: 'backlog' for path in paths})
+
+
+def messages(items, path=None):
+    return [item['message'] for item in items if path is None or item['path'] == path]
+
+
+def test_clean_portfolio(write_backlog):
+    web = write_backlog("web", [{'story_id': 'US-001'}, {'story_id': 'US-002', 'dependencies': ['US-001']}])
+    app = write_backlog("app", [{'story_id': 'US-101', 'dependencies': ['US-001']}], epic_id='EP-101')
+    errors, warnings, summary = validate(web, app)
+    assert (errors, warnings) == ([], [])
+    assert (summary['story_count'], summary['dependency_count'], summary['cycle_count']) == (3, 2, 0)
+
+
+def test_duplicate_in_file_is_reported_against_that_file(write_backlog):
+    # パスの並びは app → web。重複は2つ目の web にあるので、先頭の app に報告してはいけない
+    app = write_backlog("app", [{'story_id': 'US-001'}], epic_id='EP-101')
+    web = write_backlog("web", [{'story_id': 'US-001'}, {'story_id': 'US-001'}])
+    errors, warnings, _ = validate(app, web)
+    assert messages(errors, web) == ["ストーリーID 'US-001' が同じファイル内で重複しています"]
+    assert messages(errors, app) == []
+    assert len(warnings) == 1 and "複数のファイルで定義されています" in warnings[0]['message']
+
+
+def test_dependencies_resolve_locally_first(write_backlog):
+    web = write_backlog("web", [{'story_id': 'US-001'}, {'story_id': 'US-002', 'dependencies': ['US-001', 'US-404']}])
+    app = write_backlog("app", [{'story_id': 'US-001'}, {'story_id': 'US-102', 'dependencies': ['US-001']}],
+                        epic_id='EP-101')
+    misc = write_backlog("misc", [{'story_id': 'US-201', 'dependencies': ['US-001']}], epic_id='EP-201')
+    errors, warnings, _ = validate(web, app, misc)
+    assert messages(errors) == ["story 'US-002' の依存先 'US-404' はどのバックログにも定義されていません"]
+    # US-001 は web と app の両方にあるので、どちらにも無い misc からは特定できない
+    assert messages(warnings, misc) == ["story 'US-201' の依存先 'US-001' は複数のバックログに存在するため特定できません"]
+    # web と app の中の US-001 は同じファイルで解決できる
+    assert [message for message in messages(warnings) if "依存先" in message and "US-201" not in message] == []
+
+
+def test_sprints_resolve_within_the_project(write_backlog):
+    web = write_backlog("web", [{'story_id': 'US-001', 'sprint_id': 'S2', 'sprint': None}], sprints=('S1',))
+    web_extra = write_backlog("web-extra", [{'story_id': 'US-050', 'sprint_id': 'S7', 'sprint': None}],
+                              sprints=(), epic_id='EP-050')
+    app = write_backlog("app", [{'story_id': 'US-101', 'sprint_id': 'S3', 'sprint': None}],
+                        sprints=('S2',), epic_id='EP-101')
+    errors, warnings, _ = validate(web, web_extra, app)
+    # web の S2 は app にしか無いので、黙って解決せずに警告する
+    assert len(messages(warnings, web)) == 1 and "他のプロジェクトにのみ定義されています" in messages(warnings, web)[0]
+    assert messages(errors, web_extra) == ["story 'US-050' のスプリント 'S7' はどのバックログにも定義されていません"]
+    assert messages(errors, app) == ["story 'US-101' のスプリント 'S3' はどのバックログにも定義されていません"]
+
+
+def test_sprints_shared_by_files_of_one_project(tmp_path, write_backlog):
+    sprints = write_backlog("web", [{'story_id': 'US-001'}], sprints=('S1', 'S2'))
+    stories = tmp_path / "Stock/programs/P01/projects/web/documents/backlog.yml"
+    stories.write_text("epics:\n  - epic_id: EP-009\n    stories:\n      - story_id: US-009\n        sprint_id: S2\n",
+                       encoding='utf-8')
+    errors, warnings, _ = validate(sprints, str(stories))
+    assert (errors, warnings) == ([], [])
+
+
+def test_cycles_are_detected_across_files(write_backlog):
+    web = write_backlog("web", [
+        {'story_id': 'US-001', 'dependencies': ['US-002']},
+        {'story_id': 'US-002', 'dependencies': ['US-101']},
+        {'story_id': 'US-003', 'dependencies': ['US-003']},
+    ])
+    app = write_backlog("app", [{'story_id': 'US-101', 'dependencies': ['US-001']}], epic_id='EP-101')
+    errors, _, summary = validate(web, app)
+    cycles = [message for message in messages(errors) if message.startswith("依存関係が循環しています")]
+    assert summary['cycle_count'] == 2
+    members = sorted(sorted(part.split()[0] for part in message.split(": ", 1)[1].split(" → ")) for message in cycles)
+    assert members == [['US-001', 'US-002', 'US-101'], ['US-003']]
+
+
+def test_find_cycles_handles_long_chains_without_recursion():
+    node_count = 50000
+    adjacency = [[n + 1] for n in range(node_count - 1)] + [[0]]
+    (cycle,) = validate_portfolio.find_cycles(node_count, adjacency)
+    assert sorted(cycle) == list(range(node_count))
+    assert validate_portfolio.find_cycles(3, [[1], [2], []]) == []
+    assert validate_portfolio.find_cycles(4, [[1], [0], [3], [2]]) == [[0, 1], [2, 3]]
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+バックログ/ルーチンYAMLの一括検証（キャッシュ・出力形式・ファイル横断の検証）
+"""
+
+import json
+
+import validate_yaml_batch
+
+
+def run_batch(root, *options):
+    output = root / "result.json"
+    code = validate_yaml_batch.main(['--root', str(root), '-j', '1', '-o', str(output)] + list(options))
+    return code, json.loads(output.read_text(encoding='utf-8'))
+
+
+def test_valid_tree_passes_and_uses_cache(tmp_path, write_backlog):
+    web = write_backlog("web", [{'story_id': 'US-001'}, {'story_id': 'US-002', 'dependencies': ['US-001']}])
+    write_backlog("app", [{'story_id': 'US-101'}], epic_id='EP-101')
+    cache = str(tmp_path / "cache.json")
+
+    code, report = run_batch(tmp_path, '--format', 'json', '--cache', cache)
+    assert code == 0
+    assert [result['cached'] for result in report['results']] == [False, False]
+    assert all(not result['errors'] for result in report['results'])
+
+    with open(web, 'a', encoding='utf-8') as f:
+        f.write("\n# 内容を変更\n")
+    code, report = run_batch(tmp_path, '--format', 'json', '--cache', cache)
+    assert {result['path']: result['cached'] for result in report['results']} == {
+        web: False, str(tmp_path / "Stock/programs/P01/projects/app/documents/backlog.yaml"): True
+    }
+
+
+def test_errors_fail_with_positions(tmp_path, write_backlog):
+    path = write_backlog("web", [{'story_id': 'US-001', 'title': None}])
+    code, report = run_batch(tmp_path, '--format', 'json', '--no-cache', '--positions')
+    assert code == 1
+    (result,) = report['results']
+    assert result['path'] == path and result['errors']
+    assert all(line for line, _ in result['error_positions'])
+
+
+def test_sarif_cross_file_results_point_at_backlog_files(tmp_path, write_backlog):
+    web = write_backlog("web", [{'story_id': 'US-001', 'dependencies': ['US-999']}])
+    app = write_backlog("app", [{'story_id': 'US-101', 'sprint_id': 'S9', 'sprint': None}], epic_id='EP-101')
+
+    code, sarif = run_batch(tmp_path, '--format', 'sarif', '--no-cache', '--cross-file')
+    assert code == 1
+    rules = {rule['id'] for rule in sarif['runs'][0]['tool']['driver']['rules']}
+    portfolio = [result for result in sarif['runs'][0]['results'] if result['ruleId'].startswith('portfolio-')]
+    assert {result['ruleId'] for result in portfolio} <= rules
+    uris = [result['locations'][0]['physicalLocation']['artifactLocation']['uri'] for result in portfolio]
+    assert sorted(uris) == sorted([web, app])
+    assert all("(portfolio)" not in uri for uri in uris)
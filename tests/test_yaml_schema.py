@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+宣言的スキーマのコンパイルと、バックログ/ルーチンの検証ルール（行・列番号を含む）
+"""
+
+import yaml
+
+import validate_backlog_yaml
+import yaml_schema
+
+
+def issues(schema, data):
+    return [(issue.severity, issue.message) for issue in yaml_schema.compile_schema(schema)(data)]
+
+
+def test_field_checks():
+    schema = (
+        ('required', 'id', yaml_schema.ERROR, "{where}{field} がありません"),
+        ('enum', 'priority', ('high', 'low'), yaml_schema.WARNING, "priority '{value}'"),
+        ('pattern', 'id', r'^US-\d+$', yaml_schema.WARNING, "id '{value}'"),
+        ('date', 'due', yaml_schema.ERROR, "due '{value}'"),
+        ('int_range', 'estimate', 1, 10, yaml_schema.ERROR, "estimate '{value}'"),
+    )
+    assert issues(schema, {'id': 'US-1', 'priority': 'high', 'due': '2026-10-19', 'estimate': 3}) == []
+    assert issues(schema, {'priority': 'urgent', 'due': '2026-02-30', 'estimate': 0}) == [
+        ('error', "id がありません"),
+        ('warning', "priority 'urgent'"),
+        ('error', "due '2026-02-30'"),
+        ('error', "estimate '0'"),
+    ]
+    assert issues(schema, {'id': 'X-1', 'estimate': True})[0] == ('warning', "id 'X-1'")
+
+
+def test_nested_checks_and_references():
+    schema = (
+        ('each', 'sprints', "sprint #{}", (('collect', 'sprint_id', 'sprints'),), None),
+        ('each', 'stories', "story #{}", (
+            ('ref', 'sprint', 'sprints', yaml_schema.ERROR, "{where}: '{value}'"),
+            ('if_present', 'frequency', (
+                ('rule', lambda story: story['frequency'] == 'weekly' and 'day' not in story, yaml_schema.WARNING,
+                 "{where}: day"),
+            )),
+        ), (yaml_schema.WARNING, "{where} がリストではありません")),
+        ('section', 'project', "project ", (('required', 'name', yaml_schema.ERROR, "{where}{field}"),)),
+    )
+    data = {
+        'sprints': [{'sprint_id': 'S1'}],
+        'stories': [{'sprint': 'S1'}, {'sprint': 'S9', 'frequency': 'weekly'}],
+        'project': {}
+    }
+    assert issues(schema, data) == [
+        ('error', "story #2: 'S9'"),
+        ('warning', "story #2: day"),
+        ('error', "project name"),
+    ]
+    # リストでない場合の {where} は親の位置（ここではトップレベル）
+    assert issues(schema, {'stories': 'none'}) == [('warning', " がリストではありません")]
+
+
+def test_messages_are_built_lazily():
+    calls = []
+
+    class Template(str):
+        def format(self, **values):
+            calls.append(values)
+            return str.format(self, **values)
+
+    (issue,) = yaml_schema.compile_schema((('required', 'id', yaml_schema.ERROR, Template("{where}id")),))({})
+    assert calls == []
+    assert issue.message == "id" and len(calls) == 1
+
+
+def test_backlog_schema():
+    story = {'story_id': 'US-001', 'title': 't', 'description': 'd', 'priority': 'high', 'story_points': 1,
+             'assignee': '宮田', 'status': 'new', 'sprint': 'S1'}
+    document = {
+        'project': {'id': 'P', 'name': 'n', 'description': 'd'},
+        'sprints': [{'sprint_id': 'S1', 'name': 's', 'start_date': '2026-10-12', 'end_date': '2026-10-25',
+                     'goal': 'g', 'status': 'in_progress'}],
+        'epics': [{'epic_id': 'EP-001', 'title': 't', 'priority': 'high', 'status': 'new',
+                   'stories': [story, dict(story, story_id='story-2', sprint='S2', priority='urgent')]}]
+    }
+    errors, warnings, truncated = yaml_schema.collect_issues(yaml_schema.validate_backlog_document(document))
+    assert [issue.message for issue in errors] == ["epic #1, story #2 の sprint 'S2' は定義されていないスプリントです"]
+    assert [issue.message for issue in warnings] == [
+        "epic #1, story #2 の story_id 'story-2' は推奨形式 'US-XXX' または 'S-XXX' に準拠していません",
+        "epic #1, story #2 の priority 'urgent' は 'high', 'medium', 'low' のいずれかであるべきです",
+    ]
+    assert not truncated
+
+    errors, _, truncated = yaml_schema.collect_issues(yaml_schema.validate_backlog_document({'epics': [{}, {}]}), 2)
+    assert len(errors) == 2 and truncated
+
+
+def test_routines_schema():
+    document = {
+        'project': {'id': 'P'},
+        'routines': [
+            {'routine_id': 'RT-001', 'title': '週報', 'frequency': 'weekly', 'priority': 'high',
+             'tasks': [{'task_id': 'T-001', 'title': '書く', 'estimate': 30, 'priority': 'high', 'assignee': '宮田'}]},
+            {'routine_id': 'RT-002', 'title': '月次', 'frequency': 'monthly', 'day_of_month': 32, 'priority': 'low',
+             'tasks': [{'task_id': 'T-002', 'title': '締め', 'estimate': -5, 'priority': 'low', 'assignee': '宮田'}]},
+        ]
+    }
+    errors, warnings, _ = yaml_schema.collect_issues(yaml_schema.validate_routines_document(document))
+    assert [issue.message for issue in errors] == [
+        "routine #2 の day_of_month '32' は 1-31 の整数である必要があります",
+        "routine #2, task #1 の estimate '-5' は正の整数である必要があります",
+    ]
+    assert [issue.message for issue in warnings] == ["routine #1 は weekly ですが、day_of_week が指定されていません"]
+
+
+POSITIONED_BACKLOG = """\
+project:
+  id: P
+  name: n
+  description: d
+epics:
+  - epic_id: EP-001
+    title: t
+    priority: high
+    status: new
+    stories:
+      - story_id: US-001
+        title: t
+        description: d
+        priority: urgent
+        story_points: 1
+        status: new
+"""
+
+
+def test_positions_from_a_single_parse():
+    data = yaml_schema.load_with_positions(POSITIONED_BACKLOG)
+    assert data == yaml.safe_load(POSITIONED_BACKLOG)
+    errors, warnings, _ = yaml_schema.collect_issues(yaml_schema.validate_backlog_document(data))
+    positions = {issue.field: issue.position for issue in warnings}
+    # 値の問題は値の位置、フィールドの欠落はマッピングの先頭
+    assert positions['priority'] == (14, 19)
+    assert positions['assignee'] == (11, 9)
+    assert all(issue.position == (None, None)
+               for issue in yaml_schema.validate_backlog_document(yaml.safe_load(POSITIONED_BACKLOG)))
+
+
+def test_validate_backlog_yaml_positions(tmp_path):
+    path = tmp_path / "backlog.yaml"
+    path.write_text(POSITIONED_BACKLOG, encoding='utf-8')
+    errors, warnings, _ = validate_backlog_yaml.validate_backlog_yaml(str(path), positions=True)
+    assert errors == []
+    assert [(warning.line, warning.column) for warning in warnings][:1] == [(14, 19)]
+    formatted = yaml_schema.format_diagnostics("backlog.yaml", errors, warnings).splitlines()[0]
+    assert formatted.startswith("backlog.yaml:14:19: warning: epic #1, story #1 の priority")
+
+    path.write_text("project:\n  id: [\n", encoding='utf-8')
+    errors, _, _ = validate_backlog_yaml.validate_backlog_yaml(str(path), positions=True)
+    assert errors[0].line == 3 and errors[0].startswith("YAMLフォーマットエラー")
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+カレンダー予定からの空き時間の計算
+
+1. 予定の開始・終了時刻を1回だけ解析し、対象日の0時からの分にする
+   （startTime/endTime、start.time、Google Calendar API の start.dateTime / start.date に対応）
+   時刻は予定に書かれたタイムゾーンの時計のまま扱う（表示・分・日付の判定で同じ基準を使い、
+   実行するマシンのタイムゾーンには依存しない）
+2. 終日予定（allDay または日付のみ）は区別し、busy には含めない（include_all_day で含める）
+3. 日をまたぐ予定は対象日の範囲に切り詰める
+4. 予定を開始時刻で並べて重なりをまとめ（sort-and-sweep、O(n log n)）、就業時間内の空き時間を求める
+5. 順位付けされたタスクを空き時間に先頭から詰める（空き時間をまたぐ場合は分割）
+
+複数のカレンダーの予定は calendar / calendarId / calendarName でカレンダーを区別し、
+calendars を指定するとそのカレンダーの予定だけを busy とします。
+"""
+
+from datetime import datetime, time
+
+
+MINUTES_PER_DAY = 24 * 60
+DEFAULT_MIN_BLOCK_MINUTES = 15
+
+
+def _raw_time(event, key):
+    """
+    予定の開始（key='start'）または終了（key='end'）の文字列を取り出す
+    """
+    value = event.get(key)
+    if isinstance(value, dict):
+        return value.get('time') or value.get('dateTime') or value.get('date') or ''
+    return event.get(f"{key}Time") or (value if isinstance(value, str) else '') or ''
+
+
+def parse_time(value):
+    """
+    時刻の文字列を解析
+
+    戻り値: (予定に書かれた時刻のdatetime（タイムゾーンなし）, 表示用の HH:MM, 日付のみか)
+    解析できない場合は (None, 元の文字列, False)
+    UTCオフセットは捨てるので、表示用の時刻と datetime は同じ時計（文字列の T 以降の HH:MM）になる
+    """
+    text = str(value).strip()
+    if not text:
+        return None, '', False
+    try:
+        moment = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None, text, False
+
+    date_only = "T" not in text and " " not in text
+    return moment.replace(tzinfo=None), f"{moment.hour:02d}:{moment.minute:02d}", date_only
+
+
+def to_minutes(moment, day):
+    """
+    day の0時からの分にする（前日は負、翌日は1440以上）
+    """
+    return int((moment - datetime.combine(day, time())).total_seconds() // 60)
+
+
+def event_calendar(event):
+    return event.get('calendar') or event.get('calendarId') or event.get('calendarName') or ''
+
+
+def parse_event(event, day):
+    """
+    予定を1件解析
+
+    戻り値の辞書:
+        title, calendar, all_day, start / end（day の0時からの分、時間帯が無い場合はNone）,
+        start_label / end_label（表示用）, event（元の予定）
+    """
+    start, start_label, start_date_only = parse_time(_raw_time(event, 'start'))
+    end, end_label, end_date_only = parse_time(_raw_time(event, 'end'))
+    all_day = bool(event.get('allDay')) or start_date_only or (not start_label and not end_label)
+
+    parsed = {
+        'title': event.get('title', 'タイトルなし'),
+        'calendar': event_calendar(event),
+        'all_day': all_day,
+        'start': None,
+        'end': None,
+        'start_label': start_label,
+        'end_label': end_label,
+        'event': event
+    }
+    if all_day:
+        if start is not None:
+            parsed['start'] = to_minutes(start, day)
+            parsed['end'] = (to_minutes(end, day) if end is not None and end > start
+                             else parsed['start'] + MINUTES_PER_DAY)
+    elif start is not None:
+        parsed['start'] = to_minutes(start, day)
+        parsed['end'] = to_minutes(end, day) if end is not None and end > start else parsed['start']
+    return parsed
+
+
+def parse_events(events, day):
+    """
+    予定をまとめて解析（開始時刻順、時間帯の無いものは元の順序で最後）
+    """
+    parsed = [parse_event(event, day) for event in events if isinstance(event, dict)]
+    parsed.sort(key=lambda item: (item['start'] is None, item['start'] if item['start'] is not None else 0))
+    return parsed
+
+
+def merge_intervals(intervals):
+    """
+    (開始, 終了) のリストを開始順に並べ、重なり・接するものをまとめる
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def busy_intervals(parsed_events, window_start, window_end, calendars=None, include_all_day=False):
+    """
+    window（分）の範囲で予定が入っている時間帯をまとめたリスト
+    """
+    calendars = set(calendars) if calendars else None
+    intervals = []
+    for item in parsed_events:
+        if item['start'] is None or (item['all_day'] and not include_all_day):
+            continue
+        if calendars is not None and item['calendar'] not in calendars:
+            continue
+        start = max(item['start'], window_start)
+        end = min(item['end'], window_end)
+        if start < end:
+            intervals.append((start, end))
+    return merge_intervals(intervals)
+
+
+def free_slots(busy, window_start, window_end, min_minutes=0):
+    """
+    まとめた予定の間の空き時間（min_minutes 未満の隙間は除く）
+    """
+    slots = []
+    cursor = window_start
+    for start, end in busy:
+        if start - cursor >= max(min_minutes, 1):
+            slots.append((cursor, start))
+        cursor = max(cursor, end)
+    if window_end - cursor >= max(min_minutes, 1):
+        slots.append((cursor, window_end))
+    return slots
+
+
+def total_minutes(intervals):
+    return sum(end - start for start, end in intervals)
+
+
+def clock_minutes(value):
+    """
+    "HH:MM" を0時からの分にする
+    """
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    hours, _, minutes = str(value).partition(":")
+    return int(hours) * 60 + int(minutes or 0)
+
+
+def format_clock(minute):
+    """
+    0時からの分を HH:MM にする
+    """
+    minute = int(minute) % MINUTES_PER_DAY
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def assign_blocks(slots, entries, min_block=DEFAULT_MIN_BLOCK_MINUTES):
+    """
+    順位順の entries（'minutes' を持つ辞書）を空き時間に先頭から詰める
+
+    空き時間の残りが min_block 未満になったら次の空き時間へ進み、
+    1つの空き時間に収まらないものは分割する。
+    戻り値: (ブロックのリスト, 時間を割り当てられなかった entries)
+    各ブロックは {'start', 'end'（分）, 'entry', 'part'（分割の何番目か、1から）}
+    """
+    blocks = []
+    unplaced = []
+    slot_index = 0
+    cursor = slots[0][0] if slots else 0
+
+    for entry in entries:
+        needed = int(round(entry['minutes']))
+        part = 0
+        while needed > 0 and slot_index < len(slots):
+            slot_start, slot_end = slots[slot_index]
+            cursor = max(cursor, slot_start)
+            available = slot_end - cursor
+            if available < min(min_block, needed) or available <= 0:
+                slot_index += 1
+                continue
+            used = min(available, needed)
+            part += 1
+            blocks.append({'start': cursor, 'end': cursor + used, 'entry': entry, 'part': part})
+            cursor += used
+            needed -= used
+        if needed > 0:
+            unplaced.append(entry)
+
+    return blocks, unplaced
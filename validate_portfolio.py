@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ポートフォリオ横断の参照整合性検証スクリプト
+
+1. すべてのbacklog/routinesファイルを1回ずつ読み込み、ID索引（ストーリー・エピック・
+   スプリント・ルーチン）を構築
+2. ストーリーの dependencies / sprint_id / sprint 参照を索引で解決
+3. 以下を報告
+   - 未定義の依存先・スプリントへの参照（dangling reference）
+   - 重複ID（同じファイル内はそのファイルのエラー、ファイルをまたぐ場合は警告）
+   - 他のプロジェクトにしか無いスプリントへの参照（警告）
+   - 依存関係の循環（TarjanのSCCによる線形時間検出）
+
+依存先の解決は「同じファイル内 → ポートフォリオ全体で一意なID」の順、
+スプリントの解決は「同じファイル内 → 同じプロジェクト内 → ポートフォリオ全体」の順に行う。
+"""
+
+import os
+import sys
+import argparse
+
+from aipm.lazy import lazy_import
+
+# --help で読み込み時間を払わないよう、初回アクセスまで読み込まない
+json = lazy_import("json")
+yaml = lazy_import("yaml")
+extract_tasks = lazy_import("extract_tasks")
+validate_yaml_batch = lazy_import("validate_yaml_batch")
+
+
+def _as_list(value):
+    """
+    YAMLの値をリストとして扱う（単一値・カンマ区切り文字列にも対応）
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(',') if v.strip()]
+    if isinstance(value, list):
+        return [str(v) for v in value if v is not None and str(v) != '']
+    return [str(value)]
+
+
+def load_document(file_path):
+    """
+    YAMLファイルを読み込む（エラー時はNoneとエラーメッセージを返す）
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f), None
+    except Exception as e:
+        return None, f"ファイル読み込みエラー: {e}"
+
+
+def build_index(targets):
+    """
+    検証対象ファイルを1回ずつ読み込み、ポートフォリオ全体のID索引を構築
+
+    targetsは {ファイルパス: 'backlog' または 'routines'} の辞書
+    """
+    index = {
+        'stories': {},      # story_id -> [file_path, ...]
+        'epics': {},        # epic_id -> [file_path, ...]
+        'sprints': {},      # sprint_id -> [file_path, ...]
+        'routines': {},     # routine_id -> [file_path, ...]
+        'local_stories': {},    # file_path -> set(story_id)
+        'local_sprints': {},    # file_path -> set(sprint_id)
+        'file_projects': {},    # file_path -> project_key
+        'project_sprints': {},  # project_key -> set(sprint_id)
+        'story_refs': [],   # (file_path, story_id, dependencies, sprint_refs)
+        'load_errors': []   # (file_path, message)
+    }
+
+    for file_path, kind in sorted(targets.items()):
+        data, error = load_document(file_path)
+        if error:
+            index['load_errors'].append((file_path, error))
+            continue
+        if not isinstance(data, dict):
+            continue
+
+        if kind == 'routines':
+            for routine in data.get('routines', []) or []:
+                if not isinstance(routine, dict):
+                    continue
+                routine_id = routine.get('routine_id') or routine.get('id')
+                if routine_id:
+                    index['routines'].setdefault(str(routine_id), []).append(file_path)
+            continue
+
+        local_sprints = set()
+        for sprint in data.get('sprints', []) or []:
+            if isinstance(sprint, dict) and sprint.get('sprint_id'):
+                sprint_id = str(sprint['sprint_id'])
+                local_sprints.add(sprint_id)
+                index['sprints'].setdefault(sprint_id, []).append(file_path)
+        index['local_sprints'][file_path] = local_sprints
+        index['file_projects'][file_path] = project_key(file_path)
+        index['project_sprints'].setdefault(index['file_projects'][file_path], set()).update(local_sprints)
+
+        local_stories = set()
+        for epic in data.get('epics', []) or []:
+            if not isinstance(epic, dict):
+                continue
+            if epic.get('epic_id'):
+                index['epics'].setdefault(str(epic['epic_id']), []).append(file_path)
+
+            for story in epic.get('stories', []) or []:
+                if not isinstance(story, dict) or not story.get('story_id'):
+                    continue
+                story_id = str(story['story_id'])
+                local_stories.add(story_id)
+                index['stories'].setdefault(story_id, []).append(file_path)
+
+                sprint_refs = [str(story[key]) for key in ('sprint_id', 'sprint') if story.get(key)]
+                index['story_refs'].append((
+                    file_path, story_id, _as_list(story.get('dependencies')), sprint_refs
+                ))
+        index['local_stories'][file_path] = local_stories
+
+    return index
+
+
+def project_key(file_path):
+    """
+    ファイルの属するプロジェクト（Stock/programs/<プログラム>/projects/<プロジェクト>/ 以外はディレクトリ）
+    """
+    program_name, project_name = extract_tasks.extract_project_info(file_path)
+    if project_name == "Unknown Project":
+        return os.path.dirname(file_path)
+    return (program_name, project_name)
+
+
+def _resolve(ref_id, file_path, local_ids, global_ids):
+    """
+    IDを同一ファイル → ポートフォリオ全体の順で解決
+
+    戻り値: 解決先ファイルパスのリスト（空なら未定義、2件以上なら曖昧）
+    """
+    if ref_id in local_ids.get(file_path, ()):
+        return [file_path]
+    return global_ids.get(ref_id, [])
+
+
+def find_cycles(node_count, adjacency):
+    """
+    TarjanのアルゴリズムでSCC（強連結成分）を求め、循環しているものを返す
+
+    再帰を使わない実装で、O(ノード数 + 辺数)
+    """
+    index_of = [-1] * node_count
+    lowlink = [0] * node_count
+    on_stack = [False] * node_count
+    stack = []
+    cycles = []
+    counter = 0
+
+    for root in range(node_count):
+        if index_of[root] != -1:
+            continue
+
+        work = [(root, 0)]
+        while work:
+            node, edge_pos = work[-1]
+            if edge_pos == 0:
+                index_of[node] = lowlink[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack[node] = True
+
+            edges = adjacency[node]
+            if edge_pos < len(edges):
+                work[-1] = (node, edge_pos + 1)
+                target = edges[edge_pos]
+                if index_of[target] == -1:
+                    work.append((target, 0))
+                elif on_stack[target]:
+                    lowlink[node] = min(lowlink[node], index_of[target])
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1 or node in adjacency[node]:
+                    cycles.append(list(reversed(component)))
+
+    return cycles
+
+
+def validate_portfolio(targets):
+    """
+    ポートフォリオ全体の参照整合性を検証
+
+    戻り値: (errors, warnings, summary)
+      errors / warnings は {'path', 'message'} の辞書のリスト
+    """
+    index = build_index(targets)
+    errors = [{'path': path, 'message': message} for path, message in index['load_errors']]
+    warnings = []
+
+    # ファイルをまたいだ重複ID
+    for label, key in (("ストーリーID", 'stories'), ("エピックID", 'epics'), ("ルーチンID", 'routines')):
+        for item_id, paths in index[key].items():
+            if len(paths) < 2:
+                continue
+            unique_paths = sorted(set(paths))
+            for path in unique_paths:
+                if paths.count(path) > 1:
+                    errors.append({'path': path, 'message': f"{label} '{item_id}' が同じファイル内で重複しています"})
+            if len(unique_paths) > 1:
+                warnings.append({
+                    'path': unique_paths[0],
+                    'message': f"{label} '{item_id}' が複数のファイルで定義されています: {', '.join(unique_paths)}"
+                })
+
+    # ストーリーを整数IDに変換して依存グラフを構築
+    node_ids = {}
+    node_keys = []
+    for file_path, story_id, _, _ in index['story_refs']:
+        key = (file_path, story_id)
+        if key not in node_ids:
+            node_ids[key] = len(node_keys)
+            node_keys.append(key)
+    adjacency = [[] for _ in node_keys]
+
+    dependency_count = 0
+    for file_path, story_id, dependencies, sprint_refs in index['story_refs']:
+        source = node_ids[(file_path, story_id)]
+
+        for dependency in dependencies:
+            dependency_count += 1
+            resolved = _resolve(dependency, file_path, index['local_stories'], index['stories'])
+            if not resolved:
+                errors.append({
+                    'path': file_path,
+                    'message': f"story '{story_id}' の依存先 '{dependency}' はどのバックログにも定義されていません"
+                })
+            elif len(set(resolved)) > 1:
+                warnings.append({
+                    'path': file_path,
+                    'message': f"story '{story_id}' の依存先 '{dependency}' は複数のバックログに存在するため特定できません"
+                })
+            else:
+                adjacency[source].append(node_ids[(resolved[0], dependency)])
+
+        for sprint_ref in sprint_refs:
+            if sprint_ref in index['local_sprints'].get(file_path, ()):
+                continue
+            if sprint_ref in index['project_sprints'][index['file_projects'][file_path]]:
+                continue
+            if sprint_ref in index['sprints']:
+                warnings.append({
+                    'path': file_path,
+                    'message': (f"story '{story_id}' のスプリント '{sprint_ref}' は同じプロジェクトに無く、"
+                                f"他のプロジェクトにのみ定義されています: {', '.join(sorted(set(index['sprints'][sprint_ref])))}")
+                })
+            else:
+                errors.append({
+                    'path': file_path,
+                    'message': f"story '{story_id}' のスプリント '{sprint_ref}' はどのバックログにも定義されていません"
+                })
+
+    # 依存関係の循環
+    cycles = find_cycles(len(node_keys), adjacency)
+    for component in cycles:
+        members = [f"{node_keys[n][1]} ({os.path.basename(os.path.dirname(node_keys[n][0]))})" for n in component]
+        errors.append({
+            'path': node_keys[component[0]][0],
+            'message': f"依存関係が循環しています: {' → '.join(members)}"
+        })
+
+    summary = {
+        "file_count": len(targets),
+        "story_count": len(node_keys),
+        "epic_count": len(index['epics']),
+        "sprint_count": len(index['sprints']),
+        "routine_count": len(index['routines']),
+        "dependency_count": dependency_count,
+        "cycle_count": len(cycles)
+    }
+
+    return errors, warnings, summary
+
+
+def format_check_result(errors, warnings, summary):
+    """検証結果を読みやすいフォーマットで返す"""
+    result = ""
+
+    if errors:
+        result += "\n❌ エラー:\n"
+        for error in errors:
+            result += f"  - {error['path']}: {error['message']}\n"
+
+    if warnings:
+        result += "\n⚠️ 警告:\n"
+        for warning in warnings:
+            result += f"  - {warning['path']}: {warning['message']}\n"
+
+    if summary:
+        result += "\n📊 サマリー:\n"
+        result += f"  - ファイル数: {summary['file_count']}\n"
+        result += f"  - ストーリー数: {summary['story_count']}\n"
+        result += f"  - 依存関係数: {summary['dependency_count']}\n"
+        result += f"  - 循環数: {summary['cycle_count']}\n"
+
+    if errors:
+        result += "\n検証結果: 失敗 - エラーを修正してください\n"
+    elif warnings:
+        result += "\n検証結果: 成功（警告あり） - 必要に応じて警告を確認してください\n"
+    else:
+        result += "\n検証結果: 成功\n"
+
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='ポートフォリオ全体のID参照・重複・循環依存を検証するスクリプト')
+    parser.add_argument('paths', nargs='*', help='検証するファイルまたはディレクトリ (デフォルト: ROOT/Stock 以下すべて)')
+    parser.add_argument('--root', help='ルートディレクトリ (デフォルト: 環境変数 AIPM_ROOT または ~/aipm_v3)')
+    parser.add_argument('--format', choices=['text', 'json'], default='text', help='出力形式')
+    args = parser.parse_args(argv)
+
+    root_dir = args.root if args.root else extract_tasks.get_root_dir()
+
+    targets = validate_yaml_batch.discover_targets(args.paths, root_dir)
+    errors, warnings, summary = validate_portfolio(targets)
+
+    if args.format == 'json':
+        print(json.dumps({"errors": errors, "warnings": warnings, "summary": summary}, ensure_ascii=False, indent=2))
+    else:
+        print(format_check_result(errors, warnings, summary))
+
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,20 @@
 #!/usr/bin/env python3
 import sys
-import yaml
-import json
-import re
-from pathlib import Path
-import datetime
+import argparse
 
-def validate_routines_yaml(file_path):
-    """ルーチンタスクYAMLファイルを検証する"""
+from aipm.lazy import lazy_import
+
+yaml = lazy_import("yaml")
+yaml_schema = lazy_import("yaml_schema")
+
+def validate_routines_yaml(file_path, max_errors=None, positions=False):
+    """
+    ルーチンタスクYAMLファイルを検証する
+    
+    max_errorsを指定するとエラーがその件数に達した時点で検証を打ち切る
+    positions=Trueの場合は位置情報付きで1回だけ解析し、各メッセージを
+    行・列番号を持つ yaml_schema.Diagnostic として返す
+    """
     errors = []
     warnings = []
     
@@ -15,9 +22,12 @@ def validate_routines_yaml(file_path):
     try:
         with open(file_path, 'r', encoding='utf-8') as file:
             try:
-                data = yaml.safe_load(file)
+                if positions:
+                    data = yaml_schema.load_with_positions(file)
+                else:
+                    data = yaml.safe_load(file)
             except yaml.YAMLError as e:
-                errors.append(f"YAMLフォーマットエラー: {str(e)}")
+                errors.append(yaml_schema.yaml_error_diagnostic(f"YAMLフォーマットエラー: {str(e)}", e))
                 return errors, warnings, None
     except Exception as e:
         errors.append(f"ファイル読み込みエラー: {str(e)}")
@@ -28,153 +38,47 @@ def validate_routines_yaml(file_path):
         errors.append("空のYAMLファイルです")
         return errors, warnings, None
     
-    # 基本情報の検証
-    if "project" not in data and "program" not in data:
-        errors.append("'project' または 'program' が定義されていません")
+    if not isinstance(data, dict):
+        errors.append("YAMLのトップレベルがキーと値の形式（マッピング）ではありません")
+        return errors, warnings, None
     
-    # ルーチン定義の検証
+    # コンパイル済みスキーマで検証
+    error_issues, warning_issues, truncated = yaml_schema.collect_issues(
+        yaml_schema.validate_routines_document(data), max_errors
+    )
+    if positions:
+        errors.extend(issue.diagnostic() for issue in error_issues)
+        warnings.extend(issue.diagnostic() for issue in warning_issues)
+    else:
+        errors.extend(issue.message for issue in error_issues)
+        warnings.extend(issue.message for issue in warning_issues)
+    if truncated:
+        warnings.append(f"エラーが {max_errors} 件に達したため検証を打ち切りました")
+        return errors, warnings, None
+    
+    # ルーチン数・タスク数・担当者指定タスク数を集計
     routine_count = 0
     task_count = 0
     tasks_with_assignee = 0
     
-    # 標準形式のルーチンチェック
     if "routines" in data and isinstance(data["routines"], list):
-        for i, routine in enumerate(data["routines"], 1):
+        for routine in data["routines"]:
             routine_count += 1
-            
-            # 必須フィールドの検証
-            required_fields = ["routine_id", "title", "frequency", "priority"]
-            for field in required_fields:
-                if field not in routine:
-                    errors.append(f"routine #{i} に必須フィールド '{field}' がありません")
-            
-            # IDフォーマットの検証
-            if "routine_id" in routine:
-                routine_id = routine["routine_id"]
-                if not re.match(r'^RT-\d+$', routine_id):
-                    warnings.append(f"routine #{i} の routine_id '{routine_id}' は推奨形式 'RT-数字' に準拠していません")
-            
-            # 頻度の検証
-            if "frequency" in routine:
-                frequency = routine["frequency"]
-                if frequency not in ["daily", "weekly", "monthly", "quarterly", "yearly"]:
-                    errors.append(f"routine #{i} の frequency '{frequency}' は 'daily', 'weekly', 'monthly', 'quarterly', 'yearly' のいずれかである必要があります")
-                
-                # 曜日の検証
-                if frequency == "weekly" and "day_of_week" not in routine:
-                    warnings.append(f"routine #{i} は weekly ですが、day_of_week が指定されていません")
-                
-                if "day_of_week" in routine:
-                    day_of_week = routine["day_of_week"]
-                    valid_days = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-                    if day_of_week not in valid_days:
-                        errors.append(f"routine #{i} の day_of_week '{day_of_week}' は {', '.join(valid_days)} のいずれかである必要があります")
-                
-                # 日付の検証
-                if frequency == "monthly" and "day_of_month" not in routine:
-                    warnings.append(f"routine #{i} は monthly ですが、day_of_month が指定されていません")
-                
-                if "day_of_month" in routine:
-                    day_of_month = routine["day_of_month"]
-                    if not isinstance(day_of_month, int) or day_of_month < 1 or day_of_month > 31:
-                        errors.append(f"routine #{i} の day_of_month '{day_of_month}' は 1-31 の整数である必要があります")
-            
-            # 優先度の検証
-            if "priority" in routine:
-                priority = routine["priority"]
-                if priority not in ["high", "medium", "low"]:
-                    errors.append(f"routine #{i} の priority '{priority}' は 'high', 'medium', 'low' のいずれかである必要があります")
-            
-            # タスクの検証
-            if "tasks" in routine and isinstance(routine["tasks"], list):
-                for j, task in enumerate(routine["tasks"], 1):
+            if isinstance(routine, dict) and isinstance(routine.get("tasks"), list):
+                for task in routine["tasks"]:
                     task_count += 1
-                    
-                    # 必須フィールドの検証
-                    task_required_fields = ["task_id", "title"]
-                    for field in task_required_fields:
-                        if field not in task:
-                            errors.append(f"routine #{i}, task #{j} に必須フィールド '{field}' がありません")
-                    
-                    # IDフォーマットの検証
-                    if "task_id" in task:
-                        task_id = task["task_id"]
-                        if not re.match(r'^T-\d+$', task_id):
-                            warnings.append(f"routine #{i}, task #{j} の task_id '{task_id}' は推奨形式 'T-数字' に準拠していません")
-                    
-                    # 見積もり時間の検証
-                    if "estimate" in task:
-                        estimate = task["estimate"]
-                        if not isinstance(estimate, int) or estimate <= 0:
-                            errors.append(f"routine #{i}, task #{j} の estimate '{estimate}' は正の整数である必要があります")
-                    else:
-                        warnings.append(f"routine #{i}, task #{j} に見積もり時間 (estimate) が指定されていません")
-                    
-                    # 優先度の検証
-                    if "priority" in task:
-                        priority = task["priority"]
-                        if priority not in ["high", "medium", "low"]:
-                            errors.append(f"routine #{i}, task #{j} の priority '{priority}' は 'high', 'medium', 'low' のいずれかである必要があります")
-                    else:
-                        warnings.append(f"routine #{i}, task #{j} に優先度 (priority) が指定されていません")
-                    
-                    # Assigneeの検証
-                    if "assignee" in task and task["assignee"]:
+                    if isinstance(task, dict) and task.get("assignee"):
                         tasks_with_assignee += 1
-                    else:
-                        warnings.append(f"routine #{i}, task #{j} に担当者 (assignee) が指定されていません")
-            else:
-                warnings.append(f"routine #{i} には tasks が定義されていないか、リスト形式ではありません")
-    
-    # 代替形式のルーチンチェック（morning_routinesなど）
-    alternative_routines = ["morning_routines", "evening_routines", "weekly_routines"]
-    for routine_key in alternative_routines:
+    
+    for routine_key in yaml_schema.ALTERNATIVE_ROUTINE_KEYS:
         if routine_key in data and isinstance(data[routine_key], dict):
             routine_count += 1
-            routine_obj = data[routine_key]
-            
-            # 必須フィールドの検証
-            if "name" not in routine_obj:
-                errors.append(f"{routine_key} に名前 (name) がありません")
-            
-            # タスクリストの検証
-            if "items" in routine_obj and isinstance(routine_obj["items"], list):
-                for j, task in enumerate(routine_obj["items"], 1):
+            items = data[routine_key].get("items")
+            if isinstance(items, list):
+                for task in items:
                     task_count += 1
-                    
-                    # 必須フィールドの検証
-                    task_required_fields = ["id", "title"]
-                    for field in task_required_fields:
-                        if field not in task:
-                            errors.append(f"{routine_key}, item #{j} に必須フィールド '{field}' がありません")
-                    
-                    # IDフォーマットの検証
-                    if "id" in task:
-                        task_id = task["id"]
-                        if not re.match(r'^RT-\d+$', task_id):
-                            warnings.append(f"{routine_key}, item #{j} の id '{task_id}' は推奨形式 'RT-数字' に準拠していません")
-                    
-                    # 見積もり時間の検証
-                    if "estimate" in task:
-                        estimate = task["estimate"]
-                        if not isinstance(estimate, int) or estimate <= 0:
-                            errors.append(f"{routine_key}, item #{j} の estimate '{estimate}' は正の整数である必要があります")
-                    else:
-                        warnings.append(f"{routine_key}, item #{j} に見積もり時間 (estimate) が指定されていません")
-                    
-                    # 優先度の検証
-                    if "priority" in task:
-                        priority = task["priority"]
-                        if not isinstance(priority, int) or priority < 0:
-                            errors.append(f"{routine_key}, item #{j} の priority '{priority}' は 0以上の整数である必要があります")
-                    
-                    # Assigneeの検証
-                    if "assignee" in task and task["assignee"]:
+                    if isinstance(task, dict) and task.get("assignee"):
                         tasks_with_assignee += 1
-                    else:
-                        warnings.append(f"{routine_key}, item #{j} に担当者 (assignee) が指定されていません")
-            else:
-                errors.append(f"{routine_key} には items が定義されていないか、リスト形式ではありません")
     
     # 最低1つのルーチンがあるか確認
     if routine_count == 0:
@@ -234,17 +138,21 @@ def format_check_result(errors, warnings, summary):
     return result
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("使用方法: python validate_routines_yaml.py <ルーチンタスクファイルパス>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='ルーチンタスクYAMLファイルを検証する')
+    parser.add_argument('file_path', help='ルーチンタスクファイルパス')
+    parser.add_argument('--max-errors', type=int, help='エラーがこの件数に達したら検証を打ち切る')
+    parser.add_argument('--positions', action='store_true', help='エディタ向けに "path:line:column: severity: message" 形式で出力する')
+    args = parser.parse_args()
     
-    file_path = sys.argv[1]
-    errors, warnings, summary = validate_routines_yaml(file_path)
+    errors, warnings, summary = validate_routines_yaml(args.file_path, args.max_errors, args.positions)
     
-    result = format_check_result(errors, warnings, summary)
+    if args.positions:
+        result = yaml_schema.format_diagnostics(args.file_path, errors, warnings)
+    else:
+        result = format_check_result(errors, warnings, summary)
     print(result)
     
     if errors:
         sys.exit(1)
     else:
-        sys.exit(0) 
\ No newline at end of file
+        sys.exit(0)
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+バックログ/ルーチンYAMLの一括検証スクリプト
+
+1. 指定されたファイル・ディレクトリ（未指定時はStock全体）から検証対象を探索
+2. 前回実行時から内容ハッシュが変わったファイルのみをプロセスプールで検証
+3. 結果をテキスト / JSON / SARIF 形式で出力
+
+使用例:
+  python validate_yaml_batch.py                       # Stock以下をすべて検証
+  python validate_yaml_batch.py Stock/projects -j 8   # ディレクトリを指定
+  python validate_yaml_batch.py --format sarif -o result.sarif
+"""
+
+import os
+import sys
+import argparse
+import contextlib
+
+import phase_timer
+from aipm.lazy import lazy_import
+
+json = lazy_import("json")
+extract_tasks = lazy_import("extract_tasks")
+validate_backlog_yaml = lazy_import("validate_backlog_yaml")
+validate_routines_yaml = lazy_import("validate_routines_yaml")
+yaml_schema = lazy_import("yaml_schema")
+
+
+BACKLOG_NAMES = ("backlog.yaml", "backlog.yml")
+ROUTINES_NAMES = ("routines.yaml", "routines.yml")
+# 検証ルールは yaml_schema にあるため、キャッシュのキーには yaml_schema も含める
+VALIDATOR_MODULES = (validate_backlog_yaml, validate_routines_yaml, yaml_schema)
+
+
+def get_default_cache_path(root_dir):
+    """
+    ルートディレクトリからデフォルトのキャッシュファイルパスを取得
+    """
+    return os.path.join(root_dir, ".aipm", "validation_cache.json")
+
+
+def detect_kind(file_path):
+    """
+    ファイル名から検証の種類（backlog / routines）を判定
+    """
+    name = os.path.basename(file_path).lower()
+    if "routine" in name:
+        return "routines"
+    return "backlog"
+
+
+def discover_targets(paths, root_dir):
+    """
+    検証対象ファイルを探索
+
+    pathsが空の場合はextract_tasks.pyと同じ探索ルールでStock以下を検索する
+    ディレクトリが指定された場合はその配下のbacklog/routinesファイルを再帰的に検索する
+    """
+    targets = {}
+
+    if not paths:
+        # 探索ログが機械可読な出力に混ざらないよう標準エラー出力に回す
+        with contextlib.redirect_stdout(sys.stderr):
+            backlog_files = extract_tasks.find_yaml_files(root_dir, "backlog.ya?ml")
+            routines_files = extract_tasks.find_yaml_files(root_dir, "routines.ya?ml")
+        for file_path in backlog_files:
+            targets[os.path.abspath(file_path)] = "backlog"
+        for file_path in routines_files:
+            targets[os.path.abspath(file_path)] = "routines"
+        return targets
+
+    for path in paths:
+        if os.path.isdir(path):
+            for dir_path, dir_names, file_names in os.walk(path):
+                # 隠しディレクトリ（.git, .aipm など）は探索しない
+                dir_names[:] = [d for d in dir_names if not d.startswith('.')]
+                for file_name in file_names:
+                    if file_name in BACKLOG_NAMES:
+                        targets[os.path.abspath(os.path.join(dir_path, file_name))] = "backlog"
+                    elif file_name in ROUTINES_NAMES:
+                        targets[os.path.abspath(os.path.join(dir_path, file_name))] = "routines"
+        elif os.path.isfile(path):
+            targets[os.path.abspath(path)] = detect_kind(path)
+        else:
+            print(f"警告: パスが見つかりません: {path}", file=sys.stderr)
+
+    return targets
+
+
+def hash_file(file_path):
+    """
+    ファイル内容のSHA-256ハッシュを計算
+    """
+    import hashlib
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_validator_version():
+    """
+    検証スクリプト自体のハッシュ（検証ロジックが変わったらキャッシュを無効化する）
+    """
+    import hashlib
+    digest = hashlib.sha256()
+    for module in VALIDATOR_MODULES:
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def load_cache(cache_path, validator_version):
+    """
+    前回の検証結果キャッシュを読み込む
+    """
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get("validator_version") != validator_version:
+            return {}
+        return cache.get("files", {})
+    except Exception as e:
+        print(f"警告: 検証キャッシュを読み込めませんでした: {e}", file=sys.stderr)
+        return {}
+
+
+def save_cache(cache_path, validator_version, results):
+    """
+    検証結果キャッシュを保存（一時ファイル経由で置き換え）
+    """
+    if not cache_path:
+        return
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "validator_version": validator_version,
+                "files": {result["path"]: result for result in results if result.get("sha256")}
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"警告: 検証キャッシュを保存できませんでした: {e}", file=sys.stderr)
+
+
+def validate_one(task):
+    """
+    1ファイルを検証する（プロセスプールのワーカーから呼ばれる）
+    """
+    file_path, kind, sha256, positions = task
+    try:
+        if kind == "routines":
+            errors, warnings, summary = validate_routines_yaml.validate_routines_yaml(file_path, positions=positions)
+        else:
+            errors, warnings, summary = validate_backlog_yaml.validate_backlog_yaml(file_path, positions=positions)
+    except Exception as e:
+        errors, warnings, summary = [f"検証中に予期しないエラーが発生しました: {e}"], [], None
+
+    result = {
+        "path": file_path,
+        "kind": kind,
+        "sha256": sha256,
+        "positions": positions,
+        "errors": [str(error) for error in errors],
+        "warnings": [str(warning) for warning in warnings],
+        "summary": summary,
+        "cached": False
+    }
+    if positions:
+        # 行・列番号は errors / warnings と同じ順序で保持する
+        result["error_positions"] = [[getattr(e, 'line', None), getattr(e, 'column', None)] for e in errors]
+        result["warning_positions"] = [[getattr(w, 'line', None), getattr(w, 'column', None)] for w in warnings]
+    return result
+
+
+def validate_files(targets, cache, jobs=None, positions=False):
+    """
+    検証対象をキャッシュと照合し、変更されたファイルのみを並列に検証
+    """
+    results = []
+    pending = []
+
+    for file_path, kind in sorted(targets.items()):
+        try:
+            sha256 = hash_file(file_path)
+        except Exception as e:
+            results.append({
+                "path": file_path,
+                "kind": kind,
+                "sha256": None,
+                "errors": [f"ファイル読み込みエラー: {str(e)}"],
+                "warnings": [],
+                "summary": None,
+                "cached": False
+            })
+            continue
+
+        cached = cache.get(file_path)
+        if (cached and cached.get("sha256") == sha256 and cached.get("kind") == kind
+                and cached.get("positions", False) == positions):
+            results.append(dict(cached, cached=True))
+        else:
+            pending.append((file_path, kind, sha256, positions))
+
+    if len(pending) <= 1 or jobs == 1:
+        # 対象が少ない場合はプロセス起動のコストを払わない
+        results.extend(validate_one(task) for task in pending)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results.extend(executor.map(validate_one, pending, chunksize=max(1, len(pending) // 32)))
+
+    results.sort(key=lambda result: result["path"])
+    return results
+
+
+def portfolio_results(portfolio_errors, portfolio_warnings):
+    """
+    ファイル横断の検証結果を、報告されたバックログのファイルごとの結果（kind: portfolio）にまとめる
+    """
+    by_path = {}
+    for key, items in (("errors", portfolio_errors), ("warnings", portfolio_warnings)):
+        for item in items:
+            result = by_path.setdefault(item['path'], {
+                "path": item['path'],
+                "kind": "portfolio",
+                "sha256": None,
+                "errors": [],
+                "warnings": [],
+                "summary": None,
+                "cached": False
+            })
+            result[key].append(item['message'])
+    return [by_path[path] for path in sorted(by_path)]
+
+
+def to_sarif(results):
+    """
+    検証結果をSARIF 2.1.0 形式に変換
+    """
+    sarif_results = []
+    for result in results:
+        for level, messages, positions in (
+            ("error", result["errors"], result.get("error_positions")),
+            ("warning", result["warnings"], result.get("warning_positions"))
+        ):
+            for i, message in enumerate(messages):
+                physical_location = {"artifactLocation": {"uri": result["path"]}}
+                if positions and positions[i][0]:
+                    physical_location["region"] = {"startLine": positions[i][0], "startColumn": positions[i][1] or 1}
+                sarif_results.append({
+                    "ruleId": f"{result['kind']}-{level}",
+                    "level": level,
+                    "message": {"text": message},
+                    "locations": [{"physicalLocation": physical_location}]
+                })
+
+    return {
+        "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+        "version": "2.1.0",
+        "runs": [{
+            "tool": {"driver": {"name": "validate_yaml_batch", "rules": [
+                {"id": "backlog-error"}, {"id": "backlog-warning"},
+                {"id": "routines-error"}, {"id": "routines-warning"},
+                {"id": "portfolio-error"}, {"id": "portfolio-warning"}
+            ]}},
+            "results": sarif_results
+        }]
+    }
+
+
+def format_text(results):
+    """
+    検証結果を読みやすいテキストにまとめる
+    """
+    lines = []
+    for result in results:
+        if not result["errors"] and not result["warnings"]:
+            continue
+        label = "（ファイル横断）" if result["kind"] == "portfolio" else ""
+        lines.append(f"\n📄 {result['path']}{label}")
+        for mark, messages, positions in (
+            ("❌", result["errors"], result.get("error_positions")),
+            ("⚠️", result["warnings"], result.get("warning_positions"))
+        ):
+            for i, message in enumerate(messages):
+                if positions and positions[i][0]:
+                    lines.append(f"  {mark} {positions[i][0]}:{positions[i][1]}: {message}")
+                else:
+                    lines.append(f"  {mark} {message}")
+
+    error_count = sum(len(result["errors"]) for result in results)
+    warning_count = sum(len(result["warnings"]) for result in results)
+    cached_count = sum(1 for result in results if result["cached"])
+    lines.append("")
+    file_count = sum(1 for result in results if result["kind"] != "portfolio")
+    lines.append(f"📊 検証ファイル数: {file_count} (キャッシュ利用: {cached_count})")
+    lines.append(f"  - エラー: {error_count}")
+    lines.append(f"  - 警告: {warning_count}")
+    if error_count:
+        lines.append("\n検証結果: 失敗 - エラーを修正してください")
+    elif warning_count:
+        lines.append("\n検証結果: 成功（警告あり） - 必要に応じて警告を確認してください")
+    else:
+        lines.append("\n検証結果: 成功")
+    return "\n".join(lines) + "\n"
+
+
+def add_arguments(parser):
+    """
+    検証のコマンドライン引数を追加（aipm validate と共通）
+    """
+    parser.add_argument('paths', nargs='*', help='検証するファイルまたはディレクトリ (デフォルト: ROOT/Stock 以下すべて)')
+    parser.add_argument('--root', help='ルートディレクトリ (デフォルト: 環境変数 AIPM_ROOT または ~/aipm_v3)')
+    parser.add_argument('--format', choices=['text', 'json', 'sarif'], default='text', help='出力形式')
+    parser.add_argument('--output', '-o', help='出力ファイルパス (デフォルト: 標準出力)')
+    parser.add_argument('--jobs', '-j', type=int, help='並列プロセス数 (デフォルト: CPU数)')
+    parser.add_argument('--cache', help='検証キャッシュファイルパス (デフォルト: ROOT/.aipm/validation_cache.json)')
+    parser.add_argument('--no-cache', action='store_true', help='キャッシュを使わずすべてのファイルを検証する')
+    parser.add_argument('--positions', action='store_true', help='各メッセージに行・列番号を付ける (SARIFのregionに反映)')
+    parser.add_argument('--cross-file', action='store_true', help='ファイル横断の参照整合性（依存先・重複ID・循環依存）も検証する')
+    phase_timer.add_arguments(parser)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='バックログ/ルーチンYAMLをまとめて検証するスクリプト')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with phase_timer.session(args, "validate_yaml_batch"):
+        return phase_timer.record_exit_code(run(args))
+
+
+def run(args):
+    """
+    コマンドライン引数に従って検証を実行し、終了コードを返す
+    """
+    with contextlib.redirect_stdout(sys.stderr):
+        root_dir = args.root if args.root else extract_tasks.get_root_dir()
+    cache_path = None if args.no_cache else (args.cache or get_default_cache_path(root_dir))
+
+    with phase_timer.phase("discover"):
+        targets = discover_targets(args.paths, root_dir)
+        phase_timer.count(files=len(targets))
+    if not targets:
+        print("検証対象のファイルが見つかりませんでした。", file=sys.stderr)
+        return 0
+
+    with phase_timer.phase("cache_load"):
+        validator_version = get_validator_version()
+        cache = load_cache(cache_path, validator_version)
+    with phase_timer.phase("validate"):
+        results = validate_files(targets, cache, args.jobs, args.positions)
+        cache_hits = sum(1 for result in results if result["cached"])
+        phase_timer.count(files=len(results) - cache_hits, items=len(results), cache_hits=cache_hits)
+        phase_timer.set_value('cache_hit_ratio', cache_hits / len(results) if results else 0.0)
+    with phase_timer.phase("cache_save"):
+        save_cache(cache_path, validator_version, results)
+
+    if args.cross_file:
+        import validate_portfolio
+        with phase_timer.phase("cross_file"):
+            portfolio_errors, portfolio_warnings, _ = validate_portfolio.validate_portfolio(targets)
+        results.extend(portfolio_results(portfolio_errors, portfolio_warnings))
+
+    phase_timer.set_value('errors', sum(len(result["errors"]) for result in results))
+    phase_timer.set_value('warnings', sum(len(result["warnings"]) for result in results))
+
+    with phase_timer.phase("report"):
+        if args.format == 'json':
+            output = json.dumps({"results": results}, ensure_ascii=False, indent=2) + "\n"
+        elif args.format == 'sarif':
+            output = json.dumps(to_sarif(results), ensure_ascii=False, indent=2) + "\n"
+        else:
+            output = format_text(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+        print(f"検証結果を {args.output} に保存しました。", file=sys.stderr)
+    else:
+        sys.stdout.write(output)
+
+    return 1 if any(result["errors"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+バックログ/ルーチンYAMLの宣言的スキーマ
+
+スキーマはチェック定義（タプル）の並びとして記述し、compile_schema() で
+一度だけチェック用クロージャに変換します。
+検証結果は Issue として遅延生成され、メッセージ文字列は参照されるまで組み立てません。
+
+チェック定義:
+  ('required', field, severity, template)          フィールドが存在しない
+  ('enum', field, values, severity, template)      値が候補に含まれない
+  ('pattern', field, regex, severity, template)    値が正規表現に一致しない
+  ('date', field, severity, template)              値が YYYY-MM-DD 形式の日付でない
+  ('int_range', field, min, max, severity, template)  値が範囲内の整数でない
+  ('rule', predicate, severity, template)          predicate(obj) が真
+  ('collect', field, context_key)                  値をコンテキストの集合に追加
+  ('ref', field, context_key, severity, template)  値がコンテキストの集合に存在しない
+  ('if_present', field, checks)                    フィールドが存在する場合のみ checks を適用
+  ('each', field, label, checks, not_list)         リストの各要素に checks を適用
+  ('section', field, label, checks)                辞書の値に checks を適用
+
+テンプレートでは {where}（要素の位置）, {field}, {value} が使えます。
+
+load_with_positions() で読み込んだデータを検証すると、各 Issue から
+YAML上の行・列番号を取得できます（再解析は不要）。
+"""
+
+import re
+import datetime
+
+import yaml
+
+
+ERROR = "error"
+WARNING = "warning"
+
+# extract_tasks.py / generate_daily_tasks.py と共有する値の定義
+PRIORITIES = ("high", "medium", "low")
+SPRINT_STATUSES = ("planned", "in_progress", "completed")
+EPIC_STATUSES = ("new", "in_progress", "blocked", "completed")
+STORY_STATUSES = ("new", "planned", "in_progress", "blocked", "completed")
+FREQUENCIES = ("daily", "weekly", "monthly", "quarterly", "yearly")
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# extract_tasks.py が出力するストーリーの項目 (出力キー, YAMLキー, デフォルト値)
+STORY_FIELDS = (
+    ('id', 'story_id', ''),
+    ('title', 'title', 'Unknown Story'),
+    ('description', 'description', ''),
+    ('acceptance_criteria', 'acceptance_criteria', ''),
+    ('priority', 'priority', ''),
+    ('status', 'status', ''),
+    ('sprint_id', 'sprint_id', ''),
+    ('sprint', 'sprint', ''),
+    ('estimate', 'estimate', ''),
+    ('assignee', 'assignee', ''),
+)
+
+# カンマ区切りの文字列として出力するリスト項目
+STORY_LIST_FIELDS = ('labels', 'dependencies')
+
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+class Issue:
+    """
+    検証で見つかった1件の問題
+
+    メッセージは message を参照したときに初めて組み立てる
+    """
+    __slots__ = ('severity', 'template', 'path', 'field', 'value', 'obj')
+
+    def __init__(self, severity, template, path, field=None, value=None, obj=None):
+        self.severity = severity
+        self.template = template
+        self.path = path
+        self.field = field
+        self.value = value
+        self.obj = obj
+
+    @property
+    def where(self):
+        return format_path(self.path)
+
+    @property
+    def message(self):
+        return self.template.format(where=self.where, field=self.field, value=self.value)
+
+    def __str__(self):
+        return self.message
+
+    @property
+    def position(self):
+        """
+        問題の位置 (行, 列) を返す（位置情報付きで読み込んでいない場合は (None, None)）
+        """
+        obj = self.obj
+        if isinstance(obj, PositionedDict):
+            # 値の問題は値の位置、フィールド欠落はマッピングの先頭を指す
+            mark = obj.value_marks.get(self.field) if self.field is not None else None
+            return mark or obj.mark
+        if isinstance(obj, PositionedList):
+            if isinstance(self.field, int) and 0 <= self.field < len(obj.item_marks):
+                return obj.item_marks[self.field]
+            return obj.mark
+        return (None, None)
+
+    def diagnostic(self):
+        """
+        行・列番号付きのメッセージに変換
+        """
+        line, column = self.position
+        return Diagnostic(self.message, self.severity, line, column)
+
+
+class Diagnostic(str):
+    """
+    行・列番号を持つ検証メッセージ
+
+    str のサブクラスなので、従来の文字列メッセージとしてもそのまま扱える
+    """
+
+    def __new__(cls, message, severity=ERROR, line=None, column=None):
+        diagnostic = super().__new__(cls, message)
+        diagnostic.severity = severity
+        diagnostic.line = line
+        diagnostic.column = column
+        return diagnostic
+
+    def to_dict(self):
+        return {"severity": self.severity, "line": self.line, "column": self.column, "message": str(self)}
+
+
+class PositionedDict(dict):
+    """
+    YAML上の位置（1始まりの行・列）を保持する辞書
+    """
+    __slots__ = ('mark', 'value_marks')
+
+
+class PositionedList(list):
+    """
+    YAML上の位置（1始まりの行・列）を保持するリスト
+    """
+    __slots__ = ('mark', 'item_marks')
+
+
+def _mark(node):
+    return (node.start_mark.line + 1, node.start_mark.column + 1)
+
+
+def _construct_positioned_mapping(loader, node):
+    data = PositionedDict()
+    data.mark = _mark(node)
+    data.value_marks = {}
+    yield data
+    data.update(loader.construct_mapping(node))
+    # construct_mapping で構築済みのキーはキャッシュから返るため、再構築のコストはかからない
+    for key_node, value_node in node.value:
+        try:
+            data.value_marks[loader.construct_object(key_node)] = _mark(value_node)
+        except TypeError:
+            pass
+
+
+def _construct_positioned_sequence(loader, node):
+    data = PositionedList()
+    data.mark = _mark(node)
+    data.item_marks = [_mark(item_node) for item_node in node.value]
+    yield data
+    data.extend(loader.construct_sequence(node))
+
+
+class PositionLoader(getattr(yaml, 'CSafeLoader', yaml.SafeLoader)):
+    """
+    1回の解析で位置情報付きの辞書・リストを構築するローダー
+    """
+
+
+PositionLoader.add_constructor('tag:yaml.org,2002:map', _construct_positioned_mapping)
+PositionLoader.add_constructor('tag:yaml.org,2002:seq', _construct_positioned_sequence)
+
+
+def load_with_positions(stream):
+    """
+    YAMLを位置情報付きで読み込む（yaml.safe_load と同じ型の値を返す）
+    """
+    return yaml.load(stream, Loader=PositionLoader)
+
+
+def yaml_error_diagnostic(message, error):
+    """
+    YAMLの構文エラーを行・列番号付きのメッセージに変換
+    """
+    mark = getattr(error, 'problem_mark', None) or getattr(error, 'context_mark', None)
+    if mark is None:
+        return Diagnostic(message, ERROR)
+    return Diagnostic(message, ERROR, mark.line + 1, mark.column + 1)
+
+
+def format_diagnostics(file_path, errors, warnings):
+    """
+    エディタが解釈できる "path:line:column: severity: message" 形式に整形
+    """
+    lines = []
+    for severity, messages in ((ERROR, errors), (WARNING, warnings)):
+        for message in messages:
+            line = getattr(message, 'line', None) or 1
+            column = getattr(message, 'column', None) or 1
+            lines.append(f"{file_path}:{line}:{column}: {severity}: {message}")
+    return "\n".join(lines)
+
+
+def format_path(path):
+    """
+    ('epic #{}', 2), ('story #{}', 3) のようなパスを "epic #2, story #3" に整形
+    """
+    return ", ".join(label if index is None else label.format(index) for label, index in path)
+
+
+def _is_valid_date(value):
+    """
+    YYYY-MM-DD 形式の日付か（YAMLで日付型として読み込まれた値も許可）
+    """
+    if isinstance(value, datetime.date):
+        return True
+    if not isinstance(value, str) or not _DATE_RE.match(value):
+        return False
+    try:
+        datetime.date.fromisoformat(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _compile_check(spec):
+    """
+    1つのチェック定義をクロージャに変換
+
+    クロージャは (obj, path, ctx) を受け取り、Issueを順に返すジェネレータ
+    """
+    kind = spec[0]
+
+    if kind == 'required':
+        _, field, severity, template = spec
+
+        def check(obj, path, ctx):
+            if field not in obj:
+                yield Issue(severity, template, path, field, None, obj)
+
+    elif kind == 'enum':
+        _, field, values, severity, template = spec
+        allowed = frozenset(values)
+
+        def check(obj, path, ctx):
+            if field in obj:
+                value = obj[field]
+                try:
+                    valid = value in allowed
+                except TypeError:
+                    valid = False
+                if not valid:
+                    yield Issue(severity, template, path, field, value, obj)
+
+    elif kind == 'pattern':
+        _, field, regex, severity, template = spec
+        match = re.compile(regex).match
+
+        def check(obj, path, ctx):
+            if field in obj:
+                value = obj[field]
+                if not isinstance(value, str) or not match(value):
+                    yield Issue(severity, template, path, field, value, obj)
+
+    elif kind == 'date':
+        _, field, severity, template = spec
+
+        def check(obj, path, ctx):
+            if field in obj and not _is_valid_date(obj[field]):
+                yield Issue(severity, template, path, field, obj[field], obj)
+
+    elif kind == 'int_range':
+        _, field, minimum, maximum, severity, template = spec
+
+        def check(obj, path, ctx):
+            if field in obj:
+                value = obj[field]
+                if (not isinstance(value, int)
+                        or (minimum is not None and value < minimum)
+                        or (maximum is not None and value > maximum)):
+                    yield Issue(severity, template, path, field, value, obj)
+
+    elif kind == 'rule':
+        _, predicate, severity, template = spec
+
+        def check(obj, path, ctx):
+            if predicate(obj):
+                yield Issue(severity, template, path, None, None, obj)
+
+    elif kind == 'collect':
+        _, field, context_key = spec
+
+        def check(obj, path, ctx):
+            if field in obj:
+                try:
+                    ctx.setdefault(context_key, set()).add(obj[field])
+                except TypeError:
+                    pass
+            return ()
+
+    elif kind == 'ref':
+        _, field, context_key, severity, template = spec
+
+        def check(obj, path, ctx):
+            if field in obj:
+                value = obj[field]
+                try:
+                    known = value in ctx.get(context_key, ())
+                except TypeError:
+                    known = False
+                if not known:
+                    yield Issue(severity, template, path, field, value, obj)
+
+    elif kind == 'if_present':
+        _, field, checks = spec
+        validate = compile_schema(checks)
+
+        def check(obj, path, ctx):
+            if field in obj:
+                yield from validate(obj, path, ctx)
+
+    elif kind == 'each':
+        _, field, label, checks, not_list = spec
+        validate = compile_schema(checks)
+
+        def check(obj, path, ctx):
+            items = obj.get(field)
+            if not isinstance(items, list):
+                if not_list is not None:
+                    severity, template = not_list
+                    yield Issue(severity, template, path, field, items, obj)
+                return
+            for index, item in enumerate(items, 1):
+                item_path = path + ((label, index),)
+                if isinstance(item, dict):
+                    yield from validate(item, item_path, ctx)
+                else:
+                    # 位置情報はリスト側に記録されているため、objにはリスト、fieldには添字を渡す
+                    yield Issue(ERROR, "{where} はキーと値の形式（マッピング）ではありません", item_path, index - 1, item, items)
+
+    elif kind == 'section':
+        _, field, label, checks = spec
+        validate = compile_schema(checks)
+
+        def check(obj, path, ctx):
+            section = obj.get(field)
+            if isinstance(section, dict):
+                yield from validate(section, path + ((label, None),), ctx)
+
+    else:
+        raise ValueError(f"未知のチェック種別です: {kind}")
+
+    return check
+
+
+def compile_schema(checks):
+    """
+    チェック定義の並びを1つの検証関数にまとめる
+
+    戻り値の関数は (obj, path=(), ctx=None) を受け取り、Issueを順に返すジェネレータ
+    """
+    compiled = tuple(_compile_check(spec) for spec in checks)
+
+    def validate(obj, path=(), ctx=None):
+        if ctx is None:
+            ctx = {}
+        for check in compiled:
+            yield from check(obj, path, ctx)
+
+    return validate
+
+
+def collect_issues(issues, max_errors=None):
+    """
+    Issueのジェネレータからエラーと警告を集める
+
+    max_errorsを指定するとエラーがその件数に達した時点で検証を打ち切る
+    戻り値: (errors, warnings, truncated)
+    """
+    errors = []
+    warnings = []
+    for issue in issues:
+        if issue.severity == ERROR:
+            errors.append(issue)
+            if max_errors is not None and len(errors) >= max_errors:
+                return errors, warnings, True
+        else:
+            warnings.append(issue)
+    return errors, warnings, False
+
+
+def _one_of(values):
+    return ", ".join(values)
+
+
+def _one_of_quoted(values):
+    return ", ".join(f"'{v}'" for v in values)
+
+
+SPRINT_CHECKS = (
+    ('required', 'sprint_id', ERROR, "{where} にスプリントID (sprint_id) がありません"),
+    ('collect', 'sprint_id', 'sprints'),
+    ('pattern', 'sprint_id', r'^S\d+$', WARNING, "{where} の sprint_id '{value}' は推奨形式 'S数字' に準拠していません"),
+    ('required', 'name', ERROR, "{where} に名前 (name) がありません"),
+    ('required', 'start_date', ERROR, "{where} に{field}がありません"),
+    ('date', 'start_date', ERROR, "{where} の {field} '{value}' は有効な日付形式 (YYYY-MM-DD) ではありません"),
+    ('required', 'end_date', ERROR, "{where} に{field}がありません"),
+    ('date', 'end_date', ERROR, "{where} の {field} '{value}' は有効な日付形式 (YYYY-MM-DD) ではありません"),
+    ('required', 'goal', WARNING, "{where} にゴール (goal) がありません"),
+    ('enum', 'status', SPRINT_STATUSES, WARNING,
+     "{where} の status '{value}' は " + _one_of(SPRINT_STATUSES) + " のいずれかであるべきです"),
+    ('required', 'status', ERROR, "{where} にステータス (status) がありません"),
+)
+
+STORY_CHECKS = (
+    ('required', 'story_id', ERROR, "{where} にストーリーID (story_id) がありません"),
+    ('pattern', 'story_id', r'^(US|S)-\d+$', WARNING,
+     "{where} の story_id '{value}' は推奨形式 'US-XXX' または 'S-XXX' に準拠していません"),
+    ('required', 'title', ERROR, "{where} にタイトル (title) がありません"),
+    ('required', 'description', ERROR, "{where} に説明 (description) がありません"),
+    ('enum', 'priority', PRIORITIES, WARNING,
+     "{where} の priority '{value}' は " + _one_of_quoted(PRIORITIES) + " のいずれかであるべきです"),
+    ('required', 'priority', ERROR, "{where} に優先度 (priority) がありません"),
+    ('required', 'story_points', ERROR, "{where} にストーリーポイント (story_points) がありません"),
+    ('required', 'assignee', WARNING, "{where} に担当者 (assignee) が設定されていません"),
+    ('enum', 'status', STORY_STATUSES, WARNING,
+     "{where} の status '{value}' は " + _one_of(STORY_STATUSES) + " のいずれかであるべきです"),
+    ('required', 'status', ERROR, "{where} にステータス (status) がありません"),
+    ('ref', 'sprint', 'sprints', ERROR, "{where} の sprint '{value}' は定義されていないスプリントです"),
+    ('required', 'sprint', WARNING, "{where} にスプリント (sprint) が割り当てられていません"),
+)
+
+EPIC_CHECKS = (
+    ('required', 'epic_id', ERROR, "{where} にエピックID (epic_id) がありません"),
+    ('pattern', 'epic_id', r'^EP-\d+$', WARNING, "{where} の epic_id '{value}' は推奨形式 'EP-XXX' に準拠していません"),
+    ('required', 'title', ERROR, "{where} にタイトル (title) がありません"),
+    ('enum', 'priority', PRIORITIES, WARNING,
+     "{where} の priority '{value}' は " + _one_of_quoted(PRIORITIES) + " のいずれかであるべきです"),
+    ('required', 'priority', ERROR, "{where} に優先度 (priority) がありません"),
+    ('enum', 'status', EPIC_STATUSES, WARNING,
+     "{where} の status '{value}' は " + _one_of(EPIC_STATUSES) + " のいずれかであるべきです"),
+    ('required', 'status', ERROR, "{where} にステータス (status) がありません"),
+    ('each', 'stories', "story #{}", STORY_CHECKS, None),
+)
+
+PROJECT_CHECKS = tuple(
+    ('required', field, ERROR, "{where}セクションに必須フィールド '{field}' がありません")
+    for field in ("id", "name", "description")
+)
+
+BACKLOG_SCHEMA = (
+    ('required', 'project', ERROR, "必須セクション '{field}' がありません"),
+    ('required', 'epics', ERROR, "必須セクション '{field}' がありません"),
+    ('section', 'project', "project ", PROJECT_CHECKS),
+    ('each', 'sprints', "sprint #{}", SPRINT_CHECKS, None),
+    ('each', 'epics', "epic #{}", EPIC_CHECKS, None),
+)
+
+ROUTINE_TASK_CHECKS = (
+    ('required', 'task_id', ERROR, "{where} に必須フィールド '{field}' がありません"),
+    ('required', 'title', ERROR, "{where} に必須フィールド '{field}' がありません"),
+    ('pattern', 'task_id', r'^T-\d+$', WARNING, "{where} の task_id '{value}' は推奨形式 'T-数字' に準拠していません"),
+    ('int_range', 'estimate', 1, None, ERROR, "{where} の estimate '{value}' は正の整数である必要があります"),
+    ('required', 'estimate', WARNING, "{where} に見積もり時間 (estimate) が指定されていません"),
+    ('enum', 'priority', PRIORITIES, ERROR,
+     "{where} の priority '{value}' は " + _one_of_quoted(PRIORITIES) + " のいずれかである必要があります"),
+    ('required', 'priority', WARNING, "{where} に優先度 (priority) が指定されていません"),
+    ('rule', lambda task: not task.get('assignee'), WARNING, "{where} に担当者 (assignee) が指定されていません"),
+)
+
+ROUTINE_CHECKS = (
+    ('required', 'routine_id', ERROR, "{where} に必須フィールド '{field}' がありません"),
+    ('required', 'title', ERROR, "{where} に必須フィールド '{field}' がありません"),
+    ('required', 'frequency', ERROR, "{where} に必須フィールド '{field}' がありません"),
+    ('required', 'priority', ERROR, "{where} に必須フィールド '{field}' がありません"),
+    ('pattern', 'routine_id', r'^RT-\d+$', WARNING,
+     "{where} の routine_id '{value}' は推奨形式 'RT-数字' に準拠していません"),
+    ('if_present', 'frequency', (
+        ('enum', 'frequency', FREQUENCIES, ERROR,
+         "{where} の frequency '{value}' は " + _one_of_quoted(FREQUENCIES) + " のいずれかである必要があります"),
+        ('rule', lambda routine: routine['frequency'] == 'weekly' and 'day_of_week' not in routine, WARNING,
+         "{where} は weekly ですが、day_of_week が指定されていません"),
+        ('enum', 'day_of_week', WEEKDAYS, ERROR,
+         "{where} の day_of_week '{value}' は " + _one_of(WEEKDAYS) + " のいずれかである必要があります"),
+        ('rule', lambda routine: routine['frequency'] == 'monthly' and 'day_of_month' not in routine, WARNING,
+         "{where} は monthly ですが、day_of_month が指定されていません"),
+        ('int_range', 'day_of_month', 1, 31, ERROR, "{where} の day_of_month '{value}' は 1-31 の整数である必要があります"),
+    )),
+    ('enum', 'priority', PRIORITIES, ERROR,
+     "{where} の priority '{value}' は " + _one_of_quoted(PRIORITIES) + " のいずれかである必要があります"),
+    ('each', 'tasks', "task #{}", ROUTINE_TASK_CHECKS,
+     (WARNING, "{where} には tasks が定義されていないか、リスト形式ではありません")),
+)
+
+ALTERNATIVE_ROUTINE_KEYS = ("morning_routines", "evening_routines", "weekly_routines")
+
+ALTERNATIVE_ITEM_CHECKS = (
+    ('required', 'id', ERROR, "{where} に必須フィールド '{field}' がありません"),
+    ('required', 'title', ERROR, "{where} に必須フィールド '{field}' がありません"),
+    ('pattern', 'id', r'^RT-\d+$', WARNING, "{where} の id '{value}' は推奨形式 'RT-数字' に準拠していません"),
+    ('int_range', 'estimate', 1, None, ERROR, "{where} の estimate '{value}' は正の整数である必要があります"),
+    ('required', 'estimate', WARNING, "{where} に見積もり時間 (estimate) が指定されていません"),
+    ('int_range', 'priority', 0, None, ERROR, "{where} の priority '{value}' は 0以上の整数である必要があります"),
+    ('rule', lambda task: not task.get('assignee'), WARNING, "{where} に担当者 (assignee) が指定されていません"),
+)
+
+ALTERNATIVE_ROUTINE_CHECKS = (
+    ('required', 'name', ERROR, "{where} に名前 (name) がありません"),
+    ('each', 'items', "item #{}", ALTERNATIVE_ITEM_CHECKS,
+     (ERROR, "{where} には items が定義されていないか、リスト形式ではありません")),
+)
+
+ROUTINES_SCHEMA = (
+    ('rule', lambda data: "project" not in data and "program" not in data, ERROR,
+     "'project' または 'program' が定義されていません"),
+    ('each', 'routines', "routine #{}", ROUTINE_CHECKS, None),
+) + tuple(
+    ('section', key, key, ALTERNATIVE_ROUTINE_CHECKS) for key in ALTERNATIVE_ROUTINE_KEYS
+)
+
+validate_backlog_document = compile_schema(BACKLOG_SCHEMA)
+validate_routines_document = compile_schema(ROUTINES_SCHEMA)